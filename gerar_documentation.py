@@ -32,7 +32,7 @@ Uso (exemplos):
       --toc --toc-pagebreak --theme clean
 
 Variáveis de ambiente úteis:
-  OPENAI_API_KEY, DOC_MODEL, DOC_SUMMARY_MODEL, DOC_STREAM, DOC_NO_PDF, DOC_POST_POLISH, DOC_POLISH_MODEL,
+  OPENAI_API_KEY, OPENAI_BASE_URL, DOC_MODEL, DOC_SUMMARY_MODEL, DOC_STREAM, DOC_NO_PDF, DOC_POST_POLISH, DOC_POLISH_MODEL,
   DOC_POLISH_STYLE, DOC_FILES_PER_BATCH, DOC_FILE_EXCERPT_CHARS, DOC_BATCH_OUT_TOKENS, DOC_SEC_OUT_TOKENS,
   DOC_MAX_CHARS_FILE, DOC_MAX_PROJECT_CHARS,
   LOGO_PATH, DEPT_TEXT, PERSON_NAME,
@@ -86,14 +86,17 @@ if not OPENAI_API_KEY:
     raise RuntimeError("Defina OPENAI_API_KEY no ambiente ou no arquivo .env")
 
 # ===================== OpenAI cliente =====================
+# URL base alternativa (ex.: stub local utils/llm_stub_server.py); None = API oficial
+OPENAI_BASE_URL = (os.environ.get("OPENAI_BASE_URL") or os.environ.get("ATESTMED_OPENAI_BASE_URL") or "").strip() or None
+
 def _client_openai_v1():
     try:
         from openai import OpenAI
-        return OpenAI(api_key=OPENAI_API_KEY)
+        return OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
     except Exception:
         import openai  # compat
         if hasattr(openai, "OpenAI"):
-            return openai.OpenAI(api_key=OPENAI_API_KEY)
+            return openai.OpenAI(api_key=OPENAI_API_KEY, base_url=OPENAI_BASE_URL)
         raise
 
 # ===================== Tokenização aproximada =====================
@@ -78,57 +78,28 @@ try:
 except Exception:
     pass
 
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+# Modo adiado: associa os jobs enfileirados de cada comentário ao sidecar gravado
+from utils.comment_queue import bind as _bind_deferred_comment, capture as _capture_deferred
+
 def _load_openai_key_from_dotenv(env_path: str) -> Optional[str]:
-    """Carrega OPENAI_API_KEY do .env (python-dotenv se disponível; senão parse manual)."""
-    if not os.path.exists(env_path):
-        return os.getenv("OPENAI_API_KEY")
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-        if os.getenv("OPENAI_API_KEY"):
-            return os.getenv("OPENAI_API_KEY")
-    except Exception:
-        pass
-    try:
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                if k.strip() == "OPENAI_API_KEY":
-                    v = v.strip().strip('"').strip("'")
-                    if v:
-                        os.environ.setdefault("OPENAI_API_KEY", v)
-                        return v
-    except Exception:
-        pass
-    return os.getenv("OPENAI_API_KEY")
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key(env_path)
 
+# Cache persistente das respostas (utils/llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
+    def _llm_cached(fn):
+        return fn
+
+@_llm_cached
 def _call_openai_chat(messages: List[Dict[str, str]], model: str, temperature: float) -> Optional[str]:
-    """Compat com SDK novo (openai>=1.x) e legado."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(model=model, messages=messages, temperature=temperature)
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
-    except Exception:
-        pass
-    return None
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 def _sanitize_paragraph(text: str, max_words: int = 180) -> str:
     """Remove cercas/headers/tabelas e limita nº de palavras para 1 parágrafo."""
@@ -493,13 +464,14 @@ def export_org(path_png: Optional[str],
     print(f"✅ ORG salvo em: {out_path}")
     return out_path
 
-def _write_comment_org(org_main_path: str, comment_text: str) -> str:
+def _write_comment_org(org_main_path: str, comment_text: str, deferred_keys=()) -> str:
     stem = os.path.splitext(os.path.basename(org_main_path))[0]
     out = os.path.join(EXPORT_DIR, f"{stem}_comment.org")
     with open(out, "w", encoding="utf-8") as f:
         f.write("#+TITLE: Comentário — " + stem + "\n\n")
         f.write(_sanitize_paragraph(comment_text) + "\n")
     print(f"📝 Comentário salvo em: {out}")
+    _bind_deferred_comment(out, deferred_keys)
     return out
 
 def _append_comment_into_org(org_main_path: str, comment_text: str) -> None:
@@ -584,31 +556,32 @@ def run_group_from_csv(start: str, end: str,
 
     # Comentário
     if export_comment_flag or export_comment_org_flag:
-        comment = ""
-        # 1) tenta função utilitária se existir
-        for fn in _COMENT_FUNCS:
-            try:
-                ascii_buf = ""  # deixamos vazio; algumas impls aceitam
-                md_tbl = f"| Grupo | ≤{threshold}s | Total | % |\n" \
-                         f"|---|---:|---:|---:|\n" \
-                         f"| {left_label} | {left_leq} | {left_tot} | {left_pct:.1f}% |\n" \
-                         f"| {right_label} | {right_leq} | {right_tot} | {right_pct:.1f}% |\n"
-                comment = fn(md_tbl, ascii_buf, start, end, threshold, cut_n, call_api=call_api)
-                if comment:
-                    comment = _sanitize_paragraph(comment)
-                    break
-            except Exception:
-                pass
-        # 2) fallback por valores
-        if not comment:
-            comment = _comment_from_values_leq(start, end,
-                                               left_label, left_leq, left_tot, left_pct,
-                                               right_label, right_leq, right_tot, right_pct,
-                                               threshold, cut_n,
-                                               call_api=call_api, model=model, max_words=max_words, temperature=temperature)
+        with _capture_deferred() as comment_keys:
+            comment = ""
+            # 1) tenta função utilitária se existir
+            for fn in _COMENT_FUNCS:
+                try:
+                    ascii_buf = ""  # deixamos vazio; algumas impls aceitam
+                    md_tbl = f"| Grupo | ≤{threshold}s | Total | % |\n" \
+                             f"|---|---:|---:|---:|\n" \
+                             f"| {left_label} | {left_leq} | {left_tot} | {left_pct:.1f}% |\n" \
+                             f"| {right_label} | {right_leq} | {right_tot} | {right_pct:.1f}% |\n"
+                    comment = fn(md_tbl, ascii_buf, start, end, threshold, cut_n, call_api=call_api)
+                    if comment:
+                        comment = _sanitize_paragraph(comment)
+                        break
+                except Exception:
+                    pass
+            # 2) fallback por valores
+            if not comment:
+                comment = _comment_from_values_leq(start, end,
+                                                   left_label, left_leq, left_tot, left_pct,
+                                                   right_label, right_leq, right_tot, right_pct,
+                                                   threshold, cut_n,
+                                                   call_api=call_api, model=model, max_words=max_words, temperature=temperature)
         if comment:
             if export_comment_flag and org_path:
-                _write_comment_org(org_path, comment)
+                _write_comment_org(org_path, comment, comment_keys)
             if export_comment_org_flag and org_path:
                 _append_comment_into_org(org_path, comment)
 
@@ -655,14 +628,15 @@ def run_perito(start: str, end: str, perito: str,
 
     # Comentário
     if export_comment_flag or export_comment_org_flag:
-        comment = _comment_from_values_leq(start, end,
-                                           left_label, left_leq, left_tot, left_pct,
-                                           right_label, right_leq, right_tot, right_pct,
-                                           threshold, cut_n,
-                                           call_api=call_api, model=model, max_words=max_words, temperature=temperature)
+        with _capture_deferred() as comment_keys:
+            comment = _comment_from_values_leq(start, end,
+                                               left_label, left_leq, left_tot, left_pct,
+                                               right_label, right_leq, right_tot, right_pct,
+                                               threshold, cut_n,
+                                               call_api=call_api, model=model, max_words=max_words, temperature=temperature)
         if comment and org_path:
             if export_comment_flag:
-                _write_comment_org(org_path, comment)
+                _write_comment_org(org_path, comment, comment_keys)
             if export_comment_org_flag:
                 _append_comment_into_org(org_path, comment)
 
@@ -709,14 +683,15 @@ def run_top10(start: str, end: str, min_analises: int,
                               threshold, cut_n, f"compare_{threshold}s_top10.org")
 
     if export_comment_flag or export_comment_org_flag:
-        comment = _comment_from_values_leq(start, end,
-                                           left_label, left_leq, left_tot, left_pct,
-                                           right_label, right_leq, right_tot, right_pct,
-                                           threshold, cut_n,
-                                           call_api=call_api, model=model, max_words=max_words, temperature=temperature)
+        with _capture_deferred() as comment_keys:
+            comment = _comment_from_values_leq(start, end,
+                                               left_label, left_leq, left_tot, left_pct,
+                                               right_label, right_leq, right_tot, right_pct,
+                                               threshold, cut_n,
+                                               call_api=call_api, model=model, max_words=max_words, temperature=temperature)
         if comment and org_path:
             if export_comment_flag:
-                _write_comment_org(org_path, comment)
+                _write_comment_org(org_path, comment, comment_keys)
             if export_comment_org_flag:
                 _append_comment_into_org(org_path, comment)
 
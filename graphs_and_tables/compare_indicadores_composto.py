@@ -74,62 +74,26 @@ os.makedirs(EXPORT_DIR, exist_ok=True)
 # ────────────────────────────────────────────────────────────────────────────────
 # OpenAI helper (SDK 1.x e legado) + .env
 # ────────────────────────────────────────────────────────────────────────────────
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+# Modo adiado: associa os jobs enfileirados de cada comentário ao sidecar gravado
+from utils.comment_queue import bind as _bind_deferred_comment, capture as _capture_deferred
+
 def _load_openai_key_from_dotenv() -> Optional[str]:
-    """Carrega OPENAI_API_KEY do .env na raiz do projeto (se existir)."""
-    env_path = os.path.join(BASE_DIR, ".env")
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-    except Exception:
-        if os.path.exists(env_path) and not os.getenv("OPENAI_API_KEY"):
-            try:
-                with open(env_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line or line.startswith("#") or "=" not in line:
-                            continue
-                        k, v = line.split("=", 1)
-                        if k.strip() == "OPENAI_API_KEY":
-                            os.environ.setdefault("OPENAI_API_KEY", v.strip().strip('"').strip("'"))
-                            break
-            except Exception:
-                pass
-    return os.getenv("OPENAI_API_KEY")
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key()
 
+# Cache persistente das respostas (utils/llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
+    def _llm_cached(fn):
+        return fn
+
+@_llm_cached
 def _call_openai(messages: List[Dict[str, str]], model: str = "gpt-4o-mini", temperature: float = 0.2) -> Optional[str]:
-    """Tenta SDK novo e legado; retorna texto limpo ou None."""
-    api_key = _load_openai_key_from_dotenv()
-    if not api_key:
-        return None
-    # SDK novo
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
-    # SDK legado
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
-    except Exception:
-        pass
-    return None
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 def _strip_markers(text: str) -> str:
     """Remove cercas de código, blocos [..], tabelas md/org e diretivas org."""
@@ -911,7 +875,8 @@ def main():
                 "cut_hits": cut_hits,
             }
             call_api = bool(args.call_api or _load_openai_key_from_dotenv())
-            comment_text = _gerar_comentario_composto(payload, call_api=call_api)
+            with _capture_deferred() as comment_keys:
+                comment_text = _gerar_comentario_composto(payload, call_api=call_api)
 
             if args.export_comment:
                 cpath = org_path.replace(".org", "_comment.md")
@@ -924,6 +889,8 @@ def main():
                     f.write(comment_text.strip() + "\n")
                 print(f"✅ Comentário incorporado ao ORG: {org_path}")
 
+            _bind_deferred_comment(org_path, comment_keys)
+
     if args.chart:
         if p is None:
             print("plotext não instalado; pulei o gráfico ASCII.")
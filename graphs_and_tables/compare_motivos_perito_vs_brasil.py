@@ -113,57 +113,26 @@ except Exception:
 # ────────────────────────────────────────────────────────────────────────────────
 # Helpers OpenAI (API direta, sem parse de tabela)
 # ────────────────────────────────────────────────────────────────────────────────
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+# Modo adiado: associa os jobs enfileirados de cada comentário ao sidecar gravado
+from utils.comment_queue import bind as _bind_deferred_comment, capture as _capture_deferred
+
 def _load_openai_key_from_dotenv(env_path: str) -> Optional[str]:
-    if not os.path.exists(env_path):
-        return os.getenv("OPENAI_API_KEY")
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-        if os.getenv("OPENAI_API_KEY"):
-            return os.getenv("OPENAI_API_KEY")
-    except Exception:
-        pass
-    try:
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                if k.strip() == "OPENAI_API_KEY":
-                    v = v.strip().strip('"').strip("'")
-                    if v:
-                        os.environ.setdefault("OPENAI_API_KEY", v)
-                        return v
-    except Exception:
-        pass
-    return os.getenv("OPENAI_API_KEY")
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key(env_path)
 
+# Cache persistente das respostas (utils/llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
+    def _llm_cached(fn):
+        return fn
+
+@_llm_cached
 def _call_openai_chat(messages: List[Dict[str, str]], model: str, temperature: float) -> Optional[str]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    # SDK novo
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
-    # SDK legado
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(model=model, messages=messages, temperature=temperature)
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
-    except Exception:
-        pass
-    return None
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 def _sanitize_paragraph(text: str, max_words: int = 180) -> str:
     if not text:
@@ -977,7 +946,8 @@ def exportar_comment(df: pd.DataFrame, meta: Dict[str, Any], cuts: Optional[Dict
     fname = "motivos_top10_vs_brasil_comment.md" if meta['mode']=='top10' else f"motivos_perito_vs_brasil_{safe}_comment.md"
     path = os.path.join(EXPORT_DIR, fname)
 
-    comment_text = gerar_comentario(df, meta, cuts, call_api=call_api)
+    with _capture_deferred() as comment_keys:
+        comment_text = gerar_comentario(df, meta, cuts, call_api=call_api)
 
     header_tbl = [
         "| Motivo (descrição) | % " + meta['label_lhs'] + " | % " + meta['label_rhs'] + " | n " + meta['label_lhs'] + " | n " + meta['label_rhs'] + " |",
@@ -1000,6 +970,7 @@ def exportar_comment(df: pd.DataFrame, meta: Dict[str, Any], cuts: Optional[Dict
     with open(path, "w", encoding="utf-8") as f:
         f.write("\n".join(md_out))
     print(f"✅ Comentário salvo em: {path}")
+    _bind_deferred_comment(path, comment_keys)
     return path
 
 # ============================
@@ -71,69 +71,26 @@ except Exception:
 # OpenAI helpers (.env + clientes novo/legado)
 # ──────────────────────────────────────────────────────────────────────
 
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+# Modo adiado: associa os jobs enfileirados de cada comentário ao sidecar gravado
+from utils.comment_queue import bind as _bind_deferred_comment, capture as _capture_deferred
+
 def _load_openai_key_from_dotenv(env_path: str) -> Optional[str]:
-    """Carrega OPENAI_API_KEY do .env se existir (python-dotenv ou parse manual)."""
-    if not os.path.exists(env_path):
-        return os.getenv("OPENAI_API_KEY")
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-        if os.getenv("OPENAI_API_KEY"):
-            return os.getenv("OPENAI_API_KEY")
-    except Exception:
-        pass
-    try:
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                if k.strip() == "OPENAI_API_KEY":
-                    v = v.strip().strip('"').strip("'")
-                    if v:
-                        os.environ.setdefault("OPENAI_API_KEY", v)
-                        return v
-    except Exception:
-        pass
-    return os.getenv("OPENAI_API_KEY")
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key(env_path)
 
+# Cache persistente das respostas (utils/llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
+    def _llm_cached(fn):
+        return fn
 
+@_llm_cached
 def _call_openai_chat(messages: List[Dict[str, str]], model: str = "gpt-4o-mini", temperature: float = 0.2) -> Optional[str]:
-    """Compat com SDK novo e legado. Retorna texto ou None."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    # Novo
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
-    # Legado
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
-    except Exception:
-        pass
-    return None
-
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 def gerar_comentario_gpt(df: pd.DataFrame,
                          meta: Dict[str, Any],
@@ -925,7 +882,7 @@ def _stem_from_meta(meta: Dict[str, Any]) -> str:
     safe = _safe_name(meta['safe_stub'])
     return "motivos_top10_vs_brasil" if meta['mode'] == 'top10' else f"motivos_perito_vs_brasil_{safe}"
 
-def _export_comment_sidecar_org(meta: Dict[str, Any], text: Optional[str]) -> Optional[str]:
+def _export_comment_sidecar_org(meta: Dict[str, Any], text: Optional[str], deferred_keys=()) -> Optional[str]:
     """Grava graphs_and_tables/exports/<stem>_comment.org com o parágrafo interpretativo."""
     if not text:
         return None
@@ -934,6 +891,7 @@ def _export_comment_sidecar_org(meta: Dict[str, Any], text: Optional[str]) -> Op
     with open(path, "w", encoding="utf-8") as f:
         f.write(text.strip() + "\n")
     print(f"📝 Comentário(ORG) salvo em: {path}")
+    _bind_deferred_comment(path, deferred_keys)
     return path
 
 def _plotext_multi_bar(x_labels, series_list, labels):
@@ -1027,24 +985,25 @@ def exportar_comment(df: pd.DataFrame, meta: Dict[str, Any], cuts: Optional[Dict
         print(f"⚠️ Comentário salvo (sem dados) em: {path}")
         return path
 
-    # 1) API direta (VALORES)
-    texto = None
-    try:
-        _load_openai_key_from_dotenv(os.path.join(BASE_DIR, ".env"))
-        texto = gerar_comentario_gpt(df, meta, cuts, model=model, max_words=max_words, temperature=temperature)
-    except Exception:
+    with _capture_deferred() as comment_keys:
+        # 1) API direta (VALORES)
         texto = None
-
-    # 2) utils.comentarios (fallback)
-    if (not texto) and (_COMENT_FUNC is not None):
-        payload = _build_payload_motivos_for_gpt(df, meta, cuts)
         try:
-            bruto = _COMENT_FUNC(payload, call_api=True)  # string
-            texto = bruto if isinstance(bruto, str) else str(bruto)
-        except Exception as e:
-            print(f"⚠️ Falha ao gerar comentário via utils.comentarios: {e}")
+            _load_openai_key_from_dotenv(os.path.join(BASE_DIR, ".env"))
+            texto = gerar_comentario_gpt(df, meta, cuts, model=model, max_words=max_words, temperature=temperature)
+        except Exception:
             texto = None
 
+        # 2) utils.comentarios (fallback)
+        if (not texto) and (_COMENT_FUNC is not None):
+            payload = _build_payload_motivos_for_gpt(df, meta, cuts)
+            try:
+                bruto = _COMENT_FUNC(payload, call_api=True)  # string
+                texto = bruto if isinstance(bruto, str) else str(bruto)
+            except Exception as e:
+                print(f"⚠️ Falha ao gerar comentário via utils.comentarios: {e}")
+                texto = None
+
     # 3) heurístico local
     if not texto:
         diffs = [(float(r['pct_perito']) - float(r['pct_brasil']), r) for _, r in df.iterrows()]
@@ -1066,6 +1025,7 @@ def exportar_comment(df: pd.DataFrame, meta: Dict[str, Any], cuts: Optional[Dict
     with open(path, "w", encoding="utf-8") as f:
         f.write(texto.strip() + "\n")
     print(f"✅ Comentário salvo em: {path}")
+    _bind_deferred_comment(path, comment_keys)
     return path
 
 
@@ -1246,10 +1206,12 @@ def main() -> None:
 
     # Comentário a ser inserido no .org (valores → utils → heurístico)
     comment_for_org = None
+    comment_keys: List[str] = []
     if args.export_comment_org or args.add_comments:
-        comment_for_org = _gerar_texto_comentario_para_org(
-            df, meta, cuts_info, model=args.model, max_words=args.max_words, temperature=args.temperature
-        )
+        with _capture_deferred() as comment_keys:
+            comment_for_org = _gerar_texto_comentario_para_org(
+                df, meta, cuts_info, model=args.model, max_words=args.max_words, temperature=args.temperature
+            )
 
     if args.export_md:
         exportar_md(df, meta, cuts_info)
@@ -1260,7 +1222,7 @@ def main() -> None:
     if args.export_org or args.export_comment_org or args.add_comments:
         exportar_org(df, meta, cuts_info, png_path, comment_text=comment_for_org)
         # sidecar .org para o coletor
-        _export_comment_sidecar_org(meta, comment_for_org)
+        _export_comment_sidecar_org(meta, comment_for_org, comment_keys)
 
     if args.chart:
         exibir_chart_ascii(df, meta, label_maxlen=args.label_maxlen)
@@ -46,69 +46,26 @@ os.makedirs(EXPORT_DIR, exist_ok=True)
 # ────────────────────────────────────────────────────────────────────────────────
 # Helpers OpenAI (.env + chamada)
 # ────────────────────────────────────────────────────────────────────────────────
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+# Modo adiado: associa os jobs enfileirados de cada comentário ao sidecar gravado
+from utils.comment_queue import bind as _bind_deferred_comment, capture as _capture_deferred
+
 def _load_openai_key_from_dotenv(env_path: str) -> Optional[str]:
-    """Carrega OPENAI_API_KEY do .env (python-dotenv se disponível; senão parse manual)."""
-    if not os.path.exists(env_path):
-        return os.getenv("OPENAI_API_KEY")
-    # tenta dotenv
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-        if os.getenv("OPENAI_API_KEY"):
-            return os.getenv("OPENAI_API_KEY")
-    except Exception:
-        pass
-    # parse manual simples
-    try:
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                if k.strip() == "OPENAI_API_KEY":
-                    v = v.strip().strip('"').strip("'")
-                    if v:
-                        os.environ.setdefault("OPENAI_API_KEY", v)
-                        return v
-    except Exception:
-        pass
-    return os.getenv("OPENAI_API_KEY")
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key(env_path)
+
+# Cache persistente das respostas (utils/llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
+    def _llm_cached(fn):
+        return fn
 
+@_llm_cached
 def _call_openai_chat(messages: List[Dict[str, str]], model: str, temperature: float) -> Optional[str]:
-    """Compatível com SDK novo (openai>=1.x) e legado. Retorna texto ou None."""
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    # SDK novo
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
-    # SDK legado
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
-    except Exception:
-        pass
-    return None
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 def _sanitize_org_text(text: str, max_words: int = 180) -> str:
     """Remove cercas de código, cabeçalhos [..], tabelas e diretivas org; compacta para um parágrafo; limita palavras."""
@@ -607,20 +564,22 @@ def _render_ascii(title: str, left_label: str, right_label: str, left_pct: float
     p.plotsize(80, 18)
     p.show()
 
-def _write_comment_md(stem: str, text: str) -> str:
+def _write_comment_md(stem: str, text: str, deferred_keys=()) -> str:
     """Salva o comentário em Markdown simples."""
     path = os.path.join(EXPORT_DIR, f"{stem}_comment.md")
     with open(path, "w", encoding="utf-8") as f:
         f.write(text.strip() + "\n")
     print("🗒️ Comentário salvo em", path)
+    _bind_deferred_comment(path, deferred_keys)
     return path
 
-def _write_comment_org(stem: str, text: str) -> str:
+def _write_comment_org(stem: str, text: str, deferred_keys=()) -> str:
     """Salva o comentário em Org-mode como sidecar: <stem>_comment.org."""
     path = os.path.join(EXPORT_DIR, f"{stem}_comment.org")
     with open(path, "w", encoding="utf-8") as f:
         f.write(text.strip() + "\n")
     print("📝 Comentário(ORG) salvo em", path)
+    _bind_deferred_comment(path, deferred_keys)
     return path
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -691,6 +650,7 @@ def run_perito(start: str, end: str, perito: str, mode: str,
 
     # Comentário (um único texto para .org e/ou .md)
     comment_text: Optional[str] = None
+    comment_keys: List[str] = []
     if want_comment or save_comment_md:
         ascii_chart = ""
         if p is not None:
@@ -703,15 +663,16 @@ def run_perito(start: str, end: str, perito: str, mode: str,
             except Exception:
                 ascii_chart = ""
         _load_openai_key_from_dotenv(os.path.join(BASE_DIR, ".env"))
-        comment_text = _comment_from_values_overlap(
-            start, end, mode,
-            left_label, right_label,
-            left_pct, right_pct,
-            left_num, left_den, right_num, right_den,
-            ascii_chart,
-            call_api=call_api and bool(os.getenv("OPENAI_API_KEY")),
-            model=model, max_words=max_words, temperature=temperature
-        )
+        with _capture_deferred() as comment_keys:
+            comment_text = _comment_from_values_overlap(
+                start, end, mode,
+                left_label, right_label,
+                left_pct, right_pct,
+                left_num, left_den, right_num, right_den,
+                ascii_chart,
+                call_api=call_api and bool(os.getenv("OPENAI_API_KEY")),
+                model=model, max_words=max_words, temperature=temperature
+            )
 
     # .org
     if export_org or want_comment:
@@ -721,9 +682,9 @@ def run_perito(start: str, end: str, perito: str, mode: str,
 
     # sidecars de comentário (ORG sempre; MD se explicitado)
     if comment_text:
-        _write_comment_org(stem, comment_text)
+        _write_comment_org(stem, comment_text, comment_keys)
         if save_comment_md:
-            _write_comment_md(stem, comment_text)
+            _write_comment_md(stem, comment_text, comment_keys)
 
     # Log
     print(f"\n📊 {left_label}: {left_pct:.1f}%  |  {right_label}: {right_pct:.1f}%")
@@ -793,6 +754,7 @@ def run_top10(start: str, end: str, min_analises: int, mode: str,
         _render_ascii(title, left_label, right_label, left_pct, right_pct, mode)
 
     comment_text: Optional[str] = None
+    comment_keys: List[str] = []
     if want_comment or save_comment_md:
         ascii_chart = ""
         if p is not None:
@@ -805,15 +767,16 @@ def run_top10(start: str, end: str, min_analises: int, mode: str,
             except Exception:
                 ascii_chart = ""
         _load_openai_key_from_dotenv(os.path.join(BASE_DIR, ".env"))
-        comment_text = _comment_from_values_overlap(
-            start, end, mode,
-            left_label, right_label,
-            left_pct, right_pct,
-            left_num, left_den, right_num, right_den,
-            ascii_chart,
-            call_api=call_api and bool(os.getenv("OPENAI_API_KEY")),
-            model=model, max_words=max_words, temperature=temperature
-        )
+        with _capture_deferred() as comment_keys:
+            comment_text = _comment_from_values_overlap(
+                start, end, mode,
+                left_label, right_label,
+                left_pct, right_pct,
+                left_num, left_den, right_num, right_den,
+                ascii_chart,
+                call_api=call_api and bool(os.getenv("OPENAI_API_KEY")),
+                model=model, max_words=max_words, temperature=temperature
+            )
 
     if export_org or want_comment:
         _export_org(title, start, end, left_label, right_label,
@@ -821,9 +784,9 @@ def run_top10(start: str, end: str, min_analises: int, mode: str,
                     mode, png, org, top_names=sorted(left_set), comment_text=comment_text)
 
     if comment_text:
-        _write_comment_org(stem, comment_text)
+        _write_comment_org(stem, comment_text, comment_keys)
         if save_comment_md:
-            _write_comment_md(stem, comment_text)
+            _write_comment_md(stem, comment_text, comment_keys)
 
     print(f"\n📊 {left_label}: {left_pct:.1f}%  |  {right_label}: {right_pct:.1f}%")
     if mode == "time-share":
@@ -430,7 +430,7 @@ def _render_ascii(title: str, y_label: str, left_label: str, right_label: str, l
     p.plotsize(80, 18)
     p.show()
 
-def _export_comment_sidecar(stem: str, comment_text: Optional[str]) -> Optional[str]:
+def _export_comment_sidecar(stem: str, comment_text: Optional[str], deferred_keys=()) -> Optional[str]:
     """Grava graphs_and_tables/exports/<stem>_comment.org com o parágrafo interpretativo."""
     if not comment_text:
         return None
@@ -438,6 +438,7 @@ def _export_comment_sidecar(stem: str, comment_text: Optional[str]) -> Optional[
     with open(path, "w", encoding="utf-8") as f:
         f.write(comment_text.strip() + "\n")
     print(f"📝 Comment(org) salvo em {path}")
+    _bind_deferred_comment(path, deferred_keys)
     return path
 
 def _build_parsed_from_values(mode: str,
@@ -471,57 +472,26 @@ except Exception:
     pass
 
 # .env + OpenAI
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+# Modo adiado: associa os jobs enfileirados de cada comentário ao sidecar gravado
+from utils.comment_queue import bind as _bind_deferred_comment, capture as _capture_deferred
+
 def _load_openai_key_from_dotenv(env_path: str) -> Optional[str]:
-    if not os.path.exists(env_path):
-        return os.getenv("OPENAI_API_KEY")
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-        if os.getenv("OPENAI_API_KEY"):
-            return os.getenv("OPENAI_API_KEY")
-    except Exception:
-        pass
-    try:
-        with open(env_path, "r", encoding="utf-8") as f:
-            for line in f:
-                line = line.strip()
-                if not line or line.startswith("#") or "=" not in line:
-                    continue
-                k, v = line.split("=", 1)
-                if k.strip() == "OPENAI_API_KEY":
-                    v = v.strip().strip('"').strip("'")
-                    if v:
-                        os.environ.setdefault("OPENAI_API_KEY", v)
-                        return v
-    except Exception:
-        pass
-    return os.getenv("OPENAI_API_KEY")
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key(env_path)
+
+# Cache persistente das respostas (utils/llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
+    def _llm_cached(fn):
+        return fn
 
+@_llm_cached
 def _call_openai_chat(messages: List[Dict[str, str]], model: str, temperature: float) -> Optional[str]:
-    api_key = os.getenv("OPENAI_API_KEY")
-    if not api_key:
-        return None
-    # SDK novo
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(model=model, messages=messages, temperature=temperature)
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
-    # SDK legado
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(model=model, messages=messages, temperature=temperature)
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
-    except Exception:
-        pass
-    return None
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 # Sanitização
 def _sanitize_org_text(text: str, max_words: int) -> str:
@@ -836,17 +806,18 @@ def run_top10(start: str, end: str, min_analises: int, threshold: float, mode: s
         comment_text = None
         if want_comment:
             _load_openai_key_from_dotenv(os.path.join(BASE_DIR, ".env"))
-            comment_text = _comment_from_values(
-                start, end, threshold, mode,
-                a_name, b_name,
-                left_label="Top 10 piores", right_label="Brasil (excl.)",
-                left_num=left_num, left_den=left_den, left_pct=left_pct,
-                right_num=right_num, right_den=right_den, right_pct=right_pct,
-                ascii_chart=ascii_chart,
-                call_api=call_api and bool(os.getenv("OPENAI_API_KEY")),
-                debug=debug_comments, model=model, max_words=max_words, temperature=temperature
-            )
-            _export_comment_sidecar(stem, comment_text)
+            with _capture_deferred() as comment_keys:
+                comment_text = _comment_from_values(
+                    start, end, threshold, mode,
+                    a_name, b_name,
+                    left_label="Top 10 piores", right_label="Brasil (excl.)",
+                    left_num=left_num, left_den=left_den, left_pct=left_pct,
+                    right_num=right_num, right_den=right_den, right_pct=right_pct,
+                    ascii_chart=ascii_chart,
+                    call_api=call_api and bool(os.getenv("OPENAI_API_KEY")),
+                    debug=debug_comments, model=model, max_words=max_words, temperature=temperature
+                )
+            _export_comment_sidecar(stem, comment_text, comment_keys)
 
         _export_org(title, start, end, "Top 10 piores", "Brasil (excl.)",
                     left_num, left_den, left_pct, right_num, right_den, right_pct,
@@ -19,6 +19,14 @@ Saídas (em --out-dir):
   - rcheck_weekday_to_weekend_by_cr.png        [opcional]
   - rcheck_weekday_to_weekend_protocols.org    [opcional, com --export-protocols]
 
+Modos (--mode):
+  - pandas (padrão): lê o período inteiro e filtra/agrupa em Python;
+  - sql: o predicado (início seg–sex, término sáb/dom) e as contagens por perito
+    e por CR rodam no SQLite — o dia da semana sai de strftime('%w') sobre o
+    datetime calculado uma vez por linha — e só os protocolos que casam voltam.
+    O resultado fica em cache por período e versão do DB (--cache-dir), então
+    todo run de KPI no mesmo mês o reaproveita sem consultar o banco.
+
 Exemplo:
   python g_weekday_to_weekend_table.py \
     --db db/atestmed.db \
@@ -28,6 +36,8 @@ Exemplo:
 
 import os
 import sys
+import json
+import hashlib
 import argparse
 import sqlite3
 import shutil
@@ -231,6 +241,12 @@ def build_parser():
     p.add_argument("--latex-engine", default="xelatex",
                    choices=["xelatex","lualatex","pdflatex"], help="LaTeX engine [default: xelatex]")
     p.add_argument("--emacs-timeout", type=int, default=120, help="Timeout (s) para exportação no Emacs [default: 120]")
+    p.add_argument("--mode", choices=["pandas", "sql"], default="pandas",
+                   help="pandas: filtra em Python; sql: filtro e contagens no SQLite, com cache por período "
+                        "[default: pandas]")
+    p.add_argument("--cache-dir", default=None,
+                   help="(modo sql) pasta do cache por período [default: reports/outputs/_cache/weekday_to_weekend]")
+    p.add_argument("--no-cache", action="store_true", help="(modo sql) ignora e não grava o cache")
     p.add_argument("--verbose", action="store_true", help="Logs de progresso")
     return p
 
@@ -340,6 +356,326 @@ def write_protocols_org(out_path: str, df_sel: pd.DataFrame, start: str, end: st
         f.write("\n".join(lines))
 
 
+# ───────────────────────── Colunas ─────────────────────────
+
+def detect_columns(con) -> dict:
+    """Tabela de análises e nomes reais das colunas usadas (analises/peritos)."""
+    a_tbl = detect_analises_table(con)
+    if not table_exists(con, "peritos"):
+        raise RuntimeError("Tabela 'peritos' não encontrada.")
+
+    a_cols = [r[1] for r in con.execute(f"PRAGMA table_info({a_tbl})").fetchall()]
+    p_cols = [r[1] for r in con.execute("PRAGMA table_info(peritos)").fetchall()]
+    dur_num_col, dur_txt_col = pick_duration_columns(a_cols)
+    return {
+        "a_tbl":   a_tbl,
+        "ini":     pick_col(a_cols, ["dataHoraIniPericia","data_inicio","iniPericia"]) or "dataHoraIniPericia",
+        "fim":     pick_col(a_cols, ["dataHoraFimPericia","data_fim","fimPericia"]),
+        "dur_num": dur_num_col,
+        "dur_txt": dur_txt_col,
+        "proto":   pick_protocol_column(a_cols),
+        "nome":    pick_col(p_cols, ["nomePerito","nome_perito","nome"]) or "nomePerito",
+        "matr":    pick_col(p_cols, ["siapePerito","matricula","matric","siape"]) or "siapePerito",
+        "cr":      pick_col(p_cols, ["CR","cr","codCR","codigoCR","cr_codigo"]),
+        "dr":      pick_col(p_cols, ["DR","dr","codDR","codigoDR","dr_codigo"]),
+    }
+
+def _period_where(cols: dict, args):
+    """WHERE do período (+ filtro opcional de perito) e parâmetros."""
+    where = f"substr(a.{cols['ini']},1,10) BETWEEN ? AND ?"
+    params = [args.start, args.end]
+    if args.perito:
+        where += " AND LOWER(p.{}) LIKE ?".format(cols["nome"])
+        params.append(f"%{args.perito.lower()}%")
+    return where, params
+
+
+def _dur_num_sql(d: str) -> str:
+    """
+    Duração numérica (s) como REAL, ou NULL quando o valor não é número — como
+    pd.to_numeric(errors="coerce"). Um CAST direto transformaria '' ou 'abc' em
+    0.0 e impediria a queda para a duração textual; texto só conta se for
+    [+-]dígitos[.dígitos] (no máximo um ponto).
+    """
+    t = f"trim({d})"
+    numeric_txt = (f"{t} <> '' AND {t} GLOB '*[0-9]*' "
+                   f"AND (CASE WHEN substr({t}, 1, 1) IN ('+', '-') THEN substr({t}, 2) ELSE {t} END) "
+                   f"NOT GLOB '*[^0-9.]*' "
+                   f"AND length({t}) - length(replace({t}, '.', '')) <= 1")
+    return (f"(CASE WHEN typeof({d}) IN ('integer', 'real') THEN CAST({d} AS REAL) "
+            f"WHEN typeof({d}) = 'text' AND {numeric_txt} THEN CAST({t} AS REAL) END)")
+
+
+# ───────────────────────── Modo pandas ─────────────────────────
+
+def select_pandas(con, cols: dict, args) -> dict:
+    """Lê o período inteiro, deriva ini_dt/fim_dt e filtra em Python."""
+    sel = [
+        f"p.{cols['nome']} AS nomePerito",
+        f"p.{cols['matr']} AS matricula",
+        f"a.{cols['ini']} AS ini",
+    ]
+    if cols["cr"]:   sel.append(f"p.{cols['cr']} AS CR")
+    else:            sel.append("NULL AS CR")
+    if cols["dr"]:   sel.append(f"p.{cols['dr']} AS DR")
+    else:            sel.append("NULL AS DR")
+
+    if cols["fim"]:       sel.append(f"a.{cols['fim']} AS fim")
+    if cols["dur_num"]:   sel.append(f"{_dur_num_sql('a.' + cols['dur_num'])} AS dur_num")
+    if cols["dur_txt"]:   sel.append(f"a.{cols['dur_txt']} AS dur_txt")
+    if cols["proto"]:     sel.append(f"a.{cols['proto']} AS protocolo")
+
+    where, params = _period_where(cols, args)
+    sql = f"""
+        SELECT {", ".join(sel)}
+          FROM {cols['a_tbl']} a
+          JOIN peritos p ON a.siapePerito = p.siapePerito
+         WHERE {where}
+    """
+    log("Lendo dados do SQLite…", args.verbose)
+    df = pd.read_sql(sql, con, params=params)
+    has_protocol = "protocolo" in df.columns
+    if df.empty:
+        return summarize_selection(df, 0, has_protocol)
+
+    # Deriva fim_dt vetorizado e filtra válidos
+    n_periodo = len(df)
+    df = vectorized_finish_times(df, verbose=args.verbose)
+    log("Filtrando intervalos válidos (ini/fim) e calculando flags…", args.verbose)
+    df = df[(df["ini_dt"].notna()) & (df["fim_dt"].notna())].copy()
+
+    # Flags de negócio
+    ini_wd = df["ini_dt"].dt.weekday  # 0=seg … 6=dom
+    fim_wd = df["fim_dt"].dt.weekday
+    df["created_business"]   = ini_wd.isin([0,1,2,3,4])
+    df["completed_weekend"]  = fim_wd.isin([5,6])
+
+    return summarize_selection(df[df["created_business"] & df["completed_weekend"]].copy(), n_periodo, has_protocol)
+
+def summarize_selection(sel: pd.DataFrame, n_periodo: int, has_protocol: bool) -> dict:
+    """Tabela por perito, contagem por CR e protocolos a partir das linhas selecionadas."""
+    agg = pd.DataFrame(columns=["Perito","Matrícula","CR","DR","Quantidade"])
+    by_cr = pd.DataFrame(columns=["CR","Quantidade"])
+    if not sel.empty:
+        group_cols = [c for c in ["nomePerito","matricula","CR","DR"] if c in sel.columns]
+        agg = (
+            sel.groupby(group_cols, dropna=False)
+               .size()
+               .reset_index(name="Quantidade")
+               .sort_values(["Quantidade","nomePerito"], ascending=[False, True])
+        )
+        agg = agg.rename(columns={"nomePerito":"Perito","matricula":"Matrícula"})
+
+        # Preenche visual
+        for c in ["Perito","Matrícula","CR","DR"]:
+            if c in agg.columns:
+                agg[c] = agg[c].fillna("")
+
+        # ── Agregação por CR (ordem decrescente) ──
+        if "CR" in sel.columns:
+            cr_series = sel["CR"].fillna("").astype(str).str.strip()
+            cr_series = cr_series.replace("", "SEM_CR")
+            by_cr = (
+                cr_series.to_frame("CR")
+                .assign(_n=1)
+                .groupby("CR", dropna=False)["_n"].sum()
+                .sort_values(ascending=False)
+                .reset_index()
+                .rename(columns={"_n":"Quantidade"})
+            )
+
+    proto_cols = ["nomePerito", "protocolo"] if has_protocol else ["nomePerito"]
+    protocols = sel[proto_cols] if "nomePerito" in sel.columns else pd.DataFrame(columns=proto_cols)
+    return {"n_periodo": n_periodo, "agg": agg, "by_cr": by_cr, "protocols": protocols}
+
+
+# ───────────────────────── Modo SQL (+ cache por período) ─────────────────────────
+
+# muda quando a semântica do SQL mudar: invalida os caches gravados
+W2W_CACHE_VERSION = 2
+
+def _hms_seconds_sql(t: str) -> str:
+    """Segundos de um texto 'H:M:S' (as partes já validadas pelo chamador)."""
+    rest = f"substr({t}, instr({t}, ':') + 1)"
+    return (f"(CAST(substr({t}, 1, instr({t}, ':') - 1) AS INTEGER) * 3600"
+            f" + CAST(substr({rest}, 1, instr({rest}, ':') - 1) AS INTEGER) * 60"
+            f" + CAST(substr({rest}, instr({rest}, ':') + 1) AS REAL))")
+
+def _finish_ts_sql(cols: dict) -> str:
+    """
+    Término como datetime do SQLite, na mesma precedência do modo pandas:
+    coluna de fim → início + duração numérica (s) → início + duração 'HH:MM:SS'.
+    """
+    ini = f"a.{cols['ini']}"
+    parts = []
+    if cols["fim"]:
+        parts.append(f"datetime(a.{cols['fim']})")
+    if cols["dur_num"]:
+        d = _dur_num_sql(f"a.{cols['dur_num']}")
+        parts.append(f"CASE WHEN {d} IS NOT NULL "
+                     f"THEN datetime({ini}, printf('%.3f seconds', {d})) END")
+    if cols["dur_txt"]:
+        t = f"trim(a.{cols['dur_txt']})"
+        # como pd.to_timedelta: só H:M:S completo ('MM:SS' sozinho não é duração)
+        valid = (f"{t} GLOB '[0-9]*:[0-9]*:[0-9]*' AND {t} NOT GLOB '*[^0-9:.]*' "
+                 f"AND {t} NOT GLOB '*::*' AND {t} NOT GLOB '*:' "
+                 f"AND length({t}) - length(replace({t}, ':', '')) = 2")
+        parts.append(f"CASE WHEN {valid} "
+                     f"THEN datetime({ini}, printf('%.3f seconds', {_hms_seconds_sql(t)})) END")
+    if not parts:
+        return "NULL"
+    return parts[0] if len(parts) == 1 else f"COALESCE({', '.join(parts)})"
+
+def select_sql(con, cols: dict, args) -> dict:
+    """
+    Predicado e contagens no SQLite: o datetime de início/término é calculado uma vez
+    por linha e o dia da semana vem de strftime('%w') (0=dom … 6=sáb). Só as linhas
+    que casam vão para a tabela temporária; dela saem as contagens e os protocolos.
+    Retorna listas simples (serializáveis no cache).
+    """
+    where, params = _period_where(cols, args)
+    cr = f"p.{cols['cr']}" if cols["cr"] else "NULL"
+    dr = f"p.{cols['dr']}" if cols["dr"] else "NULL"
+    proto = f"a.{cols['proto']}" if cols["proto"] else "NULL"
+
+    log("Filtrando no SQLite (início seg–sex, término sáb/dom)…", args.verbose)
+    con.execute("DROP TABLE IF EXISTS temp.w2w_sel")
+    con.execute(f"""
+        CREATE TEMP TABLE w2w_sel AS
+        WITH base AS (
+            SELECT p.{cols['nome']} AS nomePerito,
+                   p.{cols['matr']} AS matricula,
+                   {cr} AS CR,
+                   {dr} AS DR,
+                   {proto} AS protocolo,
+                   datetime(a.{cols['ini']}) AS ini_ts,
+                   {_finish_ts_sql(cols)} AS fim_ts
+              FROM {cols['a_tbl']} a
+              JOIN peritos p ON a.siapePerito = p.siapePerito
+             WHERE {where}
+        ), wd AS (
+            SELECT nomePerito, matricula, CR, DR, protocolo,
+                   CAST(strftime('%w', ini_ts) AS INTEGER) AS ini_wd,
+                   CAST(strftime('%w', fim_ts) AS INTEGER) AS fim_wd
+              FROM base
+             WHERE ini_ts IS NOT NULL AND fim_ts IS NOT NULL
+        )
+        SELECT nomePerito, matricula, CR, DR, protocolo
+          FROM wd
+         WHERE ini_wd BETWEEN 1 AND 5
+           AND fim_wd IN (0, 6)
+    """, params)
+
+    n_periodo = con.execute(f"""
+        SELECT COUNT(*)
+          FROM {cols['a_tbl']} a
+          JOIN peritos p ON a.siapePerito = p.siapePerito
+         WHERE {where}
+    """, params).fetchone()[0]
+    agg = con.execute("""
+        SELECT nomePerito, matricula, CR, DR, COUNT(*) AS Quantidade
+          FROM w2w_sel
+         GROUP BY nomePerito, matricula, CR, DR
+         ORDER BY Quantidade DESC, nomePerito
+    """).fetchall()
+    by_cr = con.execute("""
+        SELECT COALESCE(NULLIF(trim(CR), ''), 'SEM_CR') AS CR, COUNT(*) AS Quantidade
+          FROM w2w_sel
+         GROUP BY 1
+         ORDER BY Quantidade DESC, CR
+    """).fetchall()
+    protocols = []
+    if cols["proto"]:
+        protocols = con.execute("""
+            SELECT nomePerito, protocolo
+              FROM w2w_sel
+             WHERE nomePerito IS NOT NULL AND protocolo IS NOT NULL
+             ORDER BY nomePerito, protocolo
+        """).fetchall()
+    con.execute("DROP TABLE IF EXISTS temp.w2w_sel")
+    return {
+        "n_periodo": int(n_periodo or 0),
+        "has_protocol": bool(cols["proto"]),
+        "agg": [list(r) for r in agg],
+        "by_cr": [list(r) for r in by_cr],
+        "protocols": [list(r) for r in protocols],
+    }
+
+def frames_from_rows(raw: dict) -> dict:
+    """Resultado do modo SQL (listas) → mesmos DataFrames do modo pandas."""
+    agg = pd.DataFrame(raw["agg"], columns=["Perito","Matrícula","CR","DR","Quantidade"])
+    for c in ["Perito","Matrícula","CR","DR"]:
+        agg[c] = agg[c].fillna("")
+    by_cr = pd.DataFrame(raw["by_cr"], columns=["CR","Quantidade"])
+    proto_cols = ["nomePerito", "protocolo"] if raw["has_protocol"] else ["nomePerito"]
+    protocols = pd.DataFrame(raw["protocols"] if raw["has_protocol"] else [], columns=proto_cols)
+    return {"n_periodo": raw["n_periodo"], "agg": agg, "by_cr": by_cr, "protocols": protocols}
+
+def default_cache_dir(db_path: str) -> str:
+    base_dir = os.path.abspath(os.path.join(os.path.dirname(db_path), ".."))
+    return os.path.join(base_dir, "reports", "outputs", "_cache", "weekday_to_weekend")
+
+def cache_path(cache_dir: str, args) -> str:
+    """
+    <período>_<ident>_<versão>.json: `ident` identifica a consulta (DB, período, perito)
+    e `versão` o estado do DB (tamanho+mtime) e do formato do cache. Só arquivos com o
+    mesmo `ident` e outra versão são substituídos (ver save_cache).
+    """
+    st = os.stat(args.db)
+    ident = "|".join([os.path.abspath(args.db), args.start, args.end, (args.perito or "").lower()])
+    version = "|".join([str(W2W_CACHE_VERSION), f"{st.st_size}:{st.st_mtime_ns}"])
+    id_digest = hashlib.sha256(ident.encode("utf-8")).hexdigest()[:12]
+    ver_digest = hashlib.sha256(version.encode("utf-8")).hexdigest()[:12]
+    return os.path.join(cache_dir, f"{args.start}_a_{args.end}_{id_digest}_{ver_digest}.json")
+
+def load_cache(path: str):
+    try:
+        with open(path, encoding="utf-8") as f:
+            raw = json.load(f)
+        return raw if raw.get("version") == W2W_CACHE_VERSION else None
+    except Exception:
+        return None
+
+def save_cache(path: str, raw: dict):
+    """
+    Grava atomicamente e remove as entradas da mesma consulta (DB, período, perito)
+    com versão antiga do DB; runs globais, por perito e de outros DBs não se apagam.
+    """
+    ensure_dir(os.path.dirname(path))
+    prefix = os.path.basename(path).rsplit("_", 1)[0] + "_"
+    for old in os.listdir(os.path.dirname(path)):
+        if old.startswith(prefix) and old.endswith(".json") and old != os.path.basename(path):
+            try: os.remove(os.path.join(os.path.dirname(path), old))
+            except Exception: pass
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({**raw, "version": W2W_CACHE_VERSION}, f, ensure_ascii=False, default=str)
+    os.replace(tmp, path)
+
+def load_selection_sql(args) -> dict:
+    """Modo SQL com cache por período (reaproveitado por todo run de KPI do mesmo mês)."""
+    path = None
+    if not args.no_cache:
+        path = cache_path(os.path.abspath(args.cache_dir) if args.cache_dir else default_cache_dir(args.db), args)
+        raw = load_cache(path)
+        if raw is not None:
+            print(f"[INFO] Weekday→weekend reaproveitado do cache: {path}")
+            return frames_from_rows(raw)
+
+    con = sqlite3.connect(args.db)
+    try:
+        raw = select_sql(con, detect_columns(con), args)
+    finally:
+        con.close()
+    if path:
+        try:
+            save_cache(path, raw)
+            log(f"Cache gravado: {path}", args.verbose)
+        except Exception as e:
+            print(f"[AVISO] Falha ao gravar cache weekday→weekend: {e}")
+    return frames_from_rows(raw)
+
+
 # ───────────────────────── Main ─────────────────────────
 
 def main():
@@ -357,64 +693,20 @@ def main():
     out_cr_png = os.path.join(export_dir, "rcheck_weekday_to_weekend_by_cr.png")
     out_protocols_org = os.path.join(export_dir, "rcheck_weekday_to_weekend_protocols.org")
 
-    con = sqlite3.connect(args.db)
-    try:
-        a_tbl = detect_analises_table(con)
-        if not table_exists(con, "peritos"):
-            raise RuntimeError("Tabela 'peritos' não encontrada.")
-
-        # Detectar colunas em analises/peritos
-        a_cols = [r[1] for r in con.execute(f"PRAGMA table_info({a_tbl})").fetchall()]
-        has_fim = "dataHoraFimPericia" in a_cols or pick_col(a_cols, ["dataHoraFimPericia","data_fim","fimPericia"]) is not None
-        dur_num_col, dur_txt_col = pick_duration_columns(a_cols)
-        proto_col = pick_protocol_column(a_cols)
-
-        p_cols = [r[1] for r in con.execute("PRAGMA table_info(peritos)").fetchall()]
-        nome_col  = pick_col(p_cols, ["nomePerito","nome_perito","nome"]) or "nomePerito"
-        matr_col  = pick_col(p_cols, ["siapePerito","matricula","matric","siape"]) or "siapePerito"
-        cr_col    = pick_col(p_cols, ["CR","cr","codCR","codigoCR","cr_codigo"])
-        dr_col    = pick_col(p_cols, ["DR","dr","codDR","codigoDR","dr_codigo"])
-
-        # Seleção (nome, matr, CR/DR) + ini/fim/duração/protocolo
-        fim_col = pick_col(a_cols, ["dataHoraFimPericia","data_fim","fimPericia"])
-        ini_col = pick_col(a_cols, ["dataHoraIniPericia","data_inicio","iniPericia"]) or "dataHoraIniPericia"
-
-        sel = [
-            f"p.{nome_col} AS nomePerito",
-            f"p.{matr_col} AS matricula",
-            f"a.{ini_col} AS ini",
-        ]
-        if cr_col:   sel.append(f"p.{cr_col} AS CR")
-        else:        sel.append("NULL AS CR")
-        if dr_col:   sel.append(f"p.{dr_col} AS DR")
-        else:        sel.append("NULL AS DR")
-
-        if fim_col:       sel.append(f"a.{fim_col} AS fim")
-        if dur_num_col:   sel.append(f"CAST(a.{dur_num_col} AS REAL) AS dur_num")
-        if dur_txt_col:   sel.append(f"a.{dur_txt_col} AS dur_txt")
-        if proto_col:     sel.append(f"a.{proto_col} AS protocolo")
-
-        sql = f"""
-            SELECT {", ".join(sel)}
-              FROM {a_tbl} a
-              JOIN peritos p ON a.siapePerito = p.siapePerito
-             WHERE substr(a.{ini_col},1,10) BETWEEN ? AND ?
-        """
-        params = [args.start, args.end]
-        if args.perito:
-            sql += " AND LOWER(p.{}) LIKE ?".format(nome_col)
-            params.append(f"%{args.perito.lower()}%")
-
-        log("Lendo dados do SQLite…", args.verbose)
-        df = pd.read_sql(sql, con, params=params)
-    finally:
-        con.close()
+    if args.mode == "sql":
+        res = load_selection_sql(args)
+    else:
+        con = sqlite3.connect(args.db)
+        try:
+            res = select_pandas(con, detect_columns(con), args)
+        finally:
+            con.close()
 
-    if df.empty:
+    if res["n_periodo"] == 0:
         print("Sem registros no período/critério.")
         # Mesmo assim, se pediu protocolos, escrevemos um org vazio/explicativo
         if args.export_protocols:
-            write_protocols_org(out_protocols_org, df, args.start, args.end)
+            write_protocols_org(out_protocols_org, res["protocols"], args.start, args.end)
             print(f"✅ Org(protocolos) salvo: {out_protocols_org}")
         if args.export_org:
             metodo_txt = (f"*Método.* Período {args.start} a {args.end}. "
@@ -427,29 +719,19 @@ def main():
             print(f"✅ Org salvo: {out_org}\n✅ Org(comment) salvo: {out_org_comment}")
         return
 
-    # Deriva fim_dt vetorizado e filtra válidos
-    df = vectorized_finish_times(df, verbose=args.verbose)
-    log("Filtrando intervalos válidos (ini/fim) e calculando flags…", args.verbose)
-    df = df[(df["ini_dt"].notna()) & (df["fim_dt"].notna())].copy()
-
-    # Flags de negócio
-    ini_wd = df["ini_dt"].dt.weekday  # 0=seg … 6=dom
-    fim_wd = df["fim_dt"].dt.weekday
-    df["created_business"]   = ini_wd.isin([0,1,2,3,4])
-    df["completed_weekend"]  = fim_wd.isin([5,6])
-
-    sel = df[df["created_business"] & df["completed_weekend"]].copy()
-
     # Se pediu protocolos, gera o .org de protocolos (mesmo se vazio)
     if args.export_protocols:
         try:
-            write_protocols_org(out_protocols_org, sel, args.start, args.end)
+            write_protocols_org(out_protocols_org, res["protocols"], args.start, args.end)
             print(f"✅ Org(protocolos) salvo: {out_protocols_org}")
         except Exception as e:
             print(f"❌ Falha ao gerar protocolos .org: {e}")
 
+    agg = res["agg"]
+    by_cr_df = res["by_cr"]
+
     # Agrupa por perito
-    if sel.empty:
+    if agg.empty:
         print("Nenhuma tarefa criada em dia útil e concluída no fim de semana.")
         empty = pd.DataFrame(columns=["Perito","Matrícula","CR","DR","Quantidade"])
         if args.export_csv:
@@ -469,38 +751,13 @@ def main():
                 print(f"{'✅' if ok else '❌'} PDF gerado: {out_pdf}")
         return
 
-    group_cols = [c for c in ["nomePerito","matricula","CR","DR"] if c in sel.columns]
-    agg = (
-        sel.groupby(group_cols, dropna=False)
-           .size()
-           .reset_index(name="Quantidade")
-           .sort_values(["Quantidade","nomePerito"], ascending=[False, True])
-    )
-    agg = agg.rename(columns={"nomePerito":"Perito","matricula":"Matrícula"})
-
-    # Preenche visual
-    for c in ["Perito","Matrícula","CR","DR"]:
-        if c in agg.columns:
-            agg[c] = agg[c].fillna("")
-
-    # ── Agregação e gráfico por CR (ordem decrescente) ──
+    # ── Gráfico por CR (ordem decrescente) ──
     cr_png_created = False
-    if "CR" in sel.columns:
-        cr_series = sel["CR"].fillna("").astype(str).str.strip()
-        cr_series = cr_series.replace("", "SEM_CR")
-        by_cr_df = (
-            cr_series.to_frame("CR")
-            .assign(_n=1)
-            .groupby("CR", dropna=False)["_n"].sum()
-            .sort_values(ascending=False)
-            .reset_index()
-            .rename(columns={"_n":"Quantidade"})
+    if not by_cr_df.empty and (args.export_png or args.export_org or args.export_pdf):
+        cr_png_created = render_cr_bar(
+            by_cr_df, out_cr_png,
+            "Tarefas (início em dia útil, fim no fim de semana) — por CR"
         )
-        if not by_cr_df.empty and (args.export_png or args.export_org or args.export_pdf):
-            cr_png_created = render_cr_bar(
-                by_cr_df, out_cr_png,
-                "Tarefas (início em dia útil, fim no fim de semana) — por CR"
-            )
 
     # Preview perito
     print(agg.to_string(index=False))
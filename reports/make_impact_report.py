@@ -17,10 +17,11 @@ Relatório "Impacto na Fila" (PDF e PNGs) — 100% em Python (ReportLab + Matplo
 ✔ Nomes de perito em Title Case (exc.: da, de, di, do, du, e).
 """
 
-import os, sys, re, json, math, sqlite3, argparse, shutil, unicodedata
+import os, sys, re, json, math, sqlite3, argparse, shutil, unicodedata, time
 from datetime import datetime
 from typing import Optional, Tuple, Dict, Any, List
 from pathlib import Path
+from functools import lru_cache
 
 import numpy as np
 import pandas as pd
@@ -41,6 +42,12 @@ except Exception:
     except Exception:
         PdfMerger = None
 
+# — SciPy (opcional): caudas binomial/beta-binomial exatas e vetorizadas
+try:
+    from scipy import stats as _sp_stats
+except Exception:
+    _sp_stats = None
+
 # — Integração com make_kpi_report (Top-10 KPI)
 try:
     # quando executado como módulo: python -m reports.make_impact_report_pdf
@@ -114,6 +121,10 @@ except Exception as e:
         "Escreva comentários claros, objetivos e tecnicamente corretos, em um parágrafo."
     )
 
+# Renderização paralela das figuras (pool de processos com Agg)
+from utils.figure_jobs import FigurePool, result_of as _fig_result
+from utils.pdf_build import PdfBuildStage
+
 # =======================
 # Configuração geral
 # =======================
@@ -229,6 +240,8 @@ from xml.sax.saxutils import escape as xml_escape
 # Tenta usar DejaVu (melhor cobertura PT-BR); cai para Helvetica se indisponível
 def _register_fonts():
     try:
+        if {"DejaVu", "DejaVu-Bold"} <= set(pdfmetrics.getRegisteredFontNames()):
+            return "DejaVu", "DejaVu-Bold"
         dejavu = "/usr/share/fonts/truetype/dejavu/DejaVuSans.ttf"
         dejavu_b = "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf"
         if os.path.exists(dejavu) and os.path.exists(dejavu_b):
@@ -425,6 +438,50 @@ def _render_org_to_pdf(org_path: str, out_pdf: Optional[str] = None,
         return out_pdf
     return expected
 
+def _front_pdfs_from_args(args: argparse.Namespace, use_header_and_text: bool) -> List[str]:
+    """
+    PDFs de abertura na ordem: header_and_text.org, --front-pdf, --front-org-render.
+    Os .org são renderizados juntos (em paralelo, pulando os inalterados).
+    """
+    orgs: List[str] = []
+    if use_header_and_text:
+        path_ht = getattr(args, "header_and_text_file", None)
+        if not path_ht:
+            base_hint = args.front_org or args.header_org or os.getcwd()
+            base_dir  = str(Path(base_hint).resolve().parent if os.path.exists(str(base_hint)) else Path(base_hint))
+            path_ht = os.path.join(base_dir, "header_and_text.org")
+        orgs.append(path_ht)
+    org_list = getattr(args, "front_org_render", None) or []
+    if isinstance(org_list, str): org_list = [org_list]
+    orgs += [o for o in org_list if o]
+
+    def _build(o: str, p: str, wd: str) -> str:
+        return _render_org_to_pdf(o)
+
+    stage = PdfBuildStage(workers=getattr(args, "pdf_workers", 0), force=getattr(args, "pdf_force", False))
+    for o in orgs:
+        stage.add(o, str(Path(o).resolve().with_suffix(".pdf")), _build, engine="emacs", no_toc=True, no_nums=True)
+    rendered = stage.run() if orgs else {}
+
+    front: List[str] = []
+    if use_header_and_text:
+        if rendered.get(orgs[0]):
+            front.append(rendered[orgs[0]])
+        else:
+            print(f"[warn] Falha ao renderizar header_and_text: {orgs[0]}", file=sys.stderr)
+    if getattr(args, "front_pdf", None):
+        if isinstance(args.front_pdf, (list, tuple)):
+            for p in args.front_pdf:
+                if p and os.path.exists(p): front.append(str(p))
+        elif isinstance(args.front_pdf, str) and os.path.exists(args.front_pdf):
+            front.append(args.front_pdf)
+    for o in orgs[1 if use_header_and_text else 0:]:
+        if rendered.get(o):
+            front.append(rendered[o])
+        else:
+            print(f"[warn] Falha ao renderizar ORG '{o}'", file=sys.stderr)
+    return front
+
 def _concat_pdfs(paths: List[str], out_path: str) -> None:
     if not PdfMerger:
         raise RuntimeError("Instale 'pypdf' (ou 'PyPDF2') para concatenar PDFs: pip install pypdf")
@@ -442,15 +499,20 @@ def _concat_pdfs(paths: List[str], out_path: str) -> None:
 
 from reportlab.pdfbase.pdfmetrics import stringWidth
 
+@lru_cache(maxsize=65536)
+def _string_width(text: str, font: str, size: float) -> float:
+    """stringWidth memoizado: nomes de peritos/estratos se repetem entre tabelas e blocos."""
+    return stringWidth(text, font, size)
+
 def _measure_col_width(strings, header_text,
                        font_body=FONT_REG, size_body=8.0,
                        font_header=FONT_BOLD, size_header=None,
                        padding=3) -> float:
     """Retorna a largura em pontos suficiente p/ a coluna (maior entre header e linhas) + padding."""
     size_header = float(size_header if size_header is not None else size_body)
-    max_pts = stringWidth(str(header_text), font_header, size_header)
+    max_pts = _string_width(str(header_text), font_header, size_header)
     for s in strings:
-        max_pts = max(max_pts, stringWidth(str(s), font_body, size_body))
+        max_pts = max(max_pts, _string_width(str(s), font_body, float(size_body)))
     return max_pts + 2*padding  # padding dos dois lados
 
 def measure_col_pts(strings, header_text,
@@ -551,6 +613,24 @@ def _latexish_to_ascii(s: str) -> str:
     out = re.sub(r"\s+", " ", out).strip()
     return out
 
+_CODE_STYLE_CACHE: Dict[str, ParagraphStyle] = {}
+
+def _code_display_style(style: ParagraphStyle) -> ParagraphStyle:
+    """
+    Estilo Courier centralizado derivado de `style` (criado uma vez por estilo-base).
+    A chave é o nome: _styles() recria os mesmos estilos a cada relatório, e um id()
+    de objeto já coletado poderia ser reaproveitado por outro estilo.
+    """
+    st = _CODE_STYLE_CACHE.get(style.name)
+    if st is None:
+        st = _CODE_STYLE_CACHE[style.name] = ParagraphStyle(
+            name=f"{style.name}_code_display",
+            parent=style,
+            fontName="Courier",
+            alignment=TA_CENTER,
+        )
+    return st
+
 def _comment_to_flowables_with_math(text: str,
                                     style: ParagraphStyle,
                                     doc_width: float,
@@ -602,12 +682,7 @@ def _comment_to_flowables_with_math(text: str,
                         flows.append(Spacer(1, 2))
                     buff_rl_parts = []
 
-                    code_style_disp = ParagraphStyle(
-                        name=f"{style.name}_code_display",
-                        parent=style,
-                        fontName="Courier",
-                        alignment=TA_CENTER,
-                    )
+                    code_style_disp = _code_display_style(style)
                     flows.append(Paragraph(_xml_escape(ascii_formula), code_style_disp))
                     flows.append(Spacer(1, 4))
                 else:
@@ -731,11 +806,88 @@ def _log_binom_pmf(k: int, n: int, p: float) -> float:
     from math import lgamma, log
     return (lgamma(n+1)-lgamma(k+1)-lgamma(n-k+1) + k*log(p) + (n-k)*log(1.0-p))
 
+def _segment_tail_sum(k: np.ndarray, n: np.ndarray, lp0: np.ndarray, log_ratio,
+                      chunk_terms: int = 2_000_000) -> np.ndarray:
+    """
+    Soma exp(log pmf) de k_obs..n para vários (k_obs, n) de uma vez, em passadas
+    NumPy. Os termos saem da recorrência log pmf(j+1) = log pmf(j) + log_ratio(j, n)
+    a partir de lp0 = log pmf(k_obs); a soma é feita por segmento em escala log
+    (max + soma de exp). Segmentos de comprimento parecido viram linhas de uma
+    matriz (cumsum por linha: o erro de arredondamento fica restrito ao próprio
+    segmento, não ao acumulado do bloco), em blocos de ~chunk_terms células.
+    """
+    k = k.astype(np.int64); n = n.astype(np.int64)
+    L = n - k + 1
+    out = np.zeros(len(k), dtype=float)
+    idx = np.flatnonzero((L > 0) & np.isfinite(lp0))
+    if idx.size == 0:
+        return out
+    idx = idx[np.argsort(L[idx], kind="stable")]
+    Lsorted = L[idx]
+    i0 = 0
+    while i0 < idx.size:
+        # bloco: comprimentos até ~2x o menor (padding limitado) e ≤ chunk_terms células
+        lo = int(Lsorted[i0])
+        i1 = int(np.searchsorted(Lsorted, 2 * lo + 16, side="right"))
+        width = int(Lsorted[i1 - 1])
+        i1 = min(i1, i0 + max(1, chunk_terms // width))
+        width = int(Lsorted[i1 - 1])
+        sel = idx[i0:i1]
+        i0 = i1
+
+        off = np.arange(width, dtype=float)
+        # j = k_obs - 1 + deslocamento (o termo de índice 0 é o próprio lp0)
+        j = (k[sel] - 1).astype(float)[:, None] + off[None, :]
+        # coluna 0 (j = k_obs-1, p.ex. k_obs=0 → divisão por zero/log de negativo) e o
+        # padding além de n são descartados abaixo, então os avisos não procedem
+        with np.errstate(divide="ignore", invalid="ignore"):
+            inc = log_ratio(j, n[sel].astype(float)[:, None])
+        inc[:, 0] = lp0[sel]
+        valid = off[None, :] < L[sel][:, None]
+        inc[~valid] = 0.0
+        terms = np.cumsum(inc, axis=1)
+        terms[~valid] = -np.inf
+        m = terms.max(axis=1)
+        tot = np.exp(terms - m[:, None]).sum(axis=1)
+        out[sel] = np.exp(m + np.log(tot))
+    return out
+
+_SF_DEEP_TAIL = 1e-250
+
+def _binom_tail_rec(k: np.ndarray, n: np.ndarray, p0: float) -> np.ndarray:
+    """P(X >= k) pela recorrência do pmf em escala log (0 < p0 < 1)."""
+    kk = np.clip(k, 0, None)
+    lp0 = np.array([_log_binom_pmf(int(a), int(b), p0) if a <= b else -np.inf for a, b in zip(kk, n)], dtype=float)
+    logit = math.log(p0) - math.log1p(-p0)
+    return _segment_tail_sum(kk, n, lp0, lambda j, nn: np.log((nn - j) / (j + 1.0)) + logit)
+
+def _binom_sf_batch(k_obs, n, p0: float) -> np.ndarray:
+    """
+    P(X >= k_obs), X ~ Bin(n, p0), para vetores k_obs/n (n<=0 → 1.0).
+    Usa scipy.stats quando disponível (a cauda profunda vai pela recorrência);
+    senão, a recorrência vetorizada do pmf.
+    """
+    k = np.asarray(k_obs, dtype=np.int64).ravel()
+    n = np.asarray(n, dtype=np.int64).ravel()
+    p0 = float(p0)
+    if p0 <= 0.0:
+        out = (k <= 0).astype(float)
+    elif p0 >= 1.0:
+        out = (k <= n).astype(float)
+    elif _sp_stats is not None:
+        out = np.asarray(_sp_stats.binom.sf(k - 1, np.maximum(n, 0), p0), dtype=float)
+        # binom.sf zera/perde a cauda profunda (~1e-277 e abaixo) que a soma em escala
+        # log ainda representa: esses poucos pontos vão pela recorrência
+        deep = (out < _SF_DEEP_TAIL) & (k > 0) & (k <= n)
+        if deep.any():
+            out[deep] = _binom_tail_rec(k[deep], n[deep], p0)
+    else:
+        out = _binom_tail_rec(k, n, p0)
+    out = np.where(n <= 0, 1.0, out)
+    return np.clip(out, 0.0, 1.0)
+
 def _binom_sf_one_sided(k_obs: int, n: int, p0: float) -> float:
-    ks = np.arange(k_obs, n+1, dtype=int)
-    lps = np.array([_log_binom_pmf(int(k), n, p0) for k in ks], dtype=float)
-    m = np.max(lps)
-    return float(np.exp(lps - m).sum() * np.exp(m))
+    return float(_binom_sf_batch([k_obs], [n], p0)[0])
 
 def _wilson_ci(k: int, n: int, z: float = 1.96) -> Tuple[float, float]:
     if n <= 0: return (0.0, 1.0)
@@ -770,11 +922,23 @@ def _log_betabinom_pmf(k: int, n: int, a: float, b: float) -> float:
     return (lgamma(n+1)-lgamma(k+1)-lgamma(n-k+1)
             + _log_beta(k+a, n-k+b) - _log_beta(a,b))
 
+def _betabin_sf_batch(k_obs, n, a: float, b: float) -> np.ndarray:
+    """P(X >= k_obs), X ~ BetaBin(n, a, b), para vetores k_obs/n (n<=0 → 1.0)."""
+    k = np.asarray(k_obs, dtype=np.int64).ravel()
+    n = np.asarray(n, dtype=np.int64).ravel()
+    a = float(a); b = float(b)
+    # (scipy.stats.betabinom.sf perde precisão relativa na cauda profunda: usa a recorrência)
+    kk = np.clip(k, 0, None)
+    lp0 = np.array([_log_betabinom_pmf(int(x), int(m), a, b) if x <= m else -np.inf for x, m in zip(kk, n)], dtype=float)
+    out = _segment_tail_sum(
+        kk, n, lp0,
+        lambda j, nn: np.log((nn - j) * (j + a) / ((j + 1.0) * (nn - j - 1.0 + b))),
+    )
+    out = np.where(n <= 0, 1.0, out)
+    return np.clip(out, 0.0, 1.0)
+
 def _betabin_sf_one_sided(k_obs: int, n: int, a: float, b: float) -> float:
-    ks = np.arange(k_obs, n+1, dtype=int)
-    lps = np.array([_log_betabinom_pmf(int(k), n, a, b) for k in ks], dtype=float)
-    m = np.max(lps)
-    return float(np.exp(lps - m).sum() * np.exp(m))
+    return float(_betabin_sf_batch([k_obs], [n], a, b)[0])
 
 def _estimate_rho_mom(N: np.ndarray, NC: np.ndarray, p: float) -> float:
     Y = NC.astype(float)
@@ -883,13 +1047,28 @@ def _prep_base(df_n: pd.DataFrame, df_scores: pd.DataFrame, p_br: float, alpha:
     m["IV_vagas"]=np.ceil(float(alpha)*m["E"]).astype(int)
     return m
 
-def _elbow_cutoff_score(df: pd.DataFrame) -> Optional[float]:
-    tmp=df.dropna(subset=["score_final"]).copy()
+def _impact_curve(df: pd.DataFrame) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    Curva de impacto acumulado: para cada score distinto s (decrescente),
+    Σ IV_vagas dos peritos com score_final ≥ s. Uma ordenação + cumsum.
+    """
+    tmp=df.dropna(subset=["score_final"])
     if tmp.empty: return None
-    ss=np.sort(tmp["score_final"].unique())[::-1]
+    sc=tmp["score_final"].to_numpy(dtype=float)
+    iv=pd.to_numeric(tmp["IV_vagas"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    order=np.argsort(-sc, kind="stable")
+    sc=sc[order]; cum=np.cumsum(iv[order])
+    last=np.flatnonzero(np.append(sc[1:]!=sc[:-1], True))  # último perito de cada score
+    return (sc[last], cum[last])
+
+def _elbow_cutoff_score(df: pd.DataFrame,
+                        curve: Optional[Tuple[np.ndarray, np.ndarray]]=None) -> Optional[float]:
+    if curve is None:
+        curve=_impact_curve(df)
+    if curve is None: return None
+    ss, y = curve
     if len(ss)==1: return float(ss[0])
-    yy=[tmp.loc[tmp["score_final"]>=s,"IV_vagas"].sum() for s in ss]
-    y=np.array(yy,dtype=float)
+    y=np.asarray(y,dtype=float)
     y=(y - y.min())/(y.max()-y.min()+1e-9)
     x=np.linspace(0,1,num=len(ss))
     x0,y0=x[0],y[0]; x1,y1=x[-1],y[-1]
@@ -944,6 +1123,38 @@ def _save_fig(fig, name: str) -> str:
     plt.close(fig); plt.close('all')
     return path
 
+# Pool de figuras (--fig-workers): criado em main(); sem pool, renderiza na hora.
+_FIG_POOL_STATE: Dict[str, Optional[FigurePool]] = {"pool": None}
+
+def _fig_submit(render, *args, **kwargs):
+    """Envia a figura ao pool (devolve Future) ou renderiza direto (devolve o caminho)."""
+    pool = _FIG_POOL_STATE["pool"]
+    if pool is None:
+        return render(*args, **kwargs)
+    return pool.submit(render, *args, **kwargs)
+
+def _fig_wait() -> None:
+    """Espera as figuras pendentes (antes de montar PDF/ORG com os PNGs)."""
+    pool = _FIG_POOL_STATE["pool"]
+    if pool is not None:
+        pool.wait()
+
+def _fig_pool_close() -> None:
+    pool, _FIG_POOL_STATE["pool"] = _FIG_POOL_STATE["pool"], None
+    if pool is not None:
+        pool.close()
+
+def _plot_weight_hist(values_pct: np.ndarray, vline_pct: float, vline_label: str,
+                      xlabel: str, title: str, out_path: str) -> str:
+    """Histograma do peso (permutação/PSA) com linha de referência."""
+    fig,ax=_mkfig(7.2, 4.6)
+    ax.hist(values_pct, bins=40, edgecolor='black')
+    ax.axvline(vline_pct, color='red', linestyle='--', label=vline_label)
+    ax.set_xlabel(xlabel); ax.set_ylabel("Frequência"); ax.set_title(title)
+    ax.legend(); plt.tight_layout()
+    fig.savefig(out_path, bbox_inches='tight', dpi=GLOBAL_FIG_DPI); plt.close(fig); plt.close('all')
+    return out_path
+
 def exportar_png_top(df_sel: pd.DataFrame, meta: Dict[str, Any], label_maxlen: int=18, label_fontsize: int=8) -> Optional[str]:
     if df_sel.empty: return None
     topn=int(meta.get("topn",10))
@@ -975,11 +1186,12 @@ def exportar_png_top(df_sel: pd.DataFrame, meta: Dict[str, Any], label_maxlen: i
 def plot_curva_cotovelo(df: pd.DataFrame, s_star: Optional[float], start: str, end: str,
                         iv_selected: Optional[int], iv_periodo: Optional[int],
                         peso_selected: Optional[float], delta_tmea_sel: Optional[int],
-                        delta_tmea_periodo: Optional[int], tmea_br: Optional[float]) -> Optional[str]:
-    tmp = df.dropna(subset=["score_final"]).copy()
-    if tmp.empty: return None
-    ss = np.sort(tmp["score_final"].astype(float).unique())[::-1]
-    y = np.array([tmp.loc[tmp["score_final"] >= s, "IV_vagas"].sum() for s in ss], dtype=float)
+                        delta_tmea_periodo: Optional[int], tmea_br: Optional[float],
+                        curve: Optional[Tuple[np.ndarray, np.ndarray]] = None) -> Optional[str]:
+    if curve is None:
+        curve = _impact_curve(df)
+    if curve is None: return None
+    ss, y = curve
 
     fig, ax = _mkfig(7.8, 5.0)
     ax.plot(ss, y, marker="o")
@@ -1005,6 +1217,60 @@ def plot_curva_cotovelo(df: pd.DataFrame, s_star: Optional[float], start: str, e
                 bbox=dict(facecolor="white", alpha=0.8, edgecolor="black"))
     return _save_fig(fig, f"impacto_curva_cotovelo_{start}_a_{end}.png")
 
+def _sens_grid(df_all: pd.DataFrame, alphas, pbrs, cuts, mem_mb: float=256.0) -> pd.DataFrame:
+    """
+    Sensibilidade em lote: avalia o peso w para toda a grade (α × p_BR × corte S*)
+    de uma vez, sobre os vetores N/NC por perito.
+      E = ceil(max(0, NC − N·p)),  IV = ceil(α·E),  w = Σ_{score≥S*} IV / ceil(α·Σ NC)
+    Corte None = todos os peritos. Devolve um cubo "tidy": uma linha por ponto, com
+    alpha, p_br, score_cut, iv_sel, iv_period e peso_pct.
+    """
+    alphas = np.asarray(list(alphas), dtype=float)
+    pbrs   = np.asarray(list(pbrs),   dtype=float)
+    cuts   = list(cuts) if cuts is not None else [None]
+    nc = pd.to_numeric(df_all["NC"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    n  = pd.to_numeric(df_all["N"],  errors="coerce").fillna(0).to_numpy(dtype=float)
+    sc = (pd.to_numeric(df_all["score_final"], errors="coerce").to_numpy(dtype=float)
+          if "score_final" in df_all.columns else np.full(nc.shape[0], np.nan))
+    # seleção de cada corte como máscara 0/1 (peritos × cortes): Σ_sel IV vira um produto matricial
+    with np.errstate(invalid="ignore"):
+        mask = np.stack([np.ones_like(nc) if c is None else (sc >= float(c)).astype(float) for c in cuts], axis=1)
+
+    A, P, C = alphas.size, pbrs.size, len(cuts)
+    iv_sel = np.zeros((A, P, C), dtype=float)
+    E = np.ceil(np.maximum(0.0, nc[None, :] - n[None, :] * pbrs[:, None]))        # (P × peritos)
+    step = int(max(1, int(max(1.0, float(mem_mb or 0)) * 1024 * 1024) // (max(1, P * nc.shape[0]) * 8)))
+    for a0 in range(0, A, step):
+        a1 = min(A, a0 + step)
+        iv = alphas[a0:a1, None, None] * E[None, :, :]                              # (a × P × peritos)
+        np.ceil(iv, out=iv)
+        iv_sel[a0:a1] = (iv.reshape(-1, nc.shape[0]) @ mask).reshape(a1 - a0, P, C)
+    iv_period = np.ceil(alphas * float(nc.sum()))
+    ivp = np.broadcast_to(iv_period[:, None, None], iv_sel.shape)
+    peso = np.divide(iv_sel, ivp, out=np.zeros_like(iv_sel), where=ivp > 0) * 100.0
+
+    ai, pi, ci = np.meshgrid(np.arange(A), np.arange(P), np.arange(C), indexing="ij")
+    return pd.DataFrame({
+        "alpha": alphas[ai.ravel()],
+        "p_br": pbrs[pi.ravel()],
+        "score_cut": [cuts[k] for k in ci.ravel()],
+        "iv_sel": iv_sel.ravel().astype(np.int64),
+        "iv_period": ivp.ravel().astype(np.int64),
+        "peso_pct": peso.ravel(),
+    })
+
+def exportar_png_sens_heatmap(grid: pd.DataFrame, meta: Dict[str, Any]) -> Optional[str]:
+    if grid is None or grid.empty: return None
+    piv = grid.pivot_table(index="p_br", columns="alpha", values="peso_pct", aggfunc="first").sort_index(ascending=False)
+    fig, ax = _mkfig(7.8, 5.6)
+    im = ax.imshow(piv.values, aspect="auto", cmap="viridis",
+                   extent=[piv.columns.min()*100, piv.columns.max()*100, piv.index.min()*100, piv.index.max()*100])
+    ax.plot([float(meta["alpha"])*100], [float(meta["p_br"])*100], marker="x", color="red", markersize=9)
+    ax.set_xlabel("α (%)"); ax.set_ylabel("p_BR (%)")
+    ax.set_title(f"Sensibilidade do peso (%) — α × p_BR — {meta['start']} a {meta['end']}")
+    cbar = fig.colorbar(im, ax=ax); cbar.set_label("Peso (%)")
+    return _save_fig(fig, f"impacto_sens_heatmap_{meta['start']}_a_{meta['end']}.png")
+
 def exportar_png_tornado(meta: Dict[str, Any], delta: Dict[str, float], alpha_frac: float, pbr_pp: float) -> Optional[str]:
     labels=[f"α -{alpha_frac*100:.0f}%", f"α +{alpha_frac*100:.0f}%",
             f"p_BR -{pbr_pp*100:.0f} p.p.", f"p_BR +{pbr_pp*100:.0f} p.p."]
@@ -1046,13 +1312,12 @@ def exportar_png_strat(df_strat_tot: pd.DataFrame, df_strat_sel: pd.DataFrame, b
 def run_test_binomial(df_all: pd.DataFrame, p_br: float) -> pd.DataFrame:
     out=df_all[["nomePerito","N","NC","E"]].copy()
     out["p_hat"]=out["NC"]/out["N"].replace(0,np.nan)
-    pvals=[]; low=[]; high=[]
-    for _,r in out.iterrows():
-        n=int(r["N"]); k=int(r["NC"])
-        pval=_binom_sf_one_sided(k, n, p_br) if n>0 else 1.0
+    N=out["N"].astype(int).values; K=out["NC"].astype(int).values
+    low=[]; high=[]
+    for n,k in zip(N.tolist(), K.tolist()):
         lo,hi=_wilson_ci(k,n)
-        pvals.append(pval); low.append(lo); high.append(hi)
-    out["p"]=np.array(pvals,dtype=float)
+        low.append(lo); high.append(hi)
+    out["p"]=_binom_sf_batch(K, N, p_br)
     out["wilson_low"]=np.array(low,dtype=float); out["wilson_high"]=np.array(high,dtype=float)
     out["q"]=_p_adjust_bh(out["p"].values)
     return out
@@ -1064,13 +1329,9 @@ def run_test_betabin(df_all: pd.DataFrame, p_br: float) -> Tuple[pd.DataFrame, f
     rho = max(min(float(rho), 0.9999), 1e-9)
     ab = (1.0/rho) - 1.0
     a = float(p_br*ab); b=float((1.0-p_br)*ab)
-    pvals=[]
-    for n,k in zip(N.tolist(), NC.tolist()):
-        pval=_betabin_sf_one_sided(int(k), int(n), a, b) if n>0 else 1.0
-        pvals.append(pval)
     out=df_all[["nomePerito","N","NC","E"]].copy()  # garante coluna E (Excesso)
     out["p_hat"]=out["NC"]/out["N"].replace(0,np.nan)
-    out["p_bb"]=np.array(pvals,dtype=float)
+    out["p_bb"]=_betabin_sf_batch(NC, N, a, b)
     out["q_bb"]=_p_adjust_bh(out["p_bb"].values)
     return out, float(rho)
 
@@ -1149,84 +1410,229 @@ def _nc_outliers(df_all: pd.DataFrame,
             return (pd.DataFrame(columns=m.columns), None, float('nan'))
     return (best_sel, best_thr, best_fdr)
 
+# =======================
+# Monte Carlo (permutação / PSA)
+# =======================
+# As R réplicas são divididas em lotes de tamanho fixo (--mc-chunk); cada lote tem
+# seu próprio gerador, filho de SeedSequence(seed).spawn(). O resultado depende só
+# de (seed, R, chunk) — não do número de processos — e a parada antecipada é
+# decidida sobre o prefixo ordenado de lotes, então também é determinística.
+# A parada exige MC_STABLE_CHUNKS lotes seguidos com variação ≤ tol: um único par de
+# prefixos parecidos pode ser coincidência de um lote.
+MC_CHUNK_DEFAULT = 1000
+MC_STABLE_CHUNKS = 3
+
+def _mc_workers(n: Optional[int]) -> int:
+    """0/None → todos os núcleos disponíveis."""
+    if n is None or int(n) <= 0:
+        try:
+            return max(1, len(os.sched_getaffinity(0)))
+        except Exception:
+            return max(1, os.cpu_count() or 1)
+    return int(n)
+
+def _mc_chunk_job(job) -> np.ndarray:
+    fn, args, size, ss = job
+    return fn(np.random.default_rng(ss), size, *args)
+
+def _mc_run(chunk_fn, chunk_args: tuple, R: int, seed: Optional[int]=None, workers: Optional[int]=1,
+            chunk: int=MC_CHUNK_DEFAULT, stat_fn=None, tol: Optional[float]=None,
+            min_chunks: int=2, stable_chunks: int=MC_STABLE_CHUNKS, label: str="MC") -> np.ndarray:
+    """
+    Executa chunk_fn(rng, tamanho, *chunk_args) -> ndarray em lotes e concatena as
+    amostras na ordem dos lotes. Com stat_fn e tol, para quando max|Δ stat_fn| entre
+    prefixos consecutivos fica ≤ tol em stable_chunks lotes seguidos (após min_chunks lotes).
+    chunk_fn deve ser uma função de módulo (é enviada aos processos do pool).
+    """
+    R = int(R); chunk = max(1, int(chunk or MC_CHUNK_DEFAULT))
+    ss = np.random.SeedSequence(seed)
+    if seed is None:
+        print(f"[INFO] {label}: semente {ss.entropy} (use --seed para repetir).")
+    n_chunks = int(math.ceil(R / chunk))
+    jobs = [(chunk_fn, chunk_args, min(chunk, R - i*chunk), child)
+            for i, child in enumerate(ss.spawn(n_chunks))]
+
+    parts: List[np.ndarray] = []
+    state = {"prev": None, "streak": 0}
+    def _accept(res) -> bool:
+        parts.append(np.asarray(res))
+        if stat_fn is None or tol is None or len(parts) < max(1, int(min_chunks)):
+            return False
+        cur = np.atleast_1d(np.asarray(stat_fn(np.concatenate(parts)), dtype=float))
+        prev, state["prev"] = state["prev"], cur
+        if prev is not None and bool(np.nanmax(np.abs(cur - prev)) <= float(tol)):
+            state["streak"] += 1
+        else:
+            state["streak"] = 0
+        return state["streak"] >= max(1, int(stable_chunks))
+
+    nw = min(_mc_workers(workers), n_chunks)
+    if nw > 1:
+        from concurrent.futures import ProcessPoolExecutor
+        try:
+            with ProcessPoolExecutor(max_workers=nw) as ex:
+                pending = [ex.submit(_mc_chunk_job, j) for j in jobs[:2*nw]]
+                nxt = len(pending)
+                while pending:
+                    res = pending.pop(0).result()
+                    if _accept(res):
+                        for f in pending: f.cancel()
+                        break
+                    if nxt < n_chunks:
+                        pending.append(ex.submit(_mc_chunk_job, jobs[nxt])); nxt += 1
+        except Exception as e:
+            print(f"[AVISO] {label}: pool de processos falhou ({e}); executando em série.")
+            parts.clear(); state["prev"] = None; state["streak"] = 0
+            nw = 1
+    if nw <= 1:
+        for j in jobs:
+            if _accept(_mc_chunk_job(j)):
+                break
+
+    out = np.concatenate(parts) if parts else np.empty(0)
+    if out.shape[0] < R:
+        print(f"[INFO] {label}: estável após {out.shape[0]} de {R} réplicas (tol={tol}).")
+    return out
+
+def _perm_block_size(n_cols: int, R: int, mem_mb: float) -> int:
+    """Quantas permutações cabem num bloco (chaves float64 + índices int64 por linha)."""
+    row_bytes = max(1, int(n_cols)) * 16
+    cap = int(max(1.0, float(mem_mb or 0)) * 1024 * 1024) // row_bytes
+    return int(max(1, min(int(R), cap)))
+
+def _perm_pick_smallest(keys: np.ndarray, c: int) -> np.ndarray:
+    """Posições (por linha) das c menores chaves — amostra sem reposição."""
+    m = keys.shape[1]
+    if c >= m:
+        return np.broadcast_to(np.arange(m), keys.shape).copy()
+    return np.argpartition(keys, c - 1, axis=1)[:, :c]
+
+def _perm_weight_sums(iv: np.ndarray, strata_pos: List[Tuple[np.ndarray, int]], n_sel: int,
+                      R: int, rng: np.random.Generator, mem_mb: float) -> np.ndarray:
+    """
+    Soma de IV_vagas em R amostras sem reposição de n_sel peritos.
+    strata_pos: lista (posições do estrato, qtd. a sortear); sem estratos, um único
+    estrato com todas as posições. As amostras são sorteadas em blocos (B × n) via
+    argpartition de chaves uniformes; o teto de memória (mem_mb) limita B.
+    Se os estratos não completam n_sel, completa com peritos ainda não sorteados.
+    """
+    n_all = iv.shape[0]
+    sums = np.empty(int(R), dtype=np.int64)
+    picked_total = sum(min(c, pos.size) for pos, c in strata_pos)
+    n_extra = max(0, min(n_sel, n_all) - picked_total)
+    # Uma matriz de chaves por bloco (estratos lado a lado + complemento): cada linha
+    # consome o mesmo trecho do gerador, então o resultado não depende do tamanho do bloco.
+    offs = np.cumsum([0] + [pos.size for pos, _ in strata_pos])
+    width = int(offs[-1]) + (n_all if n_extra else 0)
+    B = _perm_block_size(width, R, mem_mb)
+    for s0 in range(0, int(R), B):
+        b = min(B, int(R) - s0)
+        keys_all = rng.random((b, width))
+        acc = np.zeros(b, dtype=np.int64)
+        chosen = np.zeros((b, n_all), dtype=bool) if n_extra else None
+        rows = np.arange(b)[:, None]
+        for (pos, c), o in zip(strata_pos, offs[:-1]):
+            c = min(int(c), pos.size)
+            if c <= 0:
+                continue
+            pick = pos[_perm_pick_smallest(keys_all[:, o:o + pos.size], c)]
+            acc += iv[pick].sum(axis=1)
+            if chosen is not None:
+                chosen[rows, pick] = True
+        if n_extra:
+            keys = keys_all[:, int(offs[-1]):]
+            keys[chosen] = 2.0  # já sorteados ficam fora das n_extra menores chaves
+            acc += iv[_perm_pick_smallest(keys, n_extra)].sum(axis=1)
+        sums[s0:s0 + b] = acc
+    return sums
+
+def _mc_perm_chunk(rng: np.random.Generator, size: int, iv: np.ndarray, strata_pos, n_sel: int,
+                   mem_mb: float) -> np.ndarray:
+    return _perm_weight_sums(iv, strata_pos, n_sel, size, rng, mem_mb)
+
 def run_permutation_weight(df_all: pd.DataFrame, df_sel: pd.DataFrame, alpha: float, p_br: float,
-                           R: int, stratify_by: Optional[str]=None) -> Tuple[float, str]:
+                           R: int, stratify_by: Optional[str]=None,
+                           seed: Optional[int]=None, mem_mb: float=256.0, workers: Optional[int]=1,
+                           chunk: int=MC_CHUNK_DEFAULT, tol: Optional[float]=None) -> Tuple[float, str, int]:
     if df_sel.empty or df_all.empty or R<=0:
-        return (float('nan'), "")
+        return (float('nan'), "", 0)
     n_sel = df_sel.shape[0]
     iv_period = int(math.ceil(float(alpha)*float(df_all["NC"].sum())))
-    rng=np.random.default_rng()
-    weights=[]
+    iv = pd.to_numeric(df_all["IV_vagas"], errors="coerce").fillna(0).to_numpy(dtype=np.int64)
     if stratify_by and stratify_by in df_all.columns:
         counts=df_sel[stratify_by].fillna("—").value_counts().to_dict()
-        strata_groups={}
-        for g,sub in df_all.groupby(df_all[stratify_by].fillna("—")):
-            strata_groups[g]=sub.index.values
-        for _ in range(int(R)):
-            idx=[]
-            for g,c in counts.items():
-                pool=strata_groups.get(g, np.array([],dtype=int))
-                if pool.size==0: continue
-                pick=rng.choice(pool, size=min(c, pool.size), replace=False)
-                idx.extend(list(pick))
-            if len(idx)<n_sel:
-                pool_extra=np.setdiff1d(df_all.index.values, np.array(idx,dtype=int), assume_unique=False)
-                if pool_extra.size>0:
-                    pick=rng.choice(pool_extra, size=(n_sel - len(idx)), replace=False)
-                    idx.extend(list(pick))
-            iv_s = int(df_all.loc[idx, "IV_vagas"].sum())
-            w = (iv_s / iv_period) if iv_period>0 else 0.0
-            weights.append(w)
+        codes=df_all[stratify_by].fillna("—").to_numpy()
+        strata_pos=[(np.flatnonzero(codes == g), int(c)) for g,c in counts.items()]
     else:
-        idx_all=df_all.index.values
-        for _ in range(int(R)):
-            idx=np.random.choice(idx_all, size=n_sel, replace=False)
-            iv_s=int(df_all.loc[idx,"IV_vagas"].sum())
-            w=(iv_s/iv_period) if iv_period>0 else 0.0
-            weights.append(w)
-    weights=np.array(weights, dtype=float)
+        strata_pos=[(np.arange(df_all.shape[0]), n_sel)]
+    # p-valor sobre somas inteiras: sum >= IV_sel ⇔ w >= w_obs
+    iv_obs = int(df_sel["IV_vagas"].sum())
+    sums = _mc_run(_mc_perm_chunk, (iv, strata_pos, n_sel, mem_mb), int(R), seed=seed, workers=workers,
+                   chunk=chunk, tol=tol, label="Permutação",
+                   stat_fn=lambda x: (1.0 + (x >= iv_obs).sum()) / (x.shape[0] + 1.0))
+    R = int(sums.shape[0])
+    weights = (sums / iv_period) if iv_period>0 else np.zeros(R, dtype=float)
     w_obs = (df_sel["IV_vagas"].sum()/iv_period) if iv_period>0 else 0.0
     pval = float((1.0 + (weights >= w_obs).sum()) / (len(weights)+1.0))
-    fig,ax=_mkfig(7.2, 4.6)
-    ax.hist(weights*100, bins=40, edgecolor='black')
-    ax.axvline(w_obs*100, color='red', linestyle='--', label=f"w obs = {w_obs*100:.2f}%")
-    ax.set_xlabel("Peso permutado (%)"); ax.set_ylabel("Frequência"); ax.set_title("Permutação do peso (w)")
-    ax.legend(); plt.tight_layout()
     perm_png=os.path.join(EXPORT_DIR, f"perm_weight_hist_{n_sel}_{R}.png")
-    fig.savefig(perm_png, bbox_inches='tight', dpi=GLOBAL_FIG_DPI); plt.close(fig); plt.close('all')
-    return (pval, perm_png)
+    _fig_submit(_plot_weight_hist, weights*100, w_obs*100, f"w obs = {w_obs*100:.2f}%",
+                "Peso permutado (%)", "Permutação do peso (w)", perm_png)
+    return (pval, perm_png, R)
+
+def _psa_weights(nc: np.ndarray, n: np.ndarray, sel_mask: np.ndarray, a_s: np.ndarray, p_s: np.ndarray,
+                 mem_mb: float) -> np.ndarray:
+    """
+    w de cada réplica da PSA, em blocos (B × peritos selecionados):
+      E = ceil(max(0, NC − N·p)),  IV = ceil(α·E),  w = Σ_sel IV / ceil(α·Σ NC).
+    """
+    R = int(a_s.shape[0])
+    ws = np.zeros(R, dtype=float)
+    nc_tot = float(nc.sum())
+    iv_period = np.ceil(a_s * nc_tot)
+    nc_sel = nc[sel_mask].astype(float); n_sel = n[sel_mask].astype(float)
+    if nc_sel.size == 0:
+        return ws
+    B = int(max(1, min(R, int(max(1.0, float(mem_mb or 0)) * 1024 * 1024) // (nc_sel.size * 24))))
+    for s0 in range(0, R, B):
+        s1 = min(R, s0 + B)
+        E = np.ceil(np.maximum(0.0, nc_sel[None, :] - n_sel[None, :] * p_s[s0:s1, None]))
+        iv_sel = np.ceil(a_s[s0:s1, None] * E).sum(axis=1)
+        ip = iv_period[s0:s1]
+        ws[s0:s1] = np.divide(iv_sel, ip, out=np.zeros_like(iv_sel), where=ip > 0)
+    return ws
+
+def _mc_psa_chunk(rng: np.random.Generator, size: int, a_al: float, b_al: float, a_p: float, b_p: float,
+                  nc_arr: np.ndarray, n_arr: np.ndarray, sel_mask: np.ndarray, mem_mb: float) -> np.ndarray:
+    a_s = rng.beta(a_al, b_al, size=int(size))
+    p_s = rng.beta(a_p,  b_p,  size=int(size))
+    return _psa_weights(nc_arr, n_arr, sel_mask, a_s, p_s, mem_mb)
 
 def run_psa(df_all_base: pd.DataFrame, df_sel_base: pd.DataFrame, alpha: float, p_br: float,
-            total: int, nc: int, R: int, s_star: Optional[float], alpha_strength: float=50.0) -> Tuple[Tuple[float,float,float], str]:
+            total: int, nc: int, R: int, s_star: Optional[float], alpha_strength: float=50.0,
+            seed: Optional[int]=None, mem_mb: float=256.0, workers: Optional[int]=1,
+            chunk: int=MC_CHUNK_DEFAULT, tol: Optional[float]=None) -> Tuple[Tuple[float,float,float], str, int]:
     if R<=0 or df_all_base.empty:
-        return ((float('nan'),float('nan'),float('nan')), "")
-    rng=np.random.default_rng()
+        return ((float('nan'),float('nan'),float('nan')), "", 0)
     a_al = max(alpha*alpha_strength, 1e-3); b_al=max((1.0-alpha)*alpha_strength, 1e-3)
     a_p  = nc + 1.0; b_p = (total - nc) + 1.0
-    ws=[]
-    for _ in range(int(R)):
-        a_s = float(rng.beta(a_al, b_al))
-        p_s = float(rng.beta(a_p,  b_p))
-        m = df_all_base.copy()
-        m["E_raw"]=m["NC"] - m["N"]*float(p_s)
-        m["E"]=np.maximum(0, m["E_raw"])
-        m["E"]=np.ceil(m["E"]).astype(int)
-        m["IV_vagas"]=np.ceil(float(a_s)*m["E"]).astype(int)
-        sel = m if s_star is None else m.loc[m["score_final"]>=s_star].copy()
-        iv_period = int(math.ceil(a_s * float(m["NC"].sum())))
-        iv_sel    = int(sel["IV_vagas"].sum()) if not sel.empty else 0
-        w = (iv_sel/iv_period) if iv_period>0 else 0.0
-        ws.append(w)
-    ws=np.array(ws,dtype=float)
+    t0 = time.perf_counter()
+    nc_arr = pd.to_numeric(df_all_base["NC"], errors="coerce").fillna(0).to_numpy(dtype=float)
+    n_arr  = pd.to_numeric(df_all_base["N"],  errors="coerce").fillna(0).to_numpy(dtype=float)
+    if s_star is None:
+        sel_mask = np.ones(nc_arr.shape[0], dtype=bool)
+    else:
+        sel_mask = (pd.to_numeric(df_all_base["score_final"], errors="coerce") >= s_star).to_numpy()
+    ws = _mc_run(_mc_psa_chunk, (a_al, b_al, a_p, b_p, nc_arr, n_arr, sel_mask, mem_mb), int(R),
+                 seed=seed, workers=workers, chunk=chunk, tol=tol, label="PSA",
+                 stat_fn=lambda x: np.percentile(x, [2.5, 50, 97.5]))
+    R = int(ws.shape[0])
+    dt = time.perf_counter() - t0
+    print(f"[INFO] PSA: {R} réplicas em {dt:.2f}s ({R/max(dt,1e-9):,.0f} amostras/s).")
     p50=float(np.percentile(ws,50)); p2=float(np.percentile(ws,2.5)); p97=float(np.percentile(ws,97.5))
-    fig,ax=_mkfig(7.2, 4.6)
-    ax.hist(ws*100, bins=40, edgecolor='black')
-    ax.axvline(p50*100, color='red', linestyle='--', label=f"mediana = {p50*100:.2f}%")
-    ax.set_xlabel("Peso (w) em %"); ax.set_ylabel("Frequência"); ax.set_title("PSA — distribuição do peso (w)")
-    ax.legend(); plt.tight_layout()
     psa_png=os.path.join(EXPORT_DIR, f"psa_weight_hist_{R}.png")
-    fig.savefig(psa_png, bbox_inches='tight', dpi=GLOBAL_FIG_DPI); plt.close(fig); plt.close('all')
-    return ((p50,p2,p97), psa_png)
+    _fig_submit(_plot_weight_hist, ws*100, p50*100, f"mediana = {p50*100:.2f}%",
+                "Peso (w) em %", "PSA — distribuição do peso (w)", psa_png)
+    return ((p50,p2,p97), psa_png, R)
 
 # =======================
 # Tabelas (ReportLab)
@@ -1287,10 +1693,16 @@ def _df_to_table(
         hAlign="LEFT"
     )
 
+    tbl.setStyle(_table_style(font_size, header_font_size))
+    return tbl
+
+@lru_cache(maxsize=32)
+def _table_style(font_size: float, header_font_size: float) -> TableStyle:
+    """TableStyle padrão das tabelas do relatório (um por combinação de fontes)."""
     # paddings menores ajudam quando font_size ~7–8
     pad = 2 if font_size <= 8 else 3
 
-    style = TableStyle([
+    return TableStyle([
         # header
         ("FONTNAME", (0,0), (-1,0), FONT_BOLD),
         ("FONTSIZE", (0,0), (-1,0), header_font_size),
@@ -1312,8 +1724,6 @@ def _df_to_table(
         ("TOPPADDING", (0,0), (-1,-1), pad),
         ("BOTTOMPADDING", (0,0), (-1,-1), pad),
     ])
-    tbl.setStyle(style)
-    return tbl
 
 def _image_flowable(path: str, max_w: float) -> Image:
     im = Image(path)
@@ -1397,9 +1807,9 @@ def build_pdf(meta: Dict[str, Any],
                      padding: float = 2.0) -> float:
         sb = float(size_body if size_body is not None else TABLE_FONT_SIZE)
         sh = float(size_header if size_header is not None else TABLE_HEADER_FONT_SIZE or sb)
-        max_pts = pdfmetrics.stringWidth(str(header_text), font_header, sh)
+        max_pts = _string_width(str(header_text), font_header, sh)
         for s in strings:
-            max_pts = max(max_pts, pdfmetrics.stringWidth(str(s), font_body, sb))
+            max_pts = max(max_pts, _string_width(str(s), font_body, sb))
         return max_pts + 2.0 * padding
 
     story: List = []
@@ -1468,6 +1878,10 @@ def build_pdf(meta: Dict[str, Any],
             story.append(Spacer(1, 4))
             story += _comment_to_flowables_with_math(comments["tornado"], STYLES["Small"], doc.width, tmp_imgs)
         story.append(Spacer(1, 10))
+    if pngs.get("sens_heatmap"):
+        story.append(Paragraph("Sensibilidade do peso — grade α × p_BR", STYLES["Heading2"]))
+        story.append(_image_flowable(pngs["sens_heatmap"], max_w=doc.width * PDF_IMG_FRAC))
+        story.append(Spacer(1, 10))
 
     # ====== ESTRATOS ======
     if (not df_strat_tot.empty):
@@ -1757,6 +2171,8 @@ def parse_args() -> argparse.Namespace:
     grp_sens.add_argument('--sens-plot', action='store_true')
     grp_sens.add_argument('--sens-alpha-frac', type=float, default=0.10)
     grp_sens.add_argument('--sens-pbr-pp', type=float, default=0.02)
+    grp_sens.add_argument('--sens-grid', type=int, default=0, metavar="N",
+                          help="Grade N×N de α (±sens-alpha-frac) × p_BR (±sens-pbr-pp): CSV + heatmap do peso.")
     grp_sens.add_argument('--by', choices=['cr','dr'])
 
     # ── Testes estatísticos ─────────────────────────────────────────
@@ -1765,6 +2181,17 @@ def parse_args() -> argparse.Namespace:
     grp_tests.add_argument('--betabin', action='store_true')
     grp_tests.add_argument('--permute-weight', type=int, default=0, metavar="N")
     grp_tests.add_argument('--permute-stratify', action='store_true')
+    grp_tests.add_argument('--perm-mem-mb', type=float, default=256.0, metavar="MB",
+                           help="Teto de memória por bloco de réplicas (permutação e PSA; default: 256 MB).")
+    grp_tests.add_argument('--seed', type=int, default=None,
+                           help="Semente do gerador aleatório (permutação e PSA reprodutíveis).")
+    grp_tests.add_argument('--mc-workers', type=int, default=1, metavar="N",
+                           help="Processos para permutação/PSA (default: 1 = em série; 0 = todos os núcleos). Não altera o resultado.")
+    grp_tests.add_argument('--mc-chunk', type=int, default=MC_CHUNK_DEFAULT, metavar="N",
+                           help=f"Réplicas por lote Monte Carlo (default: {MC_CHUNK_DEFAULT}); junto com --seed define as amostras.")
+    grp_tests.add_argument('--mc-tol', type=float, default=None, metavar="TOL",
+                           help="Parada antecipada: encerra quando o p-valor (permutação) ou os percentis da PSA variam ≤ TOL "
+                                f"em {MC_STABLE_CHUNKS} lotes seguidos.")
     grp_tests.add_argument('--cmh', type=str, default=None, help="Ex.: cr ou by=cr")
     grp_tests.add_argument('--psa', type=int, default=0, metavar="N")
     grp_tests.add_argument('--psa-alpha-strength', type=float, default=50.0)
@@ -1801,6 +2228,8 @@ def parse_args() -> argparse.Namespace:
                          help="Multiplicador do tamanho dos gráficos (ex.: 0.8 = 80%).")
     grp_fig.add_argument('--fig-dpi', type=int, default=300,
                          help="DPI para os PNGs (afeta nitidez/tamanho do arquivo).")
+    grp_fig.add_argument('--fig-workers', type=int, default=0, metavar="N",
+                         help="Processos para renderizar os gráficos em paralelo (0 = automático; 1 = em série).")
     grp_fig.add_argument('--pdf-img-frac', type=float, default=1.0,
                          help="Fator da largura das imagens dentro do PDF (ex.: 0.8 = 80% de doc.width).")
                          
@@ -1838,6 +2267,10 @@ def parse_args() -> argparse.Namespace:
     grp_exp = ap.add_argument_group("Exportação")
     grp_exp.add_argument('--export-png', action='store_true')
     grp_exp.add_argument('--export-pdf', action='store_true')
+    grp_exp.add_argument('--pdf-workers', type=int, default=0,
+                         help="Front .org renderizados em paralelo (Emacs/LaTeX); 0 = automático.")
+    grp_exp.add_argument('--pdf-force', action='store_true',
+                         help="Renderiza os front .org mesmo sem mudança (ver _pdf_build.json ao lado dos PDFs).")
 
     # ── Front matter como texto (ReportLab) ─────────────────────────
     grp_front_text = ap.add_argument_group("Front (texto .org convertido em parágrafos)")
@@ -1895,6 +2328,7 @@ def main():
     GLOBAL_FIG_SCALE = float(getattr(args, "fig_scale", 1.0) or 1.0)
     GLOBAL_FIG_DPI   = int(getattr(args, "fig_dpi", FIG_DPI_DEFAULT) or FIG_DPI_DEFAULT)
     PDF_IMG_FRAC     = max(0.1, min(float(getattr(args, "pdf_img_frac", 1.0) or 1.0), 1.0))
+    _FIG_POOL_STATE["pool"] = FigurePool(getattr(args, "fig_workers", 0))
 
     # === margens de página vindas das flags ===
     global PDF_MARGIN_LEFT_CM, PDF_MARGIN_RIGHT_CM, PDF_MARGIN_TOP_CM, PDF_MARGIN_BOTTOM_CM
@@ -1953,43 +2387,43 @@ def main():
         })
         return m
 
-    def _export_pngs_for_block(df_all, df_sel, meta):
-        png_top = exportar_png_top(df_sel, meta) if args.export_png and not df_sel.empty else None
-        png_cotovelo = plot_curva_cotovelo(
-            df_all, meta.get('score_cut'), args.start, args.end,
+    def _export_pngs_for_block(df_all, df_sel, meta, curve=None):
+        # as figuras vão para o pool (Futures); resolvidas antes dos comentários/PDF
+        png_top = _fig_submit(exportar_png_top, df_sel, meta) if args.export_png and not df_sel.empty else None
+        png_cotovelo = _fig_submit(
+            plot_curva_cotovelo, df_all, meta.get('score_cut'), args.start, args.end,
             meta.get('iv_total_sel'), meta.get('iv_total_period'), meta.get('peso_sel'),
-            meta.get('delta_tmea_sel'), meta.get('delta_tmea_period'), args.tmea_br
+            meta.get('delta_tmea_sel'), meta.get('delta_tmea_period'), args.tmea_br,
+            curve=curve
         ) if args.export_png and not df_all.empty else None
 
         # Tornado (sensibilidade determinística)
         png_tornado = None
         sens_delta: Dict[str, float] = {}
-        if args.sens_plot and not df_all.empty:
-            # variação em α
-            for sign, key in [(-1, "alpha_minus"), (1, "alpha_plus")]:
-                a2 = max(min(args.alpha * (1.0 + sign * args.sens_alpha_frac), 0.9999), 1e-4)
-                m2 = df_all.copy()
-                m2["E_raw"]   = m2["NC"] - m2["N"]*float(meta['p_br'])
-                m2["E"]       = np.maximum(0, m2["E_raw"])
-                m2["E"]       = np.ceil(m2["E"]).astype(int)
-                m2["IV_vagas"]= np.ceil(float(a2)*m2["E"]).astype(int)
-                sel2 = m2 if meta['score_cut'] is None else m2.loc[m2["score_final"]>=meta['score_cut']].copy()
-                ivp2 = int(math.ceil(a2 * float(m2["NC"].sum())))
-                ivs2 = int(sel2["IV_vagas"].sum()) if not sel2.empty else 0
-                sens_delta[key] = (ivs2 / ivp2) * 100.0 if ivp2 > 0 else 0.0
-            # variação em p_BR (± p.p.)
-            for sign, key in [(-1, "pbr_minus"), (1, "pbr_plus")]:
-                p2 = max(min(meta['p_br'] + sign * args.sens_pbr_pp, 0.9999), 1e-6)
-                m2 = df_all.copy()
-                m2["E_raw"]   = m2["NC"] - m2["N"]*float(p2)
-                m2["E"]       = np.maximum(0, m2["E_raw"])
-                m2["E"]       = np.ceil(m2["E"]).astype(int)
-                m2["IV_vagas"]= np.ceil(float(args.alpha)*m2["E"]).astype(int)
-                sel2 = m2 if meta['score_cut'] is None else m2.loc[m2["score_final"]>=meta['score_cut']].copy()
-                ivp2 = int(math.ceil(args.alpha * float(m2["NC"].sum())))
-                ivs2 = int(sel2["IV_vagas"].sum()) if not sel2.empty else 0
-                sens_delta[key] = (ivs2 / ivp2) * 100.0 if ivp2 > 0 else 0.0
-            png_tornado = exportar_png_tornado(meta, sens_delta, args.sens_alpha_frac, args.sens_pbr_pp)
+        png_sens_heatmap = None
+        if (args.sens_plot or args.sens_grid) and not df_all.empty:
+            a0, p0, cut = float(args.alpha), float(meta['p_br']), meta['score_cut']
+            a_m = max(min(a0 * (1.0 - args.sens_alpha_frac), 0.9999), 1e-4)
+            a_p = max(min(a0 * (1.0 + args.sens_alpha_frac), 0.9999), 1e-4)
+            p_m = max(min(p0 - args.sens_pbr_pp, 0.9999), 1e-6)
+            p_p = max(min(p0 + args.sens_pbr_pp, 0.9999), 1e-6)
+            if args.sens_plot:
+                # variação em α e em p_BR (± p.p.): 3×3 pontos numa única passada
+                g = _sens_grid(df_all, [a_m, a0, a_p], [p_m, p0, p_p], [cut])
+                w = g["peso_pct"].to_numpy().reshape(3, 3)
+                sens_delta.update({"alpha_minus": float(w[0, 1]), "alpha_plus": float(w[2, 1]),
+                                   "pbr_minus": float(w[1, 0]), "pbr_plus": float(w[1, 2])})
+                png_tornado = _fig_submit(exportar_png_tornado, meta, sens_delta, args.sens_alpha_frac, args.sens_pbr_pp)
+            if args.sens_grid and int(args.sens_grid) >= 2:
+                k = int(args.sens_grid)
+                cuts = [cut] if cut is None else [None, cut]
+                grid = _sens_grid(df_all, np.linspace(a_m, a_p, k), np.linspace(p_m, p_p, k), cuts)
+                csv_path = os.path.join(EXPORT_DIR, f"impacto_sens_grid_{meta['start']}_a_{meta['end']}.csv")
+                grid.to_csv(csv_path, index=False)
+                print(f"✅ Grade de sensibilidade ({k}×{k}×{len(cuts)}) salva em {csv_path}")
+                if args.export_png:
+                    png_sens_heatmap = _fig_submit(
+                        exportar_png_sens_heatmap, grid.loc[grid["score_cut"].isna()] if cut is None else grid.loc[grid["score_cut"] == cut], meta)
         meta['sens_delta'] = sens_delta
 
         # Estratos
@@ -1997,13 +2431,14 @@ def main():
         if args.by:
             df_strat_tot, df_strat_sel = _compute_strata(df_all, df_sel, by=args.by, alpha=args.alpha, p_br=meta['p_br'])
             if args.export_png:
-                png_strat = exportar_png_strat(df_strat_tot, df_strat_sel, args.by, meta)
+                png_strat = _fig_submit(exportar_png_strat, df_strat_tot, df_strat_sel, args.by, meta)
 
         return {
             "pngs": {
                 "top": png_top,
                 "cotovelo": png_cotovelo,
                 "tornado": png_tornado,
+                "sens_heatmap": png_sens_heatmap,
                 "estratos": png_strat,
                 "perm": None,
                 "psa": None,
@@ -2014,6 +2449,7 @@ def main():
 
     def _run_tests_for_block(df_all, df_sel, meta):
         tests: Dict[str, Any] = {}
+        mc_kw = dict(workers=args.mc_workers, chunk=args.mc_chunk, tol=args.mc_tol)
         if args.test_binomial and not df_all.empty:
             tests['binomial_df'] = run_test_binomial(df_all, meta['p_br'])
         if args.betabin and not df_all.empty:
@@ -2022,8 +2458,9 @@ def main():
             tests['rho_mom'] = rho_mom
         if args.permute_weight and not df_all.empty and not df_sel.empty:
             stratify = args.by if (args.permute_stratify and args.by in ('cr','dr')) else None
-            perm_p, perm_png = run_permutation_weight(df_all, df_sel, args.alpha, meta['p_br'], args.permute_weight, stratify_by=stratify)
-            tests['perm_p'] = perm_p; tests['perm_png'] = perm_png; tests['perm_R'] = int(args.permute_weight)
+            perm_p, perm_png, perm_R = run_permutation_weight(df_all, df_sel, args.alpha, meta['p_br'], args.permute_weight, stratify_by=stratify,
+                                                                seed=args.seed, mem_mb=args.perm_mem_mb, **mc_kw)
+            tests['perm_p'] = perm_p; tests['perm_png'] = perm_png; tests['perm_R'] = int(perm_R)
         if args.cmh and not df_all.empty:
             cmh_arg = args.cmh.strip()
             cmh_by = cmh_arg.split("=",1)[1].strip().lower() if cmh_arg.lower().startswith("by=") else cmh_arg.strip().lower()
@@ -2052,11 +2489,12 @@ def main():
                     _ = p_tmp
             except Exception:
                 pass
-            ci, psa_png = run_psa(df_all, df_sel, args.alpha, meta['p_br'],
+            ci, psa_png, psa_R = run_psa(df_all, df_sel, args.alpha, meta['p_br'],
                                   int(total_calc or df_all["N"].sum()),
                                   int(nc_calc or df_all["NC"].sum()),
-                                  R=int(args.psa), s_star=meta.get('score_cut'), alpha_strength=float(args.psa_alpha_strength))
-            tests['psa_ci'] = ci; tests['psa_R'] = int(args.psa)
+                                  R=int(args.psa), s_star=meta.get('score_cut'), alpha_strength=float(args.psa_alpha_strength),
+                                  seed=args.seed, mem_mb=args.perm_mem_mb, **mc_kw)
+            tests['psa_ci'] = ci; tests['psa_R'] = int(psa_R)
             return tests, psa_png
         return tests, None
 
@@ -2211,11 +2649,7 @@ def main():
         return vals
 
     def _binom_pvals_subset(df_sub: pd.DataFrame, p_br: float) -> np.ndarray:
-        pvals=[]
-        for _, r in df_sub.iterrows():
-            n=int(r["N"]); k=int(r["NC"])
-            pvals.append(_binom_sf_one_sided(k, n, p_br) if n>0 else 1.0)
-        return np.array(pvals, dtype=float)
+        return _binom_sf_batch(df_sub["NC"].astype(int).values, df_sub["N"].astype(int).values, p_br)
 
     def _detect_nc_outliers(df_all_base: pd.DataFrame, p_br: float) -> Tuple[pd.DataFrame, Dict[str,Any]]:
         mode = getattr(args, "nc_outlier_mode", "off")
@@ -2441,6 +2875,7 @@ def main():
         pngs = block["pngs"]; df_strat_tot = block["df_strat_tot"]; df_strat_sel = block["df_strat_sel"]
         tests, psa_png = _run_tests_for_block(base_df, df_sel, meta)
         if psa_png: pngs['psa'] = psa_png
+        pngs = {k: _fig_result(v) for k, v in pngs.items()}; _fig_wait()
         comments = _comments_for_block(base_df, df_sel, meta, pngs, tests, df_strat_tot, df_strat_sel)
 
         # PDF e organização (inalterados) …
@@ -2450,37 +2885,8 @@ def main():
         final_path = None
         if args.export_pdf:
             pdf_out = os.path.join(EXPORT_DIR, f"impacto_fila_{args.start}_a_{args.end}.pdf")
-            front_pdfs: List[str] = []
             use_header_and_text = bool(getattr(args, "header_and_text", False))
-            if use_header_and_text:
-                path_ht = getattr(args, "header_and_text_file", None)
-                if not path_ht:
-                    base_hint = args.front_org or args.header_org or os.getcwd()
-                    base_dir  = str(Path(base_hint).resolve().parent if os.path.exists(str(base_hint)) else Path(base_hint))
-                    path_ht = os.path.join(base_dir, "header_and_text.org")
-                try:
-                    ht_pdf = _render_org_to_pdf(path_ht)
-                    if os.path.exists(ht_pdf): front_pdfs.append(ht_pdf)
-                except Exception as e:
-                    print(f"[warn] Falha ao renderizar header_and_text: {e}", file=sys.stderr)
-
-            if getattr(args, "front_pdf", None):
-                if isinstance(args.front_pdf, (list, tuple)):
-                    for p in args.front_pdf:
-                        if p and os.path.exists(p): front_pdfs.append(str(p))
-                elif isinstance(args.front_pdf, str) and os.path.exists(args.front_pdf):
-                    front_pdfs.append(args.front_pdf)
-
-            if getattr(args, "front_org_render", None):
-                org_list = args.front_org_render
-                if isinstance(org_list, str): org_list = [org_list]
-                for opath in (org_list or []):
-                    try:
-                        pdf_r = _render_org_to_pdf(opath)
-                        if os.path.exists(pdf_r): front_pdfs.append(pdf_r)
-                    except Exception as e:
-                        print(f"[warn] Falha ao renderizar ORG '{opath}': {e}", file=sys.stderr)
-
+            front_pdfs: List[str] = _front_pdfs_from_args(args, use_header_and_text)
             inject_front = len(front_pdfs) > 0
             header_for_build = None if inject_front or use_header_and_text else args.header_org
             front_for_build  = None if inject_front or use_header_and_text else args.front_org
@@ -2534,8 +2940,9 @@ def main():
     # >>> ESCOPAR A BASE para todos os gráficos de base
     df_all_scoped = _apply_scope(df_all, getattr(args, "scope_csv", None))
 
-    # Corte de cotovelo calculado na base escopada
-    s_star = _elbow_cutoff_score(df_all_scoped)
+    # Corte de cotovelo calculado na base escopada (a curva é reaproveitada no gráfico)
+    impact_curve = _impact_curve(df_all_scoped)
+    s_star = _elbow_cutoff_score(df_all_scoped, curve=impact_curve)
 
     # Outliers por %NC usando a base escopada
     df_nc_out, meta_nc = _detect_nc_outliers(df_all_scoped, p_br)
@@ -2598,47 +3005,19 @@ def main():
         })
         # usar base escopada em métricas/testes/gráficos
         meta = _metrics_for_block(df_all_scoped, df_sel, meta)
-        block = _export_pngs_for_block(df_all_scoped, df_sel, meta)
+        block = _export_pngs_for_block(df_all_scoped, df_sel, meta, curve=impact_curve)
         pngs = block["pngs"]; df_strat_tot = block["df_strat_tot"]; df_strat_sel = block["df_strat_sel"]
         tests, psa_png = _run_tests_for_block(df_all_scoped, df_sel, meta)
         if psa_png: pngs['psa'] = psa_png
+        pngs = {k: _fig_result(v) for k, v in pngs.items()}; _fig_wait()
         comments = _comments_for_block(df_all_scoped, df_sel, meta, pngs, tests, df_strat_tot, df_strat_sel)
 
         # [restante igual ao seu: build_pdf, concat front, apêndice NC, logs e organização]
         final_path = None
         if args.export_pdf:
             pdf_out = os.path.join(EXPORT_DIR, f"impacto_fila_{args.start}_a_{args.end}.pdf")
-            front_pdfs: List[str] = []
             use_header_and_text = bool(getattr(args, "header_and_text", False))
-            if use_header_and_text:
-                path_ht = getattr(args, "header_and_text_file", None)
-                if not path_ht:
-                    base_hint = args.front_org or args.header_org or os.getcwd()
-                    base_dir  = str(Path(base_hint).resolve().parent if os.path.exists(str(base_hint)) else Path(base_hint))
-                    path_ht = os.path.join(base_dir, "header_and_text.org")
-                try:
-                    ht_pdf = _render_org_to_pdf(path_ht)
-                    if os.path.exists(ht_pdf): front_pdfs.append(ht_pdf)
-                except Exception as e:
-                    print(f"[warn] Falha ao renderizar header_and_text: {e}", file=sys.stderr)
-
-            if getattr(args, "front_pdf", None):
-                if isinstance(args.front_pdf, (list, tuple)):
-                    for p in args.front_pdf:
-                        if p and os.path.exists(p): front_pdfs.append(str(p))
-                elif isinstance(args.front_pdf, str) and os.path.exists(args.front_pdf):
-                    front_pdfs.append(args.front_pdf)
-
-            if getattr(args, "front_org_render", None):
-                org_list = args.front_org_render
-                if isinstance(org_list, str): org_list = [org_list]
-                for opath in (org_list or []):
-                    try:
-                        pdf_r = _render_org_to_pdf(opath)
-                        if os.path.exists(pdf_r): front_pdfs.append(pdf_r)
-                    except Exception as e:
-                        print(f"[warn] Falha ao renderizar ORG '{opath}': {e}", file=sys.stderr)
-
+            front_pdfs: List[str] = _front_pdfs_from_args(args, use_header_and_text)
             inject_front = len(front_pdfs) > 0
             header_for_build = None if inject_front or use_header_and_text else args.header_org
             front_for_build  = None if inject_front or use_header_and_text else args.front_org
@@ -2701,6 +3080,9 @@ def main():
 if __name__ == "__main__":
     # Corrige um erro de digitação comum em --sens_alpha_frac
     sys.argv = [a.replace("sens_alpha_fr ac", "sens_alpha_frac") for a in sys.argv]
-    main()
+    try:
+        main()
+    finally:
+        _fig_pool_close()
 
 
@@ -14,20 +14,32 @@ import os
 import sys
 import re
 import csv
+import json
 import shutil
+import hashlib
+import importlib.util
 import sqlite3
 import subprocess
 import tempfile
 import time
 import calendar
 import shlex
+import queue
+import threading
+import cProfile
 import numpy as np
 from glob import glob
 from datetime import datetime, date
 from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional, Set, Dict, List, Tuple, Any
 from argparse import BooleanOptionalAction
 
+try:
+    import resource  # POSIX: CPU/RSS por processo filho via os.wait4
+except ImportError:
+    resource = None
+
 import pandas as pd
 from PyPDF2 import PdfMerger
 
@@ -154,8 +166,15 @@ GLOBAL_SCRIPTS = [
     "g_weekday_to_weekend_table.py",
 ]
 
+# Cache por período do panorama weekday→weekend (modo sql do g_weekday_to_weekend_table)
+W2W_CACHE_DIR = os.path.join(OUTPUTS_DIR, "_cache", "weekday_to_weekend")
+
 def build_commands_for_global(script_file: str, start: str, end: str) -> list:
-    """Monta comando para scripts globais que só precisam de --start/--end."""
+    """
+    Monta comando para scripts globais que só precisam de --start/--end.
+    O weekday→weekend roda no modo sql: filtro/contagens no SQLite e resultado em
+    cache por período, reaproveitado por todos os runs (Top 10, individual...) do mês.
+    """
     return [[
         sys.executable, script_file,
         "--db", DB_PATH,
@@ -165,6 +184,8 @@ def build_commands_for_global(script_file: str, start: str, end: str) -> list:
         "--export-org",
         "--export-png",
         "--export-protocols",
+        "--mode", "sql",
+        "--cache-dir", W2W_CACHE_DIR,
     ]]
 
 # ────────────────────────────────────────────────────────────────────────────────
@@ -194,12 +215,52 @@ RCHECK_GROUP_SCRIPTS = [
     ("08_weighted_props.R",              {"pass_top10": True, "defaults": {"--measure": "le", "--threshold": FIFTEEN_THRESHOLD}}),
 ]
 
+# Raiz do projeto no sys.path (utils/ quando rodado como script: python reports/make_kpi_report.py)
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
 # Comentário ChatGPT para apêndice R (opcional)
 try:
     from utils.comentarios import comentar_r_apendice
 except Exception:
     comentar_r_apendice = None
 
+# Build de PDFs incremental/paralelo (--pdf-workers / --pdf-force)
+from utils.pdf_build import PdfBuildStage, is_newer as _pdf_is_newer
+# Backend nativo sem pandoc/xelatex (--pdf-backend reportlab)
+from utils.org_pdf import render_org_pdf
+
+# Montagem dos .org em fluxo: normalizações numa passada, gravando direto no arquivo
+from utils.org_stream import (
+    OrgWriter, ANSI_RE as _ANSI_RE,
+    iter_shift_headings, iter_rewrite_image_links, iter_blank_around_tables,
+    iter_normalize_tables, iter_wrap_ascii, iter_protect_for_pandoc, iter_tables_in_quote,
+    iter_file_lines, normalize_table_line, rewrite_org_file,
+)
+
+# Imagens deduplicadas por conteúdo (hardlinks no reports/outputs/_assets) e variantes print/screen
+from utils import image_assets as _image_assets
+
+# --no-img-dedupe / --img-variants (ver main)
+_IMG_ASSETS_STATE: Dict[str, Any] = {"dedupe": True, "variants": False}
+
+def _place_png(src: str, dst: str) -> None:
+    """Move um PNG de exports/ para imgs/ pela etapa de imagens (nunca reescreve dst no lugar)."""
+    try:
+        _image_assets.place_image(src, dst, move=True, dedupe=_IMG_ASSETS_STATE["dedupe"],
+                                  variants=_IMG_ASSETS_STATE["variants"])
+    except Exception as e:
+        print(f"[AVISO] Falha ao colocar {os.path.basename(src)} em imgs/: {e}")
+
+# Comentários em duas fases (--defer-comments / --drain-comments), ver utils/comment_queue.py
+try:
+    from utils import comment_queue as _comment_queue
+except Exception:
+    _comment_queue = None
+
+# defer=True: os blocos de comentário do .org levam o marcador "# comment-stem: <stem>"
+_COMMENT_QUEUE_STATE: Dict[str, Any] = {"defer": False}
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Conhecimento explícito das flags dos scripts Python
 # ────────────────────────────────────────────────────────────────────────────────
@@ -279,7 +340,51 @@ def parse_args():
     p.add_argument('--high-nc-threshold', type=float, default=90.0)
     p.add_argument('--high-nc-min-tasks', type=int, default=50)
     p.add_argument('--r-bin', default='Rscript')
+    p.add_argument('--period-extract', action=BooleanOptionalAction, default=None,
+                   help="Extrato Feather do período (reports/outputs/_extracts/) carregado uma vez por worker R "
+                        "persistente no lugar de consultar o SQLite a cada check. Só vale com --r-workers ≥ 1 "
+                        "(ligado por padrão nesse caso); requer pyarrow e o pacote R arrow.")
+    p.add_argument('--r-workers', type=int, default=0,
+                   help="Roda os R checks em N processos R persistentes (r_checks/_worker.R), que carregam "
+                        "os pacotes uma única vez; com N>1 os checks rodam em paralelo, sem registro de artefatos "
+                        "(com --resume/--artifact-store fica em 1 worker). 0 = um Rscript por check.")
     p.add_argument('--plan-only', action='store_true', help='Apenas listar o plano de execução (dry-run) e sair.')
+    p.add_argument('--resume', action='store_true',
+                   help=f"Retoma um run interrompido: pula comandos cujas entradas não mudaram e cujos "
+                        f"artefatos ainda existem (ver {RUN_MANIFEST_NAME} na pasta do relatório).")
+    p.add_argument('--profile', choices=['cprofile', 'pyinstrument'], default=None,
+                   help=f"Gera um profile por etapa em <relatorio>/profiles/ (além do {RUN_TIMINGS_NAME}, sempre emitido).")
+    p.add_argument('--pdf-workers', type=int, default=0,
+                   help="PDFs gerados em paralelo (xelatex em diretórios temporários isolados); 0 = automático.")
+    p.add_argument('--pdf-force', action='store_true',
+                   help="Regera todos os PDFs mesmo sem mudança no .org/imagens (ver pdfs/_pdf_build.json).")
+    p.add_argument('--pdf-per-perito', action='store_true',
+                   help="Com --export-pdf em run de grupo, também gera um PDF por perito (em paralelo).")
+    p.add_argument('--pdf-backend', choices=['pandoc', 'reportlab'], default='pandoc',
+                   help="pandoc: Pandoc + xelatex (layout completo). reportlab: render direto em Python, "
+                        "sem LaTeX — bem mais rápido, layout simplificado (ver utils/org_pdf.py).")
+    p.add_argument('--img-dedupe', action=BooleanOptionalAction, default=True,
+                   help="PNGs iguais entre relatórios/runs viram hardlinks de um único arquivo em "
+                        "reports/outputs/_assets/ (--no-img-dedupe: cópia por relatório, como antes).")
+    p.add_argument('--img-gc', action=BooleanOptionalAction, default=True,
+                   help="Ao final do run, remove de reports/outputs/_assets/ as imagens que nenhum relatório "
+                        "referencia mais (hardlink único: relatórios apagados) [default: ligado].")
+    p.add_argument('--img-variants', action='store_true',
+                   help="imgs/ recebe a variante print (até 2480 px de largura, A4 a 300 DPI) e imgs/screen/ "
+                        "a variante screen (até 1280 px); requer Pillow.")
+    p.add_argument('--defer-comments', action='store_true',
+                   help="Fase 1 dos comentários IA: o relatório sai com os comentários locais e os pedidos "
+                        "à API ficam na fila <relatorio>/_comment_queue/ (processar depois com --drain-comments).")
+    p.add_argument('--drain-comments', action='store_true',
+                   help="Fase 2: processa a fila de comentários do relatório (mesmos --start/--end/seleção), "
+                        "reinjeta os textos nos .org e, com --export-pdf, regera o PDF. Não roda os scripts.")
+    p.add_argument('--artifact-store', action=BooleanOptionalAction, default=False,
+                   help="Reaproveita PNG/.org/.md/comentários já gerados para as mesmas entradas "
+                        "(script, período, perito, modo, thresholds, versão do DB) em reports/outputs/_artifact_store/. "
+                        "Ignorado com --defer-comments (comentários provisórios não vão para o store).")
+    p.add_argument('--store-max-age-days', type=float, default=30.0,
+                   help="Com --artifact-store: ao final do run remove do store as entradas não "
+                        "reaproveitadas há mais de N dias (0 = nunca remove) [default: 30].")
     p.add_argument('--fluxo', choices=['A','B'], default='B',
                    help="B (padrão): gate %NC ≥ 2× Brasil (válidas) e ranking por scoreFinal; A: ranking direto por scoreFinal.")
     # corrigindo as aspas quebradas do arquivo original
@@ -457,22 +562,49 @@ def _fetch_scores(conn, start: str, end: str, schema: dict) -> pd.DataFrame:
     except Exception:
         return pd.DataFrame(columns=["nomePerito","scoreFinal","harm"])
 
-def perito_tem_dados(perito: str, start: str, end: str) -> bool:
+_PERITO_PRESENCE_CACHE: Dict[Tuple[str, str], Dict[str, int]] = {}
+
+def _perito_presence_map(start: str, end: str) -> Dict[str, int]:
+    """
+    Mapa de presença no período: {siape → N, nomePerito → N}, calculado numa
+    única consulta agrupada (filtro por substr(ini,1,10), que casa com o índice
+    idx_analises_perito_data). Cacheado por (start, end) durante o run.
+    """
+    key = (start, end)
+    if key in _PERITO_PRESENCE_CACHE:
+        return _PERITO_PRESENCE_CACHE[key]
+
+    presence: Dict[str, int] = {}
     with sqlite3.connect(DB_PATH) as conn:
         schema = _detect_schema(conn)
         a, p = schema["analises"], schema["peritos"]
         ini = a["ini_col"]; per_fk = a["perito_fk"]; pid = p["id_col"]; nome = p["nome_col"]
-        if not all([ini, per_fk, pid, nome]):
-            return False
-        sql = f"""
-            SELECT 1
-            FROM analises a
-            JOIN peritos p ON a.{per_fk}=p.{pid}
-            WHERE p.{nome} = ? AND date(a.{ini}) BETWEEN ? AND ?
-            LIMIT 1
-        """
-        row = conn.execute(sql, (perito, start, end)).fetchone()
-        return bool(row)
+        if all([ini, per_fk, pid, nome]):
+            sql = f"""
+                SELECT p.{pid} AS siape, p.{nome} AS nome, x.n AS n
+                  FROM (
+                        SELECT {per_fk} AS fk, COUNT(*) AS n
+                          FROM analises
+                         WHERE substr({ini}, 1, 10) BETWEEN ? AND ?
+                         GROUP BY {per_fk}
+                       ) x
+                  JOIN peritos p ON p.{pid} = x.fk
+            """
+            for siape, nm, n in conn.execute(sql, (start, end)).fetchall():
+                n = int(n or 0)
+                presence[str(siape)] = presence.get(str(siape), 0) + n
+                if nm is not None:
+                    presence[str(nm)] = presence.get(str(nm), 0) + n
+
+    _PERITO_PRESENCE_CACHE[key] = presence
+    return presence
+
+def perito_tem_dados(perito: str, start: str, end: str) -> bool:
+    """
+    True se o perito (nome ou siape) possui pelo menos 1 tarefa no período.
+    Consulta o mapa de presença cacheado (uma única query por período).
+    """
+    return _perito_presence_map(start, end).get(str(perito), 0) > 0
 
 
 def gerar_scope_gate_b(start: str, end: str, min_analises: int = 50, factor_nc: float = 2.0) -> pd.DataFrame:
@@ -582,9 +714,15 @@ def _inject_comment_for_stem(stem, comments_dir, output_dir, imgs_dir=None):
       (D) imgs_dir     → *.org (extrai 1º parágrafo)
 
     Retorna ['#+BEGIN_QUOTE', ..., '#+END_QUOTE'] ou [].
+    No modo adiado, o bloco é precedido de '# comment-stem: <stem>' (e, sem
+    comentário, só o marcador é devolvido) para o --drain-comments substituí-lo.
     """
+    marker = []
+    if _COMMENT_QUEUE_STATE["defer"] and _comment_queue is not None:
+        marker = [_comment_queue.MARKER + stem]
+
     def _quote_block(txt):
-        return ["", "#+BEGIN_QUOTE", _protect_tables_in_quote(txt.strip()), "#+END_QUOTE"]
+        return ["", *marker, "#+BEGIN_QUOTE", _protect_tables_in_quote(txt.strip()), "#+END_QUOTE"]
 
     # (A) comments_dir — .org preferencial; depois .md
     if comments_dir and os.path.isdir(comments_dir):
@@ -646,7 +784,7 @@ def _inject_comment_for_stem(stem, comments_dir, output_dir, imgs_dir=None):
                 return _quote_block(extra)
 
     print(f"[comments] comentário não encontrado para stem='{stem}'")
-    return []
+    return ["", *marker] if marker else []
 
 def _find_impacto_dir_for_perito(periodo_dir: str, perito: str) -> str | None:
     """
@@ -676,7 +814,8 @@ def _copy_impacto_imgs_to_relatorio(impacto_dir: str, imgs_dir_dest: str) -> int
     moved = 0
     if os.path.isdir(src_dir):
         for src in glob(os.path.join(src_dir, "*.png")):
-            shutil.copy2(src, os.path.join(imgs_dir_dest, os.path.basename(src)))
+            _image_assets.place_image(src, os.path.join(imgs_dir_dest, os.path.basename(src)),
+                                      dedupe=_IMG_ASSETS_STATE["dedupe"], variants=_IMG_ASSETS_STATE["variants"])
             moved += 1
     return moved
 
@@ -1357,8 +1496,9 @@ def _run_reincidentes_scan(out_csv: str, min_months: int, root: str,
                            min_analises: int = 50) -> None:
     """
     (NOVA) Gera reincidentes consultando o BANCO, sem depender de .org antigos.
-    Jan->end do ano de 'end', mês a mês. Em cada mês, pega o Top 10 (scoreFinal)
-    exigindo 'min_analises' tarefas no próprio mês.
+    Jan->end do ano de 'end'. Em cada mês, pega o Top 10 (scoreFinal) exigindo
+    'min_analises' tarefas no próprio mês — tudo numa única consulta agrupada
+    por (perito, mês) e ranqueada por mês via window function.
 
     Parâmetros
     ----------
@@ -1390,69 +1530,61 @@ def _run_reincidentes_scan(out_csv: str, min_months: int, root: str,
     else:
         end_dt = datetime.strptime(end, "%Y-%m-%d").date()
 
-    # Jan/AAAA → end
+    # Jan/AAAA → end (o último mês entra inteiro, como na varredura mês a mês)
     scan_start = date(end_dt.year, 1, 1)
     scan_end   = end_dt
+    scan_last  = date(end_dt.year, end_dt.month, calendar.monthrange(end_dt.year, end_dt.month)[1])
 
-    # Iterador de meses
-    def _iter_months(dini: date, dfim: date):
-        y, m = dini.year, dini.month
-        while (y < dfim.year) or (y == dfim.year and m <= dfim.month):
-            yield y, m
-            if m == 12:
-                y, m = y + 1, 1
-            else:
-                m += 1
-
-    conn = sqlite3.connect(DB_PATH)
+    # Uma única passada: contagem por (perito, mês), HAVING min_analises no mês
+    # e ranking por mês (ROW_NUMBER) para o Top 10 de scoreFinal.
+    query = """
+        WITH mensal AS (
+            SELECT
+                p.siapePerito                         AS siape,
+                p.nomePerito                          AS nome,
+                p.cr                                  AS CR,
+                p.dr                                  AS DR,
+                substr(a.dataHoraIniPericia, 1, 7)    AS mes,
+                MAX(i.scoreFinal)                     AS score,
+                COUNT(a.protocolo)                    AS total_analises
+            FROM indicadores i
+            JOIN analises    a ON a.siapePerito = i.perito
+            JOIN peritos     p ON p.siapePerito = i.perito
+            WHERE substr(a.dataHoraIniPericia, 1, 10) BETWEEN ? AND ?
+            GROUP BY p.siapePerito, p.nomePerito, p.cr, p.dr, mes
+            HAVING total_analises >= ?
+        ),
+        ranked AS (
+            SELECT mensal.*,
+                   ROW_NUMBER() OVER (PARTITION BY mes ORDER BY score DESC, siape) AS rk
+              FROM mensal
+        )
+        SELECT siape, nome, CR, DR, mes
+          FROM ranked
+         WHERE rk <= 10
+         ORDER BY mes, rk
+    """
 
     # siape -> dados agregados
     seen = {}
 
+    conn = sqlite3.connect(DB_PATH)
     try:
-        for y, m in _iter_months(scan_start, scan_end):
-            m_ini = date(y, m, 1)
-            m_fim = date(y, m, calendar.monthrange(y, m)[1])
-
-            # Top 10 do mês por score, exigindo min_analises no mês
-            query = """
-                SELECT
-                    p.siapePerito AS siape,
-                    p.nomePerito  AS nome,
-                    p.cr          AS CR,
-                    p.dr          AS DR,
-                    MAX(i.scoreFinal) AS score,
-                    COUNT(a.protocolo) AS total_analises
-                FROM indicadores i
-                JOIN analises    a ON a.siapePerito = i.perito
-                JOIN peritos     p ON p.siapePerito = i.perito
-                WHERE date(a.dataHoraIniPericia) BETWEEN ? AND ?
-                GROUP BY p.siapePerito, p.nomePerito, p.cr, p.dr
-                HAVING total_analises >= ?
-                ORDER BY score DESC
-                LIMIT 10
-            """
-            dfm = pd.read_sql(
-                query, conn,
-                params=(m_ini.isoformat(), m_fim.isoformat(), int(min_analises))
-            )
-            if dfm.empty:
-                continue
-
-            month_key = f"{y:04d}-{m:02d}"
-            for _, row in dfm.iterrows():
-                siape = str(row["siape"])
-                entry = seen.setdefault(siape, {
-                    "nome": row["nome"],
-                    "CR":   row.get("CR", "") or "",
-                    "DR":   row.get("DR", "") or "",
-                    "meses": set(),
-                })
-                entry["meses"].add(month_key)
-
+        rows_top = conn.execute(
+            query, (scan_start.isoformat(), scan_last.isoformat(), int(min_analises))
+        ).fetchall()
     finally:
         conn.close()
 
+    for siape, nome, cr, dr, month_key in rows_top:
+        entry = seen.setdefault(str(siape), {
+            "nome":  nome,
+            "CR":    cr or "",
+            "DR":    dr or "",
+            "meses": set(),
+        })
+        entry["meses"].add(month_key)
+
     # Filtra reincidentes (>= min_months)
     rows = []
     for siape, data in seen.items():
@@ -1551,31 +1683,15 @@ def _append_reincidentes_to_org(org_path: str, csv_path: str, min_months: int =
 # ────────────────────────────────────────────────────────────────────────────────
 # Ajustes de Org e utilitários de texto
 # ────────────────────────────────────────────────────────────────────────────────
-_ANSI_RE     = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
-_BOX_DRAW_RE = re.compile(r"[┌┬┐└┴┘├┼┤│─━┃╭╮╯╰█▓▒░]")
-
+# As versões em texto abaixo delegam aos geradores de utils/org_stream.py; para
+# montar .org grandes, prefira OrgWriter.include(..., protect=True, shift=1).
 def shift_org_headings(text: str, delta: int = 1) -> str:
     """Rebaixa/eleva níveis de heading em um texto Org."""
-    lines = []
-    for ln in text.splitlines():
-        if ln.startswith('*'):
-            i = 0
-            while i < len(ln) and ln[i] == '*':
-                i += 1
-            if i > 0 and i + delta < 7 and (i < len(ln) and ln[i] == ' '):
-                ln = ('*' * (i + delta)) + ln[i:]
-        lines.append(ln)
-    return "\n".join(lines)
+    return "\n".join(iter_shift_headings(text.splitlines(), delta))
 
 def _rewrite_org_image_links(org_text: str, imgs_rel_prefix: str = "../imgs/") -> str:
     """Normaliza links [[file:...]] para apontarem para a pasta imgs/ relativa."""
-    def repl(m):
-        path = m.group(1).strip()
-        if path.startswith(("http://", "https://", "/")):
-            return m.group(0)
-        base = os.path.basename(path)
-        return f"[[file:{imgs_rel_prefix}{base}]]"
-    return re.sub(r"\[\[file:([^\]]+)\]\]", repl, org_text)
+    return "".join(iter_rewrite_image_links(org_text.splitlines(keepends=True), imgs_rel_prefix))
 
 def _nice_caption(fname: str) -> str:
     """Gera uma legenda amigável a partir do nome do arquivo."""
@@ -1598,111 +1714,27 @@ def _strip_ansi(s: str) -> str:
 
 def _wrap_ascii_blocks(text: str) -> str:
     """Envelopa trechos com pseudografismo/ANSI em #+begin_example/# +end_example."""
-    lines = text.splitlines()
-    out = []
-    in_block = False
-    for ln in lines:
-        has_ansi = bool(_ANSI_RE.search(ln))
-        has_box  = bool(_BOX_DRAW_RE.search(ln))
-        if (has_ansi or has_box) and ln.strip():
-            if not in_block:
-                out.append("#+begin_example")
-                in_block = True
-            out.append(_strip_ansi(ln))
-            continue
-        else:
-            if in_block:
-                out.append("#+end_example")
-                in_block = False
-            out.append(ln)
-    if in_block:
-        out.append("#+end_example")
-    return "\n".join(out)
+    return "\n".join(iter_wrap_ascii(text.splitlines()))
 
 def _ensure_blank_lines_around_tables(text: str) -> str:
     """Garante linhas em branco ao redor de tabelas Org para não confundir o Pandoc."""
-    text = re.sub(r"(\[Tabela[^\]]*\])\s*(\|)", r"\1\n\2", text, flags=re.I)
-    lines = text.splitlines()
-    out = []
-    i = 0
-    while i < len(lines):
-        ln = lines[i]
-        if ln.lstrip().startswith("|"):
-            if out and out[-1].strip() != "":
-                out.append("")
-            while i < len(lines) and lines[i].lstrip().startswith("|"):
-                out.append(lines[i])
-                i += 1
-            if i < len(lines) and lines[i].strip() != "":
-                out.append("")
-            continue
-        out.append(ln)
-        i += 1
-    return "\n".join(out)
+    return "\n".join(iter_blank_around_tables(text.splitlines()))
 
 def _normalize_org_table_block(block_lines):
     """Normaliza um bloco de tabela Org (pipes, espaços e bordas)."""
-    fixed = []
-    for ln in block_lines:
-        raw = ln.strip()
-        if raw == "|" or raw == "":
-            continue
-        raw = re.sub(r"\s*\|\s*", " | ", raw)
-        raw = raw.strip()
-        if not raw.startswith("|"):
-            raw = "| " + raw
-        if not raw.endswith("|"):
-            raw = raw + " |"
-        fixed.append(raw)
-    return fixed
+    return [fixed for fixed in map(normalize_table_line, block_lines) if fixed]
 
 def _normalize_all_tables(text: str) -> str:
     """Varre o texto Org e normaliza todas as tabelas."""
-    lines = text.splitlines()
-    out = []
-    i = 0
-    while i < len(lines):
-        if lines[i].lstrip().startswith("|"):
-            block = []
-            while i < len(lines) and lines[i].lstrip().startswith("|"):
-                block.append(lines[i])
-                i += 1
-            fixed = _normalize_org_table_block(block)
-            if fixed:
-                out.extend(fixed)
-            if i < len(lines) and lines[i].strip() != "":
-                out.append("")
-        else:
-            out.append(lines[i])
-            i += 1
-    return "\n".join(out)
+    return "\n".join(iter_normalize_tables(text.splitlines()))
 
 def _protect_org_text_for_pandoc(text: str) -> str:
-    """Protege e normaliza um texto Org para reduzir erros do Pandoc."""
-    text = _ensure_blank_lines_around_tables(text)
-    text = _normalize_all_tables(text)
-    text = _wrap_ascii_blocks(text)
-    return text
+    """Protege e normaliza um texto Org para reduzir erros do Pandoc (uma passada só)."""
+    return "\n".join(iter_protect_for_pandoc(text.splitlines()))
 
 def _protect_tables_in_quote(txt: str) -> str:
     """Se encontra tabelas dentro de quotes, envolve com example para não quebrar render."""
-    s = re.sub(r'(\S)\n\|', r'\1\n\n|', txt)
-    out_lines = []
-    in_tbl = False
-    for ln in s.splitlines():
-        if ln.lstrip().startswith('|'):
-            if not in_tbl:
-                out_lines.append('#+begin_example')
-                in_tbl = True
-            out_lines.append(ln)
-        else:
-            if in_tbl:
-                out_lines.append('#+end_example')
-                in_tbl = False
-            out_lines.append(ln)
-    if in_tbl:
-        out_lines.append('#+end_example')
-    return "\n".join(out_lines)
+    return "\n".join(iter_tables_in_quote(txt.splitlines()))
 
 def _extract_comment_from_org(org_text: str) -> str:
     """
@@ -1873,10 +1905,10 @@ def _run_or_dry(cmd: list, plan_only: bool = False) -> int:
         if _is_r_cmd(cmd):
             print(f"{tag} {' '.join(map(str, cmd))}")
             r_env = os.environ.copy()  # (se precisar, injete variáveis extras antes de chamar aqui)
-            subprocess.run(cmd, check=False, cwd=RCHECK_DIR, env=r_env)
+            _run_tracked(cmd, cwd=RCHECK_DIR, env=r_env)
         else:
             print(f"{tag} {' '.join(map(str, cmd))}")
-            subprocess.run(cmd, check=False, cwd=SCRIPTS_DIR, env=_env_with_project_path())
+            _run_tracked(cmd, cwd=SCRIPTS_DIR, env=_env_with_project_path())
         return 0
     except Exception as e:
         print(f"[ERRO] Falha executando: {' '.join(map(str, cmd))}\n  -> {e}")
@@ -2259,29 +2291,779 @@ def collect_r_outputs_to_export():
     if moved:
         print(f"[INFO] R-outputs coletados de r_checks/ → exports/: {moved} arquivo(s).")
 
+# ────────────────────────────────────────────────────────────────────────────────
+# Instrumentação: tempo por etapa/comando (JSON lines) e profiling opcional
+# ────────────────────────────────────────────────────────────────────────────────
+RUN_TIMINGS_NAME = "run_timings.jsonl"
+
+# Registros ficam em buffer até a pasta do relatório ser conhecida (após a seleção).
+_TIMING_STATE: Dict[str, Any] = {
+    "path": None, "buffer": [], "run_id": None,
+    "profile": None, "profile_dir": None, "depth": 0,
+}
+_TIMING_LOCK = threading.Lock()
+
+def _timing_emit(rec: dict) -> None:
+    """Acrescenta um registro ao run_timings.jsonl (ou ao buffer, se ainda sem caminho)."""
+    rec.setdefault("run_id", _TIMING_STATE["run_id"])
+    path = _TIMING_STATE["path"]
+    if not path:
+        _TIMING_STATE["buffer"].append(rec)
+        return
+    try:
+        with _TIMING_LOCK, open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
+    except Exception as e:
+        print(f"[AVISO] Falha gravando timings: {e}")
+
+def _timing_set_path(path: str) -> None:
+    """Define o destino dos timings (e dos profiles) e descarrega o buffer."""
+    _TIMING_STATE["path"] = path
+    _TIMING_STATE["profile_dir"] = os.path.join(os.path.dirname(path), "profiles")
+    buf, _TIMING_STATE["buffer"] = _TIMING_STATE["buffer"], []
+    for rec in buf:
+        _timing_emit(rec)
+
+class _StageTimer:
+    """
+    Mede wall/CPU de uma etapa do pipeline e emite um registro {"kind": "stage", ...}.
+    Uso: `with _StageTimer("selecao") as st: ...; st.rec["rows"] = n` — o registro sai
+    mesmo quando a etapa levanta exceção ou retorna cedo (com "error" no primeiro caso).
+    Com --profile, etapas de nível mais externo são perfiladas (cProfile/pyinstrument);
+    a seleção roda antes da pasta do relatório existir e vai para reports/outputs/profiles/.
+    """
+
+    def __init__(self, stage: str, **meta):
+        self.rec: Dict[str, Any] = {"kind": "stage", "stage": stage, **meta}
+        self._prof = None
+
+    def start(self) -> "_StageTimer":
+        mode = _TIMING_STATE.get("profile")
+        if mode and _TIMING_STATE["depth"] == 0:
+            try:
+                if mode == "pyinstrument":
+                    from pyinstrument import Profiler
+                    self._prof = Profiler()
+                    self._prof.start()
+                else:
+                    self._prof = cProfile.Profile()
+                    self._prof.enable()
+            except Exception as e:
+                print(f"[AVISO] Profiling indisponível ({mode}): {e}")
+                self._prof = None
+        _TIMING_STATE["depth"] += 1
+        self._w0, self._c0 = time.perf_counter(), time.process_time()
+        self.rec["started_at"] = datetime.now().isoformat(timespec="seconds")
+        return self
+
+    def stop(self, **extra) -> dict:
+        self.rec["wall_s"] = round(time.perf_counter() - self._w0, 4)
+        self.rec["cpu_s"] = round(time.process_time() - self._c0, 4)
+        self.rec.update(extra)
+        _TIMING_STATE["depth"] = max(0, _TIMING_STATE["depth"] - 1)
+        if self._prof is not None:
+            self._dump_profile()
+        _timing_emit(self.rec)
+        return self.rec
+
+    def _dump_profile(self) -> None:
+        prof, self._prof = self._prof, None
+        out_dir = _TIMING_STATE.get("profile_dir") or os.path.join(OUTPUTS_DIR, "profiles")
+        os.makedirs(out_dir, exist_ok=True)
+        base = os.path.join(out_dir, f"{_TIMING_STATE['run_id']}_{_safe(self.rec['stage'])}")
+        try:
+            if isinstance(prof, cProfile.Profile):
+                prof.disable()
+                prof.dump_stats(base + ".prof")
+                self.rec["profile"] = base + ".prof"
+            else:
+                prof.stop()
+                with open(base + ".html", "w", encoding="utf-8") as f:
+                    f.write(prof.output_html())
+                self.rec["profile"] = base + ".html"
+        except Exception as e:
+            print(f"[AVISO] Falha salvando profile de '{self.rec['stage']}': {e}")
+
+    def __enter__(self) -> "_StageTimer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> bool:
+        self.stop(**({"error": repr(exc)} if exc is not None else {}))
+        return False
+
+def _run_measured(cmd: list, cwd: str, env: dict) -> Tuple[int, dict]:
+    """
+    Roda o comando e devolve (returncode, stats) com wall, CPU user/sys e pico de RSS
+    do processo filho (os.wait4 no POSIX; sem CPU/RSS nas demais plataformas).
+    """
+    w0 = time.perf_counter()
+    proc = subprocess.Popen(cmd, cwd=cwd, env=env)
+    stats: Dict[str, Any] = {}
+    if resource is not None and hasattr(os, "wait4"):
+        _pid, status, ru = os.wait4(proc.pid, 0)
+        proc.returncode = os.waitstatus_to_exitcode(status)
+        rss_kb = ru.ru_maxrss // 1024 if sys.platform == "darwin" else ru.ru_maxrss
+        stats.update({
+            "cpu_user_s": round(ru.ru_utime, 4),
+            "cpu_sys_s": round(ru.ru_stime, 4),
+            "max_rss_kb": int(rss_kb),
+        })
+    else:
+        proc.wait()
+    stats["wall_s"] = round(time.perf_counter() - w0, 4)
+    return proc.returncode, stats
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Pool de workers R persistentes (--r-workers)
+# ────────────────────────────────────────────────────────────────────────────────
+R_WORKER_SCRIPT = "_worker.R"
+_R_DONE_PREFIX = "@@AM_DONE\t"
+
+# Pool ativo do run corrente (preenchido em main); None = um Rscript por check.
+_R_POOL_STATE: Dict[str, Any] = {"pool": None}
+
+class _RWorker:
+    """
+    Processo R de vida longa (r_checks/_worker.R): carrega os pacotes uma vez e
+    executa scripts de checagem recebidos por stdin, um job por linha.
+    """
+
+    def __init__(self, r_bin: str, idx: int, tag: str = ""):
+        self.idx = idx
+        self.tag = tag
+        self.proc = subprocess.Popen(
+            [r_bin, os.path.join(RCHECK_DIR, R_WORKER_SCRIPT)],
+            cwd=RCHECK_DIR, env=os.environ.copy(),
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE,
+            text=True, encoding="utf-8", errors="replace", bufsize=1,
+        )
+        self.jobs = 0
+
+    def alive(self) -> bool:
+        return self.proc.poll() is None
+
+    def run(self, job_id: str, cwd: str, script: str, args: List[str], env_vars: Dict[str, str]) -> Optional[int]:
+        """Executa um job e devolve o status do script (None se o worker morreu no caminho)."""
+        fields = [job_id, cwd, script, str(len(env_vars))]
+        fields += [f"{k}={v}" for k, v in env_vars.items()]
+        fields += args
+        try:
+            self.proc.stdin.write("\t".join(fields) + "\n")
+            self.proc.stdin.flush()
+        except (BrokenPipeError, OSError):
+            return None
+        pending_blank = False
+        for line in self.proc.stdout:
+            if line.startswith(_R_DONE_PREFIX):
+                self.jobs += 1
+                try:
+                    return int(line.rstrip("\n").split("\t")[2])
+                except (IndexError, ValueError):
+                    return 1
+            # a marca de fim vem precedida de "\n"; só ecoa linhas em branco intermediárias
+            if pending_blank:
+                print(self.tag)
+            pending_blank = (line == "\n")
+            if not pending_blank:
+                print(f"{self.tag}{line.rstrip(chr(10))}")
+        return None
+
+    def close(self) -> None:
+        try:
+            if self.alive():
+                self.proc.stdin.write("\n")
+                self.proc.stdin.flush()
+                self.proc.stdin.close()
+                self.proc.wait(timeout=30)
+        except Exception:
+            self.proc.kill()
+
+class _RWorkerPool:
+    """
+    Pool com até `size` workers R (iniciados sob demanda). Comandos que não se
+    encaixam no protocolo (argumento com TAB/quebra de linha) ou cujo worker
+    morre voltam para o Rscript avulso em _run_dispatch.
+    """
+
+    def __init__(self, r_bin: str, size: int):
+        self.r_bin = r_bin
+        self.size = max(1, int(size))
+        self._idle: "queue.Queue[_RWorker]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._workers: List[_RWorker] = []
+        self._seq = 0
+
+    def _acquire(self) -> _RWorker:
+        with self._lock:
+            if self._idle.empty() and len(self._workers) < self.size:
+                tag = f"[R#{len(self._workers) + 1}] " if self.size > 1 else ""
+                w = _RWorker(self.r_bin, len(self._workers) + 1, tag)
+                self._workers.append(w)
+                return w
+        return self._idle.get()
+
+    def run(self, cmd: list, cwd: str, extra_env: Optional[dict]) -> Optional[Tuple[int, dict]]:
+        script, args = str(cmd[1]), [str(x) for x in cmd[2:]]
+        env_vars = {str(k): str(v) for k, v in (extra_env or {}).items()}
+        if any(("\t" in x or "\n" in x) for x in [cwd, script, *args, *env_vars.values()]):
+            return None
+        with self._lock:
+            self._seq += 1
+            job_id = str(self._seq)
+        w = self._acquire()
+        w0 = time.perf_counter()
+        rc: Optional[int] = None
+        try:
+            rc = w.run(job_id, cwd, script, args, env_vars)
+        finally:
+            if rc is not None and w.alive():
+                self._idle.put(w)
+            else:
+                w.proc.kill()
+                with self._lock:
+                    self._workers.remove(w)
+        if rc is None:
+            return None
+        return rc, {"wall_s": round(time.perf_counter() - w0, 4), "worker": w.idx}
+
+    def close(self) -> None:
+        for w in list(self._workers):
+            w.close()
+        self._workers.clear()
+
+def _run_dispatch(cmd: list, cwd: str, env: dict, extra_env: Optional[dict] = None) -> Tuple[int, dict]:
+    """Roda um R check no pool de workers (quando ativo) ou como processo avulso."""
+    pool = _R_POOL_STATE.get("pool")
+    if pool is not None and _is_r_cmd(cmd) and len(cmd) > 1 and str(cmd[1]).lower().endswith(".r"):
+        try:
+            res = pool.run(cmd, cwd, extra_env)
+        except Exception as e:
+            print(f"[AVISO] Worker R falhou ({e}).")
+            res = None
+        if res is not None:
+            return res
+        print(f"[AVISO] Worker R indisponível; rodando via Rscript avulso: {os.path.basename(str(cmd[1]))}")
+    return _run_measured(cmd, cwd, env)
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Manifesto de execução (--resume)
+# ────────────────────────────────────────────────────────────────────────────────
+RUN_MANIFEST_NAME = "run_manifest.json"
+
+# Manifesto ativo do run corrente (preenchido em main); usado por _run_or_dry também.
+_RUN_STATE: Dict[str, Any] = {"manifest": None, "path": None, "resume": False, "store": False, "search_dirs": [],
+                              "recorded": set()}
+_RUN_LOCK = threading.Lock()
+
+def _file_digest(path: str) -> str:
+    """sha256 (16 hex) do conteúdo de um arquivo."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+def _db_version(db_path: str) -> str:
+    """Versão barata do DB: tamanho + mtime (evita hashear o .db inteiro)."""
+    try:
+        st = os.stat(db_path)
+        return f"{st.st_size}:{st.st_mtime_ns}"
+    except Exception:
+        return "0:0"
+
+# Módulos compartilhados pelos scripts (utils/*.py, helpers R r_checks/_*.R e utils.R):
+# mudar um deles muda a saída de todos os comandos. Calculado uma vez por run.
+_SHARED_CODE_STATE: Dict[str, Any] = {"digest": None}
+
+def _shared_code_digest() -> str:
+    if _SHARED_CODE_STATE["digest"] is None:
+        files = sorted(glob(os.path.join(BASE_DIR, "utils", "*.py"))
+                       + glob(os.path.join(BASE_DIR, "r_checks", "_*.R"))
+                       + glob(os.path.join(BASE_DIR, "r_checks", "utils.R")))
+        h = hashlib.sha256()
+        for path in files:
+            try:
+                h.update(f"{os.path.relpath(path, BASE_DIR)}:{_file_digest(path)}\0".encode("utf-8"))
+            except OSError:
+                pass
+        _SHARED_CODE_STATE["digest"] = h.hexdigest()[:16]
+    return _SHARED_CODE_STATE["digest"]
+
+def _llm_available() -> bool:
+    """Há chave da API (ambiente ou .env)? Comentários com API e fallback local diferem."""
+    try:
+        from utils.openai_client import load_api_key
+        return bool(load_api_key())
+    except Exception:
+        return bool(os.getenv("OPENAI_API_KEY"))
+
+def _cmd_fingerprint(cmd: list, extra_env: Optional[dict] = None) -> str:
+    """
+    Impressão digital das entradas de um comando planejado:
+      - argv (o interpretador entra só pelo basename);
+      - conteúdo de todo argumento que seja arquivo (script, CSVs de seleção);
+      - versão do DB (tamanho+mtime), sempre — os scripts de gráficos leem o DB padrão
+        sem recebê-lo no argv;
+      - digest dos módulos compartilhados (utils/*.py, helpers R);
+      - variáveis extras de ambiente (FLUXO/PERITOS_CSV/SCOPE_CSV), com o mesmo tratamento.
+    """
+    db_abs = os.path.abspath(DB_PATH)
+
+    def _token(x) -> str:
+        x = str(x)
+        try:
+            if os.path.isfile(x):
+                if os.path.abspath(x) == db_abs:
+                    return f"db:{_db_version(x)}"
+                return f"file:{os.path.basename(x)}:{_file_digest(x)}"
+        except Exception:
+            pass
+        return x
+
+    h = hashlib.sha256()
+    parts = [os.path.basename(str(cmd[0]))] + [_token(x) for x in cmd[1:]]
+    for k, v in sorted((extra_env or {}).items()):
+        parts.append(f"env:{k}={_token(v)}")
+    parts.append(f"db:{_db_version(DB_PATH)}")
+    parts.append(f"code:{_shared_code_digest()}")
+    # comentário com API vs. fallback local produzem saídas diferentes
+    if "--call-api" in map(str, cmd):
+        parts.append(f"llm:{_llm_available()}")
+    h.update("\x1f".join(parts).encode("utf-8"))
+    return h.hexdigest()[:16]
+
+def _load_run_manifest(path: str) -> dict:
+    """Lê o manifesto do relatório (ou devolve um vazio)."""
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict) and isinstance(data.get("commands"), dict):
+            return data
+    except Exception:
+        pass
+    return {"version": 1, "commands": {}}
+
+def _save_run_manifest(path: str, manifest: dict) -> None:
+    """Grava o manifesto de forma atômica (tmp + replace), a cada comando concluído."""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+def _snapshot_dir(d: str) -> Dict[str, int]:
+    """{nome: mtime_ns} dos arquivos de uma pasta (não recursivo)."""
+    out: Dict[str, int] = {}
+    try:
+        with os.scandir(d) as it:
+            for e in it:
+                if e.is_file():
+                    out[e.name] = e.stat().st_mtime_ns
+    except FileNotFoundError:
+        pass
+    return out
+
+def _produced_since(before: Dict[str, int], d: str) -> List[str]:
+    """Arquivos novos/alterados em `d` desde o snapshot `before`."""
+    after = _snapshot_dir(d)
+    return sorted(n for n, mt in after.items() if before.get(n) != mt)
+
+def _restore_artifacts(names: List[str], search_dirs: List[str]) -> bool:
+    """
+    Garante que cada artefato esteja em EXPORT_DIR. Se já foi movido para as pastas
+    do relatório (imgs/, comments/, orgs/, markdown/), copia de volta para que a
+    etapa de cópia/montagem funcione igual a um run completo. False se faltar algum.
+    """
+    for name in names:
+        dst = os.path.join(EXPORT_DIR, name)
+        if os.path.exists(dst):
+            continue
+        src = next((os.path.join(d, name) for d in search_dirs if os.path.exists(os.path.join(d, name))), None)
+        if not src:
+            return False
+        try:
+            shutil.copy2(src, dst)
+        except Exception:
+            return False
+    return True
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Store de artefatos endereçado por conteúdo (--artifact-store)
+# ────────────────────────────────────────────────────────────────────────────────
+# Reaproveita as saídas (PNG/.org/.md/comentários) de um comando entre runs e entre
+# relatórios (Top-10, Top-K, individual): a chave é a mesma fingerprint do manifesto
+# (script, período, perito, modo, thresholds, CSVs de seleção e versão do DB).
+# Os arquivos são copiados (não hardlinkados) porque os scripts reescrevem saídas
+# no mesmo caminho, o que corromperia a entrada do store via inode compartilhado.
+ARTIFACT_STORE_DIR = os.path.join(OUTPUTS_DIR, "_artifact_store")
+
+def _store_entry_dir(fp: str) -> str:
+    return os.path.join(ARTIFACT_STORE_DIR, fp[:2], fp)
+
+def _store_lookup(fp: str) -> Optional[List[str]]:
+    """Lista de artefatos da entrada `fp` no store, ou None se ausente/incompleta."""
+    entry = _store_entry_dir(fp)
+    try:
+        with open(os.path.join(entry, "meta.json"), encoding="utf-8") as f:
+            names = list(json.load(f).get("artifacts") or [])
+    except Exception:
+        return None
+    if not names or not all(os.path.isfile(os.path.join(entry, n)) for n in names):
+        return None
+    return names
+
+def _store_materialize(fp: str, names: List[str]) -> bool:
+    """Copia os artefatos da entrada para EXPORT_DIR (como se o script tivesse rodado)."""
+    entry = _store_entry_dir(fp)
+    os.makedirs(EXPORT_DIR, exist_ok=True)
+    try:
+        for n in names:
+            shutil.copy2(os.path.join(entry, n), os.path.join(EXPORT_DIR, n))
+    except Exception as e:
+        print(f"[AVISO] Falha materializando artefatos do store ({fp}): {e}")
+        return False
+    try:
+        os.utime(entry)   # último reaproveitamento (idade usada por _store_gc)
+    except OSError:
+        pass
+    return True
+
+def _store_ingest(fp: str, cmd: list, names: List[str]) -> None:
+    """Grava os artefatos recém-produzidos no store (diretório temporário + rename atômico)."""
+    entry = _store_entry_dir(fp)
+    if os.path.isdir(entry) or not names:
+        return
+    os.makedirs(os.path.dirname(entry), exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{fp}_", dir=os.path.dirname(entry))
+    try:
+        for n in names:
+            src = next((os.path.join(d, n) for d in (EXPORT_DIR, RCHECK_DIR) if os.path.isfile(os.path.join(d, n))), None)
+            if not src:
+                raise FileNotFoundError(n)
+            shutil.copy2(src, os.path.join(tmp, n))
+        with open(os.path.join(tmp, "meta.json"), "w", encoding="utf-8") as f:
+            json.dump({"cmd": [str(x) for x in cmd], "artifacts": names,
+                       "created_at": datetime.now().isoformat(timespec="seconds")}, f, ensure_ascii=False, indent=1)
+        os.replace(tmp, entry)
+    except Exception as e:
+        print(f"[AVISO] Falha gravando artefatos no store ({fp}): {e}")
+        shutil.rmtree(tmp, ignore_errors=True)
+
+STORE_TMP_MAX_AGE_S = 6 * 3600   # sobras .<fp>_* de ingestões interrompidas
+
+def _store_gc(max_age_days: float) -> Tuple[int, int]:
+    """
+    Remove do store as entradas sem uso há mais de max_age_days (mtime do diretório
+    da entrada: criação ou último reaproveitamento) e temporários antigos.
+    Devolve (entradas removidas, bytes liberados).
+    """
+    if max_age_days <= 0 or not os.path.isdir(ARTIFACT_STORE_DIR):
+        return 0, 0
+    now = time.time()
+    cut = now - max_age_days * 86400.0
+    n, freed = 0, 0
+    for shard in os.listdir(ARTIFACT_STORE_DIR):
+        shard_dir = os.path.join(ARTIFACT_STORE_DIR, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in os.listdir(shard_dir):
+            entry = os.path.join(shard_dir, name)
+            try:
+                mtime = os.path.getmtime(entry)
+            except OSError:
+                continue
+            tmp = name.startswith(".")
+            if (tmp and now - mtime <= STORE_TMP_MAX_AGE_S) or (not tmp and mtime >= cut):
+                continue
+            size = sum(os.path.getsize(os.path.join(entry, f)) for f in os.listdir(entry)
+                       if os.path.isfile(os.path.join(entry, f))) if os.path.isdir(entry) else 0
+            shutil.rmtree(entry, ignore_errors=True)
+            if not os.path.exists(entry):
+                n += 0 if tmp else 1
+                freed += size
+        try:
+            os.rmdir(shard_dir)   # só se ficou vazio
+        except OSError:
+            pass
+    return n, freed
+
+def _record_command(fp: str, entry: dict) -> None:
+    """Registra o resultado de um comando no manifesto ativo e o persiste (thread-safe)."""
+    with _RUN_LOCK:
+        _RUN_STATE["manifest"]["commands"][fp] = entry
+        _RUN_STATE["recorded"].add(fp)
+        try:
+            _save_run_manifest(_RUN_STATE["path"], _RUN_STATE["manifest"])
+        except Exception as e:
+            print(f"[AVISO] Falha salvando manifesto de execução: {e}")
+
+def _run_tracked(cmd: list, cwd: str, env: dict, extra_env: Optional[dict] = None,
+                 track: bool = True) -> int:
+    """
+    Executa um comando registrando fingerprint, returncode e artefatos no manifesto
+    ativo. Com --resume, pula o comando quando a fingerprint bate, o run anterior
+    terminou com sucesso e todos os artefatos ainda existem.
+    Os artefatos são atribuídos pelo diff de mtimes em exports/ e r_checks/, o que só
+    é exato com um comando por vez. Comandos simultâneos (R checks no pool com
+    --r-workers > 1) devem rodar com track=False: sem manifesto, sem --resume e sem
+    store, para que saídas de um job nunca sejam gravadas sob a chave de outro.
+    """
+    script = os.path.basename(str(cmd[1])) if len(cmd) > 1 else str(cmd[0])
+    manifest = _RUN_STATE.get("manifest")
+    if manifest is None or not track:
+        rc, stats = _run_dispatch(cmd, cwd, env, extra_env)
+        _timing_emit({"kind": "cmd", "script": script, "cmd": [str(x) for x in cmd], "returncode": rc, **stats})
+        return rc
+
+    fp = _cmd_fingerprint(cmd, extra_env)
+    prev = manifest["commands"].get(fp)
+    if (_RUN_STATE.get("resume") and prev and prev.get("returncode") == 0
+            and _restore_artifacts(prev.get("artifacts") or [], _RUN_STATE.get("search_dirs") or [])):
+        print(f"[RESUME] inalterado, pulando: {script} ({fp})")
+        _timing_emit({"kind": "cmd", "script": script, "fingerprint": fp, "skipped": "resume", "wall_s": 0.0})
+        return 0
+
+    if _RUN_STATE.get("store"):
+        names = _store_lookup(fp)
+        if names and _store_materialize(fp, names):
+            print(f"[STORE] reaproveitando {len(names)} artefato(s): {script} ({fp})")
+            _timing_emit({"kind": "cmd", "script": script, "fingerprint": fp, "skipped": "store",
+                          "artifacts": len(names), "wall_s": 0.0})
+            _record_command(fp, {
+                "cmd": [str(x) for x in cmd],
+                "returncode": 0,
+                "artifacts": names,
+                "from_store": True,
+                "finished_at": datetime.now().isoformat(timespec="seconds"),
+            })
+            return 0
+
+    watch = [EXPORT_DIR, RCHECK_DIR]
+    before = {d: _snapshot_dir(d) for d in watch}
+    rc, stats = _run_dispatch(cmd, cwd, env, extra_env)
+    produced: List[str] = []
+    for d in watch:
+        for name in _produced_since(before[d], d):
+            # saídas R gravadas em r_checks/ são coletadas para exports/ depois
+            if d == RCHECK_DIR and not name.startswith("rcheck") and "top10" not in name:
+                continue
+            produced.append(name)
+    _timing_emit({"kind": "cmd", "script": script, "fingerprint": fp, "cmd": [str(x) for x in cmd],
+                  "returncode": rc, "artifacts": len(set(produced)), **stats})
+
+    _record_command(fp, {
+        "cmd": [str(x) for x in cmd],
+        "returncode": int(rc),
+        "artifacts": sorted(set(produced)),
+        "finished_at": datetime.now().isoformat(timespec="seconds"),
+    })
+    if _RUN_STATE.get("store") and rc == 0 and produced:
+        _store_ingest(fp, cmd, sorted(set(produced)))
+    return rc
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Extrato do período para os R checks (KPI_PERIOD_EXTRACT)
+# ────────────────────────────────────────────────────────────────────────────────
+# Uma extração por (período, versão do DB) em Feather sem compressão (lido via mmap
+# pelo arrow no R). O _common.R monta a partir dele um SQLite em memória com as
+# mesmas tabelas/colunas, então o SQL de cada check roda inalterado. Essa cópia só
+# compensa quando é feita uma vez e reaproveitada pelos checks seguintes, por isso
+# o extrato só é usado pelos workers persistentes (--r-workers); um Rscript avulso
+# (ou sem o pacote arrow no R) consulta o DB com índice, como antes.
+PERIOD_EXTRACT_DIR = os.path.join(OUTPUTS_DIR, "_extracts")
+
+PERIOD_EXTRACT_BATCH = 50_000
+PERIOD_EXTRACT_KEEP = 3          # extratos mais recentes mantidos (os demais são removidos)
+PERIOD_EXTRACT_TMP_MAX_AGE_S = 6 * 3600   # sobras .<key>_* de execuções interrompidas
+
+def _prune_period_extracts(current: str) -> None:
+    """
+    Mantém em PERIOD_EXTRACT_DIR só os PERIOD_EXTRACT_KEEP extratos usados mais
+    recentemente (o atual sempre fica) e remove diretórios temporários antigos.
+    Cada nova versão do DB gera outra chave, então sem isso o diretório só cresce.
+    """
+    try:
+        names = os.listdir(PERIOD_EXTRACT_DIR)
+    except OSError:
+        return
+    now = time.time()
+    done = []
+    for name in names:
+        path = os.path.join(PERIOD_EXTRACT_DIR, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        if name.startswith("."):
+            if now - mtime > PERIOD_EXTRACT_TMP_MAX_AGE_S:
+                shutil.rmtree(path, ignore_errors=True)
+        elif os.path.abspath(path) != os.path.abspath(current):
+            done.append((mtime, path))
+    done.sort(reverse=True)
+    for _, path in done[max(0, PERIOD_EXTRACT_KEEP - 1):]:
+        shutil.rmtree(path, ignore_errors=True)
+
+def _arrow_schema_for(conn, sql: str, params: tuple, cols: List[str]):
+    """
+    Tipos Arrow a partir dos tipos SQLite realmente presentes (typeof) em cada coluna:
+    só inteiros → int64; inteiros/reais → float64; texto/blob/misto → string.
+    """
+    import pyarrow as pa
+    if not cols:
+        return pa.schema([])
+    probes = ", ".join(f"group_concat(DISTINCT typeof(q.\"{c}\"))" for c in cols)
+    row = conn.execute(f"SELECT {probes} FROM ({sql}) q", params).fetchone() or ()
+    fields = []
+    for c, kinds in zip(cols, row):
+        ks = set((kinds or "").split(",")) - {"null", ""}
+        if ks == {"integer"}:
+            t = pa.int64()
+        elif ks and ks <= {"integer", "real"}:
+            t = pa.float64()
+        else:
+            t = pa.string()
+        fields.append(pa.field(c, t))
+    return pa.schema(fields)
+
+def _write_feather_stream(conn, sql: str, params: tuple, path: str) -> int:
+    """Grava o resultado de `sql` em Feather (Arrow IPC) em lotes, sem materializar tudo em memória."""
+    import pyarrow as pa
+    cur = conn.execute(f"SELECT * FROM ({sql}) LIMIT 0", params)
+    cols = [d[0] for d in cur.description]
+    schema = _arrow_schema_for(conn, sql, params, cols)
+    as_text = [pa.types.is_string(f.type) for f in schema]
+    n = 0
+    with pa.OSFile(path, "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+        cur = conn.execute(sql, params)
+        while True:
+            rows = cur.fetchmany(PERIOD_EXTRACT_BATCH)
+            if not rows:
+                break
+            arrays = []
+            for i, f in enumerate(schema):
+                vals = [r[i] for r in rows]
+                if as_text[i]:
+                    vals = [None if v is None else (v.decode("utf-8", "replace") if isinstance(v, bytes) else str(v))
+                            for v in vals]
+                arrays.append(pa.array(vals, type=f.type))
+            writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+            n += len(rows)
+    return n
+
+def _write_period_extract(start: str, end: str) -> Optional[str]:
+    """
+    Grava (ou reaproveita) o extrato do período e devolve o diretório; None se o
+    pyarrow não estiver disponível ou a extração falhar.
+    Conteúdo: analises do período (todas as colunas), protocolos dessas análises,
+    peritos e indicadores (inteiros, são pequenos) e period.txt com "início<TAB>fim".
+    """
+    if importlib.util.find_spec("pyarrow") is None:
+        print("[AVISO] pyarrow indisponível (pipenv install): R checks consultarão o DB diretamente.")
+        return None
+
+    key = hashlib.sha256(f"{start}|{end}|{_db_version(DB_PATH)}".encode("utf-8")).hexdigest()[:16]
+    out_dir = os.path.join(PERIOD_EXTRACT_DIR, key)
+    if os.path.isfile(os.path.join(out_dir, "period.txt")):
+        try:
+            os.utime(out_dir)   # marca como usado (ordem da poda)
+        except OSError:
+            pass
+        _prune_period_extracts(out_dir)
+        return out_dir
+
+    os.makedirs(PERIOD_EXTRACT_DIR, exist_ok=True)
+    tmp = tempfile.mkdtemp(prefix=f".{key}_", dir=PERIOD_EXTRACT_DIR)
+    try:
+        with sqlite3.connect(DB_PATH) as conn:
+            schema = _detect_schema(conn)
+            tbl = schema["analises"]["table"]
+            ini = schema["analises"]["ini_col"] or "dataHoraIniPericia"
+            tables = {r[0] for r in conn.execute("SELECT name FROM sqlite_master WHERE type IN ('table','view')")}
+            where = f"substr({ini},1,10) BETWEEN ? AND ?"
+            queries = {"analises": (f"SELECT * FROM {tbl} WHERE {where}", (start, end))}
+            if "protocolos" in tables:
+                queries["protocolos"] = (
+                    f"SELECT pr.* FROM protocolos pr WHERE pr.protocolo IN (SELECT protocolo FROM {tbl} WHERE {where})",
+                    (start, end))
+            for t in ("peritos", "indicadores"):
+                if t in tables:
+                    queries[t] = (f"SELECT * FROM {t}", ())
+
+            n_rows = 0
+            for name, (sql, params) in queries.items():
+                n = _write_feather_stream(conn, sql, params, os.path.join(tmp, f"{name}.feather"))
+                if name == "analises":
+                    n_rows = n
+
+        with open(os.path.join(tmp, "period.txt"), "w", encoding="utf-8") as f:
+            f.write(f"{start}\t{end}\n")
+        os.replace(tmp, out_dir)
+        print(f"[INFO] Extrato do período para R checks: {n_rows} análises → {out_dir}")
+        _prune_period_extracts(out_dir)
+        return out_dir
+    except OSError:
+        # outro processo publicou o mesmo extrato primeiro
+        shutil.rmtree(tmp, ignore_errors=True)
+        return out_dir if os.path.isfile(os.path.join(out_dir, "period.txt")) else None
+    except Exception as e:
+        print(f"[AVISO] Falha gerando extrato do período ({e}); R checks consultarão o DB.")
+        shutil.rmtree(tmp, ignore_errors=True)
+        return None
+
 # ────────────────────────────────────────────────────────────────────────────────
 # Limpeza, cópia e organização de artefatos (.png, .org, .md)
 # ────────────────────────────────────────────────────────────────────────────────
-def _cleanup_exports_for_perito(safe_perito: str):
-    """Remove do exports/ os artefatos pendentes do perito (para evitar mistura entre execuções)."""
+def _cleanup_exports_for_perito(safe_perito: str, keep: Optional[Set[str]] = None):
+    """
+    Remove do exports/ os artefatos pendentes do perito (para evitar mistura entre execuções).
+    keep: nomes preservados (no --resume, os artefatos que o manifesto atribui a comandos reaproveitáveis).
+    """
+    keep = keep or set()
     for f in glob(os.path.join(EXPORT_DIR, f"*_{safe_perito}.*")):
+        if os.path.basename(f) in keep:
+            continue
         try: os.remove(f)
         except Exception: pass
     for f in glob(os.path.join(EXPORT_DIR, f"*{safe_perito}.*")):
-        if "top10" in os.path.basename(f).lower():
+        if "top10" in os.path.basename(f).lower() or os.path.basename(f) in keep:
             continue
         try: os.remove(f)
         except Exception: pass
 
-def _cleanup_exports_top10():
-    """Remove do exports/ os artefatos pendentes de top10."""
+def _cleanup_exports_top10(keep: Optional[Set[str]] = None):
+    """Remove do exports/ os artefatos pendentes de top10 (exceto os nomes em keep)."""
+    keep = keep or set()
     for f in glob(os.path.join(EXPORT_DIR, "*_top10*.*")):
+        if os.path.basename(f) in keep:
+            continue
         try: os.remove(f)
         except Exception: pass
     for f in glob(os.path.join(EXPORT_DIR, "*top10*.*")):
+        if os.path.basename(f) in keep:
+            continue
         try: os.remove(f)
         except Exception: pass
 
+def _resume_keep_set(planned_cmds: list, r_extra_env: Optional[dict] = None) -> Set[str]:
+    """
+    Artefatos que o manifesto atribui a comandos deste plano que terminaram bem no run
+    anterior (o --resume pode pulá-los) ou a comandos já executados neste run.
+    Todo o resto nos padrões do relatório é sobra de outro run e pode ser removido.
+    """
+    commands = (_RUN_STATE.get("manifest") or {}).get("commands") or {}
+    fps = set(_RUN_STATE.get("recorded") or ())
+    for cmd in planned_cmds:
+        try:
+            fps.add(_cmd_fingerprint(cmd, r_extra_env if _is_r_cmd(cmd) else None))
+        except Exception:
+            pass
+    keep: Set[str] = set()
+    for fp in fps:
+        entry = commands.get(fp) or {}
+        if entry.get("returncode") == 0:
+            keep.update(entry.get("artifacts") or [])
+    return keep
+
 def _move_md_generic_to(markdown_dir: str, pattern: str = "*.md"):
     """Move quaisquer .md remanescentes de exports/ para a pasta markdown/."""
     os.makedirs(markdown_dir, exist_ok=True)
@@ -2320,9 +3102,7 @@ def copiar_artefatos_perito(perito: str, imgs_dir: str, comments_dir: str, orgs_
             base = os.path.basename(src)
             if "top10" in base.lower():
                 continue
-            shutil.copy2(src, os.path.join(imgs_dir, base))
-            try: os.remove(src)
-            except Exception: pass
+            _place_png(src, os.path.join(imgs_dir, base))
 
     # Comentários já em .org
     for pat in (f"*_{safe}_comment.org", f"*{safe}_comment.org"):
@@ -2369,12 +3149,7 @@ def copiar_artefatos_perito(perito: str, imgs_dir: str, comments_dir: str, orgs_
             base = os.path.basename(src)
             if "top10" in base.lower():
                 continue
-            with open(src, encoding="utf-8") as f:
-                content = f.read()
-            content = _rewrite_org_image_links(content, imgs_rel_prefix="../imgs/")
-            dst = os.path.join(orgs_dir, base)
-            with open(dst, "w", encoding="utf-8") as g:
-                g.write(content)
+            rewrite_org_file(src, os.path.join(orgs_dir, base), imgs_rel_prefix="../imgs/")
             try: os.remove(src)
             except Exception: pass
 
@@ -2403,9 +3178,7 @@ def copiar_artefatos_top10(imgs_dir: str, comments_dir: str, orgs_dir: str = Non
     for pat in ("*_top10*.png", "*top10*.png"):
         for src in glob(os.path.join(EXPORT_DIR, pat)):
             base = os.path.basename(src)
-            shutil.copy2(src, os.path.join(imgs_dir, base))
-            try: os.remove(src)
-            except Exception: pass
+            _place_png(src, os.path.join(imgs_dir, base))
 
     # Comentários .org (grupo)
     for pat in ("*_top10*_comment.org", "*top10*_comment.org"):
@@ -2439,12 +3212,7 @@ def copiar_artefatos_top10(imgs_dir: str, comments_dir: str, orgs_dir: str = Non
     for pat in ("*_top10*.org", "*top10*.org"):
         for src in glob(os.path.join(EXPORT_DIR, pat)):
             base = os.path.basename(src)
-            with open(src, encoding="utf-8") as f:
-                content = f.read()
-            content = _rewrite_org_image_links(content, imgs_rel_prefix="../imgs/")
-            dst = os.path.join(orgs_dir, base)
-            with open(dst, "w", encoding="utf-8") as g:
-                g.write(content)
+            rewrite_org_file(src, os.path.join(orgs_dir, base), imgs_rel_prefix="../imgs/")
             try: os.remove(src)
             except Exception: pass
 
@@ -2468,20 +3236,14 @@ def copiar_artefatos_weekday2weekend(imgs_dir: str, comments_dir: str, orgs_dir:
         src = os.path.join(EXPORT_DIR, fname)
         dst = os.path.join(imgs_dir, fname)
         if os.path.exists(src):
-            shutil.copy2(src, dst)
-            try: os.remove(src)
-            except Exception: pass
+            _place_png(src, dst)
 
     for fname in ("rcheck_weekday_to_weekend_table.org", "rcheck_weekday_to_weekend_protocols.org"):
         src = os.path.join(EXPORT_DIR, fname)
         dst = os.path.join(orgs_dir, fname)
         if os.path.exists(src):
             try:
-                with open(src, encoding="utf-8") as f:
-                    content = f.read()
-                content = _rewrite_org_image_links(content, imgs_rel_prefix="../imgs/")
-                with open(dst, "w", encoding="utf-8") as g:
-                    g.write(content)
+                rewrite_org_file(src, dst, imgs_rel_prefix="../imgs/")
             except Exception as e:
                 print(f"[AVISO] Falha ao normalizar {fname}: {e}. Copiando bruto.")
                 shutil.copy2(src, dst)
@@ -2801,225 +3563,222 @@ def gerar_org_perito(
     # prefixo correto de imagens conforme destino
     imgs_prefix = "../imgs/" if orgs_dir else "imgs/"
 
-    # -------------------------------------------------------------------------
-    # Cabeçalho: estatísticas rápidas
-    # -------------------------------------------------------------------------
-    lines = [f"** {perito}"]
-    total, pct_nc, cr, dr = get_summary_stats(perito, start, end)
-    lines += [f"- Tarefas: {total}", f"- % NC: {pct_nc:.1f}", f"- CR: {cr} | DR: {dr}", ""]
-
-    # -------------------------------------------------------------------------
-    # Gráficos principais + comentários
-    # -------------------------------------------------------------------------
-    all_pngs = glob(os.path.join(imgs_dir, f"*{safe}.png"))
-    main_pngs = [p for p in all_pngs if not os.path.basename(p).lower().startswith("rcheck_")]
-    main_pngs.sort(key=_png_rank_main)
-
-    for png in main_pngs:
-        base = os.path.basename(png)
-        lines += [
-            "#+ATTR_LATEX: :placement [H] :width \\linewidth",
-            f"#+CAPTION: {_nice_caption(base)}",
-            f"[[file:{imgs_prefix}{base}]]",
-        ]
-        if add_comments:
-            stem = os.path.splitext(base)[0]
-            quote_lines = _inject_comment_for_stem(stem, comments_dir, output_dir, imgs_dir=imgs_dir)
-            lines += quote_lines
-        lines.append("\n#+LATEX: \\newpage\n")
-
-    # -------------------------------------------------------------------------
-    # NOVO: Detalhamento dos KPIs (protocolos por critério)
-    # -------------------------------------------------------------------------
-    # Convenções:
-    #  - duração válida: 0 < dur ≤ 3600s
-    #  - ≤15s: dur ≤ FIFTEEN_THRESHOLD
-    #  - produtividade ≥50/h: janelas por strftime('%Y-%m-%d %H'), contando análises válidas na hora; se count>=50,
-    #    todos os protocolos pertencentes à(s) hora(s) elegíveis compõem a lista.
-    #  - sobreposição: self-join por (ini,fim) com intersecção de intervalos para o mesmo perito.
-    #  - NC nacional: média robusta como (conformado=0) OU (motivoNaoConformado != '' E CAST(...)!=0).
-    #    Critério ativa se pct_perito >= 2× pct_nacional. Protocolos listados = os NC do perito.
-    conn = sqlite3.connect(DB_PATH)
-
-    # Detecta coluna de fim (pode variar por base)
-    end_col = _detect_end_datetime_column(conn) or "dataHoraFimPericia"
-
-    # Tabela-base do perito com durações
-    df = pd.read_sql(
-        f"""
-        SELECT
-            a.protocolo                       AS protocolo,
-            a.dataHoraIniPericia              AS ini,
-            {end_col}                         AS fim,
-            a.conformado                      AS conformado,
-            a.motivoNaoConformado             AS motivoNC
-        FROM analises a
-        JOIN peritos p ON a.siapePerito = p.siapePerito
-        WHERE p.nomePerito = ?
-          AND date(a.dataHoraIniPericia) BETWEEN ? AND ?
-        """,
-        conn, params=(perito, start, end)
-    )
-
-    # Nacional (%NC média no período)
-    nat = pd.read_sql(
-        f"""
-        SELECT
-            COUNT(*) AS total,
-            SUM(
-              CASE
-                WHEN CAST(IFNULL(a.conformado, 1) AS INTEGER) = 0 THEN 1
-                WHEN TRIM(IFNULL(a.motivoNaoConformado,'')) <> '' AND
-                     CAST(IFNULL(a.motivoNaoConformado,'0') AS INTEGER) <> 0 THEN 1
-                ELSE 0
-              END
-            ) AS nc_count
-        FROM analises a
-        WHERE date(a.dataHoraIniPericia) BETWEEN ? AND ?
-        """,
-        conn, params=(start, end)
-    )
-    conn.close()
+    # o .org é gravado à medida que os blocos são montados
+    with OrgWriter(org_path, strip=False) as lines:
+        # -------------------------------------------------------------------------
+        # Cabeçalho: estatísticas rápidas
+        # -------------------------------------------------------------------------
+        lines.append(f"** {perito}")
+        total, pct_nc, cr, dr = get_summary_stats(perito, start, end)
+        lines += [f"- Tarefas: {total}", f"- % NC: {pct_nc:.1f}", f"- CR: {cr} | DR: {dr}", ""]
+
+        # -------------------------------------------------------------------------
+        # Gráficos principais + comentários
+        # -------------------------------------------------------------------------
+        all_pngs = glob(os.path.join(imgs_dir, f"*{safe}.png"))
+        main_pngs = [p for p in all_pngs if not os.path.basename(p).lower().startswith("rcheck_")]
+        main_pngs.sort(key=_png_rank_main)
+
+        for png in main_pngs:
+            base = os.path.basename(png)
+            lines += [
+                "#+ATTR_LATEX: :placement [H] :width \\linewidth",
+                f"#+CAPTION: {_nice_caption(base)}",
+                f"[[file:{imgs_prefix}{base}]]",
+            ]
+            if add_comments:
+                stem = os.path.splitext(base)[0]
+                quote_lines = _inject_comment_for_stem(stem, comments_dir, output_dir, imgs_dir=imgs_dir)
+                lines += quote_lines
+            lines.append("\n#+LATEX: \\newpage\n")
 
-    # Conversões de tempo
-    df["ini"] = pd.to_datetime(df["ini"], errors="coerce")
-    df["fim"] = pd.to_datetime(df["fim"], errors="coerce")
-    df["dur"] = (df["fim"] - df["ini"]).dt.total_seconds()
-    # duração válida: (0, 3600]
-    df_valid = df[(df["dur"] > 0) & (df["dur"] <= 3600)].copy()
+        # -------------------------------------------------------------------------
+        # NOVO: Detalhamento dos KPIs (protocolos por critério)
+        # -------------------------------------------------------------------------
+        # Convenções:
+        #  - duração válida: 0 < dur ≤ 3600s
+        #  - ≤15s: dur ≤ FIFTEEN_THRESHOLD
+        #  - produtividade ≥50/h: janelas por strftime('%Y-%m-%d %H'), contando análises válidas na hora; se count>=50,
+        #    todos os protocolos pertencentes à(s) hora(s) elegíveis compõem a lista.
+        #  - sobreposição: self-join por (ini,fim) com intersecção de intervalos para o mesmo perito.
+        #  - NC nacional: média robusta como (conformado=0) OU (motivoNaoConformado != '' E CAST(...)!=0).
+        #    Critério ativa se pct_perito >= 2× pct_nacional. Protocolos listados = os NC do perito.
+        conn = sqlite3.connect(DB_PATH)
+
+        # Detecta coluna de fim (pode variar por base)
+        end_col = _detect_end_datetime_column(conn) or "dataHoraFimPericia"
+
+        # Tabela-base do perito com durações
+        df = pd.read_sql(
+            f"""
+            SELECT
+                a.protocolo                       AS protocolo,
+                a.dataHoraIniPericia              AS ini,
+                {end_col}                         AS fim,
+                a.conformado                      AS conformado,
+                a.motivoNaoConformado             AS motivoNC
+            FROM analises a
+            JOIN peritos p ON a.siapePerito = p.siapePerito
+            WHERE p.nomePerito = ?
+              AND date(a.dataHoraIniPericia) BETWEEN ? AND ?
+            """,
+            conn, params=(perito, start, end)
+        )
 
-    # --------- KPI 1: ≤15 segundos -------------
-    thr_15 = float(FIFTEEN_THRESHOLD)
-    prot_le15 = sorted(df_valid.loc[df_valid["dur"] <= thr_15, "protocolo"].astype(str).unique().tolist())
-    n_le15 = len(prot_le15)
+        # Nacional (%NC média no período)
+        nat = pd.read_sql(
+            f"""
+            SELECT
+                COUNT(*) AS total,
+                SUM(
+                  CASE
+                    WHEN CAST(IFNULL(a.conformado, 1) AS INTEGER) = 0 THEN 1
+                    WHEN TRIM(IFNULL(a.motivoNaoConformado,'')) <> '' AND
+                         CAST(IFNULL(a.motivoNaoConformado,'0') AS INTEGER) <> 0 THEN 1
+                    ELSE 0
+                  END
+                ) AS nc_count
+            FROM analises a
+            WHERE date(a.dataHoraIniPericia) BETWEEN ? AND ?
+            """,
+            conn, params=(start, end)
+        )
+        conn.close()
 
-    # --------- KPI 2: Produtividade ≥ 50/h (por janela-hora) -------------
-    thr_prod = float(PRODUCTIVITY_THRESHOLD)
-    prots_prod = []
-    if not df_valid.empty:
-        # bucket hora local do início
-        df_valid["hora_bucket"] = df_valid["ini"].dt.strftime("%Y-%m-%d %H")
-        # conta análises por bucket
-        hits = df_valid.groupby("hora_bucket")["protocolo"].count().reset_index(name="n")
-        horas_elegiveis = set(hits.loc[hits["n"] >= thr_prod, "hora_bucket"].tolist())
-        if horas_elegiveis:
-            prots_prod = (
-                df_valid.loc[df_valid["hora_bucket"].isin(horas_elegiveis), "protocolo"]
-                .astype(str).unique().tolist()
-            )
-    prot_prod = sorted(prots_prod)
-    n_prod = len(prot_prod)
-
-    # --------- KPI 3: Sobreposição -------------
-    # protocolos do perito que tiveram interseção temporal com outro protocolo do mesmo perito
-    prot_overlap = []
-    if len(df_valid) > 1:
-        x = df_valid[["protocolo", "ini", "fim"]].dropna().copy()
-        # junta consigo mesmo, evita mesma linha
-        x["k"] = 1
-        m = x.merge(x, on="k", suffixes=("_a", "_b"))
-        m = m[m["protocolo_a"] != m["protocolo_b"]]
-        # interseção: ini_a < fim_b AND ini_b < fim_a
-        ov = m[(m["ini_a"] < m["fim_b"]) & (m["ini_b"] < m["fim_a"])]
-        if not ov.empty:
-            prot_overlap = sorted(
-                pd.unique(ov[["protocolo_a", "protocolo_b"]].astype(str).values.ravel()).tolist()
+        # Conversões de tempo
+        df["ini"] = pd.to_datetime(df["ini"], errors="coerce")
+        df["fim"] = pd.to_datetime(df["fim"], errors="coerce")
+        df["dur"] = (df["fim"] - df["ini"]).dt.total_seconds()
+        # duração válida: (0, 3600]
+        df_valid = df[(df["dur"] > 0) & (df["dur"] <= 3600)].copy()
+
+        # --------- KPI 1: ≤15 segundos -------------
+        thr_15 = float(FIFTEEN_THRESHOLD)
+        prot_le15 = sorted(df_valid.loc[df_valid["dur"] <= thr_15, "protocolo"].astype(str).unique().tolist())
+        n_le15 = len(prot_le15)
+
+        # --------- KPI 2: Produtividade ≥ 50/h (por janela-hora) -------------
+        thr_prod = float(PRODUCTIVITY_THRESHOLD)
+        prots_prod = []
+        if not df_valid.empty:
+            # bucket hora local do início
+            df_valid["hora_bucket"] = df_valid["ini"].dt.strftime("%Y-%m-%d %H")
+            # conta análises por bucket
+            hits = df_valid.groupby("hora_bucket")["protocolo"].count().reset_index(name="n")
+            horas_elegiveis = set(hits.loc[hits["n"] >= thr_prod, "hora_bucket"].tolist())
+            if horas_elegiveis:
+                prots_prod = (
+                    df_valid.loc[df_valid["hora_bucket"].isin(horas_elegiveis), "protocolo"]
+                    .astype(str).unique().tolist()
+                )
+        prot_prod = sorted(prots_prod)
+        n_prod = len(prot_prod)
+
+        # --------- KPI 3: Sobreposição -------------
+        # protocolos do perito que tiveram interseção temporal com outro protocolo do mesmo perito
+        prot_overlap = []
+        if len(df_valid) > 1:
+            x = df_valid[["protocolo", "ini", "fim"]].dropna().copy()
+            # junta consigo mesmo, evita mesma linha
+            x["k"] = 1
+            m = x.merge(x, on="k", suffixes=("_a", "_b"))
+            m = m[m["protocolo_a"] != m["protocolo_b"]]
+            # interseção: ini_a < fim_b AND ini_b < fim_a
+            ov = m[(m["ini_a"] < m["fim_b"]) & (m["ini_b"] < m["fim_a"])]
+            if not ov.empty:
+                prot_overlap = sorted(
+                    pd.unique(ov[["protocolo_a", "protocolo_b"]].astype(str).values.ravel()).tolist()
+                )
+        n_overlap = len(prot_overlap)
+
+        # --------- KPI 4: %NC ≥ 2× média nacional -------------
+        nat_total = float(nat.iloc[0]["total"] or 0.0)
+        nat_nc = float(nat.iloc[0]["nc_count"] or 0.0)
+        nat_pct = (nat_nc / nat_total * 100.0) if nat_total > 0 else 0.0
+
+        # perito NC robusto
+        df["nc_flag"] = (
+            (df["conformado"].fillna(1).astype("Int64") == 0)
+            | (
+                df["motivoNC"].fillna("").astype(str).str.strip().ne("")
+                & df["motivoNC"].fillna("0").astype(str).str.strip().astype(str).ne("0")
             )
-    n_overlap = len(prot_overlap)
-
-    # --------- KPI 4: %NC ≥ 2× média nacional -------------
-    nat_total = float(nat.iloc[0]["total"] or 0.0)
-    nat_nc = float(nat.iloc[0]["nc_count"] or 0.0)
-    nat_pct = (nat_nc / nat_total * 100.0) if nat_total > 0 else 0.0
-
-    # perito NC robusto
-    df["nc_flag"] = (
-        (df["conformado"].fillna(1).astype("Int64") == 0)
-        | (
-            df["motivoNC"].fillna("").astype(str).str.strip().ne("")
-            & df["motivoNC"].fillna("0").astype(str).str.strip().astype(str).ne("0")
         )
-    )
-    per_nc_total = int(df["nc_flag"].sum())
-    per_total = int(len(df))
-    per_pct = (per_nc_total / per_total * 100.0) if per_total > 0 else 0.0
+        per_nc_total = int(df["nc_flag"].sum())
+        per_total = int(len(df))
+        per_pct = (per_nc_total / per_total * 100.0) if per_total > 0 else 0.0
 
-    crit_nc_2x = per_pct >= (2.0 * nat_pct if nat_pct > 0 else 0.0)
-    prot_nc = sorted(df.loc[df["nc_flag"], "protocolo"].astype(str).unique().tolist())
-    n_nc = len(prot_nc)
+        crit_nc_2x = per_pct >= (2.0 * nat_pct if nat_pct > 0 else 0.0)
+        prot_nc = sorted(df.loc[df["nc_flag"], "protocolo"].astype(str).unique().tolist())
+        n_nc = len(prot_nc)
 
-    # Bloco textual no .org
-    lines.append("*** Detalhamento dos KPIs (protocolos por critério)")
-    lines.append("")
-    lines.append("_Critérios e pesos do ICRA; listagem de protocolos somente informativa (não soma pontos adicional)._")
-    lines.append("")
+        # Bloco textual no .org
+        lines.append("*** Detalhamento dos KPIs (protocolos por critério)")
+        lines.append("")
+        lines.append("_Critérios e pesos do ICRA; listagem de protocolos somente informativa (não soma pontos adicional)._")
+        lines.append("")
 
-    # ≤15s
-    lines.append(f"- *≤ {int(thr_15)}s* — protocolos ({n_le15}): " + (", ".join(prot_le15) if n_le15 else "_nenhum_"))
+        # ≤15s
+        lines.append(f"- *≤ {int(thr_15)}s* — protocolos ({n_le15}): " + (", ".join(prot_le15) if n_le15 else "_nenhum_"))
 
-    # Produtividade
-    if n_prod:
-        lines.append(f"- *Produtividade ≥ {int(thr_prod)}/h* (por janela-hora) — protocolos ({n_prod}): " + ", ".join(prot_prod))
-    else:
-        lines.append(f"- *Produtividade ≥ {int(thr_prod)}/h* (por janela-hora) — protocolos (0): _nenhum_")
+        # Produtividade
+        if n_prod:
+            lines.append(f"- *Produtividade ≥ {int(thr_prod)}/h* (por janela-hora) — protocolos ({n_prod}): " + ", ".join(prot_prod))
+        else:
+            lines.append(f"- *Produtividade ≥ {int(thr_prod)}/h* (por janela-hora) — protocolos (0): _nenhum_")
 
-    # Sobreposição
-    if n_overlap:
-        lines.append(f"- *Sobreposição* — protocolos envolvidos ({n_overlap}): " + ", ".join(prot_overlap))
-    else:
-        lines.append("- *Sobreposição* — protocolos (0): _nenhum_")
+        # Sobreposição
+        if n_overlap:
+            lines.append(f"- *Sobreposição* — protocolos envolvidos ({n_overlap}): " + ", ".join(prot_overlap))
+        else:
+            lines.append("- *Sobreposição* — protocolos (0): _nenhum_")
 
-    # NC ≥ 2× média nacional
-    if crit_nc_2x:
-        lines.append(f"- *%NC do perito ≥ 2× média nacional* — média BR={nat_pct:.1f}%, perito={per_pct:.1f}% → protocolos NC ({n_nc}): " + (", ".join(prot_nc) if n_nc else "_nenhum_"))
-    else:
-        lines.append(f"- *%NC do perito ≥ 2× média nacional* — **não acionado** (BR={nat_pct:.1f}% | perito={per_pct:.1f}%).")
-    lines.append("\n#+LATEX: \\newpage\n")
+        # NC ≥ 2× média nacional
+        if crit_nc_2x:
+            lines.append(f"- *%NC do perito ≥ 2× média nacional* — média BR={nat_pct:.1f}%, perito={per_pct:.1f}% → protocolos NC ({n_nc}): " + (", ".join(prot_nc) if n_nc else "_nenhum_"))
+        else:
+            lines.append(f"- *%NC do perito ≥ 2× média nacional* — **não acionado** (BR={nat_pct:.1f}% | perito={per_pct:.1f}%).")
+        lines.append("\n#+LATEX: \\newpage\n")
 
-    # -------------------------------------------------------------------------
-    # Protocolos Transferidos (complementar – já existia)
-    # -------------------------------------------------------------------------
-    _append_protocol_transfers_perito_block_if_any(
-        lines, perito, start, end, relatorio_dir=output_dir, heading_level="***",
-        link_prefix="../" if orgs_dir else ""
-    )
+        # -------------------------------------------------------------------------
+        # Protocolos Transferidos (complementar – já existia)
+        # -------------------------------------------------------------------------
+        _append_protocol_transfers_perito_block_if_any(
+            lines, perito, start, end, relatorio_dir=output_dir, heading_level="***",
+            link_prefix="../" if orgs_dir else ""
+        )
 
-    # -------------------------------------------------------------------------
-    # Apêndice: Protocolos NC por motivo
-    # -------------------------------------------------------------------------
-    apdf = gerar_apendice_nc(perito, start, end)
-    if not apdf.empty:
-        lines.append(f"*** Apêndice: Protocolos Não-Conformados por Motivo")
-        grouped = apdf.groupby('motivo_text')['protocolo'].apply(lambda seq: ', '.join(map(str, seq))).reset_index()
-        for _, grp in grouped.iterrows():
-            lines.append(f"- *{grp['motivo_text']}*: {grp['protocolo']}")
-        lines.append("")
+        # -------------------------------------------------------------------------
+        # Apêndice: Protocolos NC por motivo
+        # -------------------------------------------------------------------------
+        apdf = gerar_apendice_nc(perito, start, end)
+        if not apdf.empty:
+            lines.append(f"*** Apêndice: Protocolos Não-Conformados por Motivo")
+            grouped = apdf.groupby('motivo_text')['protocolo'].apply(lambda seq: ', '.join(map(str, seq))).reset_index()
+            for _, grp in grouped.iterrows():
+                lines.append(f"- *{grp['motivo_text']}*: {grp['protocolo']}")
+            lines.append("")
 
-    # -------------------------------------------------------------------------
-    # Apêndice estatístico (R) — imagens + comentários IA se houver
-    # -------------------------------------------------------------------------
-    r_pngs = glob(os.path.join(imgs_dir, f"rcheck_*_{safe}.png"))
-    r_pngs.sort(key=lambda p: _rcheck_perito_rank(p))
-    if r_pngs:
-        lines.append(f"*** Apêndice estatístico (R) — {perito}\n")
-        for png in r_pngs:
-            base = os.path.basename(png)
-            lines += [
-                "#+ATTR_LATEX: :placement [H] :width \\linewidth",
-                f"#+CAPTION: {_nice_caption(base)}",
-                f"[[file:{imgs_prefix}{base}]]",
-            ]
-            if add_comments:
-                stem = os.path.splitext(base)[0]
-                quote_lines = _inject_comment_for_stem(stem, comments_dir, output_dir, imgs_dir=imgs_dir)
-                lines += quote_lines
-            lines.append("\n#+LATEX: \\newpage\n")
+        # -------------------------------------------------------------------------
+        # Apêndice estatístico (R) — imagens + comentários IA se houver
+        # -------------------------------------------------------------------------
+        r_pngs = glob(os.path.join(imgs_dir, f"rcheck_*_{safe}.png"))
+        r_pngs.sort(key=lambda p: _rcheck_perito_rank(p))
+        if r_pngs:
+            lines.append(f"*** Apêndice estatístico (R) — {perito}\n")
+            for png in r_pngs:
+                base = os.path.basename(png)
+                lines += [
+                    "#+ATTR_LATEX: :placement [H] :width \\linewidth",
+                    f"#+CAPTION: {_nice_caption(base)}",
+                    f"[[file:{imgs_prefix}{base}]]",
+                ]
+                if add_comments:
+                    stem = os.path.splitext(base)[0]
+                    quote_lines = _inject_comment_for_stem(stem, comments_dir, output_dir, imgs_dir=imgs_dir)
+                    lines += quote_lines
+                lines.append("\n#+LATEX: \\newpage\n")
 
-    # -------------------------------------------------------------------------
-    # Grava o .org
-    # -------------------------------------------------------------------------
-    with open(org_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
     print(f"✅ Org individual salvo em: {org_path}")
     return org_path
 
@@ -3034,43 +3793,42 @@ def gerar_org_top10_grupo(start, end, output_dir, imgs_dir, comments_dir, orgs_d
     org_path = os.path.join(save_dir, f"top10_grupo.org")
     imgs_prefix = "../imgs/" if orgs_dir else "imgs/"
 
-    lines = [f"** Top 10 — Gráficos do Grupo ({start} a {end})\n"]
+    with OrgWriter(org_path, strip=False) as lines:
+        lines.append(f"** Top 10 — Gráficos do Grupo ({start} a {end})\n")
 
-    # ✅ dedup: use set() na união dos padrões
-    all_pngs = sorted({
-        *glob(os.path.join(imgs_dir, "*_top10*.png")),
-        *glob(os.path.join(imgs_dir, "*top10*.png")),
-    })
+        # ✅ dedup: use set() na união dos padrões
+        all_pngs = sorted({
+            *glob(os.path.join(imgs_dir, "*_top10*.png")),
+            *glob(os.path.join(imgs_dir, "*top10*.png")),
+        })
 
-    # ✅ particiona já sem duplicatas e com ordenação estável
-    main_pngs = sorted(
-        (p for p in all_pngs if "rcheck_" not in os.path.basename(p).lower()),
-        key=_png_rank_main
-    )
-    r_pngs = sorted(
-        (p for p in all_pngs if "rcheck_" in os.path.basename(p).lower()),
-        key=lambda p: _rcheck_group_rank(p)
-    )
+        # ✅ particiona já sem duplicatas e com ordenação estável
+        main_pngs = sorted(
+            (p for p in all_pngs if "rcheck_" not in os.path.basename(p).lower()),
+            key=_png_rank_main
+        )
+        r_pngs = sorted(
+            (p for p in all_pngs if "rcheck_" in os.path.basename(p).lower()),
+            key=lambda p: _rcheck_group_rank(p)
+        )
 
-    seen_imgs = set()  # ✅ guarda bases já emitidas
-    for png in main_pngs + r_pngs:
-        base = os.path.basename(png)
-        if base in seen_imgs:
-            continue
-        seen_imgs.add(base)
+        seen_imgs = set()  # ✅ guarda bases já emitidas
+        for png in main_pngs + r_pngs:
+            base = os.path.basename(png)
+            if base in seen_imgs:
+                continue
+            seen_imgs.add(base)
 
-        lines += [
-            "#+ATTR_LATEX: :placement [H] :width \\linewidth",
-            f"#+CAPTION: {_nice_caption(base)}",
-            f"[[file:{imgs_prefix}{base}]]",
-        ]
-        stem = os.path.splitext(base)[0]
-        quote_lines = _inject_comment_for_stem(stem, comments_dir, output_dir)
-        lines += quote_lines
-        lines.append("\n#+LATEX: \\newpage\n")
+            lines += [
+                "#+ATTR_LATEX: :placement [H] :width \\linewidth",
+                f"#+CAPTION: {_nice_caption(base)}",
+                f"[[file:{imgs_prefix}{base}]]",
+            ]
+            stem = os.path.splitext(base)[0]
+            quote_lines = _inject_comment_for_stem(stem, comments_dir, output_dir)
+            lines += quote_lines
+            lines.append("\n#+LATEX: \\newpage\n")
 
-    with open(org_path, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines))
     print(f"✅ Org do grupo Top 10 salvo em: {org_path}")
     return org_path
 
@@ -3098,13 +3856,11 @@ def gerar_org_individual_consolidado(perito: str, start: str, end: str, relatori
         raise FileNotFoundError(f"Org individual não encontrado (new/old): {cand_new} | {cand_old}")
 
     final_org  = os.path.join(orgs_dir, f"relatorio_{safe}_{start}_a_{end}.org")
-    with open(perito_org, "r", encoding="utf-8") as f:
-        content = f.read().strip()
-    content = _protect_org_text_for_pandoc(content)
-
-    lines = [f"* Relatório individual — {perito} ({start} a {end})", "", content, ""]
-    with open(final_org, "w", encoding="utf-8") as g:
-        g.write("\n".join(lines))
+    with OrgWriter(final_org, strip=False) as lines:
+        lines.extend([f"* Relatório individual — {perito} ({start} a {end})", ""])
+        if not lines.include(perito_org, protect=True):
+            lines.append("")
+        lines.append("")
     print(f"✅ Org consolidado (individual) salvo em: {final_org}")
     return final_org
 
@@ -3140,21 +3896,16 @@ def gerar_org_individual_consolidado_com_panorama(perito: str, start: str, end:
 
     final_org  = os.path.join(relatorio_dir, f"relatorio_{safe}_{start}_a_{end}.org")
 
-    lines = []
-    _append_weekday2weekend_panorama_block(
-        lines,
-        os.path.join(relatorio_dir, "imgs"),
-        os.path.join(relatorio_dir, "comments"),
-        heading_level="**"
-    )
-
-    with open(perito_org, "r", encoding="utf-8") as f:
-        content = f.read().strip()
-    content = _protect_org_text_for_pandoc(content)
-    lines.extend([content, ""])
-
-    with open(final_org, "w", encoding="utf-8") as g:
-        g.write("\n".join(lines))
+    with OrgWriter(final_org, strip=False) as lines:
+        _append_weekday2weekend_panorama_block(
+            lines,
+            os.path.join(relatorio_dir, "imgs"),
+            os.path.join(relatorio_dir, "comments"),
+            heading_level="**"
+        )
+        if not lines.include(perito_org, protect=True):
+            lines.append("")
+        lines.append("")
     print(f"✅ Org consolidado (individual) salvo em: {final_org}")
     return final_org
 
@@ -3167,20 +3918,15 @@ def gerar_org_individual_consolidado_com_panorama_depois(perito: str, start: str
     os.makedirs(orgs_dir, exist_ok=True)
     org_final    = os.path.join(orgs_dir, f"relatorio_{safe_perito}_{start}_a_{end}.org")
 
-    lines = [f"* Relatório individual — {perito} ({start} a {end})", ""]
-    if perito_org_path and os.path.exists(perito_org_path):
-        with open(perito_org_path, encoding="utf-8") as f:
-            content = f.read().strip()
-        if content:
-            lines.append(content)
-            lines.append("#+LATEX: \\newpage\n")
-    else:
-        print(f"[AVISO] Org do perito não encontrado: {perito_org_path}")
-
-    _append_weekday2weekend_panorama_block(lines, imgs_dir, comments_dir, start=start, end=end, heading_level="**", imgs_prefix="../imgs/")
+    with OrgWriter(org_final) as lines:
+        lines.extend([f"* Relatório individual — {perito} ({start} a {end})", ""])
+        if perito_org_path and os.path.exists(perito_org_path):
+            if lines.include(perito_org_path):
+                lines.append("#+LATEX: \\newpage\n")
+        else:
+            print(f"[AVISO] Org do perito não encontrado: {perito_org_path}")
 
-    with open(org_final, "w", encoding="utf-8") as f:
-        f.write("\n".join(lines).strip() + "\n")
+        _append_weekday2weekend_panorama_block(lines, imgs_dir, comments_dir, start=start, end=end, heading_level="**", imgs_prefix="../imgs/")
     print(f"✅ Org consolidado (individual) salvo em: {org_final}")
     return org_final
 
@@ -3277,26 +4023,6 @@ def pegar_peritos_nc_altissima(start: str, end: str,
         conn.close()
 
 
-def perito_tem_dados(perito: str, start: str, end: str) -> bool:
-    """
-    True se o perito possui pelo menos 1 tarefa no período.
-    """
-    conn = sqlite3.connect(DB_PATH)
-    try:
-        count = conn.execute(
-            """
-            SELECT COUNT(*)
-            FROM analises a
-            JOIN peritos p ON a.siapePerito = p.siapePerito
-            WHERE p.nomePerito = ?
-              AND date(a.dataHoraIniPericia) BETWEEN ? AND ?
-            """,
-            (perito, start, end)
-        ).fetchone()[0]
-        return count > 0
-    finally:
-        conn.close()
-
 def _nat_nc_pct_valid(start: str, end: str) -> float:
     """
     %NC nacional no período, mas **apenas** sobre análises com duração válida:
@@ -3465,12 +4191,27 @@ LATEX_HEADER_CONTENT = r"""
 \usepackage{array}
 """
 
+# Opções fixas do pandoc (além de entrada/saída, fonte e cabeçalho)
+PANDOC_PDF_OPTS = ["--variable", "geometry:margin=2cm", "--highlight-style=zenburn"]
+
+def _pdf_template_digest() -> str:
+    """
+    Hash do cabeçalho LaTeX e das opções fixas do pandoc: entram na impressão digital
+    dos PDFs (utils/pdf_build.py), que só vê o .org e os arquivos que ele referencia.
+    """
+    raw = json.dumps([LATEX_HEADER_CONTENT, PANDOC_PDF_OPTS], ensure_ascii=False)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()[:16]
+
 
-def exportar_org_para_pdf(org_path: str, font: str = "DejaVu Sans", pdf_dir: str | None = None) -> str | None:
+def exportar_org_para_pdf(org_path: str, font: str = "DejaVu Sans", pdf_dir: str | None = None,
+                          workdir: str | None = None) -> str | None:
     """
     Converte .org -> PDF via Pandoc + xelatex.
     Agora salva o PDF em uma pasta irmã 'pdfs/' da pasta onde está o .org (normalmente 'orgs/').
     Ex.: .../top10/orgs/relatorio.org  -->  .../top10/pdfs/relatorio.pdf
+
+    Os intermediários (cabeçalho LaTeX, .org protegido, PDF parcial) vão para `workdir`
+    (ou um diretório temporário próprio): vários PDFs podem ser gerados em paralelo.
     """
     import shutil as sh
 
@@ -3484,56 +4225,50 @@ def exportar_org_para_pdf(org_path: str, font: str = "DejaVu Sans", pdf_dir: str
     pdf_name   = org_name.replace('.org', '.pdf')
     pdf_path   = os.path.join(pdf_dir, pdf_name)
 
+    own_workdir = workdir is None
+    workdir     = workdir or tempfile.mkdtemp(prefix="pdf_")
     log_path    = org_path + ".log"
-    header_path = os.path.join(output_dir, "_header_figs.tex")
+    header_path = os.path.join(workdir, "_header_figs.tex")
 
-    # Cabeçalho LaTeX (figuras estáveis) fica ao lado do .org
-    LATEX_HEADER_CONTENT = r"""
-%% Inserido automaticamente pelo make_report.py
-\usepackage{float}
-\usepackage{placeins}
-\floatplacement{figure}{H}
-\usepackage{longtable}
-\usepackage{array}
-"""
+    # Cabeçalho LaTeX (figuras estáveis), isolado por build
     with open(header_path, "w", encoding="utf-8") as fh:
         fh.write(LATEX_HEADER_CONTENT)
 
-    # Protege o .org para consumo pelo Pandoc
-    with open(org_path, "r", encoding="utf-8") as f:
-        raw = f.read()
-    protected = _protect_org_text_for_pandoc(raw)
+    # Protege o .org para consumo pelo Pandoc (em fluxo, direto para o workdir)
     prot_name = org_name.replace(".org", "._pandoc.org")
-    prot_path = os.path.join(output_dir, prot_name)
-    with open(prot_path, "w", encoding="utf-8") as fprot:
-        fprot.write(protected)
+    prot_path = os.path.join(workdir, prot_name)
+    with OrgWriter(prot_path, strip=False) as fprot:
+        fprot.write_lines(iter_protect_for_pandoc(iter_file_lines(org_path)))
 
     # Checa pandoc
     pandoc = sh.which("pandoc")
     if not pandoc:
         print("❌ Pandoc não encontrado no PATH. Instale com: sudo apt install pandoc texlive-xetex")
+        if own_workdir:
+            sh.rmtree(workdir, ignore_errors=True)
         return None
 
-    # Saída relativa a partir de output_dir (onde vamos rodar o pandoc)
-    pdf_rel = os.path.relpath(pdf_path, start=output_dir)
-
+    # O pandoc roda em output_dir (links relativos das imagens); entrada e saída parcial ficam no workdir
+    pdf_tmp = os.path.join(workdir, pdf_name)
     cmd = [
-        "pandoc", prot_name, "-o", pdf_rel,
+        "pandoc", prot_path, "-o", pdf_tmp,
         "--pdf-engine=xelatex",
-        "--include-in-header", os.path.basename(header_path),
+        "--resource-path", output_dir,
+        "--include-in-header", header_path,
         "--variable", f"mainfont={font}",
-        "--variable", "geometry:margin=2cm",
-        "--highlight-style=zenburn",
+        *PANDOC_PDF_OPTS,
     ]
 
     print(f"[Pandoc] Gerando PDF: {' '.join(cmd)} (cwd={output_dir})")
-    prev_cwd = os.getcwd()
     try:
-        os.chdir(output_dir)
         with open(log_path, "w", encoding="utf-8") as flog:
-            result = subprocess.run(cmd, stdout=flog, stderr=flog, text=True)
+            result = subprocess.run(cmd, cwd=output_dir, stdout=flog, stderr=flog, text=True,
+                                    env={**os.environ, "TMPDIR": workdir})
+        if result.returncode == 0 and os.path.exists(pdf_tmp):
+            sh.move(pdf_tmp, pdf_path)
     finally:
-        os.chdir(prev_cwd)
+        if own_workdir:
+            sh.rmtree(workdir, ignore_errors=True)
 
     if result.returncode == 0 and os.path.exists(pdf_path):
         print(f"✅ PDF gerado: {pdf_path}")
@@ -3543,6 +4278,42 @@ def exportar_org_para_pdf(org_path: str, font: str = "DejaVu Sans", pdf_dir: str
         return None
 
 
+def _pdf_stage_add(stage: "PdfBuildStage", org_path: str, font: str = "DejaVu Sans",
+                   backend: str = "pandoc") -> str:
+    """Registra o .org na etapa de PDFs (destino: pasta irmã 'pdfs/', como exportar_org_para_pdf)."""
+    pdf_dir  = os.path.join(os.path.dirname(os.path.dirname(org_path)), "pdfs")
+    pdf_path = os.path.join(pdf_dir, os.path.basename(org_path).replace(".org", ".pdf"))
+    if backend == "reportlab":
+        stage.add(org_path, pdf_path, lambda o, p, wd: render_org_pdf(o, p), engine="reportlab")
+    else:
+        stage.add(org_path, pdf_path,
+                  lambda o, p, wd: exportar_org_para_pdf(o, font=font, pdf_dir=os.path.dirname(p), workdir=wd),
+                  engine="pandoc+xelatex", font=font, template=_pdf_template_digest())
+    return pdf_path
+
+
+def _export_pdfs(main_org: str, extra_orgs: List[str], workers: int = 0, force: bool = False,
+                 backend: str = "pandoc") -> str | None:
+    """
+    Etapa de PDFs: gera (em paralelo, pulando os inalterados) o PDF do .org principal e
+    dos extras; a capa é adicionada uma vez, no final, só ao PDF principal.
+    """
+    stage = PdfBuildStage(workers=workers, force=force)
+    _pdf_stage_add(stage, main_org, backend=backend)
+    for org in extra_orgs:
+        if org and os.path.abspath(org) != os.path.abspath(main_org):
+            _pdf_stage_add(stage, org, backend=backend)
+    pdfs = stage.run()
+    pdf_path = pdfs.get(main_org)
+    if pdf_path and os.path.exists(pdf_path):
+        capa_out = pdf_path.replace(".pdf", "_com_capa.pdf")
+        if main_org in stage.rebuilt or not _pdf_is_newer(capa_out, pdf_path, os.path.join(MISC_DIR, "capa.pdf")):
+            adicionar_capa_pdf(pdf_path)
+        else:
+            print(f"[PDF] capa inalterada: {capa_out}")
+    return pdf_path
+
+
 def adicionar_capa_pdf(pdf_final_path: str) -> None:
     """
     Prependa a capa oficial (misc/capa.pdf) ao PDF final.
@@ -3775,6 +4546,37 @@ def _append_protocol_transfers_perito_block_if_any(
     lines.append("")
     return True
 
+def _drain_comment_queue(args, queue_dir: str, comments_dir: str, orgs_dir: str,
+                         relatorio_dir: str, imgs_dir: str, org_final: str) -> None:
+    """
+    Fase 2 dos comentários adiados: processa a fila (em paralelo, com cache),
+    troca os blocos marcados nos .org do relatório e, com --export-pdf, regera o PDF.
+    """
+    if not os.path.isdir(queue_dir):
+        print(f"[AVISO] Fila de comentários não encontrada: {queue_dir} (rode antes com --defer-comments).")
+        return
+    with _StageTimer("comentarios_fila") as st:
+        done = _comment_queue.drain(queue_dir, comments_dir)
+        st.rec["rows"] = len(done)
+    restantes = sum(1 for j in _comment_queue.pending_jobs(queue_dir) if j.get("stems"))
+    print(f"[INFO] {len(done)} comentário(s) gerado(s); {restantes} job(s) ainda na fila.")
+    if not done:
+        return
+
+    n = _comment_queue.reinject(
+        sorted(glob(os.path.join(orgs_dir, "*.org"))), done.keys(),
+        lambda stem: _inject_comment_for_stem(stem, comments_dir, relatorio_dir, imgs_dir=imgs_dir))
+    print(f"✅ {n} bloco(s) de comentário atualizado(s) em {orgs_dir}")
+
+    if args.export_pdf:
+        if not os.path.exists(org_final):
+            print(f"[AVISO] Org consolidado não encontrado para regerar o PDF: {org_final}")
+            return
+        with _StageTimer("pdf"):
+            _export_pdfs(org_final, [], workers=args.pdf_workers, force=args.pdf_force,
+                         backend=args.pdf_backend)
+
+
 def main():
     """
     Orquestração principal:
@@ -3787,6 +4589,8 @@ def main():
     """
     t0 = time.time()
     args = parse_args()
+    _TIMING_STATE["run_id"] = datetime.now().strftime("%Y%m%dT%H%M%S")
+    _TIMING_STATE["profile"] = getattr(args, "profile", None)
 
     # Aviso apenas se pretendemos gerar comentários IA sem OPENAI_API_KEY
     if (args.add_comments or getattr(args, "export_comment_org", False)) and not os.getenv("OPENAI_API_KEY"):
@@ -3817,7 +4621,9 @@ def main():
     legacy_top10 = bool(args.top10)
 
     # Se houver qualquer uma das novas formas (topk / all-matching / peritos-csv), usamos _select_candidates
-    df_sel, scope_df = _select_candidates(args)  # pode retornar vazio no caso Top10 legacy
+    with _StageTimer("selecao") as st:
+        df_sel, scope_df = _select_candidates(args)  # pode retornar vazio no caso Top10 legacy
+        st.rec["rows"] = 0 if df_sel is None else int(len(df_sel))
 
     # Define rótulo da pasta de relatório de GRUPO (quando aplicável)
     if is_group_run:
@@ -3842,111 +4648,201 @@ def main():
     for d in (RELATORIO_DIR, IMGS_DIR, COMMENTS_DIR, ORGS_DIR, MARKDOWN_DIR):
         os.makedirs(d, exist_ok=True)
 
-    planned_cmds: list[list[str]] = []
-
-    # =========================
-    # PLANEJAMENTO — GRUPO
-    # =========================
-    if is_group_run:
-        # Limpa exports antigos de grupo
-        _cleanup_exports_top10()
-
-        # Materializa seleção/escopo quando houver (TopK/all-matching/peritos-csv)
-        # No Top10 legacy (df_sel vazio), não gera peritos_csv para manter fallback --top10
-        if df_sel is not None and not df_sel.empty:
-            peritos_csv_path, scope_csv_path = _materialize_selection_to_csvs(
-                df_sel, scope_df, RELATORIO_DIR, fluxo, args.start, args.end, save_manifests=bool(getattr(args, "save_manifests", False))
-            )
-            # lista para rodar apêndices/individuais
-            lista_selecionados = sorted(df_sel["nomePerito"].astype(str).unique().tolist())
+    _IMG_ASSETS_STATE.update(dedupe=bool(args.img_dedupe), variants=bool(args.img_variants))
+    if args.img_variants and not _image_assets.HAS_PIL:
+        print("[AVISO] --img-variants requer Pillow; imagens mantidas no original.")
+
+    # Comentários em duas fases: a fila fica junto ao relatório
+    comment_queue_dir = os.path.join(RELATORIO_DIR, "_comment_queue")
+    if (args.defer_comments or args.drain_comments) and _comment_queue is None:
+        print("[AVISO] utils/comment_queue.py indisponível; comentários gerados no próprio run.")
+    elif args.drain_comments:
+        _COMMENT_QUEUE_STATE["defer"] = True
+        report_label = group_label if is_group_run else _safe(args.perito.strip())
+        _drain_comment_queue(args, comment_queue_dir, COMMENTS_DIR, ORGS_DIR, RELATORIO_DIR, IMGS_DIR,
+                             os.path.join(ORGS_DIR, f"relatorio_{report_label}_{args.start}_a_{args.end}.org"))
+        return
+    elif args.defer_comments:
+        # herdado pelos scripts de comparação (subprocessos) via ambiente
+        os.environ[_comment_queue.QUEUE_ENV] = comment_queue_dir
+        _COMMENT_QUEUE_STATE["defer"] = True
+        if getattr(args, "artifact_store", False):
+            # a fase 1 grava comentários provisórios (heurísticos) e o drain só atualiza o
+            # relatório: no store eles ficariam como definitivos para os próximos runs
+            print("[AVISO] --artifact-store não combina com --defer-comments; store desligado neste run.")
+            args.artifact_store = False
+
+    # Timings (JSON lines) ao lado do relatório; descarrega o que foi medido na seleção
+    if not args.plan_only:
+        _timing_set_path(os.path.join(RELATORIO_DIR, RUN_TIMINGS_NAME))
+
+    # Manifesto de execução: sempre registra; com --resume, também pula o que não mudou
+    resume = bool(getattr(args, "resume", False))
+    manifest_path = os.path.join(RELATORIO_DIR, RUN_MANIFEST_NAME)
+    _RUN_STATE.update({
+        "manifest": _load_run_manifest(manifest_path) if resume else {"version": 1, "commands": {}},
+        "path": manifest_path,
+        "resume": resume,
+        "store": bool(getattr(args, "artifact_store", False)),
+        "search_dirs": [RCHECK_DIR, IMGS_DIR, COMMENTS_DIR, ORGS_DIR, MARKDOWN_DIR],
+    })
+    _RUN_STATE["manifest"].update({"start": args.start, "end": args.end})
+    if resume:
+        n_prev = len(_RUN_STATE["manifest"]["commands"])
+        print(f"[RESUME] Manifesto: {manifest_path} ({n_prev} comando(s) registrados). "
+              f"Limpeza de exports/ restrita ao que o manifesto não cobre.")
+
+    # Limpeza de exports/: imediata; no --resume, adiada até o plano existir para
+    # preservar só os artefatos que o manifesto atribui a comandos reaproveitáveis
+    cleanup_targets: List[Optional[str]] = []   # None = top10; str = perito (safe)
+
+    def _cleanup_exports(target: Optional[str]) -> None:
+        if resume:
+            cleanup_targets.append(target)
+        elif target is None:
+            _cleanup_exports_top10()
         else:
-            peritos_csv_path, scope_csv_path = None, (scope_df if scope_df is not None else None)
-            if legacy_top10:
-                print("ℹ️  Top 10 legacy (sem peritos_csv): scripts de grupo que suportam --top10 serão chamados com --top10.")
-                # Para gerar individuais no consolidado, calculamos a lista do Top 10 (como no seu fluxo atual)
-                if fluxo == "B":
-                    peritos_df = pegar_top10_harm_first(args.start, args.end, min_analises=args.min_analises, factor_nc=2.0)
-                else:
-                    peritos_df = pegar_10_piores_peritos(args.start, args.end, min_analises=args.min_analises)
-                if not peritos_df.empty:
-                    lista_selecionados = peritos_df['nomePerito'].astype(str).tolist()
-                    set_top10 = set(lista_selecionados)
-                else:
-                    print("⚠️  Nenhum perito elegível para o Top 10 no período/fluxo informados.")
-                    # Seguimos só com os gráficos de grupo/top10 (se houver) e saídas globais
-
-        # Scripts globais (por período) — execute antes para garantir orgs auxiliares
-        for script in GLOBAL_SCRIPTS:
-            script_file = script_path(script)
-            planned_cmds[:0] = build_commands_for_global(script_file, args.start, args.end)
-
-        # Contexto de GRUPO para os scripts Python
-        group_ctx = {
-            "kind": "group",
-            "top_k": (10 if legacy_top10 and not peritos_csv_path else int(getattr(args, "topk", 0) or 0)),
-            "start": args.start,
-            "end":   args.end,
-            "min_analises": args.min_analises,
-            "add_comments": args.add_comments,
-            "export_org": bool(getattr(args, "export_org", False)),
-            "export_pdf": bool(getattr(args, "export_pdf", False)),
-            "fluxo": fluxo,
-            "kpi_base": getattr(args, "kpi_base", None),
-            "peritos_csv": peritos_csv_path,
-            "scope_csv": scope_csv_path,
-        }
-
-        # Agenda scripts Python de GRUPO
-        for script in SCRIPT_ORDER:
-            script_file = script_path(script)
-            planned_cmds.extend(build_commands_for_script(script_file, group_ctx))
+            _cleanup_exports_for_perito(target)
 
-        # Agenda R checks (grupo ou por perito conforme a seleção)
-        _run_rchecks_for_selection(args, peritos_csv=peritos_csv_path, plan_only=bool(args.plan_only))
-
-        # Agenda scripts INDIVIDUAIS para cada perito selecionado
-        for perito in lista_selecionados:
-            if not perito_tem_dados(perito, args.start, args.end):
-                print(f"⚠️  Perito '{perito}' sem análises no período! Pulando.")
-                continue
-            safe = _safe(perito)
-            _cleanup_exports_for_perito(safe)
+    planned_cmds: list[list[str]] = []
+    with _StageTimer("planejamento") as st_plan:
+        # =========================
+        # PLANEJAMENTO — GRUPO
+        # =========================
+        if is_group_run:
+            # Limpa exports antigos de grupo (no --resume, só o que o manifesto não cobre)
+            _cleanup_exports(None)
+
+            # Materializa seleção/escopo quando houver (TopK/all-matching/peritos-csv)
+            # No Top10 legacy (df_sel vazio), não gera peritos_csv para manter fallback --top10
+            if df_sel is not None and not df_sel.empty:
+                peritos_csv_path, scope_csv_path = _materialize_selection_to_csvs(
+                    df_sel, scope_df, RELATORIO_DIR, fluxo, args.start, args.end, save_manifests=bool(getattr(args, "save_manifests", False))
+                )
+                # lista para rodar apêndices/individuais
+                lista_selecionados = sorted(df_sel["nomePerito"].astype(str).unique().tolist())
+            else:
+                peritos_csv_path, scope_csv_path = None, (scope_df if scope_df is not None else None)
+                if legacy_top10:
+                    print("ℹ️  Top 10 legacy (sem peritos_csv): scripts de grupo que suportam --top10 serão chamados com --top10.")
+                    # Para gerar individuais no consolidado, calculamos a lista do Top 10 (como no seu fluxo atual)
+                    if fluxo == "B":
+                        peritos_df = pegar_top10_harm_first(args.start, args.end, min_analises=args.min_analises, factor_nc=2.0)
+                    else:
+                        peritos_df = pegar_10_piores_peritos(args.start, args.end, min_analises=args.min_analises)
+                    if not peritos_df.empty:
+                        lista_selecionados = peritos_df['nomePerito'].astype(str).tolist()
+                        set_top10 = set(lista_selecionados)
+                    else:
+                        print("⚠️  Nenhum perito elegível para o Top 10 no período/fluxo informados.")
+                        # Seguimos só com os gráficos de grupo/top10 (se houver) e saídas globais
+
+            # Scripts globais (por período) — execute antes para garantir orgs auxiliares
+            for script in GLOBAL_SCRIPTS:
+                script_file = script_path(script)
+                planned_cmds[:0] = build_commands_for_global(script_file, args.start, args.end)
 
-            indiv_ctx = {
-                "kind": "perito",
-                "perito": perito,
+            # Contexto de GRUPO para os scripts Python
+            group_ctx = {
+                "kind": "group",
+                "top_k": (10 if legacy_top10 and not peritos_csv_path else int(getattr(args, "topk", 0) or 0)),
                 "start": args.start,
                 "end":   args.end,
+                "min_analises": args.min_analises,
                 "add_comments": args.add_comments,
                 "export_org": bool(getattr(args, "export_org", False)),
                 "export_pdf": bool(getattr(args, "export_pdf", False)),
                 "fluxo": fluxo,
                 "kpi_base": getattr(args, "kpi_base", None),
+                "peritos_csv": peritos_csv_path,
+                "scope_csv": scope_csv_path,
             }
+
+            # Agenda scripts Python de GRUPO
             for script in SCRIPT_ORDER:
                 script_file = script_path(script)
-                planned_cmds.extend(build_commands_for_script(script_file, indiv_ctx))
+                planned_cmds.extend(build_commands_for_script(script_file, group_ctx))
 
-            if args.r_appendix:
-                planned_cmds.extend(build_r_commands_for_perito(perito, args.start, args.end, args.r_bin))
+            # Agenda R checks (grupo ou por perito conforme a seleção)
+            _run_rchecks_for_selection(args, peritos_csv=peritos_csv_path, plan_only=bool(args.plan_only))
 
-        # Coorte extra %NC altíssima (opcional) — mantém sua lógica
-        extras_list = []
-        if args.include_high_nc:
-            df_high = pegar_peritos_nc_altissima(args.start, args.end, nc_threshold=args.high_nc_threshold, min_tasks=args.high_nc_min_tasks)
-            if not df_high.empty:
-                base_set = set(lista_selecionados) if lista_selecionados else set_top10
-                extras_list = [n for n in df_high['nomePerito'].astype(str).tolist() if n not in base_set]
-                if extras_list:
-                    print(f"Incluindo coorte extra (%NC ≥ {args.high_nc_threshold} e ≥ {args.high_nc_min_tasks} tarefas): {extras_list}")
-        else:
-            print("Coorte extra de %NC alta desativada (--no-high-nc).")
+            # Agenda scripts INDIVIDUAIS para cada perito selecionado
+            for perito in lista_selecionados:
+                if not perito_tem_dados(perito, args.start, args.end):
+                    print(f"⚠️  Perito '{perito}' sem análises no período! Pulando.")
+                    continue
+                safe = _safe(perito)
+                _cleanup_exports(safe)
+
+                indiv_ctx = {
+                    "kind": "perito",
+                    "perito": perito,
+                    "start": args.start,
+                    "end":   args.end,
+                    "add_comments": args.add_comments,
+                    "export_org": bool(getattr(args, "export_org", False)),
+                    "export_pdf": bool(getattr(args, "export_pdf", False)),
+                    "fluxo": fluxo,
+                    "kpi_base": getattr(args, "kpi_base", None),
+                }
+                for script in SCRIPT_ORDER:
+                    script_file = script_path(script)
+                    planned_cmds.extend(build_commands_for_script(script_file, indiv_ctx))
+
+                if args.r_appendix:
+                    planned_cmds.extend(build_r_commands_for_perito(perito, args.start, args.end, args.r_bin))
+
+            # Coorte extra %NC altíssima (opcional) — mantém sua lógica
+            extras_list = []
+            if args.include_high_nc:
+                df_high = pegar_peritos_nc_altissima(args.start, args.end, nc_threshold=args.high_nc_threshold, min_tasks=args.high_nc_min_tasks)
+                if not df_high.empty:
+                    base_set = set(lista_selecionados) if lista_selecionados else set_top10
+                    extras_list = [n for n in df_high['nomePerito'].astype(str).tolist() if n not in base_set]
+                    if extras_list:
+                        print(f"Incluindo coorte extra (%NC ≥ {args.high_nc_threshold} e ≥ {args.high_nc_min_tasks} tarefas): {extras_list}")
+            else:
+                print("Coorte extra de %NC alta desativada (--no-high-nc).")
 
-        for perito in extras_list:
+            for perito in extras_list:
+                if not perito_tem_dados(perito, args.start, args.end):
+                    continue
+                safe = _safe(perito)
+                _cleanup_exports(safe)
+
+                indiv_ctx = {
+                    "kind": "perito",
+                    "perito": perito,
+                    "start": args.start,
+                    "end":   args.end,
+                    "add_comments": args.add_comments,
+                    "export_org": bool(getattr(args, "export_org", False)),
+                    "export_pdf": bool(getattr(args, "export_pdf", False)),
+                    "fluxo": fluxo,
+                    "kpi_base": getattr(args, "kpi_base", None),
+                }
+                for script in SCRIPT_ORDER:
+                    script_file = script_path(script)
+                    planned_cmds.extend(build_commands_for_script(script_file, indiv_ctx))
+                if args.r_appendix:
+                    planned_cmds.extend(build_r_commands_for_perito(perito, args.start, args.end, args.r_bin))
+
+        # =========================
+        # PLANEJAMENTO — INDIVIDUAL
+        # =========================
+        else:
+            perito = args.perito.strip()
             if not perito_tem_dados(perito, args.start, args.end):
-                continue
+                print(f"⚠️  Perito '{perito}' sem análises no período.")
+                return
+
             safe = _safe(perito)
-            _cleanup_exports_for_perito(safe)
+            _cleanup_exports(safe)
+
+            # Scripts globais (por período) — ainda executa para obter orgs-base do W→WE
+            for script in GLOBAL_SCRIPTS:
+                script_file = script_path(script)
+                planned_cmds[:0] = build_commands_for_global(script_file, args.start, args.end)
 
             indiv_ctx = {
                 "kind": "perito",
@@ -3962,51 +4858,19 @@ def main():
             for script in SCRIPT_ORDER:
                 script_file = script_path(script)
                 planned_cmds.extend(build_commands_for_script(script_file, indiv_ctx))
+
             if args.r_appendix:
                 planned_cmds.extend(build_r_commands_for_perito(perito, args.start, args.end, args.r_bin))
 
-    # =========================
-    # PLANEJAMENTO — INDIVIDUAL
-    # =========================
-    else:
-        perito = args.perito.strip()
-        if not perito_tem_dados(perito, args.start, args.end):
-            print(f"⚠️  Perito '{perito}' sem análises no período.")
-            return
-
-        safe = _safe(perito)
-        _cleanup_exports_for_perito(safe)
-
-        # Scripts globais (por período) — ainda executa para obter orgs-base do W→WE
-        for script in GLOBAL_SCRIPTS:
-            script_file = script_path(script)
-            planned_cmds[:0] = build_commands_for_global(script_file, args.start, args.end)
-
-        indiv_ctx = {
-            "kind": "perito",
-            "perito": perito,
-            "start": args.start,
-            "end":   args.end,
-            "add_comments": args.add_comments,
-            "export_org": bool(getattr(args, "export_org", False)),
-            "export_pdf": bool(getattr(args, "export_pdf", False)),
-            "fluxo": fluxo,
-            "kpi_base": getattr(args, "kpi_base", None),
-        }
-        for script in SCRIPT_ORDER:
-            script_file = script_path(script)
-            planned_cmds.extend(build_commands_for_script(script_file, indiv_ctx))
-
+        # Bootstrap de dependências R (entra antes de tudo)
         if args.r_appendix:
-            planned_cmds.extend(build_r_commands_for_perito(perito, args.start, args.end, args.r_bin))
+            cmd_boot = _r_deps_bootstrap_cmd(args.r_bin)
+            if cmd_boot:
+                planned_cmds.insert(0, cmd_boot)
+            else:
+                print("[AVISO] r_checks/_ensure_deps.R não encontrado; pulando bootstrap de pacotes.")
 
-    # Bootstrap de dependências R (entra antes de tudo)
-    if args.r_appendix:
-        cmd_boot = _r_deps_bootstrap_cmd(args.r_bin)
-        if cmd_boot:
-            planned_cmds.insert(0, cmd_boot)
-        else:
-            print("[AVISO] r_checks/_ensure_deps.R não encontrado; pulando bootstrap de pacotes.")
+        st_plan.rec["rows"] = len(planned_cmds)
 
     # Apenas listar plano?
     if args.plan_only:
@@ -4021,195 +4885,258 @@ def main():
             R_EXTRA_ENV["PERITOS_CSV"] = peritos_csv_path
         if scope_csv_path:
             R_EXTRA_ENV["SCOPE_CSV"] = scope_csv_path
-
-    # Execução (Python e R)
-    for cmd in planned_cmds:
-        try:
-            if _is_r_cmd(cmd):
-                print(f"[RUN] {' '.join(map(str, cmd))}")
-                r_env = os.environ.copy()
-                r_env.update(R_EXTRA_ENV)
-                subprocess.run(cmd, check=False, cwd=RCHECK_DIR, env=r_env)
+    # Extrato do período: só com workers R persistentes (cada worker carrega uma vez)
+    period_extract = getattr(args, "period_extract", None)
+    if period_extract and not int(getattr(args, "r_workers", 0) or 0):
+        print("[AVISO] --period-extract só vale com --r-workers ≥ 1; R checks consultarão o DB.")
+    if (period_extract is not False and int(getattr(args, "r_workers", 0) or 0) > 0
+            and any(_is_r_cmd(c) for c in planned_cmds)):
+        with _StageTimer("extrato_periodo"):
+            extract_dir = _write_period_extract(args.start, args.end)
+        if extract_dir:
+            R_EXTRA_ENV["KPI_PERIOD_EXTRACT"] = extract_dir
+
+    # --resume: remove de exports/ as sobras que nenhum comando reaproveitável explica
+    if cleanup_targets:
+        keep = _resume_keep_set(planned_cmds, R_EXTRA_ENV)
+        for target in cleanup_targets:
+            if target is None:
+                _cleanup_exports_top10(keep)
             else:
-                print(f"[RUN] {' '.join(map(str, cmd))}")
-                subprocess.run(cmd, check=False, env=_env_with_project_path(), cwd=SCRIPTS_DIR)
-        except Exception as e:
-            print(f"[ERRO] Falha executando: {' '.join(map(str, cmd))}\n  -> {e}")
+                _cleanup_exports_for_perito(target, keep)
+
+    # Pool de workers R persistentes (pacotes carregados uma vez por worker)
+    r_workers = max(0, int(getattr(args, "r_workers", 0) or 0))
+    # Os workers compartilham exports/ e r_checks/: em paralelo não há como saber qual job
+    # gravou cada arquivo, e --resume/--artifact-store dependem dessa atribuição.
+    if r_workers > 1 and (_RUN_STATE.get("store") or _RUN_STATE.get("resume")):
+        print("[AVISO] --resume/--artifact-store exigem atribuição exata de artefatos; R checks rodarão em 1 worker.")
+        r_workers = 1
+    _R_POOL_STATE["pool"] = _RWorkerPool(args.r_bin, r_workers) if r_workers else None
+    deferred_r: List[Tuple[list, dict]] = []
+
+    # Execução (Python e R) — cada comando também emite seu registro "cmd"
+    with _StageTimer("execucao", rows=len(planned_cmds), r_workers=r_workers):
+        try:
+            for cmd in planned_cmds:
+                try:
+                    if _is_r_cmd(cmd):
+                        r_env = os.environ.copy()
+                        r_env.update(R_EXTRA_ENV)
+                        if r_workers > 1:
+                            # R checks só leem o DB: rodam juntos no pool após os comandos Python
+                            deferred_r.append((cmd, r_env))
+                            continue
+                        print(f"[RUN] {' '.join(map(str, cmd))}")
+                        _run_tracked(cmd, cwd=RCHECK_DIR, env=r_env, extra_env=R_EXTRA_ENV)
+                    else:
+                        print(f"[RUN] {' '.join(map(str, cmd))}")
+                        _run_tracked(cmd, cwd=SCRIPTS_DIR, env=_env_with_project_path())
+                except Exception as e:
+                    print(f"[ERRO] Falha executando: {' '.join(map(str, cmd))}\n  -> {e}")
+
+            if deferred_r:
+                print(f"[R] {len(deferred_r)} checks em {r_workers} workers (sem registro de artefatos no manifesto)")
+                with ThreadPoolExecutor(max_workers=r_workers) as ex:
+                    # simultâneos: o diff de mtimes não separa as saídas de cada job
+                    futs = [(cmd, ex.submit(_run_tracked, cmd, RCHECK_DIR, r_env, R_EXTRA_ENV, False))
+                            for cmd, r_env in deferred_r]
+                    for cmd, fut in futs:
+                        try:
+                            fut.result()
+                        except Exception as e:
+                            print(f"[ERRO] Falha executando: {' '.join(map(str, cmd))}\n  -> {e}")
+        finally:
+            if _R_POOL_STATE["pool"] is not None:
+                _R_POOL_STATE["pool"].close()
+                _R_POOL_STATE["pool"] = None
 
     # Coleta saídas R (fallback) em EXPORT_DIR
-    collect_r_outputs_to_export()
+    with _StageTimer("coleta_r"):
+        collect_r_outputs_to_export()
 
     # --------------------------------------------------------------------------
     # MONTAGEM DOS RELATÓRIOS E MOVIMENTAÇÃO DE ARTEFATOS
     # --------------------------------------------------------------------------
     org_paths = []
     extras_org_paths = []
+    pdf_extra_orgs: list[str] = []   # --pdf-per-perito: PDFs individuais além do consolidado
     org_grupo_top = None
     org_to_export = None
+    with _StageTimer("montagem") as st_mont:
+        if is_group_run:
+            # Copia artefatos de grupo e panorama global W→WE
+            with _StageTimer("copia_artefatos", escopo="grupo"):
+                copiar_artefatos_top10(IMGS_DIR, COMMENTS_DIR, ORGS_DIR, MARKDOWN_DIR)
+                try:
+                    copiar_artefatos_weekday2weekend(IMGS_DIR, COMMENTS_DIR, ORGS_DIR)
+                except NameError:
+                    pass
 
-    if is_group_run:
-        # Copia artefatos de grupo e panorama global W→WE
-        copiar_artefatos_top10(IMGS_DIR, COMMENTS_DIR, ORGS_DIR, MARKDOWN_DIR)
-        try:
-            copiar_artefatos_weekday2weekend(IMGS_DIR, COMMENTS_DIR, ORGS_DIR)
-        except NameError:
-            pass
-
-        # Comentários GPT dos R checks (se habilitado)
-        if args.r_appendix and args.add_comments:
-            gerar_r_apendice_group_comments_if_possible(IMGS_DIR, COMMENTS_DIR, args.start, args.end)
+            # Comentários GPT dos R checks (se habilitado)
+            if args.r_appendix and args.add_comments:
+                gerar_r_apendice_group_comments_if_possible(IMGS_DIR, COMMENTS_DIR, args.start, args.end)
 
-        # Org do grupo (salva em orgs/)
-        org_grupo_top = gerar_org_top10_grupo(args.start, args.end, RELATORIO_DIR, IMGS_DIR, COMMENTS_DIR, orgs_dir=ORGS_DIR)
+            # Org do grupo (salva em orgs/)
+            with _StageTimer("org", escopo="grupo"):
+                org_grupo_top = gerar_org_top10_grupo(args.start, args.end, RELATORIO_DIR, IMGS_DIR, COMMENTS_DIR, orgs_dir=ORGS_DIR)
 
-        # Peritos selecionados (lista_selecionados) — monta org individual de cada um
-        for perito in lista_selecionados:
-            if not perito_tem_dados(perito, args.start, args.end):
-                continue
-            copiar_artefatos_perito(perito, IMGS_DIR, COMMENTS_DIR, ORGS_DIR)
-            if args.r_appendix and args.add_comments:
-                gerar_r_apendice_comments_if_possible(perito, IMGS_DIR, COMMENTS_DIR, args.start, args.end)
-            org_path = gerar_org_perito(perito, args.start, args.end, args.add_comments, IMGS_DIR, COMMENTS_DIR, RELATORIO_DIR, orgs_dir=ORGS_DIR)
-            org_paths.append(org_path)
-
-        # Coorte extra (se existiu)
-        if args.include_high_nc:
-            df_high = pegar_peritos_nc_altissima(args.start, args.end, nc_threshold=args.high_nc_threshold, min_tasks=args.high_nc_min_tasks)
-            base_set = set(lista_selecionados) if lista_selecionados else set_top10
-            extras_list = [n for n in df_high['nomePerito'].astype(str).tolist() if n not in base_set]
-            for perito in extras_list:
+            # Peritos selecionados (lista_selecionados) — monta org individual de cada um
+            for perito in lista_selecionados:
                 if not perito_tem_dados(perito, args.start, args.end):
                     continue
-                copiar_artefatos_perito(perito, IMGS_DIR, COMMENTS_DIR, ORGS_DIR)
+                with _StageTimer("copia_artefatos", perito=perito):
+                    copiar_artefatos_perito(perito, IMGS_DIR, COMMENTS_DIR, ORGS_DIR)
                 if args.r_appendix and args.add_comments:
                     gerar_r_apendice_comments_if_possible(perito, IMGS_DIR, COMMENTS_DIR, args.start, args.end)
-                org_path = gerar_org_perito(perito, args.start, args.end, args.add_comments, IMGS_DIR, COMMENTS_DIR, RELATORIO_DIR, orgs_dir=ORGS_DIR)
-                extras_org_paths.append(org_path)
-
-        # Mover quaisquer .md remanescentes para 'markdown/'
-        _mover_markdowns_de_exports(MARKDOWN_DIR)
-
-        # Org consolidado do grupo — nomeia conforme label
-        if (args.export_org or args.export_pdf) and (org_paths or org_grupo_top or extras_org_paths):
-            org_final = os.path.join(ORGS_DIR, f"relatorio_{group_label}_{args.start}_a_{args.end}.org")
-            lines = [f"* Relatório — {group_label.replace('_', ' ').upper()} ({args.start} a {args.end}) — Fluxo {fluxo}", ""]
+                with _StageTimer("org", perito=perito):
+                    org_path = gerar_org_perito(perito, args.start, args.end, args.add_comments, IMGS_DIR, COMMENTS_DIR, RELATORIO_DIR, orgs_dir=ORGS_DIR)
+                org_paths.append(org_path)
 
-            # Grupo (TopX)
-            if org_grupo_top and os.path.exists(org_grupo_top):
-                with open(org_grupo_top, encoding="utf-8") as f:
-                    lines.append(f.read().strip())
-                    lines.append("#+LATEX: \\newpage\n")
-
-            # Cada perito + Impacto na Fila (perito)
-            for org_path in org_paths:
-                with open(org_path, encoding="utf-8") as f:
-                    content = f.read().strip()
-                if content:
-                    lines.append(content)
-                    lines.append("#+LATEX: \\newpage\n")
+            # Coorte extra (se existiu)
+            if args.include_high_nc:
+                df_high = pegar_peritos_nc_altissima(args.start, args.end, nc_threshold=args.high_nc_threshold, min_tasks=args.high_nc_min_tasks)
+                base_set = set(lista_selecionados) if lista_selecionados else set_top10
+                extras_list = [n for n in df_high['nomePerito'].astype(str).tolist() if n not in base_set]
+                for perito in extras_list:
+                    if not perito_tem_dados(perito, args.start, args.end):
+                        continue
+                    with _StageTimer("copia_artefatos", perito=perito):
+                        copiar_artefatos_perito(perito, IMGS_DIR, COMMENTS_DIR, ORGS_DIR)
+                    if args.r_appendix and args.add_comments:
+                        gerar_r_apendice_comments_if_possible(perito, IMGS_DIR, COMMENTS_DIR, args.start, args.end)
+                    with _StageTimer("org", perito=perito):
+                        org_path = gerar_org_perito(perito, args.start, args.end, args.add_comments, IMGS_DIR, COMMENTS_DIR, RELATORIO_DIR, orgs_dir=ORGS_DIR)
+                    extras_org_paths.append(org_path)
+
+            # Mover quaisquer .md remanescentes para 'markdown/'
+            _mover_markdowns_de_exports(MARKDOWN_DIR)
+
+            # Org consolidado do grupo — nomeia conforme label
+            if (args.export_org or args.export_pdf) and (org_paths or org_grupo_top or extras_org_paths):
+                org_final = os.path.join(ORGS_DIR, f"relatorio_{group_label}_{args.start}_a_{args.end}.org")
+                # gravado em fluxo: cada .org incluído passa uma vez pelas normalizações, direto para o arquivo
+                with OrgWriter(org_final) as lines:
+                    lines.extend([f"* Relatório — {group_label.replace('_', ' ').upper()} ({args.start} a {args.end}) — Fluxo {fluxo}", ""])
+
+                    # Grupo (TopX)
+                    if org_grupo_top and os.path.exists(org_grupo_top):
+                        if not lines.include(org_grupo_top):
+                            lines.append("")
+                        lines.append("#+LATEX: \\newpage\n")
 
-                # Impacto na Fila do PERITO (se existir)
-                perito_safe = os.path.splitext(os.path.basename(org_path))[0]
-                per_impacts = coletar_orgs_impacto(PERIODO_DIR, args.start, args.end, perito=perito_safe)
-                for imp_path in per_impacts:
-                    try:
-                        with open(imp_path, encoding="utf-8") as fi:
-                            imp_txt = fi.read().strip()
-                        if imp_txt:
-                            imp_txt = shift_org_headings(_protect_org_text_for_pandoc(imp_txt), delta=1)
-                            lines.append(imp_txt)
-                            lines.append("#+LATEX: \\newpage\n")
-                    except Exception as e:
-                        print(f"[AVISO] Falha ao anexar impacto do perito ({imp_path}): {e}")
-
-            # Extras (coorte %NC altíssima)
-            if extras_org_paths:
-                lines.append(f"** Peritos com %NC ≥ {args.high_nc_threshold:.0f}% e ≥ {args.high_nc_min_tasks} tarefas\n")
-                for org_path in extras_org_paths:
-                    with open(org_path, encoding="utf-8") as f:
-                        content = f.read().strip()
-                        if content:
-                            content = shift_org_headings(content, delta=1)
-                            lines.append(content)
+                    # Cada perito + Impacto na Fila (perito)
+                    for org_path in org_paths:
+                        if lines.include(org_path):
                             lines.append("#+LATEX: \\newpage\n")
 
-            # Impacto na Fila do GRUPO (se houver)
-            grp_impacts = coletar_orgs_impacto(PERIODO_DIR, args.start, args.end, perito=None)
-            for path in grp_impacts:
+                        # Impacto na Fila do PERITO (se existir)
+                        perito_safe = os.path.splitext(os.path.basename(org_path))[0]
+                        per_impacts = coletar_orgs_impacto(PERIODO_DIR, args.start, args.end, perito=perito_safe)
+                        for imp_path in per_impacts:
+                            try:
+                                if lines.include(imp_path, protect=True, shift=1):
+                                    lines.append("#+LATEX: \\newpage\n")
+                            except Exception as e:
+                                print(f"[AVISO] Falha ao anexar impacto do perito ({imp_path}): {e}")
+
+                    # Extras (coorte %NC altíssima)
+                    if extras_org_paths:
+                        lines.append(f"** Peritos com %NC ≥ {args.high_nc_threshold:.0f}% e ≥ {args.high_nc_min_tasks} tarefas\n")
+                        for org_path in extras_org_paths:
+                            if lines.include(org_path, shift=1):
+                                lines.append("#+LATEX: \\newpage\n")
+
+                    # Impacto na Fila do GRUPO (se houver)
+                    grp_impacts = coletar_orgs_impacto(PERIODO_DIR, args.start, args.end, perito=None)
+                    for path in grp_impacts:
+                        try:
+                            if lines.include(path, protect=True, shift=1):
+                                lines.append("#+LATEX: \\newpage\n")
+                        except Exception as e:
+                            print(f"[AVISO] Falha ao anexar impacto do grupo ({path}): {e}")
+
+                    # Protocolos transferidos (grupo)
+                    _append_protocol_transfers_group_block(lines, RELATORIO_DIR, args.start, args.end, heading_level="**", link_prefix="../")
+
+                    # Panorama global (W→WE) AO FINAL — imagens com ../imgs/
+                    _append_weekday2weekend_panorama_block(
+                        lines, IMGS_DIR, COMMENTS_DIR,
+                        start=args.start, end=args.end,
+                        heading_level="**", imgs_prefix="../imgs/"
+                    )
+
+                print(f"✅ Org consolidado salvo em: {org_final}")
+                st_mont.rec["rows"] = lines.items
+                org_to_export = org_final
+            else:
+                # Caso não queira consolidar, tenta expor o primeiro org individual
+                org_to_export = org_paths[0] if org_paths else None
+            if getattr(args, "pdf_per_perito", False):
+                pdf_extra_orgs = list(org_paths) + list(extras_org_paths)
+
+        # --------------------------------------------------------------------------
+        # INDIVIDUAL — consolidado + bloco W→WE condicional por perito
+        # --------------------------------------------------------------------------
+        if not is_group_run:
+            perito = args.perito.strip()
+            imgs_dir_i     = os.path.join(RELATORIO_DIR, "imgs")
+            comments_dir_i = os.path.join(RELATORIO_DIR, "comments")
+            orgs_dir_i     = os.path.join(RELATORIO_DIR, "orgs")
+
+            with _StageTimer("copia_artefatos", perito=perito):
+                copiar_artefatos_perito(perito, imgs_dir_i, comments_dir_i, orgs_dir_i)
                 try:
-                    with open(path, encoding="utf-8") as f:
-                        content = f.read().strip()
-                    if content:
-                        content = shift_org_headings(_protect_org_text_for_pandoc(content), delta=1)
-                        lines.append(content)
-                        lines.append("#+LATEX: \\newpage\n")
-                except Exception as e:
-                    print(f"[AVISO] Falha ao anexar impacto do grupo ({path}): {e}")
+                    copiar_artefatos_weekday2weekend(imgs_dir_i, comments_dir_i, orgs_dir_i)
+                except NameError:
+                    pass
 
-            # Protocolos transferidos (grupo)
-            _append_protocol_transfers_group_block(lines, RELATORIO_DIR, args.start, args.end, heading_level="**", link_prefix="../")
+            _mover_markdowns_de_exports(MARKDOWN_DIR)
 
-            # Panorama global (W→WE) AO FINAL — imagens com ../imgs/
-            _append_weekday2weekend_panorama_block(
-                lines, IMGS_DIR, COMMENTS_DIR,
-                start=args.start, end=args.end,
-                heading_level="**", imgs_prefix="../imgs/"
-            )
-
-            with open(org_final, "w", encoding="utf-8") as f:
-                f.write("\n".join(lines).strip() + "\n")
-            print(f"✅ Org consolidado salvo em: {org_final}")
-            org_to_export = org_final
-        else:
-            # Caso não queira consolidar, tenta expor o primeiro org individual
-            org_to_export = org_paths[0] if org_paths else None
+            with _StageTimer("org", perito=perito):
+                perito_org_path = gerar_org_perito(perito, args.start, args.end, args.add_comments, imgs_dir_i, comments_dir_i, RELATORIO_DIR, orgs_dir=orgs_dir_i)
 
-    # --------------------------------------------------------------------------
-    # INDIVIDUAL — consolidado + bloco W→WE condicional por perito
-    # --------------------------------------------------------------------------
-    if not is_group_run:
-        perito = args.perito.strip()
-        imgs_dir_i     = os.path.join(RELATORIO_DIR, "imgs")
-        comments_dir_i = os.path.join(RELATORIO_DIR, "comments")
-        orgs_dir_i     = os.path.join(RELATORIO_DIR, "orgs")
-
-        copiar_artefatos_perito(perito, imgs_dir_i, comments_dir_i, orgs_dir_i)
-        try:
-            copiar_artefatos_weekday2weekend(imgs_dir_i, comments_dir_i, orgs_dir_i)
-        except NameError:
-            pass
-
-        _mover_markdowns_de_exports(MARKDOWN_DIR)
-
-        perito_org_path = gerar_org_perito(perito, args.start, args.end, args.add_comments, imgs_dir_i, comments_dir_i, RELATORIO_DIR, orgs_dir=orgs_dir_i)
-
-        org_final = os.path.join(orgs_dir_i, f"relatorio_{_safe(perito)}_{args.start}_a_{args.end}.org")
-        lines = [f"* Relatório individual — {perito} ({args.start} a {args.end})", ""]
-
-        with open(perito_org_path, encoding="utf-8") as f:
-            content = f.read().strip()
-            if content:
-                lines.append(content)
-                lines.append("#+LATEX: \\newpage\n")
-
-        _append_weekday2weekend_perito_block_if_any(lines, perito, imgs_dir_i, comments_dir_i, start=args.start, end=args.end, heading_level="**")
+            org_final = os.path.join(orgs_dir_i, f"relatorio_{_safe(perito)}_{args.start}_a_{args.end}.org")
+            with OrgWriter(org_final) as lines:
+                lines.extend([f"* Relatório individual — {perito} ({args.start} a {args.end})", ""])
+                if lines.include(perito_org_path):
+                    lines.append("#+LATEX: \\newpage\n")
 
-        with open(org_final, "w", encoding="utf-8") as f:
-            f.write("\n".join(lines).strip() + "\n")
+                _append_weekday2weekend_perito_block_if_any(lines, perito, imgs_dir_i, comments_dir_i, start=args.start, end=args.end, heading_level="**")
+            st_mont.rec["rows"] = lines.items
 
-        org_to_export = org_final
+            org_to_export = org_final
 
     # Exportação para PDF (opcional) + capa
     if args.export_pdf and org_to_export:
-        pdf_path = exportar_org_para_pdf(org_to_export, font="DejaVu Sans")
-        if pdf_path and os.path.exists(pdf_path):
-            adicionar_capa_pdf(pdf_path)
+        with _StageTimer("pdf") as st:
+            _export_pdfs(org_to_export, pdf_extra_orgs, workers=args.pdf_workers, force=args.pdf_force,
+                         backend=args.pdf_backend)
+            st.rec["rows"] = 1 + len(pdf_extra_orgs)
 
     # Tempo total
     dt = time.time() - t0
     mm, ss = divmod(int(dt + 0.5), 60)
     hh, mm = divmod(mm, 60)
     print(f"⏱️ Tempo total: {hh:02d}:{mm:02d}:{ss:02d}")
+    _image_assets.print_stats()
+    if getattr(args, "img_gc", False):
+        n_gc, freed = _image_assets.gc_store()
+        if n_gc:
+            print(f"[INFO] Store de imagens: {n_gc} arquivo(s) sem referência removido(s) "
+                  f"({freed / 1e6:.1f} MB liberados).")
+    if _RUN_STATE.get("store"):
+        n_gc, freed = _store_gc(float(getattr(args, "store_max_age_days", 0) or 0))
+        if n_gc:
+            print(f"[INFO] Store de artefatos: {n_gc} entrada(s) sem uso removida(s) "
+                  f"({freed / 1e6:.1f} MB liberados).")
+    _timing_emit({"kind": "total", "wall_s": round(dt, 4)})
+    if _TIMING_STATE.get("path"):
+        print(f"[INFO] Timings por etapa/comando: {_TIMING_STATE['path']}")
+    if _COMMENT_QUEUE_STATE["defer"] and _comment_queue is not None:
+        n_jobs = sum(1 for j in _comment_queue.pending_jobs(comment_queue_dir) if j.get("stems"))
+        print(f"[INFO] {n_jobs} comentário(s) IA na fila {comment_queue_dir}; "
+              f"rode novamente com --drain-comments para incorporá-los.")
 
 
 if __name__ == '__main__':
@@ -47,6 +47,25 @@ try:
 except Exception:
     comentarios = None  # mantém os recursos como opcionais
 
+# Renderização das figuras em paralelo (pool de processos com Agg)
+from utils.figure_jobs import FigurePool
+# Build de PDF incremental (pula quando .org e imagens não mudaram)
+from utils.pdf_build import PdfBuildStage
+from utils.org_pdf import render_org_pdf
+from utils.image_assets import zip_compress_type
+
+# Comentários da IA despachados em paralelo (concorrência/taxa/retry/timeout)
+from utils.comment_service import CommentService, result_of as _ai_result
+
+# Cliente OpenAI compartilhado (chave/SDK/conexões resolvidos uma vez por processo)
+from utils.openai_client import chat as _oa_chat, in_service_call as _oa_in_service
+
+# Cache persistente das respostas da IA (opcional)
+try:
+    from utils import llm_cache as _llm_cache
+except Exception:
+    _llm_cache = None
+
 # Plotting (matplotlib puro; 1 gráfico por figura; sem cores específicas)
 import matplotlib
 matplotlib.use("Agg")
@@ -64,6 +83,27 @@ def _dbg(msg: str):
         except Exception:
             pass
 
+def _ai_cache_get(model: str, temperature: float, messages: List[Dict[str, Any]], **extra: Any) -> Tuple[Optional[str], Optional[str]]:
+    """(chave, resposta em cache | None). Sem o módulo de cache → (None, None)."""
+    if _llm_cache is None:
+        return None, None
+    try:
+        key = _llm_cache.cache_key(model, temperature, messages, **extra)
+        return key, _llm_cache.get(key)
+    except Exception:
+        return None, None
+
+def _ai_cache_put(key: Optional[str], model: str, txt: Optional[str]) -> None:
+    if _llm_cache is not None and key:
+        _llm_cache.put(key, model, txt)
+
+_AI_STATE: Dict[str, Any] = {"svc": None}
+
+def _ai_service_close(wait: bool = True) -> None:
+    svc, _AI_STATE["svc"] = _AI_STATE["svc"], None
+    if svc is not None:
+        svc.close(wait=wait)
+
 # ─────────────────────────────────────────────────────────
 # Defaults globais (seguros no nível de módulo)
 # ─────────────────────────────────────────────────────────
@@ -161,6 +201,14 @@ def parse_args():
     # Debug das chamadas de IA (OpenAI)
     p.add_argument("--debug-ai", action="store_true",
                    help="Imprime diagnósticos das chamadas à OpenAI (carregamento de .env, chave, modelo, import).")
+    p.add_argument("--ai-concurrency", type=int, default=None,
+                   help="Comentários da IA simultâneos (default: ATESTMED_LLM_CONCURRENCY ou 4; 0 = em série).")
+    p.add_argument("--ai-rps", type=float, default=None,
+                   help="Limite de requisições/s à IA (default: ATESTMED_LLM_RPS ou 2; 0 = sem limite).")
+    p.add_argument("--ai-timeout", type=float, default=None,
+                   help="Timeout por tentativa, em segundos (default: ATESTMED_LLM_TIMEOUT ou 90).")
+    p.add_argument("--ai-retries", type=int, default=None,
+                   help="Novas tentativas por comentário após falha/timeout (default: ATESTMED_LLM_RETRIES ou 2).")
 
     # DB + período
     p.add_argument("--db", required=True, help="Caminho para o SQLite (ex.: db/atestmed.db)")
@@ -214,8 +262,11 @@ def parse_args():
     # Saídas
     p.add_argument("--export-org", action="store_true")
     p.add_argument("--export-pdf", action="store_true")
-    p.add_argument("--pdf-engine", choices=["emacs","pandoc"], default="emacs",
-                   help="Gerar PDF via Emacs (org-export) ou via pandoc (default: emacs)")
+    p.add_argument("--pdf-engine", choices=["emacs","pandoc","reportlab"], default="emacs",
+                   help="Gerar PDF via Emacs (org-export), via pandoc ou direto em Python com ReportLab "
+                        "(rápido, sem LaTeX; layout simplificado — ver utils/org_pdf.py) (default: emacs)")
+    p.add_argument("--pdf-force", action="store_true",
+                   help="Regera o PDF mesmo sem mudança no .org/imagens (ver <pdf-dir>/_pdf_build.json).")
     p.add_argument("--emit-classic-figs", action="store_true",
                    help="Gera fragmento .org e manifesto JSON para inclusão no relatório clássico")
     p.add_argument("--out-dir", default=OUT_DIR)
@@ -265,6 +316,8 @@ def parse_args():
     p.add_argument("--no-plan-section", action="store_true", help="Oculta a seção 'Propostas/Plano de ação'.")
     p.add_argument("--no-scenarios-section", action="store_true", help="Oculta a seção de 'Cenários'.")
     p.add_argument("--no-graphs", action="store_true", help="Oculta a seção 'Gráficos' (todas as figuras).")
+    p.add_argument("--fig-workers", type=int, default=0,
+                   help="Processos para renderizar as figuras em paralelo (0 = automático; 1 = em série).")
 
     # 12) Reprodutibilidade e cache
     p.add_argument("--seed", type=int, default=42, help="Semente para empates estáveis.")
@@ -728,13 +781,16 @@ def annotate_png_with_text(png_path: str, text: str):
 
 
 def create_zip_bundle(zip_path: str, paths: List[str]):
-    """Cria um .zip com os arquivos existentes na lista paths."""
+    """
+    Cria um .zip com os arquivos existentes na lista paths.
+    PNG/PDF/zip já são comprimidos: vão com ZIP_STORED (deflate de novo só gasta CPU).
+    """
     import zipfile
     with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
         for p in paths:
             if p and os.path.exists(p):
                 arc = os.path.relpath(p, os.path.dirname(zip_path))
-                zf.write(p, arc)
+                zf.write(p, arc, compress_type=zip_compress_type(p))
 
 
 def human_title_name(name: str) -> str:
@@ -882,6 +938,9 @@ def ensure_graphs_module():
     if spec is None or spec.loader is None:
         raise ImportError("Falha ao montar spec para graphs_melhorias")
     gm = importlib.util.module_from_spec(spec)
+    # registrado em sys.modules: as funções do módulo precisam ser serializáveis
+    # (por nome) para o pool de figuras
+    sys.modules["graphs_melhorias"] = gm
     spec.loader.exec_module(gm)  # type: ignore[attr-defined]
     return gm
 
@@ -995,6 +1054,22 @@ def save_lorenz_impact(values: List[float], out_path: str,
 
     return float(gini)
 
+def save_pareto(values: List[float], labels: List[str], out_path: str,
+                title: str = "Pareto por impacto (Top-20)") -> str:
+    """Pareto com matplotlib puro (sem seaborn): barras + linha cumulativa."""
+    plt.figure()
+    x = np.arange(len(values))
+    plt.bar(x, values)
+    cum = np.cumsum(values) / sum(values)
+    plt.plot(x, cum * max(values), marker="o", linestyle="--")
+    plt.xticks(x, labels, rotation=45, ha="right")
+    plt.title(title)
+    plt.ylabel("Impacto (barras) / Cumulativo (linha)")
+    plt.tight_layout()
+    plt.savefig(out_path, dpi=160)
+    plt.close()
+    return out_path
+
 def generate_figures_bundle(args,
                             rows: List[Dict[str, Any]],
                             peritos: Dict[str, PeritoAgg],
@@ -1025,6 +1100,8 @@ def generate_figures_bundle(args,
       - Usa graphs_and_tables/graphs_melhorias.py se presente (ensure_graphs_module), com
         fallback para as funções locais save_bar/save_heatmap/save_lorenz_impact.
       - Respeita as flags de linha de comando (e.g., --no-graphs, --with-impact, etc.).
+      - As figuras são renderizadas num pool de processos (--fig-workers); os comentários
+        são gerados enquanto isso, e a função só retorna com todos os PNGs gravados.
     """
     # -------------------- helpers & setup --------------------
     try:
@@ -1108,13 +1185,15 @@ def generate_figures_bundle(args,
         # Se gráficos estiverem desligados, ainda retornamos dados auxiliares (cenários)
         return figs, comments_by_fig, pareto_fig, pareto_table_lines, impact_gini, cen_table_org_lines, payload_extra
 
+    pool = FigurePool(getattr(args, "fig_workers", 0))
+
     # -------------------- impacto Top-20 --------------------
     if args.with_impact and focus_records:
         top_imp = sorted(focus_records, key=lambda x: x.get("impacto_fila", 0.0), reverse=True)[:20]
         vals = [float(r.get("impacto_fila", 0.0)) for r in top_imp]
         lbls = [short_label(r["nome"]) for r in top_imp]
         f1 = os.path.join(out_dir, base_name + "_impacto_top20.png")
-        _save_bar(vals, lbls, "Impacto na fila — Top 20 elegíveis", f1, ylabel="Análises")
+        pool.submit(_save_bar, vals, lbls, "Impacto na fila — Top 20 elegíveis", f1, ylabel="Análises")
         figs.append(f1)
         comments_by_fig[f1] = _coment("impacto_top20")
 
@@ -1136,8 +1215,8 @@ def generate_figures_bundle(args,
             ])
             rlabels.append(short_label(r["nome"]))
         f2 = os.path.join(out_dir, base_name + "_heatmap_score_flags.png")
-        _save_heat(rows_hm, rlabels, ["Prod≥50/h", "Overlap", "≤15s≥10", "%NC≥2×BR"],
-                   "Heatmap — Critérios acionados (até 10 peritos)", f2)
+        pool.submit(_save_heat, rows_hm, rlabels, ["Prod≥50/h", "Overlap", "≤15s≥10", "%NC≥2×BR"],
+                    "Heatmap — Critérios acionados (até 10 peritos)", f2)
         figs.append(f2)
         comments_by_fig[f2] = _coment("heatmap_score_flags")
 
@@ -1157,7 +1236,7 @@ def generate_figures_bundle(args,
         labels = [k for k, _ in items]
         values = [v for _, v in items]
         fpath = os.path.join(out_dir, base_name + f"_{suffix}.png")
-        _save_bar(values, labels, title, fpath, ylabel=contagem_base.capitalize())
+        pool.submit(_save_bar, values, labels, title, fpath, ylabel=contagem_base.capitalize())
         figs.append(fpath)
         comments_by_fig[fpath] = _coment(kind_key, {"contagem_base": contagem_base})
 
@@ -1178,7 +1257,7 @@ def generate_figures_bundle(args,
         vals = [prod, 50.0, nc, le15, ov]
         lbls = ["Prod/h (média)", "Alvo (50/h)", "%NC (média)", "≤15s% (média)", "Overlap% (média)"]
         f4 = os.path.join(out_dir, base_name + "_indicadores_medios.png")
-        _save_bar(vals, lbls, "Indicadores médios — Elegíveis", f4, ylabel="Valor / %")
+        pool.submit(_save_bar, vals, lbls, "Indicadores médios — Elegíveis", f4, ylabel="Valor / %")
         figs.append(f4)
         comments_by_fig[f4] = _coment("indicadores_medios")
 
@@ -1196,7 +1275,7 @@ def generate_figures_bundle(args,
                 exp_vals.append(float(exp_imp))
             lbls.append(short_label(r["nome"]))
         f5 = os.path.join(out_dir, base_name + "_impacto_esperado_pos_medidas_top20.png")
-        _save_bar(exp_vals, lbls, "Impacto esperado pós-medidas — Top 20", f5, ylabel="Análises (esperado)")
+        pool.submit(_save_bar, exp_vals, lbls, "Impacto esperado pós-medidas — Top 20", f5, ylabel="Análises (esperado)")
         figs.append(f5)
         comments_by_fig[f5] = _coment("impacto_esperado_pos_medidas_top20")
 
@@ -1204,7 +1283,8 @@ def generate_figures_bundle(args,
     if args.with_impact and getattr(args, "with_impact_lorenz", False) and focus_records:
         impacts_all = [float(r.get("impacto_fila", 0.0)) for r in focus_records]
         f_lorenz = os.path.join(out_dir, base_name + "_lorenz_impacto_elegiveis.png")
-        gini = _save_lorenz(impacts_all, f_lorenz, title="Curva de Lorenz — Impacto entre elegíveis")
+        # o Gini entra no comentário: espera só esta figura
+        gini = pool.submit(_save_lorenz, impacts_all, f_lorenz, title="Curva de Lorenz — Impacto entre elegíveis").result()
         if gini is not None and os.path.exists(f_lorenz):
             figs.append(f_lorenz)
             impact_gini = float(gini)
@@ -1219,24 +1299,15 @@ def generate_figures_bundle(args,
             labels = [n for n, _ in vals_sorted]
             values = [v for _, v in vals_sorted]
             pareto_fig = os.path.join(out_dir, base_name + "_pareto_impacto.png")
-            # Pareto com matplotlib puro (sem seaborn)
-            plt.figure()
-            x = np.arange(len(values))
-            plt.bar(x, values)
-            cum = np.cumsum(values) / sum(values)
-            plt.plot(x, cum * max(values), marker="o", linestyle="--")
-            plt.xticks(x, labels, rotation=45, ha="right")
-            plt.title("Pareto por impacto (Top-20)")
-            plt.ylabel("Impacto (barras) / Cumulativo (linha)")
-            plt.tight_layout()
-            plt.savefig(pareto_fig, dpi=160)
-            plt.close()
+            pool.submit(save_pareto, values, labels, pareto_fig)
 
             pareto_table = build_pareto_table(vals, topk=10)
             pareto_table_lines = export_table_org_lines(pareto_table)
             figs.append(pareto_fig)
             comments_by_fig[pareto_fig] = _coment("pareto_impacto")
 
+    # a montagem do relatório espera só pela figura mais lenta
+    pool.close()
     return figs, comments_by_fig, pareto_fig, pareto_table_lines, impact_gini, cen_table_org_lines, payload_extra
 
 # ---------- Cenários probabilísticos ----------
@@ -1416,48 +1487,25 @@ def ai_explanations(summary_payload: Dict[str, Any]) -> str:
         "Baseie-se no JSON a seguir.\n\n"
         f"{json.dumps(summary_payload, ensure_ascii=False, indent=2)}\n"
     )
+    messages = [
+        {"role": "system", "content": "Você é um(a) analista sênior de dados do ATESTMED."},
+        {"role": "user", "content": prompt},
+    ]
+    ckey, cached = _ai_cache_get(model, 0.2, messages, max_tokens=900)
+    if cached:
+        _dbg("ai_explanations: resposta do cache")
+        return cached
 
-    # Tentativa 1: SDK novo (classe OpenAI)
     try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        _dbg("usando SDK OpenAI (classe OpenAI) para explanations")
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Você é um(a) analista sênior de dados do ATESTMED."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=900,
-        )
-        txt = resp.choices[0].message.content.strip() if getattr(resp, "choices", None) else ""
+        txt = _oa_chat(messages, model=model, temperature=0.2, max_tokens=900, raise_errors=True)
         _dbg(f"OpenAI completou? {bool(txt)}")
         if txt:
+            _ai_cache_put(ckey, model, txt)
             return txt
     except Exception as e:
-        _dbg(f"exceção OpenAI(OpenAI): {e!r}")
-
-    # Tentativa 2: SDK legacy (openai.ChatCompletion)
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        _dbg("usando SDK openai.ChatCompletion (fallback) para explanations")
-        resp = openai.ChatCompletion.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Você é um(a) analista sênior de dados do ATESTMED."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=900,
-        )
-        txt = resp["choices"][0]["message"]["content"].strip()
-        _dbg(f"ChatCompletion completou? {bool(txt)}")
-        if txt:
-            return txt
-    except Exception as e:
-        _dbg(f"exceção OpenAI(ChatCompletion): {e!r}")
+        _dbg(f"exceção OpenAI: {e!r}")
+        if _oa_in_service():
+            raise  # o CommentService faz as novas tentativas e aplica o fallback
 
     _dbg("ai_explanations() usando fallback (sem IA)")
     return _fallback_explanations(summary_payload)
@@ -1562,28 +1610,28 @@ def ai_figure_captions(summary_payload: Dict[str, Any], figs: List[str]) -> Dict
     )
 
     model = os.getenv("ATESTMED_OPENAI_MODEL", "gpt-4o-mini")
+    messages = [{"role": "system", "content": sysmsg},
+                {"role": "user", "content": user_prompt}]
+    ckey, cached = _ai_cache_get(model, 0.0, messages, max_tokens=700, kind="figure_captions")
+    if cached:
+        d = _json_from_maybe_markdown(cached)
+        if isinstance(d, dict) and d:
+            _dbg("ai_figure_captions: resposta do cache")
+            return _fill_from_map(figs, d)
 
     # Tenta 2 vezes: (1) com response_format json_object; (2) sem, mas reforçando a instrução
     raw_text = None
     for attempt in (1, 2):
         try:
-            from openai import OpenAI  # type: ignore
-            client = OpenAI(api_key=api_key)
-            kwargs = dict(
-                model=model,
-                messages=[{"role": "system", "content": sysmsg},
-                          {"role": "user", "content": user_prompt}],
-                temperature=0.0,
-                max_tokens=700,
-            )
+            kwargs: Dict[str, Any] = dict(temperature=0.0, max_tokens=700)
             if attempt == 1:
                 # Em SDKs recentes isso força JSON puro; se não suportar, cai no except
-                kwargs["response_format"] = {"type": "json_object"}  # type: ignore[assignment]
-            resp = client.chat.completions.create(**kwargs)  # type: ignore[arg-type]
-            raw_text = (resp.choices[0].message.content or "").strip()
+                kwargs["response_format"] = {"type": "json_object"}
+            raw_text = _oa_chat(messages, model=model, raise_errors=True, **kwargs) or ""
             _dbg(f"ai_figure_captions: tentativa {attempt} | len(raw)={len(raw_text)}")
             d = _json_from_maybe_markdown(raw_text)
             if isinstance(d, dict) and d:
+                _ai_cache_put(ckey, model, raw_text)
                 parsed = _fill_from_map(figs, d)
                 _dbg(f"ai_figure_captions: JSON OK na tentativa {attempt} | itens={len(parsed)}")
                 return parsed
@@ -1630,8 +1678,6 @@ def ai_table_captions(summary_payload: Dict[str, Any],
         return {t["id"]: base_defaults.get(t["id"], f"Tabela: {t.get('title','')}") for t in tables_meta}
 
     try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
         model = os.getenv("ATESTMED_OPENAI_MODEL", "gpt-4o-mini")
         prompt = (
             "Você receberá um JSON com 'payload' (resumo do relatório) e 'tables' (lista de {id,title}). "
@@ -1639,22 +1685,24 @@ def ai_table_captions(summary_payload: Dict[str, Any],
             "Não invente números. Responda somente um JSON {id: comentario}.\n\n"
             f"{json.dumps({'payload': summary_payload, 'tables': [{'id': t['id'], 'title': t.get('title','')} for t in tables_meta]}, ensure_ascii=False)}"
         )
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Você escreve legendas/observações técnicas objetivas e curtas."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=500,
-        )
-        txt = (resp.choices[0].message.content or "").strip()
-        data = json.loads(txt)
+        messages = [
+            {"role": "system", "content": "Você escreve legendas/observações técnicas objetivas e curtas."},
+            {"role": "user", "content": prompt},
+        ]
+        ckey, txt = _ai_cache_get(model, 0.2, messages, max_tokens=500)
+        if not txt:
+            txt = _oa_chat(messages, model=model, temperature=0.2, max_tokens=500, raise_errors=True) or ""
+            data = json.loads(txt)
+            _ai_cache_put(ckey, model, txt)
+        else:
+            data = json.loads(txt)
         out = {}
         for t in tables_meta:
             out[t["id"]] = data.get(t["id"]) or base_defaults.get(t["id"], f"Tabela: {t.get('title','')}")
         return out
     except Exception:
+        if _oa_in_service():
+            raise  # o CommentService faz as novas tentativas e aplica o fallback
         return {t["id"]: base_defaults.get(t["id"], f"Tabela: {t.get('title','')}") for t in tables_meta}
 
 def build_action_plan(focus_records, peritos, args, mean_nc_br: float):
@@ -1703,6 +1751,23 @@ def build_action_plan(focus_records, peritos, args, mean_nc_br: float):
     plan.sort(key=lambda x: (x["ganho_esperado"], x["impacto_base"]), reverse=True)
     return plan
 
+def _proposals_link(action_plan_csv: Optional[str]) -> str:
+    """Rodapé com link Org para o plano de ação (label verbatim evita sobrescrito por '_')."""
+    if not action_plan_csv:
+        return "\n\nArquivo do plano de ação: "
+    b = os.path.basename(action_plan_csv)
+    return f"\n\nArquivo do plano de ação: [[file:{action_plan_csv}][={b}=]]"
+
+def _fallback_proposals(action_plan_csv: Optional[str]) -> str:
+    """Texto-base das propostas (sem IA), com o link do plano de ação."""
+    return (
+        "Propostas de intervenção organizadas por alavanca: produtividade, não conformidade, ≤15s e sobreposição. "
+        "Priorizar peritos com maior ganho esperado (ver 'plano_acao.csv'). "
+        "Medidas transversais: (i) metas de throughput e coaching semanal; (ii) auditoria técnica e checklist; "
+        "(iii) revisão de triagem e limites operacionais p/ ≤15s; (iv) alerta/bloqueio de sessões sobrepostas; "
+        "(v) monitoramento contínuo com reavaliação quinzenal do impacto na fila."
+    ) + _proposals_link(action_plan_csv)
+
 def ai_proposals(summary_payload: Dict[str, Any], action_plan_csv: str) -> str:
     """Texto de propostas usando OpenAI (se houver), com instrução para NÃO inventar números (com debug).
        Inclui link Org para o plano de ação como [[file:/caminho/plano_acao.csv][=plano_acao.csv=]]."""
@@ -1710,27 +1775,11 @@ def ai_proposals(summary_payload: Dict[str, Any], action_plan_csv: str) -> str:
     api_key = os.getenv("OPENAI_API_KEY", "").strip()
     model = os.getenv("ATESTMED_OPENAI_MODEL", "gpt-4o-mini")
     _dbg(f"key? {bool(api_key)} | model={model} | action_plan_csv={action_plan_csv}")
-
-    # helper: link Org com label verbatim (evita sobrescrito por '_')
-    from os.path import basename
-    def _org_link_action(p: Optional[str]) -> str:
-        if not p:
-            return ""
-        b = basename(p)
-        return f"[[file:{p}][={b}=]]"
-
-    base = (
-        "Propostas de intervenção organizadas por alavanca: produtividade, não conformidade, ≤15s e sobreposição. "
-        "Priorizar peritos com maior ganho esperado (ver 'plano_acao.csv'). "
-        "Medidas transversais: (i) metas de throughput e coaching semanal; (ii) auditoria técnica e checklist; "
-        "(iii) revisão de triagem e limites operacionais p/ ≤15s; (iv) alerta/bloqueio de sessões sobrepostas; "
-        "(v) monitoramento contínuo com reavaliação quinzenal do impacto na fila."
-    )
-    link_rodape = f"\n\nArquivo do plano de ação: {_org_link_action(action_plan_csv)}"
+    link_rodape = _proposals_link(action_plan_csv)
 
     if not api_key:
         _dbg("sem OPENAI_API_KEY — retornando texto base (fallback)")
-        return base + link_rodape
+        return _fallback_proposals(action_plan_csv)
 
     prompt = (
         "Você é consultor(a) operacional. Escreva a seção 'Propostas' do relatório ATESTMED, "
@@ -1740,50 +1789,27 @@ def ai_proposals(summary_payload: Dict[str, Any], action_plan_csv: str) -> str:
         f"JSON:\n{json.dumps(summary_payload, ensure_ascii=False, indent=2)}\n"
         f"Caminho do plano de ação: {action_plan_csv}\n"
     )
+    messages = [
+        {"role": "system", "content": "Você escreve recomendações operacionais claras e práticas."},
+        {"role": "user", "content": prompt},
+    ]
+    ckey, cached = _ai_cache_get(model, 0.2, messages, max_tokens=700)
+    if cached:
+        _dbg("ai_proposals: resposta do cache")
+        return cached + link_rodape
 
-    # Tentativa 1: SDK novo (classe OpenAI)
     try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        _dbg("usando SDK OpenAI (classe OpenAI) para propostas")
-        resp = client.chat.completions.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Você escreve recomendações operacionais claras e práticas."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=700,
-        )
-        txt = resp.choices[0].message.content.strip() if getattr(resp, "choices", None) else ""
+        txt = _oa_chat(messages, model=model, temperature=0.2, max_tokens=700, raise_errors=True)
         _dbg(f"OpenAI completou propostas? {bool(txt)}")
         if txt:
+            _ai_cache_put(ckey, model, txt)
             return txt + link_rodape
     except Exception as e:
-        _dbg(f"exceção proposals(OpenAI): {e!r} — tentando fallback ChatCompletion")
-
-    # Tentativa 2: SDK legacy (openai.ChatCompletion)
-    try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        _dbg("usando SDK openai.ChatCompletion (fallback) para propostas")
-        resp = openai.ChatCompletion.create(
-            model=model,
-            messages=[
-                {"role": "system", "content": "Você escreve recomendações operacionais claras e práticas."},
-                {"role": "user", "content": prompt},
-            ],
-            temperature=0.2,
-            max_tokens=700,
-        )
-        txt = resp["choices"][0]["message"]["content"].strip()
-        _dbg(f"ChatCompletion completou propostas? {bool(txt)}")
-        if txt:
-            return txt + link_rodape
-    except Exception as e:
-        _dbg(f"exceção proposals(ChatCompletion): {e!r} — usando base local")
+        _dbg(f"exceção proposals(OpenAI): {e!r} — usando base local")
+        if _oa_in_service():
+            raise  # o CommentService faz as novas tentativas e aplica o fallback
 
-    return base + link_rodape
+    return _fallback_proposals(action_plan_csv)
 
 def build_org_report(path: str, titulo: str, periodo: str, tabela_csv_path: str,
                      resumo_txt: str, figs: List[str], explicacoes_txt: str,
@@ -2192,24 +2218,38 @@ def build_org_report(path: str, titulo: str, periodo: str, tabela_csv_path: str,
     with open(path, "w", encoding="utf-8") as f:
         f.write("\n".join(lines))
 
-def maybe_export_pdf(org_path: str, pdf_dir: str, engine: str = "emacs") -> Optional[str]:
-    """Gera PDF via Emacs por padrão; fallback para pandoc com xelatex."""
+def maybe_export_pdf(org_path: str, pdf_dir: str, engine: str = "emacs",
+                     workdir: Optional[str] = None) -> Optional[str]:
+    """
+    Gera PDF via Emacs por padrão; fallback para pandoc com xelatex.
+    engine="reportlab": render nativo (utils/org_pdf.py), sem LaTeX nem fallback.
+    Com `workdir`, os auxiliares do xelatex (.aux/.log/.out) ficam nele, não ao lado do .org.
+    """
     try:
         os.makedirs(pdf_dir, exist_ok=True)
         base = os.path.splitext(os.path.basename(org_path))[0]
         pdf_dst = os.path.join(pdf_dir, base + ".pdf")
 
+        if engine == "reportlab":
+            return render_org_pdf(org_path, pdf_dst)
+
         if engine == "emacs" and shutil.which("emacs"):
             env = os.environ.copy()
             texbin = "/usr/local/texlive/2024/bin/x86_64-linux"  # ajuste se necessário
             env["PATH"] = texbin + ":" + env.get("PATH", "")
+            if workdir:
+                # duas passadas no workdir isolado; o PDF final volta para junto do .tex (%o)
+                outdir = workdir.replace("\\", "/").replace('"', "")
+                latex = f"xelatex -interaction nonstopmode -shell-escape -output-directory '{outdir}' %f"
+                procs = f"\"{latex}\" \"{latex}\" \"cp '{outdir}/%b.pdf' %o\""
+            else:
+                latex = "xelatex -interaction nonstopmode -shell-escape -output-directory %o %f"
+                procs = f"\"{latex}\" \"{latex}\""
             cmd = [
                 "emacs", "--batch", org_path,
                 "--eval", "(require 'ox-latex)",
                 "--eval", "(setq org-export-in-background nil org-confirm-babel-evaluate nil "
-                          "org-latex-pdf-process (list "
-                          "\"xelatex -interaction nonstopmode -shell-escape -output-directory %o %f\" "
-                          "\"xelatex -interaction nonstopmode -shell-escape -output-directory %o %f\"))",
+                          f"org-latex-pdf-process (list {procs}))",
                 "-f", "org-latex-export-to-pdf",
             ]
             rc = subprocess.run(cmd, env=env).returncode
@@ -2374,7 +2414,12 @@ def main():
     # ---------------------------------------------
     # [COMENTÁRIOS] contexto-base e helper opcional
     # ---------------------------------------------
-    comments_by_fig: Dict[str, str] = {}
+    # Os comentários são submetidos assim que cada artefato fica pronto e só
+    # coletados na montagem do .org (valores de comments_by_fig são Futures).
+    ai_svc = CommentService(concurrency=args.ai_concurrency, rate=args.ai_rps,
+                            timeout=args.ai_timeout, retries=args.ai_retries)
+    _AI_STATE["svc"] = ai_svc
+    comments_by_fig: Dict[str, Any] = {}
 
     fb_ctx_base = {
         "periodo_inicio": dt_start,
@@ -2385,18 +2430,15 @@ def main():
         "media_nc_brasil": float(mean_br),
     }
 
-    def _coment(kind: str, extra_ctx: Optional[Dict[str, Any]] = None) -> str:
-        """Opcional: usa utils.comentarios.comentar_artefato se existir; senão retorna ''. """
+    def _coment(kind: str, extra_ctx: Optional[Dict[str, Any]] = None) -> Any:
+        """Opcional: agenda utils.comentarios.comentar_artefato (Future) se existir; senão retorna ''. """
         fn = getattr(comentarios, "comentar_artefato", None)
         if callable(fn):
-            try:
-                ctx = dict(fb_ctx_base)
-                if extra_ctx:
-                    ctx.update(extra_ctx)
-                return fn(kind, ctx, model=os.getenv("ATESTMED_OPENAI_MODEL", "gpt-4o-mini"))
-            except Exception as e:
-                _dbg(f"comentario falhou ({kind}): {e!r}")
-                return ""
+            ctx = dict(fb_ctx_base)
+            if extra_ctx:
+                ctx.update(extra_ctx)
+            return ai_svc.submit(fn, kind, ctx, model=os.getenv("ATESTMED_OPENAI_MODEL", "gpt-4o-mini"),
+                                 fallback="", label=kind)
         return ""
 
     # Cenários (conforme melhorias.org)
@@ -2438,16 +2480,20 @@ def main():
     elegiveis_keyset = {(r["nome"], r["siape"]) for r in focus_records}
     _dbg(f"keyset elegíveis para gráficos: {len(elegiveis_keyset)}")
 
+    # Barras, Lorenz e Pareto vão para o pool (--fig-workers) enquanto o resto é montado;
+    # a espera acontece uma vez, antes do payload/legendas, que leem os PNGs.
+    fig_pool = FigurePool(getattr(args, "fig_workers", 0))
+
     # Impacto Top-20
     if args.with_impact and focus_records and not args.no_graphs:
         top_imp = sorted(focus_records, key=lambda x: x["impacto_fila"], reverse=True)[:20]
         vals = [r["impacto_fila"] for r in top_imp]
         lbls = [short_label(r["nome"]) for r in top_imp]
         f1 = os.path.join(args.out_dir, base_name + "_impacto_top20.png")
-        save_bar(vals, lbls, "Impacto na fila — Top 20 elegíveis", f1, ylabel="Análises")
+        fig_pool.submit(save_bar, vals, lbls, "Impacto na fila — Top 20 elegíveis", f1, ylabel="Análises")
         figs.append(f1)
         comments_by_fig[f1] = _coment("impacto_top20")
-        _dbg(f"fig impacto_top20 gerada: {f1} | n={len(vals)}")
+        _dbg(f"fig impacto_top20 enviada: {f1} | n={len(vals)}")
 
     # Heatmap de critérios (até 10)
     if focus_records and not args.no_graphs:
@@ -2499,11 +2545,11 @@ def main():
         labels = [k for k, _ in items]
         values = [v for _, v in items]
         fpath = os.path.join(args.out_dir, base_name + f"_{suffix}.png")
-        save_bar(values, labels, title, fpath, ylabel=ylab)
+        fig_pool.submit(save_bar, values, labels, title, fpath, ylabel=ylab)
         figs.append(fpath)
         kind = {"cr": "dist_por_CR", "dr": "dist_por_DR", "uf": "dist_por_UF"}[field]
         comments_by_fig[fpath] = _coment(kind, {"contagem_base": contagem_base})
-        _dbg(f"fig {suffix} gerada: {fpath} | categorias={len(items)}")
+        _dbg(f"fig {suffix} enviada: {fpath} | categorias={len(items)}")
 
     if args.fluxo_b and focus_records:
         plot_dist_by("cr", "Distribuição por CR", "dist_por_CR")
@@ -2521,10 +2567,10 @@ def main():
         vals = [prod, 50.0, nc, le15, ov]
         lbls = ["Prod/h (média)", "Alvo (50/h)", "%NC (média)", "≤15s% (média)", "Overlap% (média)"]
         f4 = os.path.join(args.out_dir, base_name + "_indicadores_medios.png")
-        save_bar(vals, lbls, "Indicadores médios — Elegíveis", f4, ylabel="Valor / %")
+        fig_pool.submit(save_bar, vals, lbls, "Indicadores médios — Elegíveis", f4, ylabel="Valor / %")
         figs.append(f4)
         comments_by_fig[f4] = _coment("indicadores_medios")
-        _dbg(f"fig indicadores_medios gerada: {f4}")
+        _dbg(f"fig indicadores_medios enviada: {f4}")
 
     # Impacto esperado pós-medidas — Top 20
     if args.with_impact and focus_records and not args.no_graphs:
@@ -2540,17 +2586,20 @@ def main():
                 exp_vals.append(exp_imp)
             lbls.append(short_label(r["nome"]))
         f5 = os.path.join(args.out_dir, base_name + "_impacto_esperado_pos_medidas_top20.png")
-        save_bar(exp_vals, lbls, "Impacto esperado pós-medidas — Top 20", f5, ylabel="Análises (esperado)")
+        fig_pool.submit(save_bar, exp_vals, lbls, "Impacto esperado pós-medidas — Top 20", f5,
+                        ylabel="Análises (esperado)")
         figs.append(f5)
         comments_by_fig[f5] = _coment("impacto_esperado_pos_medidas_top20")
-        _dbg(f"fig impacto_esperado gerada: {f5}")
+        _dbg(f"fig impacto_esperado enviada: {f5}")
 
     # Curva de Lorenz do impacto
     impact_gini = None
     if args.with_impact and getattr(args, "with_impact_lorenz", False) and focus_records and not args.no_graphs:
         impacts_all = [float(r.get("impacto_fila", 0.0)) for r in focus_records]
         f_lorenz = os.path.join(args.out_dir, base_name + "_lorenz_impacto_elegiveis.png")
-        gini = save_lorenz_impact(impacts_all, f_lorenz, title="Curva de Lorenz — Impacto entre elegíveis")
+        # o Gini entra no comentário: espera só esta figura
+        gini = fig_pool.submit(save_lorenz_impact, impacts_all, f_lorenz,
+                               title="Curva de Lorenz — Impacto entre elegíveis").result()
         if gini is not None:
             figs.append(f_lorenz)
             impact_gini = float(gini)
@@ -2568,22 +2617,12 @@ def main():
             labels = [n for n, _ in vals_sorted]
             values = [v for _, v in vals_sorted]
             pareto_fig = os.path.join(args.out_dir, base_name + "_pareto_impacto.png")
-            plt.figure()
-            x = np.arange(len(values))
-            plt.bar(x, values)
-            cum = np.cumsum(values) / sum(values)
-            plt.plot(x, cum * max(values), marker="o", linestyle="--")
-            plt.xticks(x, labels, rotation=45, ha="right")
-            plt.title("Pareto por impacto (Top-20)")
-            plt.ylabel("Impacto (barras) / Cumulativo (linha)")
-            plt.tight_layout()
-            plt.savefig(pareto_fig, dpi=160)
-            plt.close()
+            fig_pool.submit(save_pareto, values, labels, pareto_fig)
             pareto_table = build_pareto_table(vals, topk=10)
             pareto_table_lines = export_table_org_lines(pareto_table)
             figs.append(pareto_fig)
             comments_by_fig[pareto_fig] = _coment("pareto_impacto")
-            _dbg(f"fig pareto gerada: {pareto_fig} | tabela pareto top10 montada")
+            _dbg(f"fig pareto enviada: {pareto_fig} | tabela pareto top10 montada")
 
     # Estatísticas robustas (mediana/P90)
     robust_summary = None
@@ -2632,6 +2671,10 @@ def main():
                                                   {"mediana_global": float(gmed), "p90_global": float(gp90)})
             _dbg(f"fig robust_stats gerada: {robust_fig} | resumo: {robust_summary}")
 
+    # figuras do pool prontas antes das legendas/anotações/exportação (propaga erro de render)
+    fig_pool.close()
+    _dbg("pool de figuras concluído")
+
     # Resumo + payload (para IA de legendas/textos)
     resumo_lines = [
         f"Média nacional de não conformidade no período: {mean_br:.2f}%.",
@@ -2666,20 +2709,57 @@ def main():
     payload.update(payload_extra)
     _dbg(f"payload p/ IA montado | figs={len(figs)} | with_files_section={getattr(args,'with_files_section',False)}")
 
-    # Propostas
+    # Submete de uma vez os textos da IA (propostas, explicações, legendas e
+    # comentários de tabelas); a coleta acontece abaixo, na montagem.
     propostas_txt = None
     if getattr(args, "propostas_from_file", None):
         propostas_txt = extract_proposals_from_org(args.propostas_from_file)
         _dbg(f"propostas_from_file: {bool(propostas_txt)}")
-    if not propostas_txt:
-        propostas_txt = ai_proposals(payload, plano_acao_csv)
+    fut_propostas = None if propostas_txt else ai_svc.submit(
+        ai_proposals, payload, plano_acao_csv, fallback=_fallback_proposals(plano_acao_csv), label="propostas")
+    fut_explicacoes = ai_svc.submit(ai_explanations, payload, fallback=_fallback_explanations(payload),
+                                    label="explicacoes")
+    fut_fig_captions = ai_svc.submit(ai_figure_captions, payload, figs, fallback={}, label="legendas") if figs else None
+    tables_meta = [
+        {"id": "main",        "title": "Tabela principal (ranking)"},
+        {"id": "plan",        "title": "Plano de ação (resumo)"},
+        {"id": "appendix",    "title": "Apêndice — tabela completa"},
+        {"id": "cenarios",    "title": "Cenários mensais"},
+        {"id": "pareto_table","title": "Pareto do impacto"},
+    ]
+    fn_ai_tab = getattr(comentarios, "ai_table_captions", None)
+    fut_tab_captions = (ai_svc.submit(fn_ai_tab, payload, tables_meta, fallback={}, label="legendas_tabelas")
+                        if callable(fn_ai_tab) else None)
+
+    tab_coments: Dict[str, Any] = {
+        "main": _coment("tabela_principal_csv"),
+        "appendix": _coment("tabela_full_csv"),
+        "plan": _coment("plano_acao_csv"),
+    }
+    if cen_table_org_lines:
+        red_list = (payload_extra.get("cenarios", {}) or {}).get("reductions", [])
+        lab_list = (payload_extra.get("cenarios", {}) or {}).get("labels", [])
+        reds_str = ", ".join([f"{int(r*100)}%" for r in red_list]) if red_list else "50%, 70%, 100%"
+        labs_str = ", ".join(lab_list) if lab_list else "A, B, C"
+        tab_coments["cenarios"] = _coment("cenarios_csv", {
+            "topk_mensal": int(getattr(args, "scenarios_topk", 10)),
+            "rotulos_cenarios": labs_str,
+            "reducoes_descritas": reds_str
+        })
+    if pareto_table_lines:
+        tab_coments["pareto_table"] = _coment("pareto_impacto")
+
+    # Propostas
+    if fut_propostas is not None:
+        propostas_txt = _ai_result(fut_propostas)
         _dbg(f"propostas geradas via IA? {bool(propostas_txt)}")
 
     # Explicações + legendas
-    explicacoes = ai_explanations(payload)
+    explicacoes = _ai_result(fut_explicacoes) or _fallback_explanations(payload)
     _dbg(f"explicações IA obtidas? {bool(explicacoes)}")
 
-    fc_auto = ai_figure_captions(payload, figs) if figs else {}
+    fc_auto = (_ai_result(fut_fig_captions, {}) or {}) if fut_fig_captions is not None else {}
+    comments_by_fig = {k: _ai_result(v, "") for k, v in comments_by_fig.items()}
     # Manual/“opcional” sobrescreve o automático
     fig_captions = {**fc_auto, **{k: v for k, v in comments_by_fig.items() if v}}
     _dbg(f"legendas de figuras (merge): {len(fig_captions)} itens")
@@ -2721,22 +2801,8 @@ def main():
         )
         _dbg(f"files section (unificada): {len(files_links)} links")
 
-    # Comentários de TABELAS
-    table_captions: Dict[str, str] = {}
-    tables_meta = [
-        {"id": "main",        "title": "Tabela principal (ranking)"},
-        {"id": "plan",        "title": "Plano de ação (resumo)"},
-        {"id": "appendix",    "title": "Apêndice — tabela completa"},
-        {"id": "cenarios",    "title": "Cenários mensais"},
-        {"id": "pareto_table","title": "Pareto do impacto"},
-    ]
-    fn_ai_tab = getattr(comentarios, "ai_table_captions", None)
-    if callable(fn_ai_tab):
-        try:
-            table_captions = fn_ai_tab(payload, tables_meta)
-        except Exception as e:
-            _dbg(f"ai_table_captions falhou: {e!r}")
-            table_captions = {}
+    # Comentários de TABELAS (submetidos junto com os demais textos da IA)
+    table_captions: Dict[str, str] = dict(_ai_result(fut_tab_captions, {}) or {}) if fut_tab_captions else {}
     defaults_tab = {
         "main": "Tabela principal com ranking dos elegíveis e impacto estimado.",
         "plan": "Resumo do plano de ação por perito com ganho esperado.",
@@ -2744,23 +2810,9 @@ def main():
         "cenarios": "Resumo mensal: impacto real vs. cenários A/B/C sobre IV_sel.",
         "pareto_table": "Top-10 de impacto com % acumulado.",
     }
-    table_captions.setdefault("main", _coment("tabela_principal_csv") or defaults_tab["main"])
-    table_captions.setdefault("appendix", _coment("tabela_full_csv") or defaults_tab["appendix"])
-    table_captions.setdefault("plan", _coment("plano_acao_csv") or defaults_tab["plan"])
-    if cen_table_org_lines:
-        red_list = (payload_extra.get("cenarios", {}) or {}).get("reductions", [])
-        lab_list = (payload_extra.get("cenarios", {}) or {}).get("labels", [])
-        reds_str = ", ".join([f"{int(r*100)}%" for r in red_list]) if red_list else "50%, 70%, 100%"
-        labs_str = ", ".join(lab_list) if lab_list else "A, B, C"
-        table_captions.setdefault("cenarios",
-            _coment("cenarios_csv", {
-                "topk_mensal": int(getattr(args, "scenarios_topk", 10)),
-                "rotulos_cenarios": labs_str,
-                "reducoes_descritas": reds_str
-            }) or defaults_tab["cenarios"]
-        )
-    if pareto_table_lines:
-        table_captions.setdefault("pareto_table", _coment("pareto_impacto") or defaults_tab["pareto_table"])
+    for tid, fut in tab_coments.items():
+        table_captions.setdefault(tid, _ai_result(fut, "") or defaults_tab[tid])
+    _ai_service_close()
 
     # Export .org / PDF
     if args.export_org or args.export_pdf:
@@ -2803,11 +2855,15 @@ def main():
         print(f"✅ Org gerado: {org_path}")
         if args.export_pdf:
             _dbg(f"exportando PDF via engine={args.pdf_engine}")
-            pdf_path = maybe_export_pdf(org_path, args.pdf_dir, engine=args.pdf_engine)
+            pdf_stage = PdfBuildStage(workers=1, force=args.pdf_force)
+            pdf_stage.add(org_path, os.path.join(args.pdf_dir, os.path.splitext(os.path.basename(org_path))[0] + ".pdf"),
+                          lambda o, p, wd: maybe_export_pdf(o, os.path.dirname(p), engine=args.pdf_engine, workdir=wd),
+                          engine=args.pdf_engine)
+            pdf_path = pdf_stage.run().get(org_path)
             if pdf_path:
                 print(f"✅ PDF gerado: {pdf_path}")
             else:
-                print("⚠️  Falha ao gerar PDF (Emacs/pandoc). Verifique PATH e engines.")
+                print("⚠️  Falha ao gerar PDF (Emacs/pandoc/ReportLab). Verifique PATH e engines.")
 
     # ZIP bundle (opcional) — agora dentro da pasta do relatório
     if getattr(args, "zip_bundle", False):
@@ -2841,4 +2897,7 @@ def main():
     _dbg("main() finalizado")
 
 if __name__ == "__main__":
-    main()
+    try:
+        main()
+    finally:
+        _ai_service_close(wait=False)
@@ -0,0 +1,122 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils/comment_queue.py (comentários IA em duas fases): cada job fica associado só
+ao sidecar do comentário que o gerou (capture → bind), o drain usa o cache sem
+chamar a API e o reinject troca apenas o bloco marcado do stem.
+
+Rodar:
+    python -m pytest -q testing/test_comment_queue.py
+"""
+
+import json
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils import comment_queue as cq  # noqa: E402
+from utils import llm_cache  # noqa: E402
+
+
+@pytest.fixture
+def qdir(tmp_path, monkeypatch):
+    d = tmp_path / "queue"
+    monkeypatch.setenv(cq.QUEUE_ENV, str(d))
+    monkeypatch.setenv("ATESTMED_LLM_CACHE", str(tmp_path / "llm.sqlite"))
+    yield str(d)
+    if llm_cache._STATE["con"] is not None:
+        llm_cache._STATE["con"].close()
+    llm_cache._STATE.update(con=None, path=None)
+
+
+def _msgs(txt):
+    return [{"role": "user", "content": txt}]
+
+
+def _job(qdir, key):
+    with open(os.path.join(qdir, f"{key}.json"), encoding="utf-8") as f:
+        return json.load(f)
+
+
+def test_enqueue_is_noop_without_queue(monkeypatch):
+    monkeypatch.delenv(cq.QUEUE_ENV, raising=False)
+    with cq.capture() as keys:
+        assert cq.enqueue("k", "m", 0.2, _msgs("x")) is None
+    assert keys == []
+
+
+def test_bind_is_per_comment(qdir, tmp_path):
+    with cq.capture() as keys_a:
+        assert cq.enqueue("ka", "m", 0.2, _msgs("a")) == "ka"
+    with cq.capture() as keys_b:
+        cq.enqueue("kb", "m", 0.2, _msgs("b"))
+        cq.enqueue("kb2", "m", 0.2, _msgs("b2"))
+    assert keys_a == ["ka"] and keys_b == ["kb", "kb2"]
+
+    cq.bind(str(tmp_path / "graf_a_comment.org"), keys_a)
+    cq.bind(str(tmp_path / "graf_b_comment.org"), keys_b, max_words=50)
+    assert _job(qdir, "ka")["stems"] == ["graf_a"]
+    assert _job(qdir, "kb")["stems"] == ["graf_b"]
+    assert _job(qdir, "kb2")["stems"] == ["graf_b"] and _job(qdir, "kb2")["max_words"] == 50
+
+    # o mesmo prompt em outro artefato acumula stems, sem duplicar
+    with cq.capture() as keys_c:
+        cq.enqueue("ka", "m", 0.2, _msgs("a"))
+    cq.bind(str(tmp_path / "graf_c_comment.md"), keys_c)
+    cq.bind(str(tmp_path / "graf_c_comment.org"), keys_c)
+    assert _job(qdir, "ka")["stems"] == ["graf_a", "graf_c"]
+
+
+def test_nested_captures_both_see_key(qdir):
+    with cq.capture() as outer:
+        with cq.capture() as inner:
+            cq.enqueue("k1", "m", 0.0, _msgs("1"))
+        cq.enqueue("k2", "m", 0.0, _msgs("2"))
+    assert inner == ["k1"] and outer == ["k1", "k2"]
+
+
+def test_cached_chat_defers_and_reports_key(qdir):
+    calls = []
+
+    @llm_cache.cached_chat
+    def _chat(messages, model="m", temperature=0.2):
+        calls.append(messages)
+        return "resposta"
+
+    with cq.capture() as keys:
+        assert _chat(_msgs("pergunta")) is None
+    assert calls == [] and len(keys) == 1
+    assert keys[0] == llm_cache.cache_key("m", 0.2, _msgs("pergunta"))
+
+
+def test_drain_uses_cache_and_reinject_swaps_block(qdir, tmp_path):
+    with cq.capture() as keys:
+        cq.enqueue("kx", "m", 0.2, _msgs("x"))
+    cq.enqueue("orfao", "m", 0.2, _msgs("sem sidecar"))   # nunca associado: fica na fila
+    cq.bind(str(tmp_path / "graf_x_comment.org"), keys)
+    llm_cache.put("kx", "m", "Texto   da IA.\n\n- item")
+
+    comments = tmp_path / "comments"
+    done = cq.drain(qdir, str(comments))
+    assert set(done) == {"graf_x"}
+    assert (comments / "graf_x_comment.org").read_text(encoding="utf-8").strip() == done["graf_x"]
+    assert not os.path.exists(os.path.join(qdir, "kx.json"))
+    assert os.path.exists(os.path.join(qdir, "orfao.json"))
+
+    org = tmp_path / "rel.org"
+    org.write_text("* A\n\n# comment-stem: graf_x\n#+BEGIN_QUOTE\nprovisório\n#+END_QUOTE\n\n"
+                   "# comment-stem: outro\n#+BEGIN_QUOTE\nfica\n#+END_QUOTE\n", encoding="utf-8")
+    n = cq.reinject([str(org)], done.keys(), lambda stem: ["", "#+BEGIN_QUOTE", done[stem], "#+END_QUOTE"])
+    assert n == 1
+    txt = org.read_text(encoding="utf-8")
+    assert "provisório" not in txt and done["graf_x"] in txt
+    assert "# comment-stem: outro\n#+BEGIN_QUOTE\nfica" in txt
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
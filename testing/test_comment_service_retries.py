@@ -0,0 +1,72 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Novas tentativas dos comentários IA: dentro do CommentService o serviço é o único
+dono das tentativas (o cliente OpenAI não repete), então um comentário que falha
+sempre gera retries+1 requisições — e não retries × max_retries do cliente.
+
+Roda contra o stub local (utils/llm_stub_server.py), com o transporte HTTP da
+biblioteca padrão (sem depender do SDK da OpenAI).
+
+Rodar:
+    python -m pytest -q testing/test_comment_service_retries.py
+"""
+
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils import openai_client  # noqa: E402
+from utils.comment_service import CommentService  # noqa: E402
+from utils.llm_stub_server import start_stub  # noqa: E402
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    srv = start_stub(latency=0.0, jitter=0.0, error_rate=1.0, seed=1)
+    monkeypatch.setenv("OPENAI_BASE_URL", srv.base_url)
+    monkeypatch.setenv("OPENAI_API_KEY", "stub")
+    monkeypatch.setenv("ATESTMED_OPENAI_SDK", "http")
+    monkeypatch.setenv("ATESTMED_OPENAI_MAX_RETRIES", "2")
+    openai_client.reset()
+    try:
+        yield srv
+    finally:
+        srv.stop()
+        openai_client.reset()
+
+
+def _ask():
+    return openai_client.chat([{"role": "user", "content": "x"}])
+
+
+@pytest.mark.parametrize("concurrency", [0, 2])
+def test_service_owns_retries(stub, concurrency):
+    stub.stats.reset()
+    with CommentService(concurrency=concurrency, rate=0, retries=2, backoff=0.001) as svc:
+        fut = svc.submit(_ask, fallback="FB", label="t")
+        assert fut.result() == "FB"
+    assert stub.stats_dict()["requests"] == 3
+
+
+def test_client_retries_outside_service(stub):
+    stub.stats.reset()
+    assert _ask() is None
+    assert stub.stats_dict()["requests"] == 3
+
+
+def test_errors_surface_inside_service_call(stub):
+    with openai_client.service_call(timeout=5):
+        assert openai_client.in_service_call()
+        with pytest.raises(Exception):
+            _ask()
+    assert not openai_client.in_service_call()
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
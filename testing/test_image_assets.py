@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils/image_assets.py: imagens iguais viram hardlinks de um único blob no store,
+substituir a imagem de um relatório não altera o blob nem os outros relatórios,
+e gc_store() remove só os blobs que nenhum relatório referencia mais.
+
+Rodar:
+    python -m pytest -q testing/test_image_assets.py
+"""
+
+import os
+import sys
+import time
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils import image_assets as ia  # noqa: E402
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    d = tmp_path / "_assets"
+    monkeypatch.setattr(ia, "ASSET_STORE_DIR", str(d))
+    return d
+
+
+def _png(path, payload: bytes):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(b"\x89PNG\r\n\x1a\n" + payload)
+    return str(path)
+
+
+def _blobs(store):
+    return sorted(p for p in store.rglob("*") if p.is_file())
+
+
+def test_same_content_is_one_blob(store, tmp_path):
+    a = ia.place_image(_png(tmp_path / "exp" / "g.png", b"A"), str(tmp_path / "r1" / "imgs" / "g.png"), move=True)
+    b = ia.place_image(_png(tmp_path / "exp" / "g.png", b"A"), str(tmp_path / "r2" / "imgs" / "g.png"), move=True)
+    assert not os.path.exists(tmp_path / "exp" / "g.png")
+    (blob,) = _blobs(store)
+    assert os.path.samefile(a, blob) and os.path.samefile(b, blob)
+    assert os.stat(blob).st_nlink == 3
+
+
+def test_replacing_report_image_keeps_blob(store, tmp_path):
+    r1 = str(tmp_path / "r1" / "g.png")
+    r2 = str(tmp_path / "r2" / "g.png")
+    ia.place_image(_png(tmp_path / "s1.png", b"A"), r1)
+    ia.place_image(_png(tmp_path / "s2.png", b"A"), r2)
+    ia.place_image(_png(tmp_path / "s3.png", b"B"), r1)      # novo conteúdo no mesmo nome
+    assert open(r1, "rb").read().endswith(b"B")
+    assert open(r2, "rb").read().endswith(b"A")
+    assert len(_blobs(store)) == 2
+
+
+def test_gc_removes_only_unreferenced_blobs(store, tmp_path):
+    keep = str(tmp_path / "r1" / "keep.png")
+    gone = str(tmp_path / "r2" / "gone.png")
+    ia.place_image(_png(tmp_path / "s1.png", b"keep"), keep)
+    ia.place_image(_png(tmp_path / "s2.png", b"gone"), gone)
+    os.remove(gone)                                           # relatório apagado
+
+    # blobs recentes ficam (podem estar entre o ingest e o link)
+    assert ia.gc_store() == (0, 0)
+    old = time.time() - 2 * ia.GC_MIN_AGE_S
+    for p in _blobs(store):
+        os.utime(p, (old, old))
+    n, freed = ia.gc_store()
+    assert n == 1 and freed == len(b"\x89PNG\r\n\x1a\ngone")
+    (blob,) = _blobs(store)
+    assert os.path.samefile(blob, keep)
+
+    # conteúdo removido volta ao store na próxima colocação
+    again = ia.place_image(_png(tmp_path / "s3.png", b"gone"), str(tmp_path / "r3" / "gone.png"))
+    assert open(again, "rb").read().endswith(b"gone") and len(_blobs(store)) == 2
+
+
+def test_relink_when_blob_vanishes(store, tmp_path, monkeypatch):
+    ia.place_image(_png(tmp_path / "s1.png", b"X"), str(tmp_path / "r1" / "x.png"))
+    (blob,) = _blobs(store)
+    real = ia._link_or_copy
+    calls = []
+
+    def racy(target, dst):
+        if not calls:                                         # gc concorrente apaga o blob
+            calls.append(target)
+            os.remove(target)
+        return real(target, dst)
+
+    monkeypatch.setattr(ia, "_link_or_copy", racy)
+    src = _png(tmp_path / "s2.png", b"X")
+    dst = ia.place_image(src, str(tmp_path / "r2" / "x.png"), move=True)
+    assert open(dst, "rb").read().endswith(b"X") and os.path.samefile(dst, blob)
+    assert not os.path.exists(src)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,132 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+Precisão das caudas vetorizadas de reports/make_impact_report.py
+(_binom_sf_batch / _betabin_sf_batch) contra a implementação anterior: a soma
+termo a termo de lgamma por (k, n), copiada abaixo como _baseline_*.
+
+A referência cobre inclusive a cauda profunda (valores ~1e-300 e subnormais):
+onde a implementação anterior devolvia um valor > 0, a nova não pode zerar.
+
+Rodar:
+    python -m pytest -q testing/test_impact_sf_precision.py
+    python testing/test_impact_sf_precision.py
+"""
+
+import os
+import sys
+import warnings
+from math import lgamma, log
+
+import pytest
+
+np = pytest.importorskip("numpy")
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+mir = pytest.importorskip("reports.make_impact_report")
+
+RTOL = 1e-9          # mesma ordem do erro de arredondamento das somas (≥ 1e-300)
+SUBNORMAL = 1e-300   # abaixo disso a própria referência perde dígitos
+ATOL_SUB = 1e-315
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Implementação anterior (copiada sem alterações, um (k, n) por vez)
+# ────────────────────────────────────────────────────────────────────────────────
+def _baseline_log_binom_pmf(k, n, p):
+    if p <= 0.0: return 0.0 if k == 0 else -np.inf
+    if p >= 1.0: return 0.0 if k == n else -np.inf
+    return (lgamma(n+1)-lgamma(k+1)-lgamma(n-k+1) + k*log(p) + (n-k)*log(1.0-p))
+
+def _baseline_binom_sf(k_obs, n, p0):
+    ks = np.arange(k_obs, n+1, dtype=int)
+    lps = np.array([_baseline_log_binom_pmf(int(k), n, p0) for k in ks], dtype=float)
+    m = np.max(lps)
+    return float(np.exp(lps - m).sum() * np.exp(m))
+
+def _baseline_log_beta(a, b): return lgamma(a)+lgamma(b)-lgamma(a+b)
+def _baseline_log_betabinom_pmf(k, n, a, b):
+    return (lgamma(n+1)-lgamma(k+1)-lgamma(n-k+1) + _baseline_log_beta(k+a, n-k+b) - _baseline_log_beta(a, b))
+def _baseline_betabin_sf(k_obs, n, a, b):
+    ks = np.arange(k_obs, n+1, dtype=int)
+    lps = np.array([_baseline_log_betabinom_pmf(int(k), n, a, b) for k in ks], dtype=float)
+    m = np.max(lps)
+    return float(np.exp(lps - m).sum() * np.exp(m))
+
+
+def _cases(seed: int = 7, n_rand: int = 400):
+    """(k, n) aleatórios com 0 ≤ k ≤ n (domínio da implementação anterior) + caudas extremas."""
+    rng = np.random.default_rng(seed)
+    n = rng.integers(1, 3000, n_rand)
+    k = (rng.random(n_rand) * (n + 1)).astype(np.int64)
+    edge_n = np.array([1, 1, 5, 5, 50, 50, 2000, 2000, 2000, 2000, 10000, 10000])
+    edge_k = np.array([0, 1, 0, 5, 50, 49, 2000, 1500, 400, 1, 10000, 9000])
+    return np.concatenate([k, edge_k]), np.concatenate([n, edge_n])
+
+
+def _assert_matches_baseline(got, ref, k, n, label):
+    got = np.asarray(got, dtype=float)
+    assert got.shape == ref.shape
+    assert np.all(np.isfinite(got)), f"{label}: valores não finitos"
+    assert np.all((got >= 0.0) & (got <= 1.0)), f"{label}: fora de [0, 1]"
+    normal = ref >= SUBNORMAL
+    ok = np.empty(len(ref), dtype=bool)
+    ok[normal] = np.isclose(got[normal], np.minimum(ref[normal], 1.0), rtol=RTOL, atol=0.0)
+    ok[~normal] = np.isclose(got[~normal], ref[~normal], rtol=1e-3, atol=ATOL_SUB)
+    # nenhum valor que a implementação anterior representava pode virar 0
+    ok &= ~((ref > 0.0) & (got == 0.0))
+    bad = [(int(k[i]), int(n[i]), got[i], ref[i]) for i in np.flatnonzero(~ok)]
+    assert not bad, f"{label}: {len(bad)} divergência(s), p.ex. (k, n, obtido, ref) = {bad[:5]}"
+
+
+@pytest.mark.parametrize("p0", [1e-4, 0.02, 0.15, 0.5, 0.93])
+@pytest.mark.parametrize("use_scipy", [True, False])
+def test_binom_sf_batch_vs_baseline(p0, use_scipy, monkeypatch):
+    if use_scipy:
+        if mir._sp_stats is None:
+            pytest.skip("scipy indisponível")
+    else:
+        # força o caminho da recorrência vetorizada (sem scipy)
+        monkeypatch.setattr(mir, "_sp_stats", None)
+    k, n = _cases()
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)
+        got = mir._binom_sf_batch(k, n, p0)
+    ref = np.array([_baseline_binom_sf(int(a), int(b), p0) for a, b in zip(k, n)])
+    assert (ref > 0.0).any() and (ref < SUBNORMAL).any()   # o caso cobre a cauda profunda
+    _assert_matches_baseline(got, ref, k, n, f"binom p0={p0} scipy={use_scipy}")
+
+
+@pytest.mark.parametrize("a,b", [(0.5, 20.0), (2.0, 30.0), (5.0, 5.0), (40.0, 1.5)])
+def test_betabin_sf_batch_vs_baseline(a, b):
+    k, n = _cases(seed=11)
+    with warnings.catch_warnings():
+        warnings.simplefilter("error", RuntimeWarning)   # sem RuntimeWarning em entrada válida
+        got = mir._betabin_sf_batch(k, n, a, b)
+    ref = np.array([_baseline_betabin_sf(int(x), int(m), a, b) for x, m in zip(k, n)])
+    _assert_matches_baseline(got, ref, k, n, f"betabinom a={a} b={b}")
+
+
+def test_edges_outside_baseline_domain():
+    # k > n e n ≤ 0 não eram aceitos pela implementação anterior (np.max de vazio)
+    k = np.array([6, 3, 0, -1])
+    n = np.array([5, 0, 0, 4])
+    assert mir._binom_sf_batch(k, n, 0.3).tolist() == [0.0, 1.0, 1.0, 1.0]
+    assert mir._betabin_sf_batch(k, n, 2.0, 3.0).tolist() == [0.0, 1.0, 1.0, 1.0]
+
+
+def test_scalar_wrappers_match_batch():
+    k, n = _cases(seed=3, n_rand=20)
+    batch = mir._betabin_sf_batch(k, n, 2.0, 30.0)
+    one = np.array([mir._betabin_sf_one_sided(int(x), int(m), 2.0, 30.0) for x, m in zip(k, n)])
+    assert np.allclose(batch, one, rtol=1e-12, atol=0.0)
+    batch = mir._binom_sf_batch(k, n, 0.1)
+    one = np.array([mir._binom_sf_one_sided(int(x), int(m), 0.1) for x, m in zip(k, n)])
+    assert np.allclose(batch, one, rtol=1e-12, atol=0.0)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,100 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils/llm_cache.py: acerto/falta, TTL e a remoção LRU acima do limite — que tira
+só o excesso (mesmo com vários acessos no mesmo instante) e nunca a entrada que
+acabou de ser gravada.
+
+Rodar:
+    python -m pytest -q testing/test_llm_cache.py
+"""
+
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils import llm_cache  # noqa: E402
+
+MB = 1024 * 1024
+
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    monkeypatch.setenv("ATESTMED_LLM_CACHE", str(tmp_path / "llm.sqlite"))
+    monkeypatch.setenv("ATESTMED_LLM_CACHE_MAX_MB", "1")
+    monkeypatch.setenv("ATESTMED_LLM_CACHE_TTL_DAYS", "30")
+    monkeypatch.delenv("ATESTMED_COMMENT_QUEUE", raising=False)
+    yield llm_cache
+    if llm_cache._STATE["con"] is not None:
+        llm_cache._STATE["con"].close()
+    llm_cache._STATE.update(con=None, path=None)
+
+
+def _keys(cache):
+    return [r[0] for r in cache._connect().execute("SELECT key FROM comments ORDER BY rowid")]
+
+
+def _total(cache):
+    return cache._connect().execute("SELECT COALESCE(SUM(size), 0) FROM comments").fetchone()[0]
+
+
+def test_roundtrip_and_empty_not_cached(cache):
+    k = cache.cache_key("m", 0.2, [{"role": "user", "content": "x"}])
+    assert cache.get(k) is None
+    cache.put(k, "m", "texto")
+    assert cache.get(k) == "texto"
+    cache.put("vazio", "m", "")
+    assert cache.get("vazio") is None
+
+
+def test_ttl_expires(cache, monkeypatch):
+    now = [1_000_000.0]
+    monkeypatch.setattr(cache.time, "time", lambda: now[0])
+    cache.put("k", "m", "texto")
+    now[0] += 29 * 86400
+    assert cache.get("k") == "texto"
+    now[0] += 2 * 86400
+    assert cache.get("k") is None
+
+
+def test_evicts_exact_excess_with_tied_timestamps(cache, monkeypatch):
+    monkeypatch.setattr(cache.time, "time", lambda: 1_000_000.0)   # todos no mesmo instante
+    body = "x" * (100 * 1024)
+    keys = [f"k{i:02d}" for i in range(12)]
+    for k in keys:
+        cache.put(k, "m", body)
+    left = _keys(cache)
+    assert keys[-1] in left                                      # a recém-gravada fica
+    assert _total(cache) <= MB                                   # voltou para baixo do limite
+    # só o excesso sai (as mais antigas, na ordem de gravação), não o bloco empatado inteiro
+    assert len(left) >= int(0.9 * MB) // (len(body) + 3) - 1
+    assert left == sorted(left) and left[0] != keys[0]
+
+
+def test_newest_entry_survives_even_if_it_alone_exceeds(cache):
+    cache.put("pequena", "m", "abc")
+    cache.put("grande", "m", "y" * (MB + 10))
+    assert cache.get("grande") is not None
+    assert cache.get("pequena") is None
+
+
+def test_cached_chat_calls_once(cache):
+    calls = []
+
+    @cache.cached_chat
+    def _chat(messages, model="m", temperature=0.2):
+        calls.append(1)
+        return "ok"
+
+    msgs = [{"role": "user", "content": "p"}]
+    assert _chat(msgs) == "ok" and _chat(msgs) == "ok"
+    assert len(calls) == 1
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils/openai_client.py: detecção do SDK instalado (v1 / legacy / http) e o
+ATESTMED_OPENAI_SDK forçado.
+
+Rodar:
+    python -m pytest -q testing/test_openai_client.py
+"""
+
+import os
+import sys
+import types
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils import openai_client  # noqa: E402
+
+
+@pytest.fixture(autouse=True)
+def _fresh(monkeypatch):
+    monkeypatch.delenv("ATESTMED_OPENAI_SDK", raising=False)
+    openai_client.reset()
+    yield
+    openai_client.reset()
+
+
+@pytest.mark.parametrize("attrs,flavor", [
+    ({"OpenAI": object, "ChatCompletion": object}, "v1"),
+    ({"ChatCompletion": object}, "legacy"),
+    ({}, "http"),
+])
+def test_flavor_from_installed_module(monkeypatch, attrs, flavor):
+    fake = types.ModuleType("openai")
+    for k, v in attrs.items():
+        setattr(fake, k, v)
+    monkeypatch.setitem(sys.modules, "openai", fake)
+    assert openai_client.sdk_flavor() == flavor
+
+
+def test_flavor_without_sdk(monkeypatch):
+    monkeypatch.setitem(sys.modules, "openai", None)   # import openai → ImportError
+    assert openai_client.sdk_flavor() == "http"
+
+
+def test_forced_flavor(monkeypatch):
+    monkeypatch.setenv("ATESTMED_OPENAI_SDK", "http")
+    assert openai_client.sdk_flavor() == "http"
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils/org_stream.py: o OrgWriter em fluxo grava o mesmo .org que a montagem
+antiga (ler o arquivo inteiro, aplicar as normalizações em texto e gravar
+"\\n".join(lines).strip() + "\\n"), e um include que falha no meio não deixa
+metade do arquivo no relatório.
+
+As funções _baseline_* são cópias das versões em texto anteriores ao streaming.
+
+Rodar:
+    python -m pytest -q testing/test_org_stream.py
+"""
+
+import os
+import random
+import re
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils.org_stream import OrgWriter  # noqa: E402
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Referência: normalizações em texto (pré-streaming)
+# ────────────────────────────────────────────────────────────────────────────────
+_ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+_BOX_DRAW_RE = re.compile(r"[┌┬┐└┴┘├┼┤│─━┃╭╮╯╰█▓▒░]")
+
+
+def _baseline_shift(text, delta=1):
+    lines = []
+    for ln in text.splitlines():
+        if ln.startswith('*'):
+            i = 0
+            while i < len(ln) and ln[i] == '*':
+                i += 1
+            if i > 0 and i + delta < 7 and (i < len(ln) and ln[i] == ' '):
+                ln = ('*' * (i + delta)) + ln[i:]
+        lines.append(ln)
+    return "\n".join(lines)
+
+
+def _baseline_image_links(text, prefix="../imgs/"):
+    def repl(m):
+        path = m.group(1).strip()
+        if path.startswith(("http://", "https://", "/")):
+            return m.group(0)
+        return f"[[file:{prefix}{os.path.basename(path)}]]"
+    return re.sub(r"\[\[file:([^\]]+)\]\]", repl, text)
+
+
+def _baseline_wrap_ascii(text):
+    out, in_block = [], False
+    for ln in text.splitlines():
+        if (_ANSI_RE.search(ln) or _BOX_DRAW_RE.search(ln)) and ln.strip():
+            if not in_block:
+                out.append("#+begin_example")
+                in_block = True
+            out.append(_ANSI_RE.sub("", ln))
+            continue
+        if in_block:
+            out.append("#+end_example")
+            in_block = False
+        out.append(ln)
+    if in_block:
+        out.append("#+end_example")
+    return "\n".join(out)
+
+
+def _baseline_blank_around_tables(text):
+    text = re.sub(r"(\[Tabela[^\]]*\])\s*(\|)", r"\1\n\2", text, flags=re.I)
+    lines = text.splitlines()
+    out, i = [], 0
+    while i < len(lines):
+        ln = lines[i]
+        if ln.lstrip().startswith("|"):
+            if out and out[-1].strip() != "":
+                out.append("")
+            while i < len(lines) and lines[i].lstrip().startswith("|"):
+                out.append(lines[i])
+                i += 1
+            if i < len(lines) and lines[i].strip() != "":
+                out.append("")
+            continue
+        out.append(ln)
+        i += 1
+    return "\n".join(out)
+
+
+def _baseline_normalize_tables(text):
+    def fix(block):
+        fixed = []
+        for ln in block:
+            raw = ln.strip()
+            if raw in ("|", ""):
+                continue
+            raw = re.sub(r"\s*\|\s*", " | ", raw).strip()
+            if not raw.startswith("|"):
+                raw = "| " + raw
+            if not raw.endswith("|"):
+                raw = raw + " |"
+            fixed.append(raw)
+        return fixed
+
+    lines = text.splitlines()
+    out, i = [], 0
+    while i < len(lines):
+        if lines[i].lstrip().startswith("|"):
+            block = []
+            while i < len(lines) and lines[i].lstrip().startswith("|"):
+                block.append(lines[i])
+                i += 1
+            out.extend(fix(block))
+            if i < len(lines) and lines[i].strip() != "":
+                out.append("")
+        else:
+            out.append(lines[i])
+            i += 1
+    return "\n".join(out)
+
+
+def _baseline_protect(text):
+    return _baseline_wrap_ascii(_baseline_normalize_tables(_baseline_blank_around_tables(text)))
+
+
+def _baseline_assemble(parts):
+    """parts: ("text", s) ou ("file", path, protect, shift, imgs_prefix), como na montagem antiga."""
+    lines = []
+    for p in parts:
+        if p[0] == "text":
+            lines.append(p[1])
+            continue
+        _, path, protect, shift, imgs_prefix = p
+        with open(path, encoding="utf-8") as f:
+            content = f.read().strip()
+        if not content:
+            continue
+        if imgs_prefix is not None:
+            content = _baseline_image_links(content, imgs_prefix)
+        if protect:
+            content = _baseline_protect(content)
+        if shift:
+            content = _baseline_shift(content, shift)
+        lines.append(content)
+    return "\n".join(lines).strip() + "\n"
+
+
+def _stream_assemble(out_path, parts):
+    with OrgWriter(str(out_path)) as w:
+        for p in parts:
+            if p[0] == "text":
+                w.append(p[1])
+            else:
+                _, path, protect, shift, imgs_prefix = p
+                w.include(path, protect=protect, shift=shift, imgs_prefix=imgs_prefix)
+    with open(out_path, encoding="utf-8") as f:
+        return f.read()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Documentos de teste
+# ────────────────────────────────────────────────────────────────────────────────
+_VOCAB = [
+    "", "", "   ", "* Seção", "** Subseção", "*** Nível 3", "***** Nível 5", "*negrito* no início",
+    "Texto corrido.", "  texto com recuo  ", "[Tabela 1 — Produtividade]", "[Tabela 2] | a | b |",
+    "| a | b |", "|---+---|", "|x|y", "  | 1 |  2  |", "|", "a | b", "[[file:graficos/g1.png]]",
+    "Veja [[file:/abs/g2.png]] e [[file:../x/g3.png]]", "[[https://exemplo.org/i.png]]",
+    "┌──┐", "│ok│", "└──┘", "\x1b[31mvermelho\x1b[0m", "#+BEGIN_QUOTE", "#+END_QUOTE",
+    "#+LATEX: \\newpage", "- item", "  - subitem",
+]
+
+
+def _random_doc(rng, n):
+    return "\n".join(rng.choice(_VOCAB) for _ in range(n)) + rng.choice(["", "\n", "\n\n  \n"])
+
+
+@pytest.mark.parametrize("seed", range(200))
+def test_stream_matches_baseline(tmp_path, seed):
+    rng = random.Random(seed)
+    parts = [("text", "* Relatório — grupo"), ("text", "")]
+    for i in range(rng.randint(1, 5)):
+        src = tmp_path / f"in_{i}.org"
+        src.write_text(_random_doc(rng, rng.randint(0, 60)), encoding="utf-8")
+        parts.append(("file", str(src), rng.random() < 0.6, rng.choice([0, 1]),
+                      rng.choice([None, "../imgs/"])))
+        parts.append(("text", "#+LATEX: \\newpage\n"))
+    assert _stream_assemble(tmp_path / "out.org", parts) == _baseline_assemble(parts)
+
+
+def test_missing_or_empty_include(tmp_path):
+    empty = tmp_path / "vazio.org"
+    empty.write_text("\n  \n", encoding="utf-8")
+    with OrgWriter(str(tmp_path / "out.org")) as w:
+        w.append("* A")
+        assert w.include(str(empty)) is False
+        assert w.include(str(tmp_path / "nao_existe.org")) is False
+        assert w.items == 1
+    assert (tmp_path / "out.org").read_text(encoding="utf-8") == "* A\n"
+
+
+def _broken_org(path, n_good=5000):
+    """Início válido maior que o buffer de leitura, depois bytes que não são UTF-8."""
+    good = "".join(f"| linha {i} | valor |\n" for i in range(n_good)).encode("utf-8")
+    path.write_bytes(good + b"\xff\xfe quebrado\n")
+    return str(path)
+
+
+@pytest.mark.parametrize("strip", [True, False])
+def test_failed_include_leaves_nothing(tmp_path, strip):
+    ok = tmp_path / "ok.org"
+    ok.write_text("** Perito A\n\n| x | y |\n", encoding="utf-8")
+    bad = _broken_org(tmp_path / "ruim.org")
+    out = tmp_path / "out.org"
+    ref = tmp_path / "ref.org"
+
+    with OrgWriter(str(out), strip=strip) as w:
+        w.append("* Relatório")
+        w.include(str(ok), protect=True)
+        with pytest.raises(UnicodeDecodeError):
+            w.include(bad, protect=True, shift=1)
+        assert w.items == 2
+        w.append("#+LATEX: \\newpage\n")
+        w.include(str(ok), shift=1)
+
+    with OrgWriter(str(ref), strip=strip) as w:
+        w.append("* Relatório")
+        w.include(str(ok), protect=True)
+        w.append("#+LATEX: \\newpage\n")
+        w.include(str(ok), shift=1)
+
+    got = out.read_text(encoding="utf-8")
+    assert "linha 0 " not in got
+    assert got == ref.read_text(encoding="utf-8")
+
+
+def test_failed_include_aborts_writer_when_not_caught(tmp_path):
+    out = tmp_path / "out.org"
+    out.write_text("versão anterior\n", encoding="utf-8")
+    with pytest.raises(UnicodeDecodeError):
+        with OrgWriter(str(out)) as w:
+            w.append("* Novo")
+            w.include(_broken_org(tmp_path / "ruim.org"))
+    assert out.read_text(encoding="utf-8") == "versão anterior\n"
+    assert [p.name for p in tmp_path.iterdir() if p.name.endswith(".tmp")] == []
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
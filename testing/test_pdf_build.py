@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+utils/pdf_build.py: a impressão digital cobre o .org, os arquivos referenciados e
+as opções do build (p.ex. o hash do cabeçalho LaTeX passado pelo make_kpi_report),
+e a etapa só regera o PDF quando ela muda.
+
+Rodar:
+    python -m pytest -q testing/test_pdf_build.py
+"""
+
+import os
+import sys
+
+import pytest
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils import pdf_build  # noqa: E402
+from utils.pdf_build import PdfBuildStage, org_fingerprint, referenced_files  # noqa: E402
+
+
+@pytest.fixture
+def report(tmp_path):
+    orgs = tmp_path / "orgs"
+    imgs = tmp_path / "imgs"
+    orgs.mkdir()
+    imgs.mkdir()
+    (imgs / "g.png").write_bytes(b"png-1")
+    (orgs / "setup.org").write_text("#+OPTIONS: toc:nil\n", encoding="utf-8")
+    org = orgs / "rel.org"
+    org.write_text("#+SETUPFILE: setup.org\n* A\n[[file:../imgs/g.png]]\n"
+                   "[[https://example.org/x.png]]\n#+LATEX: \\includegraphics{../imgs/g.png}\n",
+                   encoding="utf-8")
+    return org
+
+
+def test_referenced_files(report):
+    refs = referenced_files(str(report))
+    assert refs == sorted([os.path.normpath(str(report.parent / "setup.org")),
+                           os.path.normpath(str(report.parent.parent / "imgs" / "g.png"))])
+
+
+def test_fingerprint_inputs(report):
+    base = org_fingerprint(str(report), engine="pandoc", template="h1")
+    assert org_fingerprint(str(report), engine="pandoc", template="h1") == base
+    assert org_fingerprint(str(report), engine="pandoc", template="h2") != base   # cabeçalho mudou
+
+    img = report.parent.parent / "imgs" / "g.png"
+    img.write_bytes(b"png-2")
+    os.utime(img, ns=(1, 1))        # o memo é por (caminho, tamanho, mtime): garante mtime diferente
+    changed = org_fingerprint(str(report), engine="pandoc", template="h1")
+    assert changed != base
+
+    report.write_text(report.read_text(encoding="utf-8") + "texto\n", encoding="utf-8")
+    assert org_fingerprint(str(report), engine="pandoc", template="h1") != changed
+
+
+def test_stage_skips_unchanged_and_rebuilds_on_opts(report, tmp_path):
+    pdf = tmp_path / "pdfs" / "rel.pdf"
+    builds = []
+
+    def build(org, out, workdir):
+        assert os.path.isdir(workdir)
+        builds.append(org)
+        os.makedirs(os.path.dirname(out), exist_ok=True)
+        with open(out, "wb") as f:
+            f.write(b"%PDF")
+        return out
+
+    def run(**opts):
+        stage = PdfBuildStage(workers=1, force=opts.pop("force", False))
+        stage.add(str(report), str(pdf), build, **opts)
+        return stage, stage.run()
+
+    stage, res = run(engine="pandoc", template="h1")
+    assert res == {str(report): str(pdf)} and stage.rebuilt == {str(report)}
+    assert os.path.isfile(pdf.parent / pdf_build.MANIFEST_NAME)
+
+    stage, _ = run(engine="pandoc", template="h1")
+    assert stage.skipped == {str(report)} and len(builds) == 1
+
+    stage, _ = run(engine="pandoc", template="h2")
+    assert stage.rebuilt == {str(report)} and len(builds) == 2
+
+    stage, _ = run(engine="pandoc", template="h2", force=True)
+    assert len(builds) == 3
+
+    pdf.unlink()
+    stage, _ = run(engine="pandoc", template="h2")
+    assert stage.rebuilt == {str(report)} and len(builds) == 4
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+# -*- coding: utf-8 -*-
+"""
+g_weekday_to_weekend_table.py: --mode pandas e --mode sql sobre o mesmo DB de
+fixture devem selecionar exatamente os mesmos protocolos (e as mesmas contagens).
+
+O fixture cobre a precedência fim → duração numérica → duração 'HH:MM:SS',
+inclusive durações numéricas em texto vazio/não numérico, que precisam cair
+para a duração textual nos dois modos (como pd.to_numeric(errors="coerce")).
+
+Rodar:
+    python -m pytest -q testing/test_weekday_to_weekend_modes.py
+"""
+
+import argparse
+import os
+import sqlite3
+import sys
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("matplotlib")
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from graphs_and_tables import g_weekday_to_weekend_table as w2w  # noqa: E402
+
+# 2025-05-02 é sexta; 2025-05-05 é segunda
+ROWS = [
+    # protocolo, siape, início, fim, duração (s), duração texto
+    ("P01", "1", "2025-05-02 12:00:00", "2025-05-03 09:00:00", None, None),      # fim no sábado
+    ("P02", "1", "2025-05-02 12:00:00", None, 86400, None),                       # +1 dia (numérico)
+    ("P03", "1", "2025-05-02 12:00:00", None, "", "26:00:00"),                    # '' → cai no texto
+    ("P04", "2", "2025-05-02 12:00:00", None, "abc", "30:00:00"),                 # não numérico → texto
+    ("P05", "2", "2025-05-02 12:00:00", None, "12abc", "30:00:00"),               # idem
+    ("P06", "2", "2025-05-02 12:00:00", None, " 90000 ", None),                   # número em texto
+    ("P07", "2", "2025-05-02 12:00:00", None, "0", "30:00:00"),                   # 0 é número: termina na sexta
+    ("P08", "1", "2025-05-05 08:00:00", "2025-05-05 09:00:00", None, None),      # seg → seg
+    ("P09", "1", "2025-05-03 08:00:00", "2025-05-03 09:00:00", None, None),      # começa no sábado
+    ("P10", "2", "2025-05-02 12:00:00", None, "", ""),                            # sem término
+    ("P11", "2", "2025-05-02 12:00:00", None, "-1.5.2", None),                    # inválido, sem texto
+    ("P12", "3", "2025-05-02 23:30:00", None, "1800.5", None),                    # vira a meia-noite
+    ("P13", "3", "2025-05-02 22:00:00", None, None, "1:00:00"),                   # ainda sexta
+    ("P14", "3", "2025-05-02 22:00:00", None, "+7200", None),                     # sinal explícito
+]
+EXPECTED = {"P01", "P02", "P03", "P04", "P05", "P06", "P12", "P14"}
+
+
+@pytest.fixture
+def fixture_db(tmp_path):
+    db = tmp_path / "fixture.db"
+    con = sqlite3.connect(db)
+    con.execute("CREATE TABLE peritos (siapePerito TEXT, nomePerito TEXT, CR TEXT, DR TEXT)")
+    con.executemany("INSERT INTO peritos VALUES (?,?,?,?)",
+                    [("1", "ANA", "CR1", "DR1"), ("2", "BRUNO", "", "DR1"), ("3", "CARLA", None, None)])
+    con.execute("CREATE TABLE analises (protocolo TEXT, siapePerito TEXT, dataHoraIniPericia TEXT,"
+                " dataHoraFimPericia TEXT, tempoAnaliseSeg, duracaoPericia TEXT)")
+    con.executemany("INSERT INTO analises VALUES (?,?,?,?,?,?)", ROWS)
+    con.commit()
+    con.close()
+    return str(db)
+
+
+def _args(db):
+    return argparse.Namespace(db=db, start="2025-05-01", end="2025-05-31", perito=None, verbose=False)
+
+
+def _run(db, mode):
+    args = _args(db)
+    with sqlite3.connect(db) as con:
+        cols = w2w.detect_columns(con)
+        if mode == "pandas":
+            return w2w.select_pandas(con, cols, args)
+        return w2w.frames_from_rows(w2w.select_sql(con, cols, args))
+
+
+def _protocol_set(res):
+    return {(str(n), str(p)) for n, p in res["protocols"][["nomePerito", "protocolo"]].itertuples(index=False)}
+
+
+def test_pandas_and_sql_select_same_protocols(fixture_db):
+    pd_res = _run(fixture_db, "pandas")
+    sql_res = _run(fixture_db, "sql")
+
+    assert _protocol_set(pd_res) == _protocol_set(sql_res)
+    assert {p for _, p in _protocol_set(sql_res)} == EXPECTED
+    assert pd_res["n_periodo"] == sql_res["n_periodo"] == len(ROWS)
+
+    def _agg(res):
+        return sorted((r.Perito, r.Quantidade) for r in res["agg"].itertuples(index=False))
+
+    assert _agg(pd_res) == _agg(sql_res)
+    by_cr = lambda res: dict(zip(res["by_cr"]["CR"], res["by_cr"]["Quantidade"]))  # noqa: E731
+    assert by_cr(pd_res) == by_cr(sql_res)
+
+
+if __name__ == "__main__":
+    sys.exit(pytest.main([__file__, "-q"]))
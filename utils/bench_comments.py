@@ -0,0 +1,254 @@
+# -*- coding: utf-8 -*-
+"""
+Benchmark do caminho dos comentários IA contra o stub local (utils/llm_stub_server.py).
+
+Sobe o stub numa thread, aponta OPENAI_BASE_URL para ele e mede vazão sob
+diferentes concorrências (ATESTMED_LLM_CONCURRENCY) e modos de cache
+(ATESTMED_LLM_CACHE):
+
+- off   cache desativado: toda chamada vai ao stub;
+- cold  cache novo e vazio (grava as respostas);
+- warm  mesmo cache após um run completo (nenhuma chamada deveria sair).
+
+Modos:
+- sintético (padrão): N comentários de comentar_artefato despachados pelo
+  CommentService, no próprio processo — sem banco, roda em qualquer máquina.
+  É o único modo com o eixo de concorrência: só o CommentService lê
+  ATESTMED_LLM_CONCURRENCY;
+- relatório (--start/--end): roda o relatório Top 10 completo com comentários
+  (reports/make_kpi_report.py --top10 --add-comments --export-org, ou --report-cmd)
+  como subprocesso, uma vez por modo de cache. É uma medida ponta a ponta: o
+  make_kpi_report e os scripts que ele chama comentam em série, então
+  --concurrency é ignorado aqui.
+
+Exemplos:
+    python -m utils.bench_comments --jobs 60 --latency 0.4 --concurrency 1,4,8
+    python -m utils.bench_comments --start 2025-06-01 --end 2025-06-30 --concurrency 1,4 --cache off,cold,warm
+
+Resultados: tabela no terminal e CSV/logs/caches numa pasta temporária
+(atestmed_bench_*), ou em --out-dir.
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import csv
+import time
+import shlex
+import argparse
+import tempfile
+import subprocess
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from utils.llm_stub_server import start_stub  # noqa: E402
+
+CACHE_MODES = ("off", "cold", "warm")
+
+
+def _csv_list(v: str, cast=str) -> List[Any]:
+    return [cast(x.strip()) for x in v.split(",") if x.strip()]
+
+
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Vazão dos comentários IA contra o stub local da OpenAI.")
+    p.add_argument("--concurrency", default="1,4,8",
+                   help="Lista de concorrências a medir (ATESTMED_LLM_CONCURRENCY), ex.: 1,4,8. "
+                        "Só no modo sintético.")
+    p.add_argument("--cache", default="off,cold,warm",
+                   help="Modos de cache a medir: off, cold, warm (na ordem dada).")
+    p.add_argument("--rps", type=float, default=0.0,
+                   help="Limite de requisições/s do CommentService (ATESTMED_LLM_RPS; 0 = sem limite).")
+    # stub
+    p.add_argument("--latency", type=float, default=0.5, help="Latência média do stub (s).")
+    p.add_argument("--jitter", type=float, default=0.2, help="Variação ± da latência do stub (s).")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fração de respostas 503 do stub.")
+    p.add_argument("--responses", default=None, help="Respostas fixas do stub (ver utils/llm_stub_server.py).")
+    p.add_argument("--seed", type=int, default=42)
+    # sintético
+    p.add_argument("--jobs", type=int, default=40, help="Modo sintético: número de comentários por configuração.")
+    # relatório
+    p.add_argument("--start", help="Modo relatório: início do período (YYYY-MM-DD).")
+    p.add_argument("--end", help="Modo relatório: fim do período (YYYY-MM-DD).")
+    p.add_argument("--report-cmd", default=None,
+                   help="Comando do relatório (default: make_kpi_report.py --top10 --add-comments --export-org "
+                        "no período informado).")
+    p.add_argument("--out-dir", default=None,
+                   help="Pasta para CSV, logs e caches SQLite (default: pasta temporária atestmed_bench_*).")
+    p.add_argument("--out-csv", default=None, help="CSV de saída (default: <out-dir>/bench_comments_<ts>.csv).")
+    args = p.parse_args(argv)
+    args.concurrency = _csv_list(args.concurrency, int)
+    args.cache = _csv_list(args.cache)
+    bad = [c for c in args.cache if c not in CACHE_MODES]
+    if bad:
+        p.error(f"modo(s) de cache inválido(s): {', '.join(bad)} (use {', '.join(CACHE_MODES)})")
+    if bool(args.start) != bool(args.end):
+        p.error("--start e --end devem ser informados juntos (modo relatório).")
+    return args
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Ambiente por configuração
+# ────────────────────────────────────────────────────────────────────────────────
+def _bench_env(base_url: str, concurrency: Optional[int], rps: float, cache_path: Optional[str]) -> Dict[str, str]:
+    env = {
+        "OPENAI_BASE_URL": base_url,
+        "OPENAI_API_KEY": "stub",              # nunca envia a chave real, nem ao stub
+        "ATESTMED_LLM_RPS": f"{rps:g}",
+        "ATESTMED_LLM_CACHE": cache_path or "off",
+        "ATESTMED_LLM_CACHE_TTL_DAYS": "0",
+    }
+    if concurrency is not None:
+        env["ATESTMED_LLM_CONCURRENCY"] = str(concurrency)
+    return env
+
+
+def _cache_path(bench_dir: str, tag: str, mode: str) -> Optional[str]:
+    if mode == "off":
+        return None
+    path = os.path.join(bench_dir, f"llm_cache_{tag}.sqlite")
+    if mode == "cold":
+        for suffix in ("", "-wal", "-shm"):
+            try:
+                os.remove(path + suffix)
+            except OSError:
+                pass
+    return path
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Modo sintético (no processo)
+# ────────────────────────────────────────────────────────────────────────────────
+def _synthetic_jobs(n: int) -> List[tuple]:
+    from utils import comentarios
+    kinds = sorted(comentarios.PROMPTS_FB) or ["artefato"]
+    jobs = []
+    for i in range(n):
+        ctx = {"periodo_inicio": "2025-01-01", "periodo_fim": "2025-01-31", "impact_mode": "combined",
+               "n_elegiveis": 10 + i, "soma_impacto": 100.0 + i, "media_nc_brasil": 12.5}
+        jobs.append((kinds[i % len(kinds)], ctx))
+    return jobs
+
+
+def run_synthetic(env: Dict[str, str], n_jobs: int) -> Dict[str, Any]:
+    os.environ.update(env)
+    from utils import openai_client, llm_cache, comentarios
+    from utils.comment_service import CommentService
+    openai_client.reset()
+    if llm_cache._STATE["con"] is not None:  # reabre com o caminho desta configuração
+        llm_cache._STATE["con"].close()
+    llm_cache._STATE.update(con=None, path=None, hits=0, misses=0)
+
+    jobs = _synthetic_jobs(n_jobs)
+    t0 = time.perf_counter()
+    with CommentService() as svc:
+        futs = [svc.submit(comentarios.comentar_artefato, kind, ctx, model="gpt-4o-mini",
+                           fallback="", label=kind) for kind, ctx in jobs]
+        done = sum(1 for f in futs if f.result())
+    wall = time.perf_counter() - t0
+    st = llm_cache.stats()
+    return {"wall_s": wall, "comments": done, "cache_hits": st["hits"], "cache_misses": st["misses"]}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Modo relatório (subprocesso)
+# ────────────────────────────────────────────────────────────────────────────────
+def _report_cmd(args: argparse.Namespace) -> List[str]:
+    if args.report_cmd:
+        return shlex.split(args.report_cmd)
+    return [sys.executable, os.path.join(BASE_DIR, "reports", "make_kpi_report.py"),
+            "--start", args.start, "--end", args.end, "--top10", "--add-comments", "--export-org"]
+
+
+def run_report(env: Dict[str, str], cmd: List[str], log_path: str) -> Dict[str, Any]:
+    t0 = time.perf_counter()
+    with open(log_path, "w", encoding="utf-8") as log:
+        rc = subprocess.run(cmd, cwd=BASE_DIR, env={**os.environ, **env},
+                            stdout=log, stderr=subprocess.STDOUT).returncode
+    wall = time.perf_counter() - t0
+    if rc != 0:
+        print(f"[AVISO] Relatório terminou com código {rc}; ver {log_path}")
+    return {"wall_s": wall, "returncode": rc}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Orquestração
+# ────────────────────────────────────────────────────────────────────────────────
+def _print_table(rows: List[Dict[str, Any]]) -> None:
+    cols = ["mode", "concurrency", "cache", "wall_s", "requests", "errors", "peak_inflight", "req_per_s", "comments_per_s"]
+    print("\n" + "  ".join(f"{c:>14}" for c in cols))
+    for r in rows:
+        cells = []
+        for c in cols:
+            v = r.get(c, "")
+            cells.append(f"{v:>14.2f}" if isinstance(v, float) else f"{str(v):>14}")
+        print("  ".join(cells))
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    bench_dir = os.path.abspath(args.out_dir) if args.out_dir else tempfile.mkdtemp(prefix="atestmed_bench_")
+    os.makedirs(bench_dir, exist_ok=True)
+    report_mode = bool(args.start)
+    # só o CommentService (modo sintético) lê ATESTMED_LLM_CONCURRENCY
+    concurrencies: List[Optional[int]] = list(args.concurrency)
+    if report_mode:
+        print("[INFO] Modo relatório é ponta a ponta (comentários em série): --concurrency ignorado.")
+        concurrencies = [None]
+    stub = start_stub(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                      responses=args.responses, seed=args.seed)
+    print(f"✅ Stub em {stub.base_url} (latência {args.latency:g}±{args.jitter:g}s, erros {args.error_rate:.0%})")
+
+    ts = datetime.now().strftime("%Y%m%dT%H%M%S")
+    rows: List[Dict[str, Any]] = []
+    try:
+        for conc in concurrencies:
+            primed = False
+            tag = "e2e" if conc is None else f"c{conc}"
+            for mode in args.cache:
+                env = _bench_env(stub.base_url, conc, args.rps, _cache_path(bench_dir, tag, mode))
+                if mode == "warm" and not primed:
+                    # sem um run "cold" antes: aquece o cache sem medir
+                    (run_report(env, _report_cmd(args), os.devnull) if report_mode
+                     else run_synthetic(env, args.jobs))
+                stub.stats.reset()
+                label = f"{tag}_{mode}"
+                print(f"[INFO] {label}: rodando…")
+                if report_mode:
+                    res = run_report(env, _report_cmd(args), os.path.join(bench_dir, f"bench_{ts}_{label}.log"))
+                else:
+                    res = run_synthetic(env, args.jobs)
+                primed = primed or mode in ("cold", "warm")
+                st = stub.stats_dict()
+                wall = max(res["wall_s"], 1e-9)
+                row = {"mode": "report_e2e" if report_mode else "synthetic",
+                       "concurrency": "-" if conc is None else conc, "cache": mode,
+                       "wall_s": round(wall, 3), "requests": st["requests"], "errors": st["errors"],
+                       "peak_inflight": st["peak_inflight"], "req_per_s": round(st["requests"] / wall, 3)}
+                if "comments" in res:
+                    row.update(comments=res["comments"], comments_per_s=round(res["comments"] / wall, 3),
+                               cache_hits=res["cache_hits"], cache_misses=res["cache_misses"])
+                else:
+                    row["returncode"] = res["returncode"]
+                rows.append(row)
+                print(f"[INFO] {label}: {row['wall_s']:.2f}s, {row['requests']} requisição(ões) ao stub")
+    finally:
+        stub.stop()
+
+    _print_table(rows)
+    out_csv = args.out_csv or os.path.join(bench_dir, f"bench_comments_{ts}.csv")
+    fields = sorted({k for r in rows for k in r}, key=lambda k: list(rows[0]).index(k) if k in rows[0] else 99)
+    with open(out_csv, "w", newline="", encoding="utf-8") as f:
+        w = csv.DictWriter(f, fieldnames=fields)
+        w.writeheader()
+        w.writerows(rows)
+    print(f"\n✅ Resultados salvos em: {out_csv}")
+
+
+if __name__ == "__main__":
+    main()
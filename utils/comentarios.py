@@ -29,69 +29,30 @@ from typing import Any, Dict, List, Optional, Tuple
 
 BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 
-def _load_openai_key_from_dotenv() -> Optional[str]:
-    """Carrega OPENAI_API_KEY do .env na raiz do projeto (se existir)."""
-    env_path = os.path.join(BASE_DIR, ".env")
-    # 1) python-dotenv
-    try:
-        from dotenv import load_dotenv  # type: ignore
-        load_dotenv(env_path, override=False)
-    except Exception:
-        # 2) parse manual se ainda não existir na env
-        if os.path.exists(env_path) and not os.getenv("OPENAI_API_KEY"):
-            try:
-                with open(env_path, "r", encoding="utf-8") as f:
-                    for line in f:
-                        line = line.strip()
-                        if not line or line.startswith("#") or "=" not in line:
-                            continue
-                        k, v = line.split("=", 1)
-                        if k.strip() == "OPENAI_API_KEY":
-                            os.environ.setdefault("OPENAI_API_KEY", v.strip().strip('"').strip("'"))
-                            break
-            except Exception:
-                pass
-    return os.getenv("OPENAI_API_KEY")
-
-
-def _call_openai(messages: List[Dict[str, str]], model: str, temperature: float) -> Optional[str]:
-    """Compatível com SDK novo e legado. Retorna o texto ou None."""
-    api_key = _load_openai_key_from_dotenv()
-    if not api_key:
-        return None
+# Cliente OpenAI compartilhado: chave, SDK e conexões HTTP resolvidos uma vez por processo
+try:
+    from utils.openai_client import chat as _oa_chat, load_api_key as _oa_load_key
+except ImportError:
+    from openai_client import chat as _oa_chat, load_api_key as _oa_load_key  # type: ignore  # utils/ no sys.path
 
-    # SDK novo (openai>=1.x)
-    try:
-        from openai import OpenAI  # type: ignore
-        client = OpenAI(api_key=api_key)
-        resp = client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = (resp.choices[0].message.content or "").strip()
-        if txt:
-            return txt
-    except Exception:
-        pass
+def _load_openai_key_from_dotenv() -> Optional[str]:
+    """Carrega OPENAI_API_KEY (ambiente ou .env) uma vez por processo (utils/openai_client.py)."""
+    return _oa_load_key()
 
-    # SDK legado
+# Cache persistente das respostas (llm_cache.py); sem ele, chama a API sempre
+try:
+    from utils.llm_cache import cached_chat as _llm_cached  # type: ignore
+except Exception:
     try:
-        import openai  # type: ignore
-        openai.api_key = api_key
-        resp = openai.ChatCompletion.create(
-            model=model,
-            messages=messages,
-            temperature=temperature,
-        )
-        txt = resp["choices"][0]["message"]["content"]
-        if txt:
-            return txt.strip()
+        from llm_cache import cached_chat as _llm_cached  # type: ignore  # utils/ no sys.path
     except Exception:
-        pass
-
-    return None
+        def _llm_cached(fn):
+            return fn
 
+@_llm_cached
+def _call_openai(messages: List[Dict[str, str]], model: str, temperature: float) -> Optional[str]:
+    """Uma requisição pelo cliente OpenAI compartilhado (pool de conexões). Retorna texto ou None."""
+    return _oa_chat(messages, model=model, temperature=temperature)
 
 # ────────────────────────────────────────────────────────────────────────────────
 # Sistema/formatadores
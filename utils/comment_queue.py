@@ -0,0 +1,245 @@
+# -*- coding: utf-8 -*-
+"""
+Comentários da IA em duas fases (artefatos primeiro, comentários depois).
+
+Fase 1 — ATESTMED_COMMENT_QUEUE=<dir> no ambiente (make_kpi_report --defer-comments):
+  os helpers de chat decorados com llm_cache.cached_chat não chamam a API em caso
+  de falta no cache; o payload (modelo, temperatura, mensagens — o mesmo montado
+  pelos _build_*_messages) vira um job <dir>/<chave>.json e o script segue com o
+  comentário heurístico. enqueue() devolve a chave do job; o script gera cada
+  comentário dentro de `with capture() as keys:` e, ao gravar o sidecar
+  <stem>_comment.{org,md}, chama bind(caminho, keys) — só os jobs daquele
+  comentário ficam associados àquele stem. O relatório sai na hora.
+
+Fase 2 — drain(): processa a fila em lote (CommentService: concorrência, taxa,
+  novas tentativas), grava as respostas no cache, reescreve
+  <comments_dir>/<stem>_comment.org e devolve os stems atualizados; reinject()
+  troca, nos .org já montados, o bloco marcado com "# comment-stem: <stem>" pelo
+  resultado de _inject_comment_for_stem.
+
+Os jobs que falham continuam na fila para o próximo drain.
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import glob
+import threading
+import contextlib
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+QUEUE_ENV = "ATESTMED_COMMENT_QUEUE"
+MARKER = "# comment-stem: "
+
+_TLS = threading.local()   # capturas abertas (capture()) nesta thread
+
+
+def queue_dir() -> Optional[str]:
+    v = (os.getenv(QUEUE_ENV) or "").strip()
+    return v or None
+
+
+def _job_path(qdir: str, key: str) -> str:
+    return os.path.join(qdir, f"{key}.json")
+
+
+def _read_job(path: str) -> Optional[Dict[str, Any]]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            return json.load(f)
+    except Exception:
+        return None
+
+
+def _write_job(path: str, job: Dict[str, Any]) -> None:
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(job, f, ensure_ascii=False, indent=1)
+    os.replace(tmp, path)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Fase 1
+# ────────────────────────────────────────────────────────────────────────────────
+def _open_captures() -> List[List[str]]:
+    st = getattr(_TLS, "captures", None)
+    if st is None:
+        st = _TLS.captures = []
+    return st
+
+
+@contextlib.contextmanager
+def capture() -> Iterator[List[str]]:
+    """Coleta as chaves enfileiradas dentro do bloco (passar a bind() do artefato gerado ali)."""
+    keys: List[str] = []
+    st = _open_captures()
+    st.append(keys)
+    try:
+        yield keys
+    finally:
+        st.pop()   # capturas aninham (pilha por thread)
+
+
+def enqueue(key: str, model: str, temperature: float, messages: List[Dict[str, Any]]) -> Optional[str]:
+    """
+    Registra o job se o modo adiado estiver ativo e devolve a chave (não chamar a
+    API agora); None = modo adiado desligado ou fila indisponível.
+    """
+    qdir = queue_dir()
+    if not qdir:
+        return None
+    try:
+        os.makedirs(qdir, exist_ok=True)
+        path = _job_path(qdir, key)
+        job = _read_job(path) or {"key": key, "model": str(model), "temperature": float(temperature),
+                                  "messages": messages, "stems": []}
+        _write_job(path, job)
+    except Exception as e:
+        print(f"[AVISO] Fila de comentários indisponível ({e}); chamando a API agora.")
+        return None
+    for keys in _open_captures():
+        keys.append(key)
+    return key
+
+
+def stem_of(sidecar_path: str) -> str:
+    stem = os.path.splitext(os.path.basename(sidecar_path))[0]
+    return stem[:-len("_comment")] if stem.endswith("_comment") else stem
+
+
+def bind(sidecar_path: str, keys: Iterable[str], max_words: int = 180) -> None:
+    """Associa os jobs `keys` (os de enqueue/capture deste comentário) ao stem do sidecar gravado."""
+    qdir = queue_dir()
+    keys = [k for k in dict.fromkeys(keys or ()) if k]
+    if not qdir or not keys:
+        return
+    stem = stem_of(sidecar_path)
+    for key in keys:
+        path = _job_path(qdir, key)
+        job = _read_job(path)
+        if job is None:
+            continue
+        if stem not in job["stems"]:
+            job["stems"].append(stem)
+        job["max_words"] = int(max_words)
+        _write_job(path, job)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Fase 2
+# ────────────────────────────────────────────────────────────────────────────────
+def pending_jobs(qdir: str) -> List[Dict[str, Any]]:
+    jobs = []
+    for path in sorted(glob.glob(os.path.join(qdir, "*.json"))):
+        job = _read_job(path)
+        if job and job.get("messages"):
+            job["_path"] = path
+            jobs.append(job)
+    return jobs
+
+
+def _paragraph(text: str, max_words: int) -> str:
+    """Mesmo acabamento dos comentários diretos: um parágrafo, sem marcadores, limitado em palavras."""
+    try:
+        from utils.comentarios import _strip_markers, _to_one_paragraph, _cap_words
+        return _cap_words(_to_one_paragraph(_strip_markers(text)), max_words)
+    except Exception:
+        words = " ".join((text or "").split()).split()
+        return " ".join(words[:max_words])
+
+
+def drain(qdir: str, comments_dir: str, service: Any = None) -> Dict[str, str]:
+    """
+    Processa a fila: uma requisição por job (em paralelo via CommentService),
+    grava no cache e em <comments_dir>/<stem>_comment.org. Retorna {stem: texto}.
+    """
+    from utils.openai_client import chat
+    from utils.comment_service import CommentService
+    try:
+        from utils import llm_cache
+    except Exception:
+        llm_cache = None  # type: ignore[assignment]
+
+    jobs = [j for j in pending_jobs(qdir) if j.get("stems")]
+    if not jobs:
+        return {}
+    own = service is None
+    svc = service or CommentService()
+    futs = []
+    for job in jobs:
+        cached = llm_cache.get(job["key"]) if llm_cache is not None else None
+        if cached:
+            futs.append(cached)
+            continue
+        futs.append(svc.submit(chat, job["messages"], model=job["model"], temperature=job["temperature"],
+                               raise_errors=True, retry_if=lambda r: not r,
+                               label=",".join(job["stems"])))
+    os.makedirs(comments_dir, exist_ok=True)
+    done: Dict[str, str] = {}
+    try:
+        for job, fut in zip(jobs, futs):
+            txt = fut if isinstance(fut, str) else fut.result()
+            if not txt:
+                continue
+            if llm_cache is not None:
+                llm_cache.put(job["key"], job["model"], txt)
+            para = _paragraph(txt, int(job.get("max_words", 180)))
+            for stem in job["stems"]:
+                with open(os.path.join(comments_dir, f"{stem}_comment.org"), "w", encoding="utf-8") as f:
+                    f.write(para.strip() + "\n")
+                done[stem] = para
+            try:
+                os.remove(job["_path"])
+            except OSError:
+                pass
+    finally:
+        if own:
+            svc.close()
+    return done
+
+
+def reinject(org_paths: Iterable[str], stems: Iterable[str],
+             inject: Callable[[str], List[str]]) -> int:
+    """
+    Nos .org dados, substitui o bloco de cada stem marcado ("# comment-stem: <stem>"
+    seguido, opcionalmente, de #+BEGIN_QUOTE … #+END_QUOTE) pelas linhas de inject(stem).
+    Retorna quantos blocos foram trocados.
+    """
+    wanted = set(stems)
+    if not wanted:
+        return 0
+    pat = re.compile(r"^" + re.escape(MARKER) + r"(.+?)\s*$")
+    total = 0
+    for path in org_paths:
+        try:
+            with open(path, encoding="utf-8") as f:
+                lines = f.read().split("\n")
+        except OSError:
+            continue
+        out: List[str] = []
+        i, n_sub = 0, 0
+        while i < len(lines):
+            m = pat.match(lines[i])
+            if not m or m.group(1) not in wanted:
+                out.append(lines[i]); i += 1
+                continue
+            j = i + 1
+            if j < len(lines) and lines[j].strip() == "#+BEGIN_QUOTE":
+                while j < len(lines) and lines[j].strip() != "#+END_QUOTE":
+                    j += 1
+                j += 1
+            new = [ln for blk in inject(m.group(1)) for ln in blk.split("\n")]
+            while new and not new[0].strip():   # a linha em branco anterior já está no arquivo
+                new.pop(0)
+            out.extend(new or [lines[i]])
+            n_sub += 1
+            i = j
+        if n_sub:
+            tmp = f"{path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write("\n".join(out))
+            os.replace(tmp, path)
+            total += n_sub
+    return total
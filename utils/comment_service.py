@@ -0,0 +1,253 @@
+# -*- coding: utf-8 -*-
+"""
+Despacho concorrente dos comentários automáticos (GPT) dos relatórios.
+
+Cada comentário é um *job* (uma função síncrona que chama a API, p.ex.
+comentar_artefato ou ai_explanations). O CommentService executa os jobs num
+loop asyncio em thread própria, com:
+
+- limite de concorrência (semáforo);
+- limitação de taxa por token bucket (requisições/s com rajada);
+- timeout por tentativa e nova tentativa com backoff exponencial + jitter;
+- valor de fallback quando todas as tentativas falham.
+
+O serviço é o único dono das novas tentativas: os jobs rodam dentro de
+openai_client.service_call, então o cliente OpenAI não repete por conta própria
+(max_retries=0), cada requisição usa o timeout da tentativa e os erros sobem até
+aqui (em vez de virarem texto de fallback dentro do job).
+
+O relatório submete os jobs assim que os dados de cada artefato ficam prontos e
+só coleta os resultados na montagem (org/PDF): a latência da rede sobrepõe-se à
+renderização em vez de se somar a ela.
+
+Uso:
+    from utils.comment_service import CommentService
+
+    with CommentService(concurrency=4, rate=2.0) as svc:
+        fut = svc.submit(comentar_artefato, "indicadores_medios", ctx, fallback="")
+        ...
+        txt = fut.result()          # não lança: devolve o fallback em caso de falha
+
+Configuração por ambiente (usada quando o argumento correspondente é None):
+- ATESTMED_LLM_CONCURRENCY   jobs simultâneos (default 4; 0 = em série, no próprio processo)
+- ATESTMED_LLM_RPS           requisições por segundo (default 2.0; 0 = sem limite)
+- ATESTMED_LLM_BURST         rajada do token bucket (default = concorrência)
+- ATESTMED_LLM_TIMEOUT       timeout por tentativa em segundos (default 90)
+- ATESTMED_LLM_RETRIES       novas tentativas após a primeira (default 2)
+"""
+
+from __future__ import annotations
+
+import os
+import time
+import random
+import asyncio
+import functools
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, List, Optional
+
+from utils.openai_client import service_call
+
+# Folga do wait_for sobre o timeout da requisição: em geral a própria requisição
+# expira antes e a thread do job termina, em vez de ficar pendurada no executor.
+TIMEOUT_GRACE_S = 5.0
+
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+def _owned_call(timeout: Optional[float], fn: Callable[..., Any], args: tuple, kwargs: dict) -> Any:
+    with service_call(timeout):
+        return fn(*args, **kwargs)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Token bucket
+# ────────────────────────────────────────────────────────────────────────────────
+class TokenBucket:
+    """Token bucket assíncrono: `rate` fichas/s, no máximo `burst` acumuladas."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self._tokens = float(self.burst)
+        self._stamp = time.monotonic()
+        self._lock: Optional[asyncio.Lock] = None
+
+    async def acquire(self) -> None:
+        if self.rate <= 0:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:  # fila FIFO: quem chegou antes sai antes
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._stamp) * self.rate)
+                self._stamp = now
+                if self._tokens >= 1.0:
+                    self._tokens -= 1.0
+                    return
+                await asyncio.sleep((1.0 - self._tokens) / self.rate)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Serviço
+# ────────────────────────────────────────────────────────────────────────────────
+class CommentService:
+    def __init__(self,
+                 concurrency: Optional[int] = None,
+                 rate: Optional[float] = None,
+                 burst: Optional[int] = None,
+                 timeout: Optional[float] = None,
+                 retries: Optional[int] = None,
+                 backoff: float = 1.0,
+                 backoff_max: float = 30.0):
+        conc = int(_env_num("ATESTMED_LLM_CONCURRENCY", 4) if concurrency is None else concurrency)
+        self.concurrency = max(0, conc)
+        self.rate = max(0.0, _env_num("ATESTMED_LLM_RPS", 2.0) if rate is None else float(rate))
+        self.burst = int(_env_num("ATESTMED_LLM_BURST", max(1, self.concurrency)) if burst is None else burst)
+        self.timeout = _env_num("ATESTMED_LLM_TIMEOUT", 90.0) if timeout is None else float(timeout)
+        self.retries = max(0, int(_env_num("ATESTMED_LLM_RETRIES", 2) if retries is None else retries))
+        self.backoff = float(backoff)
+        self.backoff_max = float(backoff_max)
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._thread: Optional[threading.Thread] = None
+        self._threads: Optional[ThreadPoolExecutor] = None
+        self._sem: Optional[asyncio.Semaphore] = None
+        self._bucket = TokenBucket(self.rate, self.burst)
+        self._futures: List[Future] = []
+        self._start_lock = threading.Lock()
+
+    # ── loop em background ────────────────────────────────────────────────────
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._start_lock:
+            if self._loop is not None:
+                return self._loop
+            loop = asyncio.new_event_loop()
+            ready = threading.Event()
+
+            def _run() -> None:
+                asyncio.set_event_loop(loop)
+                self._sem = asyncio.Semaphore(self.concurrency)
+                ready.set()
+                loop.run_forever()
+
+            # folga para tentativas abandonadas pelo wait_for cuja requisição ainda não expirou
+            self._threads = ThreadPoolExecutor(max_workers=self.concurrency * 2,
+                                               thread_name_prefix="comment")
+            self._thread = threading.Thread(target=_run, name="comment-service", daemon=True)
+            self._thread.start()
+            ready.wait()
+            self._loop = loop
+            return loop
+
+    def _delay(self, attempt: int) -> float:
+        base = min(self.backoff_max, self.backoff * (2 ** attempt))
+        return base * (0.5 + random.random() / 2.0)  # jitter: evita rajadas sincronizadas
+
+    async def _run_job(self, fn: Callable[..., Any], args: tuple, kwargs: dict,
+                       fallback: Any, retry_if: Optional[Callable[[Any], bool]], label: str) -> Any:
+        loop = asyncio.get_running_loop()
+        call = functools.partial(_owned_call, self.timeout, fn, args, kwargs)
+        wait_s = self.timeout + TIMEOUT_GRACE_S
+        assert self._sem is not None
+        async with self._sem:
+            for attempt in range(self.retries + 1):
+                await self._bucket.acquire()
+                try:
+                    fut = loop.run_in_executor(self._threads, call)
+                    res = await (asyncio.wait_for(fut, wait_s) if self.timeout > 0 else fut)
+                    if retry_if is None or not retry_if(res):
+                        return res
+                    err = "resposta vazia"
+                except asyncio.TimeoutError:
+                    err = f"timeout ({self.timeout:g}s)"
+                except Exception as e:
+                    err = repr(e)
+                if attempt < self.retries:
+                    await asyncio.sleep(self._delay(attempt))
+            print(f"[AVISO] Comentário '{label}' falhou após {self.retries + 1} tentativa(s) ({err}); usando fallback.")
+            return fallback
+
+    # ── API ───────────────────────────────────────────────────────────────────
+    def submit(self, fn: Callable[..., Any], *args: Any,
+               fallback: Any = None,
+               retry_if: Optional[Callable[[Any], bool]] = None,
+               label: Optional[str] = None,
+               **kwargs: Any) -> Future:
+        """
+        Agenda fn(*args, **kwargs) e devolve um Future que nunca lança: em caso de
+        exceção/timeout em todas as tentativas, resolve para `fallback`.
+        `retry_if(resultado)` → True trata o resultado como falha (p.ex. texto vazio).
+        """
+        label = label or getattr(fn, "__name__", "job")
+        if self.concurrency <= 0:
+            # modo em série: executa já, com as mesmas tentativas (sem timeout)
+            out: Future = Future()
+            res, err = fallback, None
+            for attempt in range(self.retries + 1):
+                try:
+                    res = _owned_call(self.timeout, fn, args, kwargs)
+                    if retry_if is None or not retry_if(res):
+                        break
+                    err = "resposta vazia"
+                except Exception as e:
+                    err = repr(e)
+                res = fallback
+                if attempt < self.retries:
+                    time.sleep(self._delay(attempt))
+            else:
+                print(f"[AVISO] Comentário '{label}' falhou após {self.retries + 1} tentativa(s) ({err}); usando fallback.")
+            out.set_result(res)
+            self._futures.append(out)
+            return out
+
+        loop = self._ensure_loop()
+        cf = asyncio.run_coroutine_threadsafe(
+            self._run_job(fn, args, kwargs, fallback, retry_if, label), loop)
+        self._futures.append(cf)
+        return cf
+
+    def wait(self) -> List[Any]:
+        """Espera todos os jobs submetidos (na ordem de submissão)."""
+        futs, self._futures = self._futures, []
+        return [f.result() for f in futs]
+
+    def close(self, wait: bool = True) -> None:
+        try:
+            if wait:
+                self.wait()
+        finally:
+            loop, self._loop = self._loop, None
+            if loop is not None:
+                loop.call_soon_threadsafe(loop.stop)
+                if self._thread is not None:
+                    self._thread.join(timeout=5)
+                if not loop.is_running():
+                    loop.close()
+            if self._threads is not None:
+                # tentativas "penduradas" após timeout não seguram o encerramento
+                self._threads.shutdown(wait=False, cancel_futures=True)
+                self._threads = None
+
+    def __enter__(self) -> "CommentService":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close(wait=exc_type is None)
+
+
+def result_of(x: Any, default: Any = None) -> Any:
+    """Resolve um Future de comentário (ou devolve o valor como está)."""
+    if isinstance(x, Future):
+        try:
+            return x.result()
+        except Exception:
+            return default
+    return x
@@ -0,0 +1,168 @@
+# -*- coding: utf-8 -*-
+"""
+Renderização de figuras (matplotlib) em paralelo para os geradores de relatório.
+
+Um *job* de figura é só dado: uma função de renderização de nível de módulo
+(picklável), seus argumentos e, opcionalmente, o caminho do PNG de saída. O
+FigurePool executa os jobs num pool de processos com o backend Agg já carregado
+e devolve Futures; o relatório continua montando texto/tabelas e espera apenas
+quando precisa dos arquivos (em geral, uma vez, antes de montar o PDF/org).
+
+Uso:
+    from utils.figure_jobs import FigurePool, FigureJob
+
+    with FigurePool(workers=0) as pool:              # 0 = automático
+        fut = pool.submit(save_bar, vals, lbls, "Título", "out.png", ylabel="N")
+        ...
+    # ao sair do with, todos os jobs terminaram (exceções são propagadas)
+
+Notas:
+- Os argumentos são serializados no submit (snapshot): alterar depois o dict/
+  DataFrame passado não afeta a figura.
+- Os processos são criados por fork e herdam o estado do módulo do chamador
+  (DPI, diretórios de saída etc.). Sem fork disponível, com 1 worker ou se o job
+  não for serializável, a figura é renderizada no próprio processo.
+"""
+
+from __future__ import annotations
+
+import os
+import pickle
+import multiprocessing as mp
+from concurrent.futures import Future, ProcessPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional
+
+# Limite do modo automático: a maioria dos relatórios tem poucas dezenas de figuras
+FIG_WORKERS_MAX_AUTO = 8
+
+
+@dataclass(frozen=True)
+class FigureJob:
+    """Especificação de uma figura: render(*args, **kwargs) grava o PNG e devolve o caminho."""
+    render: Callable[..., Any]
+    args: tuple = ()
+    kwargs: Dict[str, Any] = field(default_factory=dict)
+    out_path: Optional[str] = None
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Lado do worker
+# ────────────────────────────────────────────────────────────────────────────────
+def _worker_init() -> None:
+    """Pré-carrega matplotlib com Agg (evita o custo de import por figura)."""
+    import matplotlib
+    matplotlib.use("Agg", force=True)
+    import matplotlib.pyplot  # noqa: F401
+
+
+def _run_blob(blob: bytes) -> Any:
+    render, args, kwargs = pickle.loads(blob)
+    try:
+        return render(*args, **kwargs)
+    finally:
+        try:
+            import matplotlib.pyplot as plt
+            plt.close("all")
+        except Exception:
+            pass
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Pool
+# ────────────────────────────────────────────────────────────────────────────────
+def resolve_workers(n: Optional[int]) -> int:
+    """0/None → núcleos disponíveis (até FIG_WORKERS_MAX_AUTO)."""
+    if n is not None and int(n) > 0:
+        return int(n)
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except Exception:
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, FIG_WORKERS_MAX_AUTO))
+
+
+class FigurePool:
+    def __init__(self, workers: Optional[int] = 0):
+        self.workers = resolve_workers(workers)
+        self._ex: Optional[ProcessPoolExecutor] = None
+        self._futures: List[Future] = []
+        self._can_fork = "fork" in mp.get_all_start_methods()
+
+    # ── execução ──────────────────────────────────────────────────────────────
+    def _executor(self) -> Optional[ProcessPoolExecutor]:
+        if self.workers <= 1 or not self._can_fork:
+            return None
+        if self._ex is None:
+            # criado no primeiro job: o fork herda o estado já configurado pelo relatório
+            self._ex = ProcessPoolExecutor(max_workers=self.workers,
+                                           mp_context=mp.get_context("fork"),
+                                           initializer=_worker_init)
+        return self._ex
+
+    @staticmethod
+    def _inline(render: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]) -> Future:
+        fut: Future = Future()
+        try:
+            fut.set_result(render(*args, **kwargs))
+        except BaseException as e:  # devolvida em result(), como no pool
+            fut.set_exception(e)
+        return fut
+
+    def submit(self, job_or_render: Any, *args: Any, **kwargs: Any) -> Future:
+        """Aceita um FigureJob ou (render, *args, **kwargs). Devolve um Future."""
+        if isinstance(job_or_render, FigureJob):
+            render, args, kwargs = job_or_render.render, job_or_render.args, dict(job_or_render.kwargs)
+        else:
+            render = job_or_render
+        ex = self._executor()
+        fut: Optional[Future] = None
+        if ex is not None:
+            try:
+                blob = pickle.dumps((render, args, kwargs), protocol=pickle.HIGHEST_PROTOCOL)
+            except Exception:
+                blob = None  # função/argumento não serializável → renderiza aqui
+            if blob is not None:
+                try:
+                    fut = ex.submit(_run_blob, blob)
+                except Exception as e:
+                    print(f"[AVISO] Pool de figuras indisponível ({e}); renderizando em série.")
+                    self._shutdown(); self.workers = 1
+        if fut is None:
+            fut = self._inline(render, args, kwargs)
+        self._futures.append(fut)
+        return fut
+
+    def wait(self) -> List[Any]:
+        """Espera todos os jobs enviados; propaga a primeira exceção."""
+        futs, self._futures = self._futures, []
+        return [f.result() for f in futs]
+
+    # ── ciclo de vida ─────────────────────────────────────────────────────────
+    def _shutdown(self) -> None:
+        if self._ex is not None:
+            self._ex.shutdown(wait=True, cancel_futures=False)
+            self._ex = None
+
+    def close(self) -> None:
+        try:
+            self.wait()
+        finally:
+            self._shutdown()
+
+    def __enter__(self) -> "FigurePool":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            for f in self._futures:
+                f.cancel()
+            self._futures = []
+            self._shutdown()
+
+
+def result_of(x: Any) -> Any:
+    """Resolve um Future (ou devolve o valor como está)."""
+    return x.result() if isinstance(x, Future) else x
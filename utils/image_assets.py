@@ -0,0 +1,264 @@
+# -*- coding: utf-8 -*-
+"""
+Etapa de imagens: deduplicação por conteúdo (hardlinks), variantes print/screen
+e compressão adequada nos .zip.
+
+As figuras saem a 300 DPI em exports/ e são movidas para o imgs/ de cada
+relatório (Top 10, individual, um por perito...). Muitas são idênticas entre
+relatórios e entre runs; em vez de uma cópia por destino, cada PNG vai uma vez
+para o store endereçado por conteúdo (reports/outputs/_assets/<sha[:2]>/<sha>.png)
+e o destino vira um hardlink para ele.
+
+Segurança do inode compartilhado: o destino é sempre substituído por rename
+(link temporário + os.replace), nunca reescrito no lugar — um run seguinte que
+coloque outra imagem no mesmo nome troca a entrada do diretório e não altera o
+blob do store nem os demais relatórios. Quem grava em imgs/ deve passar por
+place_image(); os blobs ficam somente leitura como proteção extra.
+gc_store() remove os blobs que nenhum relatório referencia mais (st_nlink == 1).
+
+Variantes (opcionais):
+- print:  o original, limitado a PRINT_MAX_PX de largura (A4 a 300 DPI) — o
+          xelatex não decodifica pixels que a página não mostra;
+- screen: até SCREEN_MAX_PX de largura, em imgs/screen/ (Markdown/HTML/zip).
+Ambas são derivadas uma única vez por conteúdo e também ficam no store.
+
+Uso:
+    from utils.image_assets import place_image, zip_compress_type
+
+    place_image(src_png, os.path.join(imgs_dir, nome), move=True, variants=True)
+    zf.write(p, arc, compress_type=zip_compress_type(p))
+"""
+
+from __future__ import annotations
+
+import os
+import stat
+import time
+import shutil
+import hashlib
+import threading
+import zipfile
+from typing import Any, Dict, Optional, Tuple
+
+try:
+    from PIL import Image
+    HAS_PIL = True
+except Exception:
+    Image = None
+    HAS_PIL = False
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+ASSET_STORE_DIR = os.path.join(BASE_DIR, "reports", "outputs", "_assets")
+
+PRINT_MAX_PX = 2480    # largura útil de A4 a 300 DPI
+SCREEN_MAX_PX = 1280
+SCREEN_SUBDIR = "screen"
+
+# formatos já comprimidos: no .zip vão com ZIP_STORED (deflate só gasta CPU)
+COMPRESSED_EXTS = frozenset({
+    ".png", ".jpg", ".jpeg", ".gif", ".webp", ".pdf", ".zip", ".gz", ".bz2", ".xz",
+    ".zst", ".feather", ".parquet", ".mp4",
+})
+
+_LOCK = threading.Lock()
+_ASSETS_STATE: Dict[str, Any] = {"placed": 0, "linked": 0, "deduped": 0, "copied": 0, "variants": 0}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Store endereçado por conteúdo
+# ────────────────────────────────────────────────────────────────────────────────
+def file_sha256(path: str) -> str:
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _blob_path(digest: str, ext: str, variant: str = "") -> str:
+    suffix = f".{variant}" if variant else ""
+    return os.path.join(ASSET_STORE_DIR, digest[:2], f"{digest}{suffix}{ext.lower()}")
+
+
+def _tmp_name(path: str) -> str:
+    return f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+
+
+def _ingest(src: str, blob: str, move: bool) -> bool:
+    """Coloca src no store como `blob` (se ainda não existe). True se o blob foi criado agora."""
+    if os.path.exists(blob):
+        return False
+    os.makedirs(os.path.dirname(blob), exist_ok=True)
+    tmp = _tmp_name(blob)
+    if move:
+        try:
+            os.replace(src, tmp)       # mesmo sistema de arquivos: sem copiar bytes
+        except OSError:
+            shutil.copy2(src, tmp)
+    else:
+        shutil.copy2(src, tmp)
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, blob)
+    return True
+
+
+def _link_or_copy(blob: str, dst: str) -> bool:
+    """dst passa a apontar para blob (hardlink; cópia se o FS não permitir). True se hardlink."""
+    os.makedirs(os.path.dirname(os.path.abspath(dst)), exist_ok=True)
+    tmp = _tmp_name(dst)
+    try:
+        os.link(blob, tmp)
+        linked = True
+    except OSError:
+        shutil.copy2(blob, tmp)
+        os.chmod(tmp, 0o644)
+        linked = False
+    os.replace(tmp, dst)
+    return linked
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Variantes
+# ────────────────────────────────────────────────────────────────────────────────
+def _resized_blob(blob: str, digest: str, ext: str, variant: str, max_px: int) -> str:
+    """Blob da variante (criado uma vez por conteúdo); o próprio blob se já cabe em max_px."""
+    if not HAS_PIL:
+        return blob
+    out = _blob_path(digest, ext, variant)
+    if os.path.exists(out):
+        return out
+    with Image.open(blob) as im:
+        w, h = im.size
+        if w <= max_px:
+            return blob
+        dpi = im.info.get("dpi")
+        new_size = (max_px, max(1, round(h * max_px / w)))
+        small = im.resize(new_size, Image.LANCZOS)
+        save_kw: Dict[str, Any] = {"optimize": True}
+        if dpi:
+            # mantém o tamanho físico: o LaTeX/HTML continua vendo a mesma largura em polegadas
+            save_kw["dpi"] = tuple(float(d) * max_px / w for d in dpi)
+        tmp = _tmp_name(out)
+        small.save(tmp, format=im.format or "PNG", **save_kw)
+    os.chmod(tmp, 0o444)
+    os.replace(tmp, out)
+    with _LOCK:
+        _ASSETS_STATE["variants"] += 1
+    return out
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# API
+# ────────────────────────────────────────────────────────────────────────────────
+def place_image(src: str, dst: str, move: bool = False, variants: bool = False,
+                dedupe: bool = True) -> Optional[str]:
+    """
+    Coloca a imagem src em dst. Com dedupe, dst vira hardlink do blob no store
+    (conteúdo idêntico = um único arquivo em disco); sem dedupe, cópia simples.
+    variants=True: dst recebe a variante print e <dir>/screen/<nome> a variante screen.
+    move=True remove src ao final. Devolve dst (ou None se src não existe).
+    """
+    if not src or not os.path.isfile(src):
+        return None
+    if not dedupe:
+        tmp = _tmp_name(dst)
+        shutil.copy2(src, tmp)
+        os.replace(tmp, dst)
+        if move:
+            os.remove(src)
+        with _LOCK:
+            _ASSETS_STATE["placed"] += 1
+            _ASSETS_STATE["copied"] += 1
+        return dst
+
+    ext = os.path.splitext(src)[1] or ".png"
+    digest = file_sha256(src)
+    blob = _blob_path(digest, ext)
+    created = _ingest(src, blob, move)
+
+    target = blob
+    screen = None
+    if variants and HAS_PIL and ext.lower() in (".png", ".jpg", ".jpeg"):
+        try:
+            target = _resized_blob(blob, digest, ext, "print", PRINT_MAX_PX)
+            screen = _resized_blob(blob, digest, ext, "screen", SCREEN_MAX_PX)
+        except Exception as e:
+            print(f"[AVISO] Variantes de {os.path.basename(dst)} não geradas: {e}")
+            target, screen = blob, None
+
+    try:
+        linked = _link_or_copy(target, dst)
+    except FileNotFoundError:
+        # blob removido por um gc_store() concorrente entre o _ingest e o link
+        if not os.path.isfile(src):
+            raise
+        created = _ingest(src, blob, move=False)
+        target, screen = blob, None
+        linked = _link_or_copy(target, dst)
+    if move and os.path.exists(src):
+        os.remove(src)
+    if screen:
+        _link_or_copy(screen, os.path.join(os.path.dirname(dst), SCREEN_SUBDIR, os.path.basename(dst)))
+    with _LOCK:
+        _ASSETS_STATE["placed"] += 1
+        _ASSETS_STATE["linked" if linked else "copied"] += 1
+        if not created:
+            _ASSETS_STATE["deduped"] += 1
+    return dst
+
+
+GC_MIN_AGE_S = 3600   # blobs mais novos que isso podem estar entre o _ingest e o link
+
+def gc_store(min_age_s: float = GC_MIN_AGE_S) -> Tuple[int, int]:
+    """
+    Remove do store os blobs que nenhum relatório referencia mais (st_nlink == 1:
+    só a entrada do próprio store) e temporários antigos. Relatórios apagados
+    liberam assim o espaço das suas imagens. Com cópias em vez de hardlinks (FS
+    sem suporte), os relatórios têm os próprios arquivos e o blob também pode sair.
+    Devolve (arquivos removidos, bytes liberados).
+    """
+    if not os.path.isdir(ASSET_STORE_DIR):
+        return 0, 0
+    cut = time.time() - max(0.0, float(min_age_s))
+    n, freed = 0, 0
+    for shard in os.listdir(ASSET_STORE_DIR):
+        shard_dir = os.path.join(ASSET_STORE_DIR, shard)
+        if not os.path.isdir(shard_dir):
+            continue
+        for name in os.listdir(shard_dir):
+            path = os.path.join(shard_dir, name)
+            try:
+                st = os.lstat(path)
+            except OSError:
+                continue
+            if not stat.S_ISREG(st.st_mode) or st.st_nlink != 1 or st.st_mtime >= cut:
+                continue
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            n += 1
+            freed += st.st_size
+        try:
+            os.rmdir(shard_dir)   # só se ficou vazio
+        except OSError:
+            pass
+    return n, freed
+
+
+def stats() -> Dict[str, Any]:
+    with _LOCK:
+        return dict(_ASSETS_STATE)
+
+
+def print_stats() -> None:
+    st = stats()
+    if st["placed"]:
+        print(f"[INFO] Imagens: {st['placed']} colocada(s), {st['deduped']} reaproveitada(s) do store, "
+              f"{st['linked']} hardlink(s), {st['copied']} cópia(s), {st['variants']} variante(s) geradas.")
+
+
+def zip_compress_type(path: str) -> int:
+    """ZIP_STORED para formatos já comprimidos; ZIP_DEFLATED para o resto."""
+    ext = os.path.splitext(path)[1].lower()
+    return zipfile.ZIP_STORED if ext in COMPRESSED_EXTS else zipfile.ZIP_DEFLATED
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+"""
+Cache persistente (SQLite) das respostas de chat usadas nos comentários automáticos.
+
+Chave = sha256 de (modelo, temperatura, mensagens, parâmetros extras como
+max_tokens/response_format). Regerar um relatório sem mudanças nos prompts
+não faz nenhuma chamada à API.
+
+Configuração (variáveis de ambiente):
+- ATESTMED_LLM_CACHE            caminho do .sqlite; "0"/"off" desativa
+                                (default: reports/outputs/_cache/llm_comments.sqlite)
+- ATESTMED_LLM_CACHE_TTL_DAYS   validade das entradas em dias (default: 30; 0 = sem expiração)
+- ATESTMED_LLM_CACHE_MAX_MB     tamanho máximo; acima disso remove as menos usadas (LRU) (default: 64)
+
+Uso:
+    from utils.llm_cache import cached_chat
+
+    @cached_chat
+    def _call_openai(messages, model, temperature): ...
+
+ou, quando a chamada tem parâmetros próprios:
+    key = cache_key(model, 0.2, msgs, max_tokens=900)
+    txt = get(key) or chamar_api(...)
+    put(key, model, txt)
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import functools
+import inspect
+import threading
+from typing import Any, Callable, Dict, List, Optional
+
+# Modo adiado (comment_queue.py): falta no cache vira job na fila em vez de chamada à API
+try:
+    from utils.comment_queue import enqueue as _enqueue_deferred
+except ImportError:
+    try:
+        from comment_queue import enqueue as _enqueue_deferred  # type: ignore  # utils/ no sys.path
+    except ImportError:
+        def _enqueue_deferred(*_a: Any, **_k: Any) -> Optional[str]:
+            return None
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_CACHE_PATH = os.path.join(BASE_DIR, "reports", "outputs", "_cache", "llm_comments.sqlite")
+
+_LOCK = threading.Lock()
+_STATE: Dict[str, Any] = {"con": None, "path": None, "hits": 0, "misses": 0}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Configuração
+# ────────────────────────────────────────────────────────────────────────────────
+def _cache_path() -> Optional[str]:
+    v = (os.getenv("ATESTMED_LLM_CACHE") or "").strip()
+    if v.lower() in ("0", "off", "false", "no", "nao", "não"):
+        return None
+    return v or DEFAULT_CACHE_PATH
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+def _ttl_seconds() -> float:
+    return max(0.0, _env_float("ATESTMED_LLM_CACHE_TTL_DAYS", 30.0)) * 86400.0
+
+def _max_bytes() -> int:
+    return int(max(1.0, _env_float("ATESTMED_LLM_CACHE_MAX_MB", 64.0)) * 1024 * 1024)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Conexão
+# ────────────────────────────────────────────────────────────────────────────────
+def _connect() -> Optional[sqlite3.Connection]:
+    path = _cache_path()
+    if path is None:
+        return None
+    if _STATE["con"] is not None and _STATE["path"] == path:
+        return _STATE["con"]
+    try:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        con = sqlite3.connect(path, timeout=30, check_same_thread=False, isolation_level=None)
+        con.execute("PRAGMA journal_mode=WAL")      # vários scripts de comparação em paralelo
+        con.execute("PRAGMA synchronous=NORMAL")
+        con.execute(
+            "CREATE TABLE IF NOT EXISTS comments ("
+            " key TEXT PRIMARY KEY, model TEXT, created REAL, last_access REAL,"
+            " size INTEGER, response TEXT)"
+        )
+        con.execute("CREATE INDEX IF NOT EXISTS ix_comments_access ON comments(last_access)")
+    except Exception as e:
+        print(f"[AVISO] Cache de comentários indisponível ({e}); seguindo sem cache.")
+        return None
+    _STATE["con"], _STATE["path"] = con, path
+    return con
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# API
+# ────────────────────────────────────────────────────────────────────────────────
+def cache_key(model: str, temperature: float, messages: List[Dict[str, Any]], **extra: Any) -> str:
+    """Hash estável de (modelo, temperatura, mensagens, extras)."""
+    payload = {
+        "model": str(model),
+        "temperature": round(float(temperature), 6),
+        "messages": messages,
+        "extra": {k: v for k, v in sorted(extra.items()) if v is not None},
+    }
+    raw = json.dumps(payload, ensure_ascii=False, sort_keys=True, separators=(",", ":"), default=str)
+    return hashlib.sha256(raw.encode("utf-8")).hexdigest()
+
+def get(key: str) -> Optional[str]:
+    """Resposta em cache (não expirada) ou None."""
+    with _LOCK:
+        con = _connect()
+        if con is None:
+            return None
+        try:
+            row = con.execute("SELECT response, created FROM comments WHERE key=?", (key,)).fetchone()
+            now = time.time()
+            ttl = _ttl_seconds()
+            if row is None or (ttl > 0 and now - float(row[1]) > ttl):
+                _STATE["misses"] += 1
+                return None
+            con.execute("UPDATE comments SET last_access=? WHERE key=?", (now, key))
+            _STATE["hits"] += 1
+            return row[0]
+        except sqlite3.Error:
+            return None
+
+def put(key: str, model: str, response: Optional[str]) -> None:
+    """Grava a resposta (respostas vazias não são cacheadas) e aplica TTL/LRU."""
+    if not response:
+        return
+    with _LOCK:
+        con = _connect()
+        if con is None:
+            return
+        now = time.time()
+        size = len(response.encode("utf-8")) + len(key)
+        try:
+            con.execute(
+                "INSERT OR REPLACE INTO comments(key, model, created, last_access, size, response)"
+                " VALUES (?,?,?,?,?,?)", (key, str(model), now, now, size, response))
+            _evict(con, now, keep=key)
+        except sqlite3.Error:
+            pass
+
+def _evict(con: sqlite3.Connection, now: float, keep: Optional[str] = None) -> None:
+    ttl = _ttl_seconds()
+    if ttl > 0:
+        con.execute("DELETE FROM comments WHERE created < ?", (now - ttl,))
+    total = con.execute("SELECT COALESCE(SUM(size), 0) FROM comments").fetchone()[0]
+    limit = _max_bytes()
+    if total <= limit:
+        return
+    # remove as menos acessadas até ficar em ~90% do limite, na contagem exata: o rowid
+    # desempata acessos no mesmo instante e `keep` (a entrada recém-gravada) nunca sai
+    excess = total - int(limit * 0.9)
+    order = "FROM comments WHERE key IS NOT ? ORDER BY last_access, rowid"
+    n_del, acc = 0, 0
+    for (size,) in con.execute(f"SELECT size {order}", (keep,)):
+        acc += int(size); n_del += 1
+        if acc >= excess:
+            break
+    if n_del:
+        con.execute(f"DELETE FROM comments WHERE rowid IN (SELECT rowid {order} LIMIT ?)", (keep, n_del))
+
+def stats() -> Dict[str, int]:
+    """Acertos/faltas deste processo."""
+    return {"hits": int(_STATE["hits"]), "misses": int(_STATE["misses"])}
+
+def cached_chat(fn: Callable[..., Optional[str]]) -> Callable[..., Optional[str]]:
+    """
+    Decorador para helpers no formato fn(messages, model, temperature) -> texto|None.
+    Acerto devolve o texto sem chamar fn; respostas não vazias são gravadas. Com
+    ATESTMED_COMMENT_QUEUE definido, a falta vira job na fila e o retorno é None.
+    """
+    sig = inspect.signature(fn)
+
+    @functools.wraps(fn)
+    def wrapper(*args: Any, **kwargs: Any) -> Optional[str]:
+        try:
+            ba = sig.bind(*args, **kwargs); ba.apply_defaults()
+            model = ba.arguments.get("model", "")
+            temperature = ba.arguments.get("temperature", 0.0)
+            messages = ba.arguments.get("messages") or []
+            key = cache_key(model, temperature, messages)
+        except Exception:
+            return fn(*args, **kwargs)
+        hit = get(key)
+        if hit is not None:
+            return hit
+        if _enqueue_deferred(key, model, temperature, messages):
+            return None  # fase 1 do modo adiado: o script segue com o fallback local
+        txt = fn(*args, **kwargs)
+        put(key, model, txt)
+        return txt
+
+    wrapper.__wrapped__ = fn  # type: ignore[attr-defined]
+    return wrapper
@@ -0,0 +1,330 @@
+# -*- coding: utf-8 -*-
+"""
+Servidor local compatível com a API de chat da OpenAI (stub) para medir e
+testar o caminho dos comentários sem chamar a API real.
+
+Atende POST /v1/chat/completions (inclusive stream=True, em SSE) e GET /v1/models,
+com latência, taxa de erro e respostas configuráveis. Todos os clientes do projeto
+apontam para ele pela URL base:
+
+    python -m utils.llm_stub_server --port 8765 --latency 0.6 --jitter 0.3 --error-rate 0.05
+    export OPENAI_BASE_URL=http://127.0.0.1:8765/v1 OPENAI_API_KEY=stub
+
+- utils/comentarios.py, graphs_and_tables/compare_*.py e make_kpi_report_fluxo_b.ai_*
+  usam utils/openai_client.py (OPENAI_BASE_URL / ATESTMED_OPENAI_BASE_URL);
+- gerar_documentation._chat_completion usa o SDK com a mesma URL base.
+
+Respostas:
+- pedidos de legenda com JSON ('figs': [...] ou 'tables': [{id, ...}]) recebem um
+  JSON {nome: legenda}; response_format=json_object sem esse formato recebe {"texto": ...};
+- os demais recebem um parágrafo fixo;
+- --responses ARQ.json substitui isso por regras [{"match": "trecho", "response": "texto"}, ...]
+  (a primeira cujo trecho aparecer nas mensagens) e, opcionalmente, {"default": "texto"}.
+
+GET /stats devolve contadores (requisições, erros, pico de concorrência); POST /stats/reset zera.
+
+Uso programático (benchmarks):
+    from utils.llm_stub_server import start_stub
+    stub = start_stub(latency=0.2)          # porta livre, thread daemon
+    os.environ["OPENAI_BASE_URL"] = stub.base_url
+    ...
+    print(stub.stats_dict()); stub.stop()
+"""
+
+from __future__ import annotations
+
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+
+DEFAULT_TEXT = (
+    "No período analisado, o indicador do perito situa-se acima da referência nacional, "
+    "com diferença consistente ao longo das semanas. A leitura deve considerar o volume "
+    "de análises e a composição dos motivos, sem inferir causalidade a partir deste recorte."
+)
+DEFAULT_CAPTION = "Comparação do indicador com a referência no período, destacando as maiores diferenças."
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Configuração e respostas
+# ────────────────────────────────────────────────────────────────────────────────
+class StubConfig:
+    def __init__(self,
+                 latency: float = 0.0,
+                 jitter: float = 0.0,
+                 error_rate: float = 0.0,
+                 error_status: int = 503,
+                 retry_after: Optional[float] = None,
+                 responses: Optional[str] = None,
+                 seed: Optional[int] = None):
+        self.latency = max(0.0, float(latency))
+        self.jitter = max(0.0, float(jitter))
+        self.error_rate = min(1.0, max(0.0, float(error_rate)))
+        self.error_status = int(error_status)
+        self.retry_after = retry_after
+        self.rules: List[Dict[str, str]] = []
+        self.default: Optional[str] = None
+        if responses:
+            self._load_responses(responses)
+        self.rng = random.Random(seed)
+        self.rng_lock = threading.Lock()
+
+    def _load_responses(self, path: str) -> None:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            self.default = data.get("default")
+            data = data.get("rules", [])
+        self.rules = [r for r in data if isinstance(r, dict) and "response" in r]
+
+    def delay(self) -> float:
+        with self.rng_lock:
+            return max(0.0, self.latency + self.rng.uniform(-self.jitter, self.jitter))
+
+    def fails(self) -> bool:
+        with self.rng_lock:
+            return self.rng.random() < self.error_rate
+
+
+def _embedded_json_object(text: str) -> Optional[Dict[str, Any]]:
+    """Primeiro objeto JSON completo embutido no prompt (os ai_* anexam o payload ao texto)."""
+    dec = json.JSONDecoder()
+    for m in re.finditer(r"\{", text):
+        try:
+            obj, _ = dec.raw_decode(text, m.start())
+        except ValueError:
+            continue
+        if isinstance(obj, dict):
+            return obj
+    return None
+
+
+def canned_response(cfg: StubConfig, body: Dict[str, Any]) -> str:
+    msgs = body.get("messages") or []
+    text = "\n".join(str(m.get("content", "")) for m in msgs if isinstance(m, dict))
+    for rule in cfg.rules:
+        if str(rule.get("match", "")) in text:
+            return str(rule["response"])
+    if cfg.default is not None:
+        return cfg.default
+
+    user = str(msgs[-1].get("content", "")) if msgs and isinstance(msgs[-1], dict) else ""
+    obj = _embedded_json_object(user) if "JSON" in user or "json" in user else None
+    if obj is not None:
+        if isinstance(obj.get("figs"), list):
+            return json.dumps({str(f): DEFAULT_CAPTION for f in obj["figs"]}, ensure_ascii=False)
+        if isinstance(obj.get("tables"), list):
+            return json.dumps({str(t.get("id")): DEFAULT_CAPTION for t in obj["tables"]
+                               if isinstance(t, dict) and t.get("id")}, ensure_ascii=False)
+    if (body.get("response_format") or {}).get("type") == "json_object":
+        return json.dumps({"texto": DEFAULT_TEXT}, ensure_ascii=False)
+    return DEFAULT_TEXT
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Servidor
+# ────────────────────────────────────────────────────────────────────────────────
+class _Stats:
+    def __init__(self) -> None:
+        self.lock = threading.Lock()
+        self.reset()
+
+    def reset(self) -> None:
+        self.requests = 0
+        self.errors = 0
+        self.streams = 0
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.started = time.time()
+
+    def enter(self) -> None:
+        with self.lock:
+            self.requests += 1
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+
+    def leave(self, error: bool = False, stream: bool = False) -> None:
+        with self.lock:
+            self.inflight -= 1
+            self.errors += int(error)
+            self.streams += int(stream)
+
+    def as_dict(self) -> Dict[str, Any]:
+        with self.lock:
+            return {"requests": self.requests, "errors": self.errors, "streams": self.streams,
+                    "peak_inflight": self.peak_inflight,
+                    "elapsed_s": round(time.time() - self.started, 3)}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"   # keep-alive, como a API real
+    disable_nagle_algorithm = True  # cabeçalho e corpo saem em writes separados
+    server: "StubServer"
+
+    def log_message(self, fmt: str, *args: Any) -> None:
+        if self.server.verbose:
+            super().log_message(fmt, *args)
+
+    def _send_json(self, status: int, obj: Any, headers: Optional[Dict[str, str]] = None) -> None:
+        raw = json.dumps(obj, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(raw)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        self.wfile.write(raw)
+
+    def do_GET(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        if path.endswith("/models"):
+            self._send_json(200, {"object": "list", "data": [{"id": "stub", "object": "model", "owned_by": "stub"}]})
+        elif path == "/stats":
+            self._send_json(200, self.server.stats.as_dict())
+        else:
+            self._send_json(404, {"error": {"message": f"rota desconhecida: {self.path}"}})
+
+    def do_POST(self) -> None:
+        path = self.path.split("?", 1)[0].rstrip("/")
+        n = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(n) if n else b""
+        if path == "/stats/reset":
+            self.server.stats.reset()
+            self._send_json(200, {"ok": True})
+            return
+        if not path.endswith("/chat/completions"):
+            self._send_json(404, {"error": {"message": f"rota desconhecida: {self.path}"}})
+            return
+        try:
+            body = json.loads(raw.decode("utf-8") or "{}")
+        except ValueError:
+            self._send_json(400, {"error": {"message": "JSON inválido", "type": "invalid_request_error"}})
+            return
+
+        cfg, stats = self.server.cfg, self.server.stats
+        stats.enter()
+        error, stream = False, bool(body.get("stream"))
+        try:
+            time.sleep(cfg.delay())
+            if cfg.fails():
+                error = True
+                headers = {"Retry-After": f"{cfg.retry_after:g}"} if cfg.retry_after is not None else None
+                self._send_json(cfg.error_status,
+                                {"error": {"message": "erro simulado pelo stub", "type": "server_error",
+                                           "code": cfg.error_status}}, headers)
+                return
+            text = canned_response(cfg, body)
+            if stream:
+                self._send_stream(body, text)
+            else:
+                self._send_json(200, _completion(body, text))
+        finally:
+            stats.leave(error=error, stream=stream)
+
+    def _send_stream(self, body: Dict[str, Any], text: str) -> None:
+        cid, created, model = f"chatcmpl-stub{time.time_ns()}", int(time.time()), body.get("model", "stub")
+        words = re.findall(r"\S+\s*", text) or [text]
+        chunks = [{"role": "assistant", "content": ""}] + [{"content": w} for w in words]
+        events = []
+        for i, delta in enumerate(chunks + [{}]):
+            events.append({"id": cid, "object": "chat.completion.chunk", "created": created, "model": model,
+                           "choices": [{"index": 0, "delta": delta,
+                                        "finish_reason": "stop" if i == len(chunks) else None}]})
+        payload = "".join(f"data: {json.dumps(e, ensure_ascii=False)}\n\n" for e in events) + "data: [DONE]\n\n"
+        raw = payload.encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Content-Length", str(len(raw)))
+        self.end_headers()
+        self.wfile.write(raw)
+
+
+def _completion(body: Dict[str, Any], text: str) -> Dict[str, Any]:
+    prompt_chars = sum(len(str(m.get("content", ""))) for m in body.get("messages") or [] if isinstance(m, dict))
+    p_tok, c_tok = max(1, prompt_chars // 4), max(1, len(text) // 4)
+    return {
+        "id": f"chatcmpl-stub{time.time_ns()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": p_tok, "completion_tokens": c_tok, "total_tokens": p_tok + c_tok},
+    }
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+    def __init__(self, host: str, port: int, cfg: StubConfig, verbose: bool = False):
+        super().__init__((host, port), _Handler)
+        self.cfg = cfg
+        self.verbose = verbose
+        self.stats = _Stats()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def base_url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self) -> "StubServer":
+        self._thread = threading.Thread(target=self.serve_forever, name="llm-stub", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def stats_dict(self) -> Dict[str, Any]:
+        return self.stats.as_dict()
+
+
+def start_stub(host: str = "127.0.0.1", port: int = 0, verbose: bool = False, **cfg: Any) -> StubServer:
+    """Sobe o stub numa thread daemon (port=0 → porta livre). cfg = argumentos de StubConfig."""
+    return StubServer(host, port, StubConfig(**cfg), verbose=verbose).start()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# CLI
+# ────────────────────────────────────────────────────────────────────────────────
+def parse_args(argv: Optional[List[str]] = None) -> argparse.Namespace:
+    p = argparse.ArgumentParser(description="Servidor stub compatível com a API de chat da OpenAI (offline).")
+    p.add_argument("--host", default="127.0.0.1")
+    p.add_argument("--port", type=int, default=8765)
+    p.add_argument("--latency", type=float, default=0.5, help="Latência média por requisição, em segundos.")
+    p.add_argument("--jitter", type=float, default=0.0, help="Variação uniforme ± da latência, em segundos.")
+    p.add_argument("--error-rate", type=float, default=0.0, help="Fração das requisições que falham (0–1).")
+    p.add_argument("--error-status", type=int, default=503, help="Status HTTP das falhas simuladas (ex.: 429, 503).")
+    p.add_argument("--retry-after", type=float, default=None, help="Envia Retry-After (s) nas falhas simuladas.")
+    p.add_argument("--responses", default=None, help="JSON com respostas fixas (ver docstring do módulo).")
+    p.add_argument("--seed", type=int, default=None, help="Semente para latência/erros reprodutíveis.")
+    p.add_argument("--verbose", action="store_true", help="Loga cada requisição.")
+    return p.parse_args(argv)
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    args = parse_args(argv)
+    cfg = StubConfig(latency=args.latency, jitter=args.jitter, error_rate=args.error_rate,
+                     error_status=args.error_status, retry_after=args.retry_after,
+                     responses=args.responses, seed=args.seed)
+    srv = StubServer(args.host, args.port, cfg, verbose=args.verbose)
+    print(f"✅ Stub OpenAI em {srv.base_url} (latência {cfg.latency:g}±{cfg.jitter:g}s, erros {cfg.error_rate:.0%})")
+    print(f"[INFO] export OPENAI_BASE_URL={srv.base_url} OPENAI_API_KEY=stub")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(f"[INFO] {json.dumps(srv.stats_dict())}")
+        srv.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+# -*- coding: utf-8 -*-
+"""
+Cliente OpenAI único por processo para os comentários automáticos.
+
+Substitui o padrão "lê .env → importa openai → cria OpenAI(api_key=...) →
+tenta o SDK legado se algo falhar" repetido em cada helper de comentário:
+
+- a chave é carregada uma vez (ambiente ou .env na raiz do projeto);
+- a versão do SDK é detectada uma vez (openai>=1.x, legado <1.0 ou, sem SDK
+  instalado, um transporte HTTP mínimo da biblioteca padrão);
+- o cliente é criado uma vez e reutiliza conexões HTTP (keep-alive/pool);
+- cada comentário faz exatamente uma requisição (as tentativas extras ficam
+  a cargo do próprio cliente, com backoff), sem a segunda chamada pelo SDK legado;
+- dentro do CommentService (service_call) o serviço é o único dono das novas
+  tentativas: o cliente não repete, usa o timeout da tentativa e propaga o erro.
+
+Uso:
+    from utils.openai_client import chat
+
+    txt = chat(messages, model="gpt-4o-mini", temperature=0.2)   # texto ou None
+
+Configuração (variáveis de ambiente):
+- OPENAI_API_KEY                 chave (ou no .env da raiz)
+- OPENAI_BASE_URL                endpoint alternativo (p.ex. servidor stub local:
+                                 http://127.0.0.1:8765/v1); também ATESTMED_OPENAI_BASE_URL
+- ATESTMED_OPENAI_SDK            força "v1" | "legacy" | "http"
+- ATESTMED_OPENAI_TIMEOUT        timeout por requisição em segundos (default 60)
+- ATESTMED_OPENAI_MAX_RETRIES    novas tentativas em 429/5xx/conexão (default 2)
+- ATESTMED_OPENAI_POOL           conexões mantidas abertas (default 10)
+"""
+
+from __future__ import annotations
+
+import os
+import json
+import time
+import socket
+import threading
+import contextlib
+import http.client
+from typing import Any, Dict, Iterator, List, Optional
+from urllib.parse import urlsplit
+
+BASE_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+_LOCK = threading.RLock()
+_STATE: Dict[str, Any] = {"key_loaded": False, "key": None, "sdk": None, "client": None, "pid": None}
+# Chamada feita por um job do CommentService (por thread): {"timeout": s} ou None
+_TLS = threading.local()
+
+
+def _env_num(name: str, default: float) -> float:
+    try:
+        return float(os.getenv(name, "") or default)
+    except ValueError:
+        return default
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Chave e detecção do SDK (uma vez por processo)
+# ────────────────────────────────────────────────────────────────────────────────
+def _read_dotenv(env_path: str) -> None:
+    """Carrega o .env sem sobrescrever o ambiente (python-dotenv se houver; senão parse manual)."""
+    if not os.path.isfile(env_path):
+        return
+    try:
+        from dotenv import load_dotenv  # type: ignore
+        load_dotenv(env_path, override=False)
+        return
+    except Exception:
+        pass
+    try:
+        with open(env_path, "r", encoding="utf-8") as f:
+            for line in f:
+                line = line.strip()
+                if not line or line.startswith("#") or "=" not in line:
+                    continue
+                k, v = line.split("=", 1)
+                k, v = k.strip(), v.strip().strip('"').strip("'")
+                if k and v:
+                    os.environ.setdefault(k, v)
+    except Exception:
+        pass
+
+
+def load_api_key(env_path: Optional[str] = None) -> Optional[str]:
+    """OPENAI_API_KEY do ambiente ou do .env (lido só na primeira chamada)."""
+    with _LOCK:
+        if not _STATE["key_loaded"]:
+            if not os.getenv("OPENAI_API_KEY"):
+                _read_dotenv(env_path or os.path.join(BASE_DIR, ".env"))
+            _STATE["key_loaded"] = True
+        key = (os.getenv("OPENAI_API_KEY") or "").strip()
+        _STATE["key"] = key or None
+        return _STATE["key"]
+
+
+def base_url() -> Optional[str]:
+    v = (os.getenv("OPENAI_BASE_URL") or os.getenv("ATESTMED_OPENAI_BASE_URL") or "").strip()
+    return v.rstrip("/") or None
+
+
+def sdk_flavor() -> str:
+    """'v1' (openai>=1.x), 'legacy' (openai<1.0) ou 'http' (sem SDK)."""
+    with _LOCK:
+        if _STATE["sdk"] is None:
+            forced = (os.getenv("ATESTMED_OPENAI_SDK") or "").strip().lower()
+            if forced in ("v1", "legacy", "http"):
+                _STATE["sdk"] = forced
+            else:
+                try:
+                    import openai  # type: ignore
+                except Exception:
+                    openai = None  # type: ignore[assignment]
+                if hasattr(openai, "OpenAI"):
+                    _STATE["sdk"] = "v1"
+                elif hasattr(openai, "ChatCompletion"):
+                    _STATE["sdk"] = "legacy"
+                else:
+                    _STATE["sdk"] = "http"
+        return _STATE["sdk"]
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Transporte HTTP mínimo (sem SDK): conexões keep-alive por thread
+# ────────────────────────────────────────────────────────────────────────────────
+class _HttpChat:
+    RETRY_STATUS = (408, 409, 429, 500, 502, 503, 504)
+
+    def __init__(self, url: str, api_key: str, timeout: float, max_retries: int):
+        parts = urlsplit(url)
+        self.scheme = parts.scheme or "https"
+        self.host = parts.hostname or "api.openai.com"
+        self.port = parts.port
+        self.path = (parts.path or "").rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self._local = threading.local()
+
+    def _conn(self) -> http.client.HTTPConnection:
+        c = getattr(self._local, "conn", None)
+        if c is None:
+            cls = http.client.HTTPSConnection if self.scheme == "https" else http.client.HTTPConnection
+            c = cls(self.host, self.port, timeout=self.timeout)
+            c.connect()
+            try:  # requisições pequenas: sem Nagle
+                c.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            except (OSError, AttributeError):
+                pass
+            self._local.conn = c
+        return c
+
+    def _drop(self) -> None:
+        c = getattr(self._local, "conn", None)
+        self._local.conn = None
+        if c is not None:
+            try:
+                c.close()
+            except Exception:
+                pass
+
+    def create(self, max_retries: Optional[int] = None, timeout: Optional[float] = None,
+               **body: Any) -> Dict[str, Any]:
+        data = json.dumps(body, ensure_ascii=False).encode("utf-8")
+        headers = {"Content-Type": "application/json",
+                   "Authorization": f"Bearer {self.api_key}",
+                   "Connection": "keep-alive"}
+        retries = self.max_retries if max_retries is None else max(0, int(max_retries))
+        err: Exception = RuntimeError("sem resposta")
+        for attempt in range(retries + 1):
+            try:
+                c = self._conn()
+                if c.sock is not None:
+                    c.sock.settimeout(self.timeout if timeout is None else timeout)
+                c.request("POST", self.path, body=data, headers=headers)
+                r = c.getresponse()
+                raw = r.read()
+                if r.status < 400:
+                    return json.loads(raw.decode("utf-8"))
+                err = RuntimeError(f"HTTP {r.status}: {raw[:200].decode('utf-8', 'replace')}")
+                if r.status not in self.RETRY_STATUS:
+                    raise err
+                retry_after = r.getheader("Retry-After")
+            except (http.client.HTTPException, OSError) as e:  # conexão fechada pelo servidor etc.
+                self._drop()
+                err, retry_after = e, None
+            if attempt < retries:
+                try:
+                    delay = float(retry_after) if retry_after else 0.5 * (2 ** attempt)
+                except ValueError:
+                    delay = 0.5 * (2 ** attempt)
+                time.sleep(min(delay, 20.0))
+        raise err
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Cliente
+# ────────────────────────────────────────────────────────────────────────────────
+def get_client() -> Any:
+    """Cliente compartilhado (recriado após fork). None sem chave."""
+    with _LOCK:
+        if _STATE["client"] is not None and _STATE["pid"] == os.getpid():
+            return _STATE["client"]
+        key = load_api_key()
+        if not key:
+            return None
+        url = base_url()
+        timeout = _env_num("ATESTMED_OPENAI_TIMEOUT", 60.0)
+        retries = int(_env_num("ATESTMED_OPENAI_MAX_RETRIES", 2))
+        flavor = sdk_flavor()
+        if flavor == "v1":
+            from openai import OpenAI  # type: ignore
+            kw: Dict[str, Any] = dict(api_key=key, timeout=timeout, max_retries=retries)
+            if url:
+                kw["base_url"] = url
+            try:
+                import httpx  # dependência do SDK 1.x
+                pool = int(_env_num("ATESTMED_OPENAI_POOL", 10))
+                kw["http_client"] = httpx.Client(
+                    timeout=timeout,
+                    limits=httpx.Limits(max_connections=pool, max_keepalive_connections=pool,
+                                        keepalive_expiry=60.0))
+            except Exception:
+                pass  # sem httpx explícito o SDK usa o pool padrão dele
+            client: Any = OpenAI(**kw)
+        elif flavor == "legacy":
+            import openai  # type: ignore
+            openai.api_key = key
+            if url:
+                openai.api_base = url
+            client = openai
+        else:
+            client = _HttpChat(url or DEFAULT_BASE_URL, key, timeout, retries)
+        _STATE["client"], _STATE["pid"] = client, os.getpid()
+        return client
+
+
+@contextlib.contextmanager
+def service_call(timeout: Optional[float] = None) -> Iterator[None]:
+    """
+    Marca as chamadas desta thread como vindas de um job do CommentService, que já
+    faz as novas tentativas (com backoff) e o timeout: aqui o cliente não repete
+    (max_retries=0), cada requisição usa `timeout` e erros são propagados, para
+    que uma falha vire uma nova tentativa do serviço (e não 3 × 3 requisições).
+    """
+    prev = getattr(_TLS, "service", None)
+    _TLS.service = {"timeout": timeout if timeout and timeout > 0 else None}
+    try:
+        yield
+    finally:
+        _TLS.service = prev
+
+
+def in_service_call() -> bool:
+    """True dentro de service_call (o chamador deve deixar exceções subirem)."""
+    return getattr(_TLS, "service", None) is not None
+
+
+def reset() -> None:
+    """Descarta chave/SDK/cliente em memória (ex.: após trocar variáveis de ambiente)."""
+    with _LOCK:
+        _STATE.update(key_loaded=False, key=None, sdk=None, client=None, pid=None)
+
+
+def chat(messages: List[Dict[str, Any]], model: str = "gpt-4o-mini", temperature: float = 0.2,
+         raise_errors: bool = False, **params: Any) -> Optional[str]:
+    """
+    Uma requisição de chat pelo cliente compartilhado. Retorna o texto (strip) ou
+    None (sem chave, resposta vazia ou erro). raise_errors=True propaga a exceção
+    (útil para quem faz as próprias novas tentativas). Dentro de service_call os
+    erros sempre sobem e o cliente não repete.
+    """
+    svc = getattr(_TLS, "service", None)
+    if svc is not None:
+        raise_errors = True
+    try:
+        client = get_client()
+        if client is None:
+            return None
+        flavor = _STATE["sdk"]
+        body = dict(model=model, messages=messages, temperature=temperature, **params)
+        if flavor == "v1":
+            if svc is not None:
+                opts: Dict[str, Any] = {"max_retries": 0}
+                if svc["timeout"]:
+                    opts["timeout"] = svc["timeout"]
+                client = client.with_options(**opts)
+            resp = client.chat.completions.create(**body)
+            txt = resp.choices[0].message.content if getattr(resp, "choices", None) else ""
+        elif flavor == "legacy":
+            body.pop("response_format", None)  # não suportado no SDK legado
+            if svc is not None and svc["timeout"]:
+                body["request_timeout"] = svc["timeout"]
+            resp = client.ChatCompletion.create(**body)
+            txt = resp["choices"][0]["message"]["content"]
+        else:
+            if svc is not None:
+                resp = client.create(max_retries=0, timeout=svc["timeout"], **body)
+            else:
+                resp = client.create(**body)
+            txt = resp["choices"][0]["message"]["content"]
+        return (txt or "").strip() or None
+    except Exception:
+        if raise_errors:
+            raise
+        return None
@@ -0,0 +1,554 @@
+# -*- coding: utf-8 -*-
+"""
+Backend nativo .org → PDF (ReportLab), sem pandoc/xelatex/emacs.
+
+Cobre o subconjunto de Org emitido pelos relatórios KPI (make_kpi_report*.py):
+- #+TITLE/#+AUTHOR/#+DATE (título no topo) e #+OPTIONS num:t (seções numeradas);
+- headings (*, **, ***…), parágrafos, listas (-, +, 1.) e marcação inline
+  (*negrito*, /itálico/, =código=, ~código~, +riscado+, [[link][descrição]]);
+- tabelas Org (|…|, com linha |---+---| separando o cabeçalho), #+CAPTION;
+- figuras [[file:…png]] (relativas ao .org) com #+CAPTION e #+ATTR_LATEX :width;
+- #+BEGIN_QUOTE, #+begin_example/#+BEGIN_SRC (monoespaçado);
+- #+LATEX: \\newpage/\\clearpage (quebra), \\begin{landscape}/\\end{landscape}
+  (páginas em paisagem) e \\begingroup\\scriptsize… (fonte das tabelas seguintes).
+
+Demais diretivas LaTeX (#+LATEX_HEADER, \\setcounter…) e drawers :PROPERTIES:
+são ignorados. Não há sumário nem fórmulas: para o layout completo, use o
+caminho pandoc/emacs. ReportLab é opcional: sem ele render_org_pdf devolve None.
+
+Uso:
+    from utils.org_pdf import render_org_pdf
+    render_org_pdf("relatorio.org", "pdfs/relatorio.pdf")   # -> caminho | None
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import threading
+from functools import lru_cache
+from typing import Any, Dict, List, Optional, Tuple
+from xml.sax.saxutils import escape as xml_escape
+
+try:
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A4, landscape as _landscape
+    from reportlab.lib.units import cm
+    from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+    from reportlab.lib.utils import ImageReader
+    from reportlab.pdfbase import pdfmetrics
+    from reportlab.pdfbase.ttfonts import TTFont
+    from reportlab.pdfbase.pdfmetrics import stringWidth
+    from reportlab.platypus import (
+        BaseDocTemplate, Frame, PageTemplate, NextPageTemplate, PageBreak, Paragraph,
+        Preformatted, Spacer, Table, TableStyle, Image, KeepTogether,
+    )
+    HAS_REPORTLAB = True
+except ImportError:  # pragma: no cover - depende do ambiente
+    HAS_REPORTLAB = False
+
+BACKEND_NAME = "reportlab"
+
+_FONT_DIR = "/usr/share/fonts/truetype/dejavu"
+_FONT_LOCK = threading.Lock()
+
+_MARGIN_CM = 2.0                 # mesmo geometry:margin=2cm do caminho pandoc
+_DEFAULT_IMG_FRAC = 0.9          # largura padrão das figuras (fração da linha)
+_TABLE_SIZES = {"tiny": 5.5, "scriptsize": 6.5, "footnotesize": 7.5, "small": 8.5, "normalsize": 9.5}
+_TABLE_SIZE_DEFAULT = 8.0
+
+_HEADING_RE = re.compile(r"^(\*+)\s+(.*?)\s*(?:\s:[\w@#%:]+:)?\s*$")
+_KEYWORD_RE = re.compile(r"^\s*#\+([A-Za-z_]+):\s?(.*)$")
+_BEGIN_RE = re.compile(r"^\s*#\+begin_(\w+)\b(.*)$", re.I)
+_LIST_RE = re.compile(r"^(\s*)([-+]|\d+[.)])\s+(.*)$")
+_IMAGE_LINE_RE = re.compile(r"^\s*\[\[(?:file:)?([^\]\[]+?\.(?:png|jpe?g|gif|bmp))\](?:\[[^\]]*\])?\]\s*$", re.I)
+_HLINE_RE = re.compile(r"^\s*\|[-+:\s]*\|?\s*$")
+_NUM_RE = re.compile(r"^[-+]?[\d.,]+\s*%?$")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Fontes e estilos
+# ────────────────────────────────────────────────────────────────────────────────
+@lru_cache(maxsize=1)
+def _register_fonts() -> Tuple[str, str, str]:
+    """(regular, negrito, mono): DejaVu se disponível (acentos PT-BR), senão Helvetica/Courier."""
+    with _FONT_LOCK:
+        try:
+            reg, bold = (os.path.join(_FONT_DIR, f) for f in ("DejaVuSans.ttf", "DejaVuSans-Bold.ttf"))
+            mono = os.path.join(_FONT_DIR, "DejaVuSansMono.ttf")
+            if os.path.exists(reg) and os.path.exists(bold):
+                names = set(pdfmetrics.getRegisteredFontNames())
+                if "DejaVu" not in names:
+                    pdfmetrics.registerFont(TTFont("DejaVu", reg))
+                if "DejaVu-Bold" not in names:
+                    pdfmetrics.registerFont(TTFont("DejaVu-Bold", bold))
+                # sem Oblique instalado, <i> cai na regular (sem erro de família)
+                pdfmetrics.registerFontFamily("DejaVu", normal="DejaVu", bold="DejaVu-Bold",
+                                              italic="DejaVu", boldItalic="DejaVu-Bold")
+                mono_name = "Courier"
+                if os.path.exists(mono):
+                    if "DejaVuMono" not in names:
+                        pdfmetrics.registerFont(TTFont("DejaVuMono", mono))
+                    mono_name = "DejaVuMono"
+                return "DejaVu", "DejaVu-Bold", mono_name
+        except Exception:
+            pass
+    return "Helvetica", "Helvetica-Bold", "Courier"
+
+
+@lru_cache(maxsize=1)
+def _styles() -> Dict[str, "ParagraphStyle"]:
+    reg, bold, mono = _register_fonts()
+    ss = getSampleStyleSheet()
+    body = ParagraphStyle("Body", parent=ss["BodyText"], fontName=reg, fontSize=9.7, leading=13, spaceAfter=4)
+    return {
+        "Title": ParagraphStyle("Title", parent=ss["Title"], fontName=bold, fontSize=16, leading=19, spaceAfter=8),
+        "Subtitle": ParagraphStyle("Subtitle", parent=body, alignment=1, fontSize=9.7, spaceAfter=2),
+        "Heading1": ParagraphStyle("Heading1", parent=ss["Heading1"], fontName=bold, fontSize=14, leading=17,
+                                   spaceBefore=10, spaceAfter=6),
+        "Heading2": ParagraphStyle("Heading2", parent=ss["Heading2"], fontName=bold, fontSize=12.5, leading=15,
+                                   spaceBefore=8, spaceAfter=5),
+        "Heading3": ParagraphStyle("Heading3", parent=ss["Heading3"], fontName=bold, fontSize=11.5, leading=14,
+                                   spaceBefore=6, spaceAfter=4),
+        "Body": body,
+        "Quote": ParagraphStyle("Quote", parent=body, leftIndent=18, rightIndent=18, textColor=colors.HexColor("#333333")),
+        "List": ParagraphStyle("List", parent=body, spaceAfter=2),
+        "Caption": ParagraphStyle("Caption", parent=body, fontSize=8.5, leading=11, alignment=1, spaceBefore=3,
+                                  spaceAfter=8),
+        "Code": ParagraphStyle("Code", parent=body, fontName=mono, fontSize=7.5, leading=9, spaceBefore=2,
+                               spaceAfter=6, backColor=colors.HexColor("#f6f6f6")),
+        "Footer": ParagraphStyle("Footer", parent=body, fontSize=8, leading=10),
+    }
+
+
+@lru_cache(maxsize=16)
+def _cell_styles(size: float) -> Tuple["ParagraphStyle", "ParagraphStyle", "ParagraphStyle"]:
+    """(cabeçalho, texto, número) das células de tabela num tamanho de fonte."""
+    reg, bold, _ = _register_fonts()
+    lead = round(size * 1.2, 1)
+    head = ParagraphStyle(f"TH{size}", fontName=bold, fontSize=size, leading=lead, alignment=1)
+    text = ParagraphStyle(f"TD{size}", fontName=reg, fontSize=size, leading=lead)
+    num = ParagraphStyle(f"TN{size}", parent=text, alignment=2)
+    return head, text, num
+
+
+@lru_cache(maxsize=16)
+def _table_style(size: float, has_header: bool) -> "TableStyle":
+    """Mesmo visual das tabelas do make_impact_report (cabeçalho whitesmoke, grade cinza)."""
+    pad = 2 if size <= 8 else 3
+    cmds = [
+        ("GRID", (0, 0), (-1, -1), 0.25, colors.lightgrey),
+        ("VALIGN", (0, 0), (-1, -1), "MIDDLE"),
+        ("LEFTPADDING", (0, 0), (-1, -1), pad),
+        ("RIGHTPADDING", (0, 0), (-1, -1), pad),
+        ("TOPPADDING", (0, 0), (-1, -1), pad),
+        ("BOTTOMPADDING", (0, 0), (-1, -1), pad),
+    ]
+    if has_header:
+        cmds.append(("BACKGROUND", (0, 0), (-1, 0), colors.whitesmoke))
+    return TableStyle(cmds)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Marcação inline
+# ────────────────────────────────────────────────────────────────────────────────
+_PRE = r"(^|[\s(\[{'\"—–-])"
+_POST = r"(?=$|[\s)\]}'\".,;:!?—–-])"
+_EMPH = [
+    (re.compile(_PRE + r"\*(\S|\S.*?\S)\*" + _POST), r"\1<b>\2</b>"),
+    (re.compile(_PRE + r"/(\S|\S.*?\S)/" + _POST), r"\1<i>\2</i>"),
+    (re.compile(_PRE + r"\+(\S|\S.*?\S)\+" + _POST), r"\1<strike>\2</strike>"),
+]
+_LINK_RE = re.compile(r"\[\[([^\]\[]+)\](?:\[([^\]\[]*)\])?\]")
+_VERB_RE = re.compile(_PRE + r"([=~])(\S|\S.*?\S)\2" + _POST)
+
+
+def org_inline(text: str) -> str:
+    """Texto Org de uma linha/parágrafo → mini-HTML do Paragraph do ReportLab."""
+    mono = _register_fonts()[2]
+    keep: List[str] = []
+
+    def _stash(html: str) -> str:
+        keep.append(html)
+        return f"\x00{len(keep) - 1}\x00"
+
+    def _link(m: "re.Match[str]") -> str:
+        target, desc = m.group(1).strip(), m.group(2)
+        label = xml_escape(desc if desc is not None else re.sub(r"^file:", "", target))
+        if re.match(r"^(https?|mailto):", target, re.I):
+            return _stash(f'<link href="{xml_escape(target, {chr(34): "&quot;"})}" color="blue">{label}</link>')
+        return _stash(label)
+
+    s = _LINK_RE.sub(_link, text or "")
+    s = _VERB_RE.sub(lambda m: m.group(1) + _stash(f'<font face="{mono}">{xml_escape(m.group(3))}</font>'), s)
+    s = xml_escape(s)
+    for rx, rep in _EMPH:
+        s = rx.sub(rep, s)
+    s = re.sub(r"\s*\\\\\s*$", "<br/>", s)             # "\\" no fim da linha = quebra
+    s = s.replace("\\\\ ", "<br/>")
+    return re.sub(r"\x00(\d+)\x00", lambda m: keep[int(m.group(1))], s)
+
+
+def _plain(text: str) -> str:
+    """Texto sem marcação (para medir larguras de coluna)."""
+    s = _LINK_RE.sub(lambda m: m.group(2) if m.group(2) is not None else m.group(1), text or "")
+    return re.sub(r"(^|\s)[*/=~+](\S.*?\S|\S)[*/=~+](?=\s|$)", r"\1\2", s)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Blocos
+# ────────────────────────────────────────────────────────────────────────────────
+class _Ctx:
+    """Estado do render: orientação, fonte das tabelas, numeração e legenda pendente."""
+
+    def __init__(self, base_dir: str, frames: Dict[str, Tuple[float, float]], numbered: bool):
+        self.base_dir = base_dir
+        self.frames = frames
+        self.landscape = False
+        self.table_size = _TABLE_SIZE_DEFAULT
+        self.numbered = numbered
+        self.sections = [0, 0, 0, 0, 0, 0]
+        self.n_fig = 0
+        self.n_tab = 0
+        self.caption: Optional[str] = None
+        self.width_frac: Optional[float] = None
+
+    @property
+    def frame(self) -> Tuple[float, float]:
+        return self.frames["landscape" if self.landscape else "portrait"]
+
+    def take_caption(self) -> Tuple[Optional[str], Optional[float]]:
+        cap, frac = self.caption, self.width_frac
+        self.caption, self.width_frac = None, None
+        return cap, frac
+
+
+def _split_row(line: str) -> List[str]:
+    s = line.strip()
+    if s.startswith("|"):
+        s = s[1:]
+    if s.endswith("|"):
+        s = s[:-1]
+    return [c.strip() for c in s.split("|")]
+
+
+def _org_table(lines: List[str], ctx: _Ctx) -> List[Any]:
+    rows: List[List[str]] = []
+    header_rows = 0
+    for ln in lines:
+        if _HLINE_RE.match(ln) and "-" in ln:
+            if rows and not header_rows:
+                header_rows = len(rows)
+            continue
+        rows.append(_split_row(ln))
+    if not rows:
+        return []
+    ncols = max(len(r) for r in rows)
+    rows = [r + [""] * (ncols - len(r)) for r in rows]
+
+    size = ctx.table_size
+    st_head, st_text, st_num = _cell_styles(size)
+    reg, bold, _ = _register_fonts()
+    pad = 2 if size <= 8 else 3
+
+    # larguras: natural (maior célula) e, se não couber, proporcional na largura útil
+    natural = []
+    for j in range(ncols):
+        w = 0.0
+        for i, r in enumerate(rows):
+            font = bold if i < header_rows else reg
+            w = max(w, stringWidth(_plain(r[j]), font, size))
+        natural.append(w + 2 * pad + 1)
+    avail = ctx.frame[0]
+    total = sum(natural)
+    widths = natural if total <= avail else [w * avail / total for w in natural]
+
+    data = []
+    for i, r in enumerate(rows):
+        out = []
+        for c in r:
+            if i < header_rows:
+                out.append(Paragraph(org_inline(c), st_head))
+            else:
+                out.append(Paragraph(org_inline(c), st_num if _NUM_RE.match(c) else st_text))
+        data.append(out)
+    tbl = Table(data, colWidths=widths, repeatRows=header_rows, hAlign="CENTER")
+    tbl.setStyle(_table_style(size, bool(header_rows)))
+
+    cap, _ = ctx.take_caption()
+    if cap:
+        ctx.n_tab += 1
+        return [Paragraph(f"Tabela {ctx.n_tab}: {org_inline(cap)}", _styles()["Caption"]), tbl, Spacer(1, 6)]
+    return [tbl, Spacer(1, 6)]
+
+
+def _figure(target: str, ctx: _Ctx) -> List[Any]:
+    path = target if os.path.isabs(target) else os.path.normpath(os.path.join(ctx.base_dir, target))
+    cap, frac = ctx.take_caption()
+    if not os.path.exists(path):
+        print(f"[AVISO] Imagem não encontrada para o PDF: {path}")
+        return []
+    iw, ih = ImageReader(path).getSize()
+    fw, fh = ctx.frame
+    w = fw * (frac or _DEFAULT_IMG_FRAC)
+    h = w * ih / float(iw or 1)
+    max_h = fh * 0.85 if cap else fh * 0.95
+    if h > max_h:
+        w, h = w * max_h / h, max_h
+    flows: List[Any] = [Image(path, width=w, height=h)]
+    if cap:
+        ctx.n_fig += 1
+        flows.append(Paragraph(f"Figura {ctx.n_fig}: {org_inline(cap)}", _styles()["Caption"]))
+    return [KeepTogether(flows), Spacer(1, 4)]
+
+
+def _code_block(lines: List[str], ctx: _Ctx, in_quote: bool = False) -> List[Any]:
+    st = _styles()["Code"]
+    text = "\n".join(lines).expandtabs(4).rstrip("\n")
+    if not text.strip():
+        return []
+    # reduz a fonte até a linha mais longa caber (tabelas ASCII largas), sem passar de 5pt
+    avail = ctx.frame[0] - (36 if in_quote else 0)
+    longest = max((stringWidth(ln, st.fontName, st.fontSize) for ln in text.split("\n")), default=0)
+    if longest > avail:
+        size = max(5.0, st.fontSize * avail / longest)
+        st = ParagraphStyle(f"Code{size:.1f}", parent=st, fontSize=size, leading=size * 1.2)
+    return [Preformatted(text, st, maxLineLength=None)]
+
+
+def _latex_directive(value: str, flows: List[Any], ctx: _Ctx) -> None:
+    v = value.strip()
+    if re.search(r"\\begin\{landscape\}", v) or re.search(r"\\end\{landscape\}", v):
+        ctx.landscape = "begin" in v
+        if flows and isinstance(flows[-1], PageBreak):
+            flows.pop()
+        flows.append(NextPageTemplate("landscape" if ctx.landscape else "portrait"))
+        flows.append(PageBreak())
+        return
+    if re.search(r"\\(newpage|clearpage|pagebreak)\b", v):
+        if not (flows and isinstance(flows[-1], PageBreak)):
+            flows.append(PageBreak())
+        return
+    m = re.search(r"\\(tiny|scriptsize|footnotesize|small|normalsize)\b", v)
+    if m:
+        ctx.table_size = _TABLE_SIZES[m.group(1)]
+    if "\\endgroup" in v:
+        ctx.table_size = _TABLE_SIZE_DEFAULT
+
+
+def _heading(level: int, title: str, ctx: _Ctx) -> Any:
+    level = min(level, len(ctx.sections))
+    st = _styles()[f"Heading{min(level, 3)}"]
+    if ctx.numbered:
+        ctx.sections[level - 1] += 1
+        for k in range(level, len(ctx.sections)):
+            ctx.sections[k] = 0
+        num = ".".join(str(n) for n in ctx.sections[:level])
+        return Paragraph(f"{num}&nbsp;&nbsp;{org_inline(title)}", st)
+    return Paragraph(org_inline(title), st)
+
+
+def _to_flowables(lines: List[str], ctx: _Ctx, in_quote: bool = False) -> List[Any]:
+    styles = _styles()
+    body = styles["Quote"] if in_quote else styles["Body"]
+    flows: List[Any] = []
+    par: List[str] = []
+    items: List[Tuple[int, str, str]] = []   # (nível, marcador, texto)
+
+    def flush() -> None:
+        if par:
+            flows.append(Paragraph(org_inline(" ".join(par)), body))
+            par.clear()
+        if items:
+            indents = sorted({ind for ind, _, _ in items})
+            for ind, bullet, text in items:
+                lvl = indents.index(ind)
+                st = ParagraphStyle(f"List{lvl}{int(in_quote)}", parent=styles["List"],
+                                    leftIndent=body.leftIndent + 14 * (lvl + 1), bulletIndent=body.leftIndent + 14 * lvl + 2)
+                flows.append(Paragraph(org_inline(text), st, bulletText="•" if bullet in "-+" else bullet))
+            items.clear()
+
+    i, n = 0, len(lines)
+    while i < n:
+        ln = lines[i]
+        s = ln.strip()
+
+        if not s:
+            flush(); i += 1
+            continue
+
+        # drawers (:PROPERTIES: … :END:)
+        if s.upper() == ":PROPERTIES:":
+            flush()
+            while i < n and lines[i].strip().upper() != ":END:":
+                i += 1
+            i += 1
+            continue
+
+        # blocos #+BEGIN_X … #+END_X
+        mb = _BEGIN_RE.match(ln)
+        if mb:
+            flush()
+            kind = mb.group(1).lower()
+            end_re = re.compile(r"^\s*#\+end_" + re.escape(kind) + r"\b", re.I)
+            j = i + 1
+            while j < n and not end_re.match(lines[j]):
+                j += 1
+            inner = lines[i + 1:j]
+            if kind == "quote":
+                flows.extend(_to_flowables(inner, ctx, in_quote=True))
+            elif kind in ("example", "src", "verbatim"):
+                flows.extend(_code_block(inner, ctx, in_quote))
+            elif kind == "export":
+                pass                                   # LaTeX/HTML cru: sem equivalente
+            else:
+                flows.extend(_to_flowables(inner, ctx, in_quote))
+            i = j + 1
+            continue
+
+        # palavras-chave #+X:
+        mk = _KEYWORD_RE.match(ln)
+        if mk:
+            flush()
+            key, value = mk.group(1).upper(), mk.group(2)
+            if key == "CAPTION":
+                ctx.caption = value.strip()
+            elif key == "ATTR_LATEX":
+                mw = re.search(r":width\s+([\d.]*)\s*\\(?:linewidth|textwidth|columnwidth)", value)
+                if mw:
+                    ctx.width_frac = min(1.0, float(mw.group(1) or 1.0))
+            elif key == "LATEX":
+                _latex_directive(value, flows, ctx)
+            i += 1
+            continue
+        if s.startswith("#"):
+            i += 1                                     # comentários Org (# …, #+… sem ":")
+            continue
+
+        # heading
+        mh = _HEADING_RE.match(ln)
+        if mh and not in_quote:
+            flush()
+            flows.append(_heading(len(mh.group(1)), mh.group(2), ctx))
+            i += 1
+            continue
+
+        # figura
+        mi = _IMAGE_LINE_RE.match(ln)
+        if mi:
+            flush()
+            flows.extend(_figure(mi.group(1).strip(), ctx))
+            i += 1
+            continue
+
+        # tabela
+        if s.startswith("|"):
+            flush()
+            j = i
+            while j < n and lines[j].strip().startswith("|"):
+                j += 1
+            flows.extend(_org_table(lines[i:j], ctx))
+            i = j
+            continue
+
+        # listas (continuação = linha mais indentada que o marcador)
+        ml = _LIST_RE.match(ln)
+        if ml:
+            if par:
+                flows.append(Paragraph(org_inline(" ".join(par)), body)); par.clear()
+            items.append((len(ml.group(1).expandtabs(4)), ml.group(2), ml.group(3).strip()))
+            i += 1
+            continue
+        if items and len(ln) - len(ln.lstrip()) > items[-1][0]:
+            ind, bullet, text = items[-1]
+            items[-1] = (ind, bullet, f"{text} {s}")
+            i += 1
+            continue
+
+        if items:
+            flush()
+        par.append(s)
+        i += 1
+
+    flush()
+    return flows
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Documento
+# ────────────────────────────────────────────────────────────────────────────────
+def _org_meta(lines: List[str]) -> Dict[str, str]:
+    meta: Dict[str, str] = {}
+    for ln in lines:
+        m = _KEYWORD_RE.match(ln)
+        if m and m.group(1).upper() in ("TITLE", "AUTHOR", "DATE", "OPTIONS") and m.group(1).upper() not in meta:
+            meta[m.group(1).upper()] = m.group(2).strip()
+    return meta
+
+
+def _footer(title: str):
+    reg = _register_fonts()[0]
+
+    def _draw(canvas, doc) -> None:
+        canvas.saveState()
+        canvas.setFont(reg, 8)
+        y = max(0.5 * cm, doc.bottomMargin - 0.7 * cm)
+        if title:
+            canvas.drawString(doc.leftMargin, y, title[:110])
+        canvas.drawRightString(doc.pagesize[0] - doc.rightMargin, y, str(canvas.getPageNumber()))
+        canvas.restoreState()
+    return _draw
+
+
+def render_org_pdf(org_path: str, pdf_path: str, title: Optional[str] = None) -> Optional[str]:
+    """Renderiza o .org em PDF com ReportLab. Devolve pdf_path, ou None se falhar/indisponível."""
+    if not HAS_REPORTLAB:
+        print("❌ ReportLab não instalado (pip install reportlab); use o backend pandoc.")
+        return None
+    with open(org_path, encoding="utf-8") as f:
+        lines = f.read().splitlines()
+    meta = _org_meta(lines)
+    title = title if title is not None else meta.get("TITLE", "")
+    numbered = bool(re.search(r"\bnum:(t|\d+)\b", meta.get("OPTIONS", "")))
+
+    margin = _MARGIN_CM * cm
+    frames: Dict[str, Tuple[float, float]] = {}
+    templates = []
+    on_page = _footer(title)
+    for name, size in (("portrait", A4), ("landscape", _landscape(A4))):
+        fw, fh = size[0] - 2 * margin, size[1] - 2 * margin
+        frames[name] = (fw - 12, fh - 12)            # Frame tem 6pt de padding por lado
+        templates.append(PageTemplate(id=name, pagesize=size, onPage=on_page,
+                                      frames=[Frame(margin, margin, fw, fh, id=f"f_{name}")]))
+
+    ctx = _Ctx(os.path.dirname(os.path.abspath(org_path)), frames, numbered)
+    story: List[Any] = []
+    if title:
+        story.append(Paragraph(org_inline(title), _styles()["Title"]))
+        for key in ("AUTHOR", "DATE"):
+            if meta.get(key):
+                story.append(Paragraph(org_inline(meta[key]), _styles()["Subtitle"]))
+        story.append(Spacer(1, 8))
+    story.extend(_to_flowables(lines, ctx))
+    while story and isinstance(story[-1], (PageBreak, NextPageTemplate)):
+        story.pop()
+    if not story:
+        story.append(Spacer(1, 1))
+
+    os.makedirs(os.path.dirname(os.path.abspath(pdf_path)), exist_ok=True)
+    tmp = f"{pdf_path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        doc = BaseDocTemplate(tmp, pagesize=A4, leftMargin=margin, rightMargin=margin, topMargin=margin,
+                              bottomMargin=margin, title=title or os.path.basename(org_path),
+                              pageTemplates=templates)
+        doc.build(story)
+        os.replace(tmp, pdf_path)
+    except Exception as e:
+        print(f"❌ Erro ao gerar PDF (ReportLab) de {org_path}: {e}")
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+        return None
+    print(f"✅ PDF gerado (ReportLab): {pdf_path}")
+    return pdf_path
@@ -0,0 +1,374 @@
+# -*- coding: utf-8 -*-
+"""
+Montagem de .org em fluxo (streaming), sem reler/reescrever o texto inteiro a cada ajuste.
+
+As normalizações do make_kpi_report (linhas em branco ao redor de tabelas,
+normalização das tabelas, blocos ASCII/ANSI em #+begin_example, tabelas em
+quotes, rebaixamento de headings, links de imagem) são geradores linha a linha
+com no máximo uma linha de antecipação. Encadeados, fazem uma única passada
+sobre o conteúdo; o OrgWriter grava direto no arquivo, então a memória fica
+limitada ao bloco corrente mesmo nos consolidados com milhares de linhas.
+
+O OrgWriter aceita append()/extend() como a lista `lines` usada até aqui (os
+helpers _append_*_block(lines, …) funcionam sem mudança) e, com strip=True,
+grava exatamente o que "\\n".join(lines).strip() + "\\n" gravaria.
+
+Uso:
+    from utils.org_stream import OrgWriter
+
+    with OrgWriter(org_final) as w:
+        w.append("* Relatório")
+        if w.include(org_perito, protect=True, shift=1):
+            w.append("#+LATEX: \\\\newpage\\n")
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Iterable, Iterator, List, Optional
+
+ANSI_RE = re.compile(r"\x1b\[[0-9;]*[A-Za-z]")
+BOX_DRAW_RE = re.compile(r"[┌┬┐└┴┘├┼┤│─━┃╭╮╯╰█▓▒░]")
+
+_TABELA_INLINE_RE = re.compile(r"(\[Tabela[^\]]*\])[^\S\n]*(\|)", re.I)
+_TABELA_TAIL_RE = re.compile(r"^(.*\[Tabela[^\]]*\])\s*$", re.I)
+_IMG_LINK_RE = re.compile(r"\[\[file:([^\]]+)\]\]")
+_PIPE_RE = re.compile(r"\s*\|\s*")
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Fontes de linhas
+# ────────────────────────────────────────────────────────────────────────────────
+def iter_file_lines(path: str) -> Iterator[str]:
+    """Linhas do arquivo sem o terminador (mesmo corte de str.splitlines)."""
+    with open(path, encoding="utf-8") as f:
+        for raw in f:
+            yield from raw.splitlines()
+
+
+def iter_stripped(lines: Iterable[str]) -> Iterator[str]:
+    """Equivalente em fluxo a "\\n".join(lines).strip(): sem brancos nas pontas."""
+    started = False
+    blanks: List[str] = []
+    last: Optional[str] = None
+    for ln in lines:
+        if not ln.strip():
+            if started:
+                blanks.append(ln)
+            continue
+        if not started:
+            started, last = True, ln.lstrip()
+            continue
+        yield last  # type: ignore[misc]
+        yield from blanks
+        blanks.clear()
+        last = ln
+    if last is not None:
+        yield last.rstrip()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Transformações (uma linha de antecipação no máximo)
+# ────────────────────────────────────────────────────────────────────────────────
+def iter_shift_headings(lines: Iterable[str], delta: int = 1) -> Iterator[str]:
+    """Rebaixa/eleva níveis de heading (até o nível 6)."""
+    for ln in lines:
+        if ln.startswith("*"):
+            i = len(ln) - len(ln.lstrip("*"))
+            if i + delta < 7 and i < len(ln) and ln[i] == " ":
+                ln = ("*" * (i + delta)) + ln[i:]
+        yield ln
+
+
+def iter_rewrite_image_links(lines: Iterable[str], imgs_rel_prefix: str = "../imgs/") -> Iterator[str]:
+    """Aponta [[file:...]] locais para <imgs_rel_prefix><nome do arquivo>."""
+    def repl(m: "re.Match[str]") -> str:
+        path = m.group(1).strip()
+        if path.startswith(("http://", "https://", "/")):
+            return m.group(0)
+        return f"[[file:{imgs_rel_prefix}{os.path.basename(path)}]]"
+
+    for ln in lines:
+        yield _IMG_LINK_RE.sub(repl, ln) if "[[file:" in ln else ln
+
+
+def _iter_split_table_captions(lines: Iterable[str]) -> Iterator[str]:
+    """"[Tabela …]" seguido de tabela (na mesma linha ou após brancos) fica colado à tabela, em linha própria."""
+    held: Optional[str] = None
+    blanks: List[str] = []
+    for raw in lines:
+        parts = _TABELA_INLINE_RE.sub(r"\1\n\2", raw).split("\n") if "[" in raw else [raw]
+        for ln in parts:
+            if held is not None:
+                if not ln.strip():
+                    blanks.append(ln)
+                    continue
+                if ln.lstrip().startswith("|"):
+                    yield _TABELA_TAIL_RE.match(held).group(1)  # type: ignore[union-attr]
+                    ln = ln.lstrip()
+                else:
+                    yield held
+                    yield from blanks
+                held = None
+                blanks.clear()
+            if "[" in ln and _TABELA_TAIL_RE.match(ln):
+                held = ln
+                continue
+            yield ln
+    if held is not None:
+        yield held
+        yield from blanks
+
+
+def iter_blank_around_tables(lines: Iterable[str]) -> Iterator[str]:
+    """Linhas em branco antes/depois de cada tabela Org (o Pandoc se confunde sem elas)."""
+    prev: Optional[str] = None
+    in_tbl = False
+    for ln in _iter_split_table_captions(lines):
+        is_tbl = ln.lstrip().startswith("|")
+        if is_tbl and not in_tbl and prev is not None and prev.strip() != "":
+            yield ""
+        elif not is_tbl and in_tbl and ln.strip() != "":
+            yield ""
+        in_tbl = is_tbl
+        prev = ln
+        yield ln
+
+
+def normalize_table_line(ln: str) -> Optional[str]:
+    """Uma linha de tabela com pipes/espaços/bordas normalizados (None = linha descartada)."""
+    raw = ln.strip()
+    if raw == "|" or raw == "":
+        return None
+    raw = _PIPE_RE.sub(" | ", raw).strip()
+    if not raw.startswith("|"):
+        raw = "| " + raw
+    if not raw.endswith("|"):
+        raw = raw + " |"
+    return raw
+
+
+def iter_normalize_tables(lines: Iterable[str]) -> Iterator[str]:
+    in_tbl = False
+    for ln in lines:
+        if ln.lstrip().startswith("|"):
+            in_tbl = True
+            fixed = normalize_table_line(ln)
+            if fixed:
+                yield fixed
+            continue
+        if in_tbl and ln.strip() != "":
+            yield ""
+        in_tbl = False
+        yield ln
+
+
+def iter_wrap_ascii(lines: Iterable[str]) -> Iterator[str]:
+    """Trechos com pseudografismo/ANSI vão para #+begin_example (sem os códigos ANSI)."""
+    in_block = False
+    for ln in lines:
+        if ln.strip() and (ANSI_RE.search(ln) or BOX_DRAW_RE.search(ln)):
+            if not in_block:
+                yield "#+begin_example"
+                in_block = True
+            yield ANSI_RE.sub("", ln)
+            continue
+        if in_block:
+            yield "#+end_example"
+            in_block = False
+        yield ln
+    if in_block:
+        yield "#+end_example"
+
+
+def _iter_drop_last_empty(lines: Iterable[str]) -> Iterator[str]:
+    """Descarta uma linha final vazia, como o join + splitlines entre as passadas em texto."""
+    held = False
+    for ln in lines:
+        if held:
+            yield ""
+        held = ln == ""
+        if not held:
+            yield ln
+
+
+def iter_protect_for_pandoc(lines: Iterable[str]) -> Iterator[str]:
+    """Brancos ao redor de tabelas → tabelas normalizadas → blocos ASCII, numa passada só."""
+    # uma tabela que termina só em "|" descartados deixaria o branco anterior sobrando no fim
+    return iter_wrap_ascii(_iter_drop_last_empty(
+        iter_normalize_tables(_iter_drop_last_empty(iter_blank_around_tables(lines)))))
+
+
+def iter_tables_in_quote(lines: Iterable[str]) -> Iterator[str]:
+    """Tabelas dentro de quotes viram #+begin_example (não quebram o render)."""
+    prev: Optional[str] = None
+    in_tbl = False
+    for ln in lines:
+        # mesma regra de re.sub(r'(\S)\n\|', r'\1\n\n|'): linha anterior terminada em não-branco
+        # (um "|" sozinho já consumido por essa regra não conta de novo)
+        split = ln.startswith("|") and bool(prev) and not prev[-1].isspace()  # type: ignore[index]
+        if split:
+            if in_tbl:
+                yield "#+end_example"
+                in_tbl = False
+            yield ""
+        prev = None if (split and len(ln) == 1) else ln
+        if ln.lstrip().startswith("|"):
+            if not in_tbl:
+                yield "#+begin_example"
+                in_tbl = True
+            yield ln
+            continue
+        if in_tbl:
+            yield "#+end_example"
+            in_tbl = False
+        yield ln
+    if in_tbl:
+        yield "#+end_example"
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Escrita
+# ────────────────────────────────────────────────────────────────────────────────
+class OrgWriter:
+    """
+    Grava um .org à medida que os blocos chegam (arquivo temporário + os.replace no close).
+    strip=True reproduz "\\n".join(lines).strip() + "\\n"; strip=False, "\\n".join(lines).
+    """
+
+    def __init__(self, path: str, strip: bool = True):
+        self.path = path
+        self.strip = bool(strip)
+        self.items = 0        # blocos recebidos (o antigo len(lines))
+        self.n_lines = 0      # linhas gravadas
+        self._tmp = f"{path}.{os.getpid()}.tmp"
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        self._f = open(self._tmp, "w", encoding="utf-8")
+        self._started = False
+        self._blanks: List[str] = []
+        self._last: Optional[str] = None
+
+    # ── API de lista ──────────────────────────────────────────────────────────
+    def append(self, text: str) -> None:
+        self.items += 1
+        self.write_lines(str(text).split("\n"))
+
+    def extend(self, texts: Iterable[str]) -> None:
+        for t in texts:
+            self.append(t)
+
+    def __iadd__(self, texts: Iterable[str]) -> "OrgWriter":
+        self.extend(texts)
+        return self
+
+    # ── fluxo ─────────────────────────────────────────────────────────────────
+    def write_lines(self, lines: Iterable[str]) -> None:
+        if not self.strip:
+            for ln in lines:
+                self._write(ln)
+            return
+        for ln in lines:
+            if not ln.strip():
+                if self._started:
+                    self._blanks.append(ln)
+                continue
+            if not self._started:
+                self._started, self._last = True, ln.lstrip()
+                continue
+            self._write(self._last)  # type: ignore[arg-type]
+            for b in self._blanks:
+                self._write(b)
+            self._blanks.clear()
+            self._last = ln
+
+    def include(self, path: str, protect: bool = False, shift: int = 0,
+                imgs_prefix: Optional[str] = None) -> bool:
+        """
+        Anexa o conteúdo (sem brancos nas pontas) de outro .org, aplicando em fluxo
+        links de imagem → proteção p/ Pandoc → rebaixamento de headings.
+        Retorna False se o arquivo não existe ou está vazio.
+
+        O include é atômico: se a leitura/transformação falhar no meio, o que já foi
+        gravado dele é desfeito (truncate até o ponto anterior) e a exceção sobe.
+        """
+        if not path or not os.path.exists(path):
+            return False
+        stripped = iter_stripped(iter_file_lines(path))
+        first = next(stripped, None)
+        if first is None:
+            return False
+        lines: Iterable[str] = _chain_first(first, stripped)
+        if imgs_prefix is not None:
+            lines = iter_rewrite_image_links(lines, imgs_prefix)
+        if protect:
+            lines = iter_protect_for_pandoc(lines)
+        if shift:
+            lines = iter_shift_headings(_iter_drop_last_empty(lines), shift)
+        mark = self._checkpoint()
+        try:
+            it = iter(lines)
+            # tudo descartado (ex.: só "|") ainda conta como um bloco vazio, como lines.append("")
+            self.write_lines(_chain_first(next(it, ""), it))
+        except BaseException:
+            self._rollback(mark)
+            raise
+        self.items += 1
+        return True
+
+    def _checkpoint(self) -> tuple:
+        return (self._f.tell(), self.n_lines, self._started, list(self._blanks), self._last)
+
+    def _rollback(self, mark: tuple) -> None:
+        pos, self.n_lines, self._started, blanks, self._last = mark
+        self._blanks[:] = blanks
+        self._f.seek(pos)
+        self._f.truncate()
+
+    def _write(self, ln: str) -> None:
+        if self.n_lines:
+            self._f.write("\n")
+        self._f.write(ln)
+        self.n_lines += 1
+
+    def close(self) -> str:
+        if self._f.closed:
+            return self.path
+        if self.strip:
+            if self._last is not None:
+                self._write(self._last.rstrip())
+            self._f.write("\n")
+        self._f.close()
+        os.replace(self._tmp, self.path)
+        return self.path
+
+    def abort(self) -> None:
+        if not self._f.closed:
+            self._f.close()
+        try:
+            os.remove(self._tmp)
+        except OSError:
+            pass
+
+    def __enter__(self) -> "OrgWriter":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.close()
+        else:
+            self.abort()
+
+
+def _chain_first(first: str, rest: Iterable[str]) -> Iterator[str]:
+    yield first
+    yield from rest
+
+
+def rewrite_org_file(src: str, dst: str, imgs_rel_prefix: str = "../imgs/") -> None:
+    """Copia um .org normalizando os links de imagem, linha a linha."""
+    tmp = f"{dst}.{os.getpid()}.tmp"
+    with open(src, encoding="utf-8") as f, open(tmp, "w", encoding="utf-8") as g:
+        for ln in iter_rewrite_image_links(f, imgs_rel_prefix):
+            g.write(ln)
+    os.replace(tmp, dst)
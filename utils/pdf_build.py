@@ -0,0 +1,227 @@
+# -*- coding: utf-8 -*-
+"""
+Etapa de build de PDFs (.org → PDF) incremental e em paralelo.
+
+Cada .org recebe uma impressão digital: sha256 do próprio .org, dos arquivos que
+ele referencia ([[file:...]], #+INCLUDE/#+SETUPFILE, \\includegraphics) e das
+opções do build (engine, fonte...). Se a impressão digital é a mesma do último
+build bem-sucedido (manifesto <pdf_dir>/_pdf_build.json) e o PDF ainda existe,
+o build é pulado. Os que mudaram rodam em paralelo, cada um com um diretório
+temporário próprio para os arquivos intermediários do LaTeX.
+
+Uso:
+    from utils.pdf_build import PdfBuildStage
+
+    stage = PdfBuildStage(workers=0)                   # 0 = automático
+    stage.add(org, pdf, build, engine="pandoc")         # build(org, pdf, workdir) -> caminho|None
+    pdfs = stage.run()                                  # {org: pdf|None}
+    if org in stage.rebuilt: ...                        # o que foi (re)gerado neste run
+
+Capa e concatenação dos PDFs ficam com o chamador, uma vez, depois de run().
+"""
+
+from __future__ import annotations
+
+import os
+import re
+import json
+import shutil
+import hashlib
+import tempfile
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+MANIFEST_NAME = "_pdf_build.json"
+
+# xelatex é pesado em memória: o automático não passa disso
+PDF_WORKERS_MAX_AUTO = 4
+
+_LINK_RE = re.compile(r"\[\[(?:file:)?([^\]\[]+?)\](?:\[[^\]]*\])?\]")
+_INCLUDE_RE = re.compile(r'^\s*#\+(?:INCLUDE|SETUPFILE):\s*"?([^"\s]+)"?', re.M | re.I)
+_GRAPHICS_RE = re.compile(r"\\includegraphics(?:\[[^\]]*\])?\{([^}]+)\}")
+
+_DIGEST_LOCK = threading.Lock()
+_DIGEST_MEMO: Dict[Tuple[str, int, int], str] = {}
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Impressão digital
+# ────────────────────────────────────────────────────────────────────────────────
+def _file_digest(path: str) -> str:
+    """sha256 do conteúdo (memorizado por caminho/tamanho/mtime: imagens repetem entre .org)."""
+    st = os.stat(path)
+    memo_key = (os.path.abspath(path), st.st_size, st.st_mtime_ns)
+    with _DIGEST_LOCK:
+        hit = _DIGEST_MEMO.get(memo_key)
+    if hit:
+        return hit
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    digest = h.hexdigest()
+    with _DIGEST_LOCK:
+        _DIGEST_MEMO[memo_key] = digest
+    return digest
+
+
+def referenced_files(org_path: str, text: Optional[str] = None) -> List[str]:
+    """Arquivos locais referenciados pelo .org (resolvidos a partir da pasta do .org)."""
+    if text is None:
+        with open(org_path, encoding="utf-8") as f:
+            text = f.read()
+    base = os.path.dirname(os.path.abspath(org_path))
+    refs: List[str] = []
+    for rx in (_LINK_RE, _INCLUDE_RE, _GRAPHICS_RE):
+        for m in rx.finditer(text):
+            target = m.group(1).strip()
+            if re.match(r"^[a-z][a-z0-9+.-]*://", target, re.I) or target.startswith(("mailto:", "#", "*")):
+                continue
+            target = target.split("::", 1)[0]
+            path = os.path.normpath(os.path.join(base, os.path.expanduser(target)))
+            if os.path.isfile(path):
+                refs.append(path)
+    return sorted(set(refs))
+
+
+def org_fingerprint(org_path: str, **opts: Any) -> str:
+    """Hash do .org + arquivos referenciados + opções do build."""
+    with open(org_path, encoding="utf-8") as f:
+        text = f.read()
+    h = hashlib.sha256()
+    h.update(text.encode("utf-8"))
+    for path in referenced_files(org_path, text):
+        h.update(b"\0" + path.encode("utf-8") + b"\0" + _file_digest(path).encode("ascii"))
+    h.update(json.dumps(opts, sort_keys=True, default=str).encode("utf-8"))
+    return h.hexdigest()
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Manifesto (um por pasta de PDFs)
+# ────────────────────────────────────────────────────────────────────────────────
+def _manifest_path(pdf_path: str) -> str:
+    return os.path.join(os.path.dirname(os.path.abspath(pdf_path)), MANIFEST_NAME)
+
+
+def _load_manifest(path: str) -> Dict[str, Any]:
+    try:
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return data if isinstance(data, dict) else {}
+    except Exception:
+        return {}
+
+
+def _save_manifest(path: str, data: Dict[str, Any]) -> None:
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False, indent=1, sort_keys=True)
+    os.replace(tmp, path)
+
+
+# ────────────────────────────────────────────────────────────────────────────────
+# Etapa
+# ────────────────────────────────────────────────────────────────────────────────
+def resolve_workers(n: Optional[int]) -> int:
+    """0/None → núcleos disponíveis (até PDF_WORKERS_MAX_AUTO)."""
+    if n is not None and int(n) > 0:
+        return int(n)
+    try:
+        cpus = len(os.sched_getaffinity(0))
+    except Exception:
+        cpus = os.cpu_count() or 1
+    return max(1, min(cpus, PDF_WORKERS_MAX_AUTO))
+
+
+@dataclass
+class PdfJob:
+    """Um .org a exportar: build(org_path, pdf_path, workdir) grava o PDF e devolve o caminho (ou None)."""
+    org_path: str
+    pdf_path: str
+    build: Callable[[str, str, str], Optional[str]]
+    opts: Dict[str, Any] = field(default_factory=dict)
+    fingerprint: Optional[str] = None
+
+
+class PdfBuildStage:
+    def __init__(self, workers: Optional[int] = 0, force: bool = False):
+        self.workers = resolve_workers(workers)
+        self.force = bool(force)
+        self.jobs: List[PdfJob] = []
+        self.rebuilt: Set[str] = set()
+        self.skipped: Set[str] = set()
+
+    def add(self, org_path: str, pdf_path: str, build: Callable[[str, str, str], Optional[str]],
+            **opts: Any) -> None:
+        if any(j.org_path == org_path for j in self.jobs):
+            return
+        self.jobs.append(PdfJob(org_path, pdf_path, build, opts))
+
+    @staticmethod
+    def _build_one(job: PdfJob) -> Optional[str]:
+        workdir = tempfile.mkdtemp(prefix="pdfbuild_")
+        try:
+            out = job.build(job.org_path, job.pdf_path, workdir)
+        except Exception as e:
+            print(f"❌ Falha ao gerar PDF de {job.org_path}: {e}")
+            out = None
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        return out if out and os.path.exists(out) else None
+
+    def run(self) -> Dict[str, Optional[str]]:
+        """Gera os PDFs que mudaram (em paralelo) e devolve {org: pdf|None} para todos os jobs."""
+        results: Dict[str, Optional[str]] = {}
+        manifests: Dict[str, Dict[str, Any]] = {}
+        todo: List[PdfJob] = []
+        for job in self.jobs:
+            if not os.path.exists(job.org_path):
+                print(f"[AVISO] .org não encontrado para o PDF: {job.org_path}")
+                results[job.org_path] = None
+                continue
+            job.fingerprint = org_fingerprint(job.org_path, **job.opts)
+            mpath = _manifest_path(job.pdf_path)
+            man = manifests.setdefault(mpath, _load_manifest(mpath))
+            prev = man.get(os.path.basename(job.pdf_path)) or {}
+            if not self.force and prev.get("fingerprint") == job.fingerprint and os.path.exists(job.pdf_path):
+                print(f"[PDF] inalterado, reaproveitado: {job.pdf_path}")
+                results[job.org_path] = job.pdf_path
+                self.skipped.add(job.org_path)
+                continue
+            todo.append(job)
+
+        if todo:
+            n = min(self.workers, len(todo))
+            print(f"[PDF] {len(todo)} PDF(s) a gerar ({n} worker(s)); {len(self.skipped)} reaproveitado(s).")
+            if n <= 1:
+                outs = [self._build_one(j) for j in todo]
+            else:
+                with ThreadPoolExecutor(max_workers=n, thread_name_prefix="pdf") as ex:
+                    outs = list(ex.map(self._build_one, todo))
+            for job, out in zip(todo, outs):
+                results[job.org_path] = out
+                if not out:
+                    continue
+                self.rebuilt.add(job.org_path)
+                mpath = _manifest_path(out)
+                man = manifests.setdefault(mpath, _load_manifest(mpath))
+                man[os.path.basename(out)] = {
+                    "fingerprint": job.fingerprint,
+                    "org": os.path.abspath(job.org_path),
+                    "built": datetime.now().isoformat(timespec="seconds"),
+                }
+            for mpath, man in manifests.items():
+                _save_manifest(mpath, man)
+        return results
+
+
+def is_newer(path: str, *sources: str) -> bool:
+    """True se path existe e é mais novo que todas as fontes existentes (p.ex. PDF com capa)."""
+    if not os.path.exists(path):
+        return False
+    t = os.path.getmtime(path)
+    return all(t >= os.path.getmtime(s) for s in sources if s and os.path.exists(s))